@@ -1,5 +1,6 @@
 """FastAPI main application."""
 
+import asyncio
 import logging
 import os
 from contextlib import asynccontextmanager
@@ -27,6 +28,8 @@ from api.routes import (
     threads,
 )
 from core.checkpointing import initialize_checkpointer, cleanup_checkpointer
+from core.agents.resolver import listen_for_agent_changes
+from core.database import close_async_pool, get_aconn, open_async_pool
 from core.scheduler import get_scheduler_service
 
 logger = logging.getLogger(__name__)
@@ -49,6 +52,11 @@ async def lifespan(app: FastAPI):
     _configure_langsmith()
 
     logger.info("Starting up application...")
+    try:
+        await open_async_pool()
+    except Exception as e:
+        logger.warning("Async database pool initialization failed: %s", e)
+
     try:
         await initialize_checkpointer()
     except Exception as e:
@@ -62,8 +70,20 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.warning("Scheduler initialization failed: %s", e)
 
+    # Cross-replica invalidation of cached agents (Postgres LISTEN/NOTIFY)
+    agent_listener = None
+    if os.getenv("AGENT_CACHE_LISTEN", "true").strip().lower() in {"1", "true", "yes"}:
+        agent_listener = asyncio.create_task(listen_for_agent_changes())
+
     yield
 
+    if agent_listener is not None:
+        agent_listener.cancel()
+        try:
+            await agent_listener
+        except asyncio.CancelledError:
+            pass
+
     logger.info("Shutting down application...")
     try:
         scheduler = get_scheduler_service()
@@ -85,6 +105,18 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.warning("Notification service cleanup failed: %s", e)
 
+    try:
+        from core.cache import aclose as close_cache
+
+        await close_cache()
+    except Exception as e:
+        logger.warning("Cache client cleanup failed: %s", e)
+
+    try:
+        await close_async_pool()
+    except Exception as e:
+        logger.warning("Async database pool cleanup failed: %s", e)
+
 
 app = FastAPI(
     title="DeepCode VSA API",
@@ -160,10 +192,8 @@ async def health():
     }
 
     try:
-        from core.database import get_conn
-
-        with get_conn() as conn:
-            conn.execute("SELECT 1")
+        async with get_aconn() as conn:
+            await conn.execute("SELECT 1")
         checks["checks"]["database"] = True
     except Exception:
         checks["checks"]["database"] = False
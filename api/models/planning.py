@@ -110,6 +110,10 @@ class DocumentResponse(BaseModel):
     file_size: Optional[int] = None
     content_preview: Optional[str] = Field(None, description="First 500 chars of content")
     uploaded_at: datetime
+    ingest_status: Optional[str] = Field(
+        None, description="queued, staged, chunked, embedded, indexed or failed"
+    )
+    chunk_count: Optional[int] = None
 
 
 class DocumentListResponse(BaseModel):
@@ -119,6 +123,26 @@ class DocumentListResponse(BaseModel):
     total: int
 
 
+class DocumentIngestStatus(BaseModel):
+    """RAG ingestion progress for one document."""
+
+    document_id: UUID
+    file_name: str
+    ingest_status: Optional[str] = None
+    chunk_count: Optional[int] = None
+    ingest_error: Optional[str] = None
+    ingest_task_id: Optional[str] = None
+    ingest_updated_at: Optional[datetime] = None
+
+
+class DocumentIngestStatusResponse(BaseModel):
+    """RAG ingestion progress for a project's documents."""
+
+    documents: List[DocumentIngestStatus]
+    total: int
+    pending: int = Field(..., description="Documents not yet indexed or failed")
+
+
 # =============================================================================
 # Projects
 # =============================================================================
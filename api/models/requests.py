@@ -1,7 +1,7 @@
 """Request models for API."""
 
 import re
-from typing import Optional, List
+from typing import Literal, Optional, List
 from pydantic import BaseModel, Field, field_validator
 
 
@@ -51,6 +51,33 @@ class RAGSearchRequest(BaseModel):
     chunking: Optional[str] = None
     use_hyde: bool = False
     match_threshold: Optional[float] = None
+    # HNSW recall/latency knobs (pgvector); None keeps the server default
+    ef_search: Optional[int] = Field(default=None, ge=1, le=1000)
+    iterative_scan: Optional[Literal["off", "strict_order", "relaxed_order"]] = None
+
+
+class RAGBatchSearchRequest(BaseModel):
+    """RAG batch search: several queries sharing filters and options."""
+
+    queries: List[str] = Field(..., min_length=1, max_length=500)
+    k: int = Field(default=5, ge=1, le=100)
+    search_type: str = "hybrid"
+    reranker: str = "none"
+    empresa: Optional[str] = None
+    client_id: Optional[str] = None
+    chunking: Optional[str] = None
+    project_id: Optional[str] = None
+    use_hyde: bool = False
+    match_threshold: Optional[float] = None
+    ef_search: Optional[int] = Field(default=None, ge=1, le=1000)
+    iterative_scan: Optional[Literal["off", "strict_order", "relaxed_order"]] = None
+
+    @field_validator("queries")
+    @classmethod
+    def validate_queries(cls, v: List[str]) -> List[str]:
+        if any(len(q) > 4000 for q in v):
+            raise ValueError("each query must have at most 4000 characters")
+        return v
 
 
 _SAFE_DIR_PATTERN = re.compile(r"^[a-zA-Z0-9_\-./]+$")
@@ -18,6 +18,13 @@ class RAGSearchResponse(BaseModel):
     total: int
 
 
+class RAGBatchSearchResponse(BaseModel):
+    """RAG batch search response: results[i] answers queries[i]."""
+    results: List[List[Dict[str, Any]]]
+    queries: List[str]
+    total: int
+
+
 class RAGIngestResponse(BaseModel):
     """RAG ingestion response model."""
     staged: int
@@ -23,7 +23,9 @@ from api.models.agents_admin import (
 )
 from api.models.auth import User
 from api.routes.auth import get_current_user, require_role
-from core.database import get_conn
+from core.agents.cache import agent_cache
+from core.agents.resolver import invalidate_resolved
+from core.database import get_aconn
 
 logger = logging.getLogger(__name__)
 
@@ -44,12 +46,12 @@ async def list_connectors(
     current_user: Annotated[User, Depends(get_current_user)],
 ):
     """List all available connectors."""
-    with get_conn() as conn:
-        with conn.cursor(row_factory=dict_row) as cur:
-            cur.execute(
+    async with get_aconn() as conn:
+        async with conn.cursor(row_factory=dict_row) as cur:
+            await cur.execute(
                 "SELECT * FROM connectors WHERE is_active = true ORDER BY category, name"
             )
-            return [ConnectorOut(**row) for row in cur.fetchall()]
+            return [ConnectorOut(**row) for row in await cur.fetchall()]
 
 
 # ============================================================
@@ -61,12 +63,12 @@ async def list_skills(
     current_user: Annotated[User, Depends(get_current_user)],
 ):
     """List all available skills."""
-    with get_conn() as conn:
-        with conn.cursor(row_factory=dict_row) as cur:
-            cur.execute(
+    async with get_aconn() as conn:
+        async with conn.cursor(row_factory=dict_row) as cur:
+            await cur.execute(
                 "SELECT * FROM skills WHERE is_active = true ORDER BY category, name"
             )
-            return [SkillOut(**row) for row in cur.fetchall()]
+            return [SkillOut(**row) for row in await cur.fetchall()]
 
 
 # ============================================================
@@ -79,13 +81,13 @@ async def list_domains(
 ):
     """List knowledge domains for the user's organization."""
     org_id = _get_org_id(current_user)
-    with get_conn() as conn:
-        with conn.cursor(row_factory=dict_row) as cur:
-            cur.execute(
+    async with get_aconn() as conn:
+        async with conn.cursor(row_factory=dict_row) as cur:
+            await cur.execute(
                 "SELECT * FROM knowledge_domains WHERE org_id = %s AND is_active = true ORDER BY name",
                 (org_id,),
             )
-            return [KnowledgeDomainOut(**row) for row in cur.fetchall()]
+            return [KnowledgeDomainOut(**row) for row in await cur.fetchall()]
 
 
 @router.post("/domains", response_model=KnowledgeDomainOut, status_code=status.HTTP_201_CREATED)
@@ -95,15 +97,15 @@ async def create_domain(
 ):
     """Create a new knowledge domain."""
     org_id = _get_org_id(current_user)
-    with get_conn() as conn:
-        with conn.cursor(row_factory=dict_row) as cur:
-            cur.execute(
+    async with get_aconn() as conn:
+        async with conn.cursor(row_factory=dict_row) as cur:
+            await cur.execute(
                 """INSERT INTO knowledge_domains (org_id, name, slug, description, color)
                    VALUES (%s, %s, %s, %s, %s) RETURNING *""",
                 (org_id, body.name, body.slug, body.description, body.color),
             )
-            row = cur.fetchone()
-            conn.commit()
+            row = await cur.fetchone()
+            await conn.commit()
             return KnowledgeDomainOut(**row)
 
 
@@ -122,17 +124,19 @@ async def update_domain(
     set_clauses = ", ".join(f"{k} = %s" for k in updates)
     values = list(updates.values()) + [str(domain_id), org_id]
 
-    with get_conn() as conn:
-        with conn.cursor(row_factory=dict_row) as cur:
-            cur.execute(
+    async with get_aconn() as conn:
+        async with conn.cursor(row_factory=dict_row) as cur:
+            await cur.execute(
                 f"""UPDATE knowledge_domains SET {set_clauses}, updated_at = now()
                     WHERE id = %s AND org_id = %s RETURNING *""",
                 values,
             )
-            row = cur.fetchone()
-            conn.commit()
+            row = await cur.fetchone()
+            await conn.commit()
             if not row:
                 raise HTTPException(status_code=404, detail="Domain not found")
+            # Domain access is part of every ResolvedAgent
+            invalidate_resolved()
             return KnowledgeDomainOut(**row)
 
 
@@ -143,49 +147,50 @@ async def delete_domain(
 ):
     """Soft-delete a knowledge domain."""
     org_id = _get_org_id(current_user)
-    with get_conn() as conn:
-        with conn.cursor() as cur:
-            cur.execute(
+    async with get_aconn() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(
                 "UPDATE knowledge_domains SET is_active = false WHERE id = %s AND org_id = %s",
                 (str(domain_id), org_id),
             )
-            conn.commit()
+            await conn.commit()
             if cur.rowcount == 0:
                 raise HTTPException(status_code=404, detail="Domain not found")
+            invalidate_resolved()
 
 
 # ============================================================
 # Agents
 # ============================================================
 
-def _fetch_agent_relations(cur, agent_id: str) -> tuple[list, list, list]:
+async def _fetch_agent_relations(cur, agent_id: str) -> tuple[list, list, list]:
     """Fetch connectors, skills, domains for an agent."""
-    cur.execute(
+    await cur.execute(
         """SELECT c.slug, c.name, c.icon, ac.enabled, ac.config
            FROM agent_connectors ac
            JOIN connectors c ON c.id = ac.connector_id
            WHERE ac.agent_id = %s ORDER BY c.name""",
         (agent_id,),
     )
-    connectors = [AgentConnectorOut(**r) for r in cur.fetchall()]
+    connectors = [AgentConnectorOut(**r) for r in await cur.fetchall()]
 
-    cur.execute(
+    await cur.execute(
         """SELECT s.slug, s.name, s.icon, asks.enabled
            FROM agent_skills asks
            JOIN skills s ON s.id = asks.skill_id
            WHERE asks.agent_id = %s ORDER BY s.name""",
         (agent_id,),
     )
-    skills = [AgentSkillOut(**r) for r in cur.fetchall()]
+    skills = [AgentSkillOut(**r) for r in await cur.fetchall()]
 
-    cur.execute(
+    await cur.execute(
         """SELECT d.id, d.name, d.slug, d.color, ad.access_level
            FROM agent_domains ad
            JOIN knowledge_domains d ON d.id = ad.domain_id
            WHERE ad.agent_id = %s ORDER BY d.name""",
         (agent_id,),
     )
-    domains = [AgentDomainOut(**r) for r in cur.fetchall()]
+    domains = [AgentDomainOut(**r) for r in await cur.fetchall()]
 
     return connectors, skills, domains
 
@@ -196,9 +201,9 @@ async def list_agents(
 ):
     """List agents for the user's organization."""
     org_id = _get_org_id(current_user)
-    with get_conn() as conn:
-        with conn.cursor(row_factory=dict_row) as cur:
-            cur.execute(
+    async with get_aconn() as conn:
+        async with conn.cursor(row_factory=dict_row) as cur:
+            await cur.execute(
                 """SELECT a.*,
                           (SELECT count(*) FROM agent_connectors WHERE agent_id = a.id) as connector_count,
                           (SELECT count(*) FROM agent_skills WHERE agent_id = a.id) as skill_count,
@@ -208,7 +213,7 @@ async def list_agents(
                    ORDER BY a.is_default DESC, a.name""",
                 (org_id,),
             )
-            return [AgentListItem(**row) for row in cur.fetchall()]
+            return [AgentListItem(**row) for row in await cur.fetchall()]
 
 
 @router.post("/agents", response_model=AgentOut, status_code=status.HTTP_201_CREATED)
@@ -218,22 +223,22 @@ async def create_agent(
 ):
     """Create a new agent with connectors, skills, and domains."""
     org_id = _get_org_id(current_user)
-    with get_conn() as conn:
-        with conn.cursor(row_factory=dict_row) as cur:
+    async with get_aconn() as conn:
+        async with conn.cursor(row_factory=dict_row) as cur:
             # Create agent
-            cur.execute(
+            await cur.execute(
                 """INSERT INTO agents (org_id, slug, name, description, avatar, system_prompt, agent_type, model_override)
                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s) RETURNING *""",
                 (org_id, body.slug, body.name, body.description, body.avatar,
                  body.system_prompt, body.agent_type, body.model_override),
             )
-            agent_row = cur.fetchone()
+            agent_row = await cur.fetchone()
             agent_id = str(agent_row["id"])
 
             # Link connectors
             if body.connector_slugs:
                 for slug in body.connector_slugs:
-                    cur.execute(
+                    await cur.execute(
                         """INSERT INTO agent_connectors (agent_id, connector_id)
                            SELECT %s, id FROM connectors WHERE slug = %s
                            ON CONFLICT DO NOTHING""",
@@ -243,7 +248,7 @@ async def create_agent(
             # Link skills
             if body.skill_slugs:
                 for slug in body.skill_slugs:
-                    cur.execute(
+                    await cur.execute(
                         """INSERT INTO agent_skills (agent_id, skill_id)
                            SELECT %s, id FROM skills WHERE slug = %s
                            ON CONFLICT DO NOTHING""",
@@ -253,15 +258,15 @@ async def create_agent(
             # Link domains
             if body.domain_ids:
                 for did in body.domain_ids:
-                    cur.execute(
+                    await cur.execute(
                         """INSERT INTO agent_domains (agent_id, domain_id)
                            VALUES (%s, %s) ON CONFLICT DO NOTHING""",
                         (agent_id, str(did)),
                     )
 
-            conn.commit()
+            await conn.commit()
 
-            connectors, skills, domains = _fetch_agent_relations(cur, agent_id)
+            connectors, skills, domains = await _fetch_agent_relations(cur, agent_id)
             return AgentOut(**agent_row, connectors=connectors, skills=skills, domains=domains)
 
 
@@ -272,17 +277,17 @@ async def get_agent(
 ):
     """Get agent detail with connectors, skills, and domains."""
     org_id = _get_org_id(current_user)
-    with get_conn() as conn:
-        with conn.cursor(row_factory=dict_row) as cur:
-            cur.execute(
+    async with get_aconn() as conn:
+        async with conn.cursor(row_factory=dict_row) as cur:
+            await cur.execute(
                 "SELECT * FROM agents WHERE id = %s AND org_id = %s AND is_active = true",
                 (str(agent_id), org_id),
             )
-            agent_row = cur.fetchone()
+            agent_row = await cur.fetchone()
             if not agent_row:
                 raise HTTPException(status_code=404, detail="Agent not found")
 
-            connectors, skills, domains = _fetch_agent_relations(cur, str(agent_id))
+            connectors, skills, domains = await _fetch_agent_relations(cur, str(agent_id))
             return AgentOut(**agent_row, connectors=connectors, skills=skills, domains=domains)
 
 
@@ -296,8 +301,8 @@ async def update_agent(
     org_id = _get_org_id(current_user)
     aid = str(agent_id)
 
-    with get_conn() as conn:
-        with conn.cursor(row_factory=dict_row) as cur:
+    async with get_aconn() as conn:
+        async with conn.cursor(row_factory=dict_row) as cur:
             # Update scalar fields
             scalar_fields = body.model_dump(
                 exclude_unset=True,
@@ -306,35 +311,35 @@ async def update_agent(
             if scalar_fields:
                 set_clauses = ", ".join(f"{k} = %s" for k in scalar_fields)
                 values = list(scalar_fields.values()) + [aid, org_id]
-                cur.execute(
+                await cur.execute(
                     f"""UPDATE agents SET {set_clauses}, updated_at = now()
                         WHERE id = %s AND org_id = %s RETURNING *""",
                     values,
                 )
-                agent_row = cur.fetchone()
+                agent_row = await cur.fetchone()
                 if not agent_row:
                     raise HTTPException(status_code=404, detail="Agent not found")
 
                 # If setting is_default=True, unset others
                 if scalar_fields.get("is_default"):
-                    cur.execute(
+                    await cur.execute(
                         "UPDATE agents SET is_default = false WHERE org_id = %s AND id != %s",
                         (org_id, aid),
                     )
             else:
-                cur.execute(
+                await cur.execute(
                     "SELECT * FROM agents WHERE id = %s AND org_id = %s AND is_active = true",
                     (aid, org_id),
                 )
-                agent_row = cur.fetchone()
+                agent_row = await cur.fetchone()
                 if not agent_row:
                     raise HTTPException(status_code=404, detail="Agent not found")
 
             # Replace connectors if provided
             if body.connector_slugs is not None:
-                cur.execute("DELETE FROM agent_connectors WHERE agent_id = %s", (aid,))
+                await cur.execute("DELETE FROM agent_connectors WHERE agent_id = %s", (aid,))
                 for slug in body.connector_slugs:
-                    cur.execute(
+                    await cur.execute(
                         """INSERT INTO agent_connectors (agent_id, connector_id)
                            SELECT %s, id FROM connectors WHERE slug = %s
                            ON CONFLICT DO NOTHING""",
@@ -343,9 +348,9 @@ async def update_agent(
 
             # Replace skills if provided
             if body.skill_slugs is not None:
-                cur.execute("DELETE FROM agent_skills WHERE agent_id = %s", (aid,))
+                await cur.execute("DELETE FROM agent_skills WHERE agent_id = %s", (aid,))
                 for slug in body.skill_slugs:
-                    cur.execute(
+                    await cur.execute(
                         """INSERT INTO agent_skills (agent_id, skill_id)
                            SELECT %s, id FROM skills WHERE slug = %s
                            ON CONFLICT DO NOTHING""",
@@ -354,17 +359,20 @@ async def update_agent(
 
             # Replace domains if provided
             if body.domain_ids is not None:
-                cur.execute("DELETE FROM agent_domains WHERE agent_id = %s", (aid,))
+                await cur.execute("DELETE FROM agent_domains WHERE agent_id = %s", (aid,))
                 for did in body.domain_ids:
-                    cur.execute(
+                    await cur.execute(
                         """INSERT INTO agent_domains (agent_id, domain_id)
                            VALUES (%s, %s) ON CONFLICT DO NOTHING""",
                         (aid, str(did)),
                     )
 
-            conn.commit()
+            await conn.commit()
+            # Cached resolution and compiled graphs for the old configuration are stale now
+            invalidate_resolved(aid)
+            agent_cache.evict_agent(aid)
 
-            connectors, skills, domains = _fetch_agent_relations(cur, aid)
+            connectors, skills, domains = await _fetch_agent_relations(cur, aid)
             return AgentOut(**agent_row, connectors=connectors, skills=skills, domains=domains)
 
 
@@ -375,12 +383,14 @@ async def delete_agent(
 ):
     """Soft-delete an agent (set is_active=false)."""
     org_id = _get_org_id(current_user)
-    with get_conn() as conn:
-        with conn.cursor() as cur:
-            cur.execute(
+    async with get_aconn() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(
                 "UPDATE agents SET is_active = false WHERE id = %s AND org_id = %s",
                 (str(agent_id), org_id),
             )
-            conn.commit()
+            await conn.commit()
             if cur.rowcount == 0:
                 raise HTTPException(status_code=404, detail="Agent not found")
+            invalidate_resolved(agent_id)
+            agent_cache.evict_agent(str(agent_id))
@@ -5,15 +5,21 @@ import re
 import logging
 import os
 import uuid
+from typing import Callable, Iterable, Iterator
 
 from fastapi import APIRouter, HTTPException
-from langchain_core.messages import HumanMessage
+from langchain_core.messages import AIMessage, HumanMessage
 
 from api.models.requests import ChatRequest
 from api.models.responses import ChatResponse
-from core.agents.simple import SimpleAgent
-from core.agents.unified import UnifiedAgent
-from core.agents.resolver import resolve, resolve_for_legacy, ResolvedAgent
+from core.agents.cache import get_or_build_agent
+from core.agents.resolver import aresolve, resolve_for_legacy, ResolvedAgent
+from core.agents.response_cache import (
+    SEMANTIC_CACHE_ENABLED,
+    cacheable_answer,
+    response_cache,
+    response_cache_key,
+)
 from core.checkpointing import get_async_checkpointer
 from core.files.service import extract_text_from_file, generate_signed_url
 
@@ -163,6 +169,18 @@ CACHE_TTL = {
     "linear_issues": 180,  # 3 min
     "dashboard": 90,  # 1.5 min — combines sources
 }
+# Cache tags per intent: invalidating a source (e.g. after creating a GLPI ticket) drops its reports
+REPORT_CACHE_TAGS: dict[str, list[str]] = {
+    "glpi_tickets": ["glpi:tickets"],
+    "glpi_new_unassigned": ["glpi:tickets"],
+    "glpi_pending_old": ["glpi:tickets"],
+    "zabbix_alerts": ["zabbix:problems"],
+    "linear_issues": ["linear"],
+    "dashboard": ["glpi:tickets", "zabbix:problems"],
+    "dashboard_analysis": ["glpi:tickets", "zabbix:problems"],
+}
+# Extra window in which an expired report is still served while it is rebuilt
+REPORT_STALE_SECONDS = int(os.getenv("REPORT_CACHE_STALE_SECONDS", "60"))
 
 # Mapping from intent to artifact metadata for SSE artifact events
 INTENT_ARTIFACT_META: dict[str, dict[str, str]] = {
@@ -176,32 +194,100 @@ INTENT_ARTIFACT_META: dict[str, dict[str, str]] = {
 }
 
 
-async def _generate_report_by_intent(intent: str) -> tuple[str, bool]:
+async def _generate_report_by_intent(
+    intent: str, on_piece: Callable[[str], None] | None = None
+) -> tuple[str, bool]:
     """Gera relatório via código (sem LLM) baseado no intent detectado.
 
+    Cache Redis assíncrono por intent: requisições simultâneas compartilham uma
+    única geração e, na janela stale, o relatório anterior é servido enquanto
+    um refresh roda em background.
+
+    on_piece recebe as partes do markdown à medida que o relatório é montado,
+    quando esta chamada é a que monta (cache miss); em hits não é chamado.
+
     Returns:
         (markdown_report, success)
     """
-    from core.cache import get_cached, set_cached
+    from core.cache import get_or_set
+
+    return await get_or_set(
+        f"report:{intent}",
+        lambda: _build_report_by_intent(intent, on_piece),
+        CACHE_TTL.get(intent, 120),
+        stale_seconds=REPORT_STALE_SECONDS,
+        cache_if=lambda r: bool(r[1] and r[0]),
+        encode=lambda r: {"report": r[0], "success": r[1]},
+        decode=lambda cached: (cached["report"], cached["success"]),
+        tags=["reports", *REPORT_CACHE_TAGS.get(intent, [])],
+    )
+
+
+async def _dashboard_glpi_section(glpi_base_url: str | None) -> Iterator[str]:
+    from core.reports import iter_glpi_report
+
+    try:
+        from core.tools.glpi import get_client as get_glpi_client
+
+        client = get_glpi_client()
+        result = await client.get_tickets(limit=15)
+        if result.success:
+            glpi_data = result.output
+        else:
+            glpi_data = {"error": result.error}
+    except Exception as e:
+        glpi_data = {"error": str(e)}
+    return iter_glpi_report(glpi_data, glpi_base_url=glpi_base_url)
+
+
+async def _dashboard_zabbix_section(zabbix_base_url: str | None) -> Iterator[str]:
+    from core.reports import iter_zabbix_report
+
+    try:
+        from core.tools.zabbix import get_client as get_zabbix_client
+
+        client = get_zabbix_client()
+        result = await client.get_problems(limit=15, severity=3)
+        if result.success:
+            zabbix_data = {
+                "problems": result.output,
+                "count": len(result.output),
+                "min_severity": 3,
+            }
+        else:
+            zabbix_data = {"error": result.error}
+    except Exception as e:
+        zabbix_data = {"error": str(e)}
+    return iter_zabbix_report(zabbix_data, zabbix_base_url=zabbix_base_url)
+
+
+async def _build_report_by_intent(
+    intent: str, on_piece: Callable[[str], None] | None = None
+) -> tuple[str, bool]:
+    """Monta o relatório do intent (sem cache), repassando cada parte a on_piece."""
     from core.config import get_settings
     from core.reports import (
-        format_glpi_report,
-        format_zabbix_report,
-        format_linear_report,
-        format_new_unassigned_report,
-        format_pending_old_report,
+        iter_glpi_report,
+        iter_zabbix_report,
+        iter_linear_report,
+        iter_new_unassigned_report,
+        iter_pending_old_report,
     )
-    from core.reports.dashboard import format_dashboard_report
-
-    # --- Redis cache check ---
-    cache_key = f"report:{intent}"
-    cached = get_cached(cache_key)
-    if cached:
-        logger.info("⚡ [CACHE HIT] intent=%s", intent)
-        return cached["report"], cached["success"]
+    from core.reports.dashboard import DASHBOARD_HEADER, DASHBOARD_SEPARATOR
 
     report_md: str | None = None
     success = False
+    parts: list[str] = []
+
+    def stream(pieces: Iterable[str]) -> None:
+        if on_piece is not None:
+            for piece in pieces:
+                on_piece(piece)
+
+    def emit(pieces: Iterable[str]) -> None:
+        pieces = list(pieces)
+        parts.extend(pieces)
+        stream(pieces)
 
     try:
         settings = get_settings()
@@ -214,7 +300,7 @@ async def _generate_report_by_intent(intent: str) -> tuple[str, bool]:
             client = get_client()
             result = await client.get_tickets_new_unassigned(min_age_hours=24, limit=20)
             if result.success:
-                report_md = format_new_unassigned_report(result.output, glpi_base_url=glpi_base_url)
+                emit(iter_new_unassigned_report(result.output, glpi_base_url=glpi_base_url))
                 success = True
             else:
                 report_md = f"**Erro GLPI:** {result.error}"
@@ -225,7 +311,7 @@ async def _generate_report_by_intent(intent: str) -> tuple[str, bool]:
             client = get_client()
             result = await client.get_tickets_pending_old(min_age_days=7, limit=20)
             if result.success:
-                report_md = format_pending_old_report(result.output, glpi_base_url=glpi_base_url)
+                emit(iter_pending_old_report(result.output, glpi_base_url=glpi_base_url))
                 success = True
             else:
                 report_md = f"**Erro GLPI:** {result.error}"
@@ -236,7 +322,7 @@ async def _generate_report_by_intent(intent: str) -> tuple[str, bool]:
             client = get_client()
             result = await client.get_tickets(limit=15)
             if result.success:
-                report_md = format_glpi_report(result.output, glpi_base_url=glpi_base_url)
+                emit(iter_glpi_report(result.output, glpi_base_url=glpi_base_url))
                 success = True
             else:
                 report_md = f"**Erro GLPI:** {result.error}"
@@ -248,7 +334,7 @@ async def _generate_report_by_intent(intent: str) -> tuple[str, bool]:
             result = await client.get_problems(limit=15, severity=3)
             if result.success:
                 data = {"problems": result.output, "count": len(result.output), "min_severity": 3}
-                report_md = format_zabbix_report(data, zabbix_base_url=zabbix_base_url)
+                emit(iter_zabbix_report(data, zabbix_base_url=zabbix_base_url))
                 success = True
             else:
                 report_md = f"**Erro Zabbix:** {result.error}"
@@ -259,7 +345,7 @@ async def _generate_report_by_intent(intent: str) -> tuple[str, bool]:
             client = get_client()
             result = await client.get_issues(limit=15)
             if result.success:
-                report_md = format_linear_report(result.output)
+                emit(iter_linear_report(result.output))
                 success = True
             else:
                 report_md = f"**Erro Linear:** {result.error}"
@@ -270,52 +356,36 @@ async def _generate_report_by_intent(intent: str) -> tuple[str, bool]:
             download_url = "/api/v1/reports/glpi/cost-center/excel"
             start_date, end_date = get_previous_month_range()
 
-            report_md = f"""### Relatório Disponível
+            emit([f"""### Relatório Disponível
 
 O relatório **Atendimentos por Centro de Custo ({start_date} a {end_date})** pode ser baixado abaixo.
 
 [Baixar Arquivo Excel]({download_url})
-"""
+"""])
             success = True
 
         elif intent in ("dashboard", "dashboard_analysis"):
-            glpi_data = None
-            zabbix_data = None
-
+            emit([DASHBOARD_HEADER])
+            # GLPI and Zabbix are fetched concurrently; each section is streamed as
+            # soon as its own source answers, but the report keeps GLPI before
+            # Zabbix (as in iter_dashboard_report) so the cached layout is stable
+            tasks = [
+                asyncio.create_task(_dashboard_glpi_section(glpi_base_url)),
+                asyncio.create_task(_dashboard_zabbix_section(zabbix_base_url)),
+            ]
+            sections: dict[asyncio.Task, list[str]] = {}
+            pending = set(tasks)
             try:
-                from core.tools.glpi import get_client as get_glpi_client
-
-                client = get_glpi_client()
-                result = await client.get_tickets(limit=15)
-                if result.success:
-                    glpi_data = result.output
-                else:
-                    glpi_data = {"error": result.error}
-            except Exception as e:
-                glpi_data = {"error": str(e)}
-
-            try:
-                from core.tools.zabbix import get_client as get_zabbix_client
-
-                client = get_zabbix_client()
-                result = await client.get_problems(limit=15, severity=3)
-                if result.success:
-                    zabbix_data = {
-                        "problems": result.output,
-                        "count": len(result.output),
-                        "min_severity": 3,
-                    }
-                else:
-                    zabbix_data = {"error": result.error}
-            except Exception as e:
-                zabbix_data = {"error": str(e)}
-
-            report_md = format_dashboard_report(
-                glpi_data=glpi_data,
-                zabbix_data=zabbix_data,
-                glpi_base_url=glpi_base_url,
-                zabbix_base_url=zabbix_base_url,
-            )
+                while pending:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in (t for t in tasks if t in done):
+                        sections[task] = [DASHBOARD_SEPARATOR, *task.result()]
+                        stream(sections[task])
+            finally:
+                # A failed (or cancelled) section must not leave its sibling running
+                for task in pending:
+                    task.cancel()
+            parts.extend(piece for task in tasks for piece in sections[task])
             success = True
 
     except Exception as e:
@@ -323,12 +393,9 @@ O relatório **Atendimentos por Centro de Custo ({start_date} a {end_date})** po
         report_md = f"**Erro ao gerar relatório:** {e}"
         success = False
 
-    # --- Cache successful results ---
-    if success and report_md:
-        ttl = CACHE_TTL.get(intent, 120)
-        set_cached(cache_key, {"report": report_md, "success": success}, ttl)
-        logger.info("📦 [CACHE SET] intent=%s ttl=%ds", intent, ttl)
-
+    if success:
+        report_md = "".join(parts)
+    logger.info("📦 [REPORT] intent=%s generated (success=%s)", intent, success)
     return report_md, success
 
 
@@ -400,6 +467,36 @@ CONVERSA: Entendimento → Resposta → Encaminhamento se necessário.
 ### RECOMENDAÇÕES: Ação imediata, Próximos passos, Prevenção."""
 
 
+async def _build_request_context(request: ChatRequest) -> str:
+    """Per-request system prompt suffix (active project + retrieved project/Wareline context)."""
+    parts = []
+    if request.project_id:
+        parts.append(
+            f"\n\nCONTEXTO ATIVO: Você está no projeto {request.project_id}. "
+            "Use a ferramenta 'search_project_knowledge' para dúvidas sobre este projeto."
+        )
+        project_context = await asyncio.to_thread(
+            _fetch_project_context, request.message, request.project_id
+        )
+        if project_context:
+            parts.append(f"\n\nCONTEXTO RECUPERADO DO PROJETO:\n{project_context}")
+
+    if request.wareline_domain or request.enable_wareline:
+        wareline_ctx = await asyncio.to_thread(
+            _fetch_wareline_context, request.message, request.wareline_domain
+        )
+        if wareline_ctx:
+            domain_label = request.wareline_domain or "GERAL"
+            parts.append(
+                f"\n\nCATÁLOGO WARELINE ({domain_label}):\n"
+                "Use as informações abaixo sobre tabelas e colunas do sistema hospitalar "
+                "Wareline/MV para responder a pergunta do usuário.\n\n"
+                f"{wareline_ctx}"
+            )
+            logger.info("[WARELINE] Contexto injetado (%d chars, domínio=%s)", len(wareline_ctx), domain_label)
+    return "".join(parts)
+
+
 def get_system_prompt(enable_vsa: bool, include_examples: bool = False) -> str:
     """Get appropriate system prompt based on VSA mode. include_examples=False saves ~50% input tokens.
     Prompt is kept stable (date only, no time) so OpenRouter can cache it; check usage.cached_tokens in responses.
@@ -420,7 +517,7 @@ def get_system_prompt(enable_vsa: bool, include_examples: bool = False) -> str:
     return suffix
 
 
-def _resolve_tools_and_prompt(request: ChatRequest) -> ResolvedAgent:
+async def _resolve_tools_and_prompt(request: ChatRequest) -> ResolvedAgent:
     """Resolve tools and system prompt from agent_id or legacy flags.
 
     When agent_id is provided, resolves from DB.
@@ -428,7 +525,7 @@ def _resolve_tools_and_prompt(request: ChatRequest) -> ResolvedAgent:
     """
     if request.agent_id:
         try:
-            resolved = resolve(request.agent_id)
+            resolved = await aresolve(request.agent_id)
             logger.info(
                 "🔧 [RESOLVER] agent_id=%s -> %d tools, type=%s",
                 request.agent_id, len(resolved.tools), resolved.agent_type,
@@ -451,6 +548,44 @@ def _resolve_tools_and_prompt(request: ChatRequest) -> ResolvedAgent:
     return resolved
 
 
+async def _semantic_cache_key(request: ChatRequest, agent, config: dict, **agent_config) -> str | None:
+    """Semantic cache partition for this turn, or None when the turn is not eligible.
+
+    Only first turns of a thread without attachments are eligible: follow-ups depend on history.
+    """
+    if not SEMANTIC_CACHE_ENABLED or request.attachments or not (request.message or "").strip():
+        return None
+    try:
+        if await agent.ahas_history(config):
+            return None
+    except Exception as e:
+        logger.debug("[semantic cache] thread lookup failed: %s", e)
+        return None
+    return response_cache_key(
+        request_context=config["configurable"].get("request_context") or "", **agent_config
+    )
+
+
+async def _semantic_cache_hit(
+    cache_key: str, request: ChatRequest, agent, config: dict, human_message: HumanMessage
+) -> str | None:
+    """Cached response for this turn (recorded in the thread), or None on miss."""
+    hit = await response_cache.lookup(cache_key, request.message)
+    if hit is None:
+        return None
+    try:
+        await agent.arecord_turn([human_message, AIMessage(content=hit.response)], config)
+    except Exception as e:
+        logger.warning("[semantic cache] could not record cached turn in thread: %s", e)
+    return hit.response
+
+
+@router.get("/semantic-cache/stats")
+async def get_semantic_cache_stats():
+    """Semantic response cache counters and hit rate (this process)."""
+    return {"enabled": SEMANTIC_CACHE_ENABLED, **response_cache.stats()}
+
+
 @router.post("", response_model=ChatResponse)
 async def chat(request: ChatRequest):
     """Chat endpoint - synchronous."""
@@ -477,7 +612,7 @@ async def chat(request: ChatRequest):
         checkpointer = get_async_checkpointer()
 
         # Resolve tools and prompt from agent_id or legacy flags
-        resolved = _resolve_tools_and_prompt(request)
+        resolved = await _resolve_tools_and_prompt(request)
         tools = resolved.tools
 
         has_tools = bool(tools)
@@ -491,62 +626,58 @@ async def chat(request: ChatRequest):
         # System prompt: use resolved prompt or fall back to VSA prompt
         enable_vsa = resolved.agent_type in ("unified", "vsa") or request.enable_vsa
         system_prompt = resolved.system_prompt or get_system_prompt(enable_vsa)
-        if request.project_id:
-            system_prompt += (
-                f"\n\nCONTEXTO ATIVO: Você está no projeto {request.project_id}. "
-                "Use a ferramenta 'search_project_knowledge' para dúvidas sobre este projeto."
-            )
-            project_context = _fetch_project_context(request.message, request.project_id)
-            if project_context:
-                system_prompt += f"\n\nCONTEXTO RECUPERADO DO PROJETO:\n{project_context}"
-
-        if request.wareline_domain or request.enable_wareline:
-            wareline_ctx = _fetch_wareline_context(request.message, request.wareline_domain)
-            if wareline_ctx:
-                domain_label = request.wareline_domain or "GERAL"
-                system_prompt += (
-                    f"\n\nCATÁLOGO WARELINE ({domain_label}):\n"
-                    "Use as informações abaixo sobre tabelas e colunas do sistema hospitalar "
-                    "Wareline/MV para responder a pergunta do usuário.\n\n"
-                    f"{wareline_ctx}"
-                )
-                logger.info("[WARELINE] Contexto injetado (%d chars, domínio=%s)", len(wareline_ctx), domain_label)
-
-        # Select agent based on resolved type
-        if enable_vsa:
-            agent = UnifiedAgent(
-                model_name=model_name,
-                tools=tools,
-                checkpointer=checkpointer,
-                system_prompt=system_prompt,
-                enable_itil=resolved.enable_itil,
-                enable_planning=resolved.enable_planning,
-                fast_model_name=_resolve_fast_model(),
-            )
-            logger.info("🤖 Using UnifiedAgent (ITIL mode)")
-        else:
-            agent = SimpleAgent(
-                model_name=model_name,
-                tools=tools,
-                checkpointer=checkpointer,
-                system_prompt=system_prompt,
-            )
-            logger.info("🤖 Using SimpleAgent")
+        # Per-request context goes in the runtime config so the compiled graph is reusable
+        request_context = await _build_request_context(request)
+
+        agent_type = "unified" if enable_vsa else "simple"
+        agent = get_or_build_agent(
+            agent_type=agent_type,
+            model_name=model_name,
+            tools=tools,
+            system_prompt=system_prompt,
+            checkpointer=checkpointer,
+            fast_model_name=_resolve_fast_model(),
+            enable_itil=resolved.enable_itil,
+            enable_planning=resolved.enable_planning,
+            agent_id=request.agent_id,
+        )
+        logger.info("🤖 Using %s", type(agent).__name__)
 
         # Invoke agent
         config = {
             "configurable": {
                 "thread_id": thread_id,
+                "request_context": request_context,
             }
         }
 
+        cache_key = await _semantic_cache_key(
+            request,
+            agent,
+            config,
+            agent_type=agent_type,
+            model_name=model_name,
+            tools=tools,
+            system_prompt=system_prompt,
+            enable_itil=resolved.enable_itil,
+            enable_planning=resolved.enable_planning,
+        )
+
         human_message = _build_human_message(request)
+        if cache_key:
+            cached = await _semantic_cache_hit(cache_key, request, agent, config, human_message)
+            if cached is not None:
+                return ChatResponse(response=cached, thread_id=thread_id, model="semantic-cache")
+
         result = await agent.ainvoke({"messages": [human_message]}, config=config)
 
         # Extract response
         messages = result.get("messages", [])
         response_text = messages[-1].content if messages else "No response generated"
 
+        if cache_key and isinstance(response_text, str) and cacheable_answer(result) is not None:
+            await response_cache.store(cache_key, request.message, response_text)
+
         return ChatResponse(response=response_text, thread_id=thread_id, model=request.model)
     except Exception as e:
         logger.error(f"Chat error: {str(e)}", exc_info=True)
@@ -568,44 +699,76 @@ async def stream_chat(request: ChatRequest):
         logger.info("📊 [RULE-ROUTER/STREAM] Intent detectado: %s (bypass LLM)", intent)
 
         async def generate_report_stream():
-            """Stream do relatório gerado por código (simula streaming).
+            """Stream do relatório gerado por código, parte a parte.
 
             Emits artifact_start / artifact_content / artifact_end SSE events
             so the frontend can render the report in a side panel, followed by
-            a compact content event for the chat bubble.
+            a compact content event for the chat bubble. On a cache miss the
+            artifact opens with the first piece (title/summary) and rows follow
+            as they are formatted; a cached report is sent as one piece.
             """
+
+            def sse(payload: dict) -> str:
+                return f"data: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+            meta = INTENT_ARTIFACT_META.get(
+                intent,
+                {
+                    "title": "Relatório",
+                    "artifact_type": "generic_report",
+                },
+            )
+            artifact_id: str | None = None
+
+            def artifact_start() -> str:
+                return sse({'type': 'artifact_start', 'thread_id': thread_id, 'artifact': {'artifact_id': artifact_id, 'title': meta['title'], 'artifact_type': meta['artifact_type'], 'intent': intent, 'source': 'rule-based'}})
+
+            def artifact_content(content: str) -> str:
+                return sse({'type': 'artifact_content', 'thread_id': thread_id, 'artifact_id': artifact_id, 'content': content})
+
+            # Pieces of the report as it is built; None once generation is over
+            pieces: asyncio.Queue[str | None] = asyncio.Queue()
+            report_task: asyncio.Future | None = None
+
+            def on_piece(piece: str) -> None:
+                # Only the build this request waits for, not a stale-window background refresh
+                if report_task is not None and not report_task.done():
+                    pieces.put_nowait(piece)
+
             try:
                 # Enviar evento start
-                yield f"data: {json.dumps({'type': 'start', 'thread_id': thread_id}, ensure_ascii=False)}\n\n"
+                yield sse({'type': 'start', 'thread_id': thread_id})
 
-                report_md, success = await _generate_report_by_intent(intent)
+                report_task = asyncio.ensure_future(
+                    _generate_report_by_intent(intent, on_piece=on_piece)
+                )
+                report_task.add_done_callback(lambda _: pieces.put_nowait(None))
+
+                while (piece := await pieces.get()) is not None:
+                    if artifact_id is None:
+                        artifact_id = f"art-{uuid.uuid4().hex[:12]}"
+                        yield artifact_start()
+                    yield artifact_content(piece)
+
+                report_md, success = report_task.result()
 
-                if success and report_md:
-                    # --- Artifact SSE events ---
+                if artifact_id is None and success and report_md:
+                    # Cache hit (or another request built it): whole report at once
                     artifact_id = f"art-{uuid.uuid4().hex[:12]}"
-                    meta = INTENT_ARTIFACT_META.get(
-                        intent,
-                        {
-                            "title": "Relatório",
-                            "artifact_type": "generic_report",
-                        },
-                    )
-
-                    # artifact_start
-                    yield f"data: {json.dumps({'type': 'artifact_start', 'thread_id': thread_id, 'artifact': {'artifact_id': artifact_id, 'title': meta['title'], 'artifact_type': meta['artifact_type'], 'intent': intent, 'source': 'rule-based'}}, ensure_ascii=False)}\n\n"
-
-                    # artifact_content in chunks
-                    chunk_size = 400
-                    for i in range(0, len(report_md), chunk_size):
-                        chunk = report_md[i : i + chunk_size]
-                        yield f"data: {json.dumps({'type': 'artifact_content', 'thread_id': thread_id, 'artifact_id': artifact_id, 'content': chunk}, ensure_ascii=False)}\n\n"
+                    yield artifact_start()
+                    yield artifact_content(report_md)
+
+                if artifact_id is not None:
+                    if not success:
+                        # Failed after part of the report was streamed
+                        yield artifact_content(f"\n\n{report_md}")
 
                     # artifact_end
-                    yield f"data: {json.dumps({'type': 'artifact_end', 'thread_id': thread_id, 'artifact_id': artifact_id}, ensure_ascii=False)}\n\n"
+                    yield sse({'type': 'artifact_end', 'thread_id': thread_id, 'artifact_id': artifact_id})
 
                     # Chat bubble summary (compact message that references the artifact)
-                    summary = f"Relatório gerado com sucesso."
-                    yield f"data: {json.dumps({'type': 'content', 'content': summary, 'thread_id': thread_id, 'model': 'rule-based', 'artifact_id': artifact_id}, ensure_ascii=False)}\n\n"
+                    summary = "Relatório gerado com sucesso." if success else (report_md or "Erro ao gerar relatório")
+                    yield sse({'type': 'content', 'content': summary, 'thread_id': thread_id, 'model': 'rule-based', 'artifact_id': artifact_id})
                 else:
                     # Erro: envia como conteúdo normal
                     data = {
@@ -614,10 +777,10 @@ async def stream_chat(request: ChatRequest):
                         "thread_id": thread_id,
                         "model": "rule-based",
                     }
-                    yield f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
+                    yield sse(data)
 
                 # Evento done
-                yield f"data: {json.dumps({'type': 'done', 'thread_id': thread_id}, ensure_ascii=False)}\n\n"
+                yield sse({'type': 'done', 'thread_id': thread_id})
 
             except asyncio.CancelledError:
                 logger.debug("Report stream cancelled (client disconnected)")
@@ -625,6 +788,10 @@ async def stream_chat(request: ChatRequest):
             except Exception as e:
                 logger.exception("Report stream error: %s", e)
                 yield f"data: {json.dumps({'type': 'error', 'error': str(e)})}\n\n"
+            finally:
+                # The shared (single-flight) build keeps running for other callers
+                if report_task is not None:
+                    report_task.cancel()
 
         return StreamingResponse(generate_report_stream(), media_type="text/event-stream")
 
@@ -633,7 +800,7 @@ async def stream_chat(request: ChatRequest):
         checkpointer = get_async_checkpointer()
 
         # Resolve tools and prompt from agent_id or legacy flags
-        resolved = _resolve_tools_and_prompt(request)
+        resolved = await _resolve_tools_and_prompt(request)
         tools = resolved.tools
 
         has_tools = bool(tools)
@@ -647,51 +814,27 @@ async def stream_chat(request: ChatRequest):
         # System prompt: use resolved prompt or fall back to VSA prompt
         enable_vsa = resolved.agent_type in ("unified", "vsa") or request.enable_vsa
         system_prompt = resolved.system_prompt or get_system_prompt(enable_vsa)
-        if request.project_id:
-            system_prompt += (
-                f"\n\nCONTEXTO ATIVO: Você está no projeto {request.project_id}. "
-                "Use a ferramenta 'search_project_knowledge' para dúvidas sobre este projeto."
-            )
-            project_context = _fetch_project_context(request.message, request.project_id)
-            if project_context:
-                system_prompt += f"\n\nCONTEXTO RECUPERADO DO PROJETO:\n{project_context}"
-
-        if request.wareline_domain or request.enable_wareline:
-            wareline_ctx = _fetch_wareline_context(request.message, request.wareline_domain)
-            if wareline_ctx:
-                domain_label = request.wareline_domain or "GERAL"
-                system_prompt += (
-                    f"\n\nCATÁLOGO WARELINE ({domain_label}):\n"
-                    "Use as informações abaixo sobre tabelas e colunas do sistema hospitalar "
-                    "Wareline/MV para responder a pergunta do usuário.\n\n"
-                    f"{wareline_ctx}"
-                )
-                logger.info("[WARELINE] Contexto injetado (%d chars, domínio=%s) [stream]", len(wareline_ctx), domain_label)
-
-        # Select agent based on resolved type
-        if enable_vsa:
-            agent = UnifiedAgent(
-                model_name=model_name,
-                tools=tools,
-                checkpointer=checkpointer,
-                system_prompt=system_prompt,
-                enable_itil=resolved.enable_itil,
-                enable_planning=resolved.enable_planning,
-                fast_model_name=_resolve_fast_model(),
-            )
-            logger.info("🤖 Using UnifiedAgent (ITIL mode) [stream]")
-        else:
-            agent = SimpleAgent(
-                model_name=model_name,
-                tools=tools,
-                checkpointer=checkpointer,
-                system_prompt=system_prompt,
-            )
-            logger.info("🤖 Using SimpleAgent [stream]")
+        # Per-request context goes in the runtime config so the compiled graph is reusable
+        request_context = await _build_request_context(request)
+
+        agent_type = "unified" if enable_vsa else "simple"
+        agent = get_or_build_agent(
+            agent_type=agent_type,
+            model_name=model_name,
+            tools=tools,
+            system_prompt=system_prompt,
+            checkpointer=checkpointer,
+            fast_model_name=_resolve_fast_model(),
+            enable_itil=resolved.enable_itil,
+            enable_planning=resolved.enable_planning,
+            agent_id=request.agent_id,
+        )
+        logger.info("🤖 Using %s [stream]", type(agent).__name__)
 
         config = {
             "configurable": {
                 "thread_id": thread_id,
+                "request_context": request_context,
             }
         }
 
@@ -709,6 +852,18 @@ async def stream_chat(request: ChatRequest):
                 return "".join(parts)
             return str(content) if content else ""
 
+        cache_key = await _semantic_cache_key(
+            request,
+            agent,
+            config,
+            agent_type=agent_type,
+            model_name=model_name,
+            tools=tools,
+            system_prompt=system_prompt,
+            enable_itil=resolved.enable_itil,
+            enable_planning=resolved.enable_planning,
+        )
+
         async def generate():
             try:
                 # Enviar evento "start" imediatamente para o cliente saber que a conexão está viva
@@ -717,8 +872,21 @@ async def stream_chat(request: ChatRequest):
 
                 from langchain_core.messages import AIMessage, AIMessageChunk
 
-                # Use stream_mode="messages" to get deltas (tokens) for a smoother experience
                 human_message = _build_human_message(request)
+                if cache_key:
+                    cached = await _semantic_cache_hit(cache_key, request, agent, config, human_message)
+                    if cached is not None:
+                        data = {
+                            "type": "content",
+                            "content": cached,
+                            "thread_id": thread_id,
+                            "model": "semantic-cache",
+                        }
+                        yield f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
+                        yield f"data: {json.dumps({'type': 'done', 'thread_id': thread_id}, ensure_ascii=False)}\n\n"
+                        return
+
+                # Use stream_mode="messages" to get deltas (tokens) for a smoother experience
                 async for chunk, metadata in agent.astream(
                     {"messages": [human_message]},
                     config=config,
@@ -738,6 +906,17 @@ async def stream_chat(request: ChatRequest):
                                 }
                                 yield f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
 
+                if cache_key:
+                    try:
+                        state = await agent.create_graph().aget_state(config)
+                        answer = cacheable_answer(state.values)
+                        if answer is not None:
+                            await response_cache.store(
+                                cache_key, request.message, _content_to_str(answer.content)
+                            )
+                    except Exception as e:
+                        logger.warning("[semantic cache] could not read streamed turn: %s", e)
+
                 logger.info("[STREAM] Sending done event")
                 yield f"data: {json.dumps({'type': 'done', 'thread_id': thread_id}, ensure_ascii=False)}\n\n"
 
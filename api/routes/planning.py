@@ -4,7 +4,9 @@ import logging
 from typing import Optional
 from uuid import UUID
 
-from fastapi import APIRouter, BackgroundTasks, Body, File, HTTPException, Query, UploadFile
+import asyncio
+
+from fastapi import APIRouter, Body, File, HTTPException, Query, UploadFile
 from psycopg.rows import dict_row
 
 from api.models.planning import (
@@ -13,6 +15,8 @@ from api.models.planning import (
     BudgetItemCreate,
     BudgetItemResponse,
     BudgetItemUpdate,
+    DocumentIngestStatus,
+    DocumentIngestStatusResponse,
     DocumentListResponse,
     DocumentResponse,
     ProjectCreate,
@@ -26,9 +30,10 @@ from api.models.planning import (
     SyncLinearRequest,
     SyncLinearResponse,
 )
-from core.database import get_conn
+from core.database import get_aconn
 from core.rag.loaders import get_file_type, load_document_from_bytes
-from core.rag.planning_ingestion import ingest_project_document_task
+from core.rag.planning_ingestion import INGEST_FAILED, INGEST_QUEUED, set_document_ingest_status
+from core.rag.project_settings import invalidate_project_settings
 from core.rag.embeddings import EmbeddingFactory
 
 logger = logging.getLogger(__name__)
@@ -41,14 +46,18 @@ router = APIRouter()
 # =============================================================================
 
 
-from contextlib import contextmanager
+from contextlib import asynccontextmanager
 
-@contextmanager
-def _get_conn_with_dict_row():
-    """Get connection with dict row factory."""
-    with get_conn() as conn:
+@asynccontextmanager
+async def _get_aconn_with_dict_row():
+    """Get pooled async connection with dict row factory (restored before returning to pool)."""
+    async with get_aconn() as conn:
+        row_factory = conn.row_factory
         conn.row_factory = dict_row
-        yield conn
+        try:
+            yield conn
+        finally:
+            conn.row_factory = row_factory
 
 
 def _resolve_embedding_model(model_id: Optional[str]) -> str:
@@ -62,6 +71,26 @@ def _resolve_embedding_model(model_id: Optional[str]) -> str:
     return resolved
 
 
+def _enqueue_document_ingest(project_id: UUID, document_id: UUID) -> Optional[str]:
+    """Enfileira a ingestão RAG de um documento na fila Celery 'ingest'.
+
+    Retorna o task_id; se o broker estiver indisponível marca o documento como 'failed'.
+    """
+    from core.tasks import ingest_planning_document
+
+    try:
+        task = ingest_planning_document.apply_async(
+            args=[str(project_id), str(document_id)],
+            queue="ingest",
+        )
+    except Exception as e:
+        logger.error(f"Error enqueuing ingestion for {document_id}: {e}", exc_info=True)
+        set_document_ingest_status(document_id, INGEST_FAILED, error=f"Fila indisponível: {e}")
+        return None
+    set_document_ingest_status(document_id, INGEST_QUEUED, task_id=task.id)
+    return task.id
+
+
 # =============================================================================
 # Projects CRUD
 # =============================================================================
@@ -76,8 +105,8 @@ async def list_projects(
 ):
     """List all planning projects."""
     try:
-        with _get_conn_with_dict_row() as conn:
-            with conn.cursor() as cur:
+        async with _get_aconn_with_dict_row() as conn:
+            async with conn.cursor() as cur:
                 where_parts = []
                 params = []
 
@@ -91,11 +120,11 @@ async def list_projects(
                 where_clause = " AND ".join(where_parts) if where_parts else "1=1"
 
                 # Count total
-                cur.execute(f"SELECT COUNT(*) FROM planning_projects WHERE {where_clause}", params)
-                total = cur.fetchone()["count"]
+                await cur.execute(f"SELECT COUNT(*) FROM planning_projects WHERE {where_clause}", params)
+                total = (await cur.fetchone())["count"]
 
                 # Fetch projects
-                cur.execute(
+                await cur.execute(
                     f"""
                     SELECT id, title, description, status, empresa, client_id,
                            COALESCE(embedding_model, 'openai') AS embedding_model,
@@ -107,7 +136,7 @@ async def list_projects(
                     """,
                     params + [limit, offset],
                 )
-                rows = cur.fetchall()
+                rows = await cur.fetchall()
 
                 projects = [ProjectResponse(**row) for row in rows]
                 return ProjectListResponse(projects=projects, total=total)
@@ -120,10 +149,10 @@ async def list_projects(
 async def create_project(request: ProjectCreate):
     """Create a new planning project."""
     try:
-        with _get_conn_with_dict_row() as conn:
-            with conn.cursor() as cur:
+        async with _get_aconn_with_dict_row() as conn:
+            async with conn.cursor() as cur:
                 embedding_model = _resolve_embedding_model(request.embedding_model)
-                cur.execute(
+                await cur.execute(
                     """
                     INSERT INTO planning_projects (title, description, empresa, client_id, embedding_model)
                     VALUES (%s, %s, %s, %s, %s)
@@ -139,8 +168,8 @@ async def create_project(request: ProjectCreate):
                         embedding_model,
                     ),
                 )
-                row = cur.fetchone()
-                conn.commit()
+                row = await cur.fetchone()
+                await conn.commit()
                 return ProjectResponse(**row)
     except Exception as e:
         logger.error(f"Error creating project: {e}", exc_info=True)
@@ -151,10 +180,10 @@ async def create_project(request: ProjectCreate):
 async def get_project(project_id: UUID):
     """Get project details with stages, documents, and budget."""
     try:
-        with _get_conn_with_dict_row() as conn:
-            with conn.cursor() as cur:
+        async with _get_aconn_with_dict_row() as conn:
+            async with conn.cursor() as cur:
                 # Get project
-                cur.execute(
+                await cur.execute(
                     """
                     SELECT id, title, description, status, empresa, client_id,
                            COALESCE(embedding_model, 'openai') AS embedding_model,
@@ -164,12 +193,12 @@ async def get_project(project_id: UUID):
                     """,
                     (str(project_id),),
                 )
-                project = cur.fetchone()
+                project = await cur.fetchone()
                 if not project:
                     raise HTTPException(status_code=404, detail="Projeto não encontrado")
 
                 # Get stages
-                cur.execute(
+                await cur.execute(
                     """
                     SELECT id, project_id, title, description, order_index, status,
                            estimated_days, start_date, end_date, linear_milestone_id,
@@ -180,23 +209,24 @@ async def get_project(project_id: UUID):
                     """,
                     (str(project_id),),
                 )
-                stages = [StageResponse(**row) for row in cur.fetchall()]
+                stages = [StageResponse(**row) for row in await cur.fetchall()]
 
                 # Get documents
-                cur.execute(
+                await cur.execute(
                     """
                     SELECT id, project_id, file_name, file_type, file_size,
-                           LEFT(content, 500) as content_preview, uploaded_at
+                           LEFT(content, 500) as content_preview, uploaded_at,
+                           ingest_status, chunk_count
                     FROM planning_documents
                     WHERE project_id = %s
                     ORDER BY uploaded_at DESC
                     """,
                     (str(project_id),),
                 )
-                documents = [DocumentResponse(**row) for row in cur.fetchall()]
+                documents = [DocumentResponse(**row) for row in await cur.fetchall()]
 
                 # Get budget items
-                cur.execute(
+                await cur.execute(
                     """
                     SELECT id, project_id, stage_id, category, description,
                            estimated_cost, actual_cost, currency, created_at, updated_at
@@ -206,7 +236,7 @@ async def get_project(project_id: UUID):
                     """,
                     (str(project_id),),
                 )
-                budget_items = [BudgetItemResponse(**row) for row in cur.fetchall()]
+                budget_items = [BudgetItemResponse(**row) for row in await cur.fetchall()]
 
                 # Calculate totals
                 total_estimated = sum(b.estimated_cost for b in budget_items)
@@ -231,8 +261,8 @@ async def get_project(project_id: UUID):
 async def update_project(project_id: UUID, request: ProjectUpdate):
     """Update a project."""
     try:
-        with _get_conn_with_dict_row() as conn:
-            with conn.cursor() as cur:
+        async with _get_aconn_with_dict_row() as conn:
+            async with conn.cursor() as cur:
                 updates = []
                 params = []
 
@@ -254,7 +284,7 @@ async def update_project(project_id: UUID, request: ProjectUpdate):
 
                 params.append(str(project_id))
 
-                cur.execute(
+                await cur.execute(
                     f"""
                     UPDATE planning_projects
                     SET {", ".join(updates)}
@@ -265,10 +295,11 @@ async def update_project(project_id: UUID, request: ProjectUpdate):
                     """,
                     params,
                 )
-                row = cur.fetchone()
+                row = await cur.fetchone()
                 if not row:
                     raise HTTPException(status_code=404, detail="Projeto não encontrado")
-                conn.commit()
+                await conn.commit()
+                invalidate_project_settings(project_id)
                 return ProjectResponse(**row)
     except HTTPException:
         raise
@@ -281,14 +312,15 @@ async def update_project(project_id: UUID, request: ProjectUpdate):
 async def delete_project(project_id: UUID):
     """Delete a project and all related data."""
     try:
-        with _get_conn_with_dict_row() as conn:
-            with conn.cursor() as cur:
-                cur.execute(
+        async with _get_aconn_with_dict_row() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(
                     "DELETE FROM planning_projects WHERE id = %s RETURNING id", (str(project_id),)
                 )
-                if not cur.fetchone():
+                if not await cur.fetchone():
                     raise HTTPException(status_code=404, detail="Projeto não encontrado")
-                conn.commit()
+                await conn.commit()
+                invalidate_project_settings(project_id)
                 return {"message": "Projeto excluído com sucesso"}
     except HTTPException:
         raise
@@ -306,19 +338,20 @@ async def delete_project(project_id: UUID):
 async def list_documents(project_id: UUID):
     """List documents for a project."""
     try:
-        with _get_conn_with_dict_row() as conn:
-            with conn.cursor() as cur:
-                cur.execute(
+        async with _get_aconn_with_dict_row() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(
                     """
                     SELECT id, project_id, file_name, file_type, file_size,
-                           LEFT(content, 500) as content_preview, uploaded_at
+                           LEFT(content, 500) as content_preview, uploaded_at,
+                           ingest_status, chunk_count
                     FROM planning_documents
                     WHERE project_id = %s
                     ORDER BY uploaded_at DESC
                     """,
                     (str(project_id),),
                 )
-                rows = cur.fetchall()
+                rows = await cur.fetchall()
                 documents = [DocumentResponse(**row) for row in rows]
                 return DocumentListResponse(documents=documents, total=len(documents))
     except Exception as e:
@@ -329,10 +362,9 @@ async def list_documents(project_id: UUID):
 @router.post("/projects/{project_id}/documents", response_model=DocumentResponse)
 async def upload_document(
     project_id: UUID,
-    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
 ):
-    """Upload a document to a project. RAG ingestion runs in background."""
+    """Upload a document to a project. RAG ingestion runs on the Celery 'ingest' queue."""
     try:
         # Validate file type
         file_type = get_file_type(file.filename or "")
@@ -346,19 +378,21 @@ async def upload_document(
         file_size = len(content_bytes)
 
         try:
-            extracted_text = load_document_from_bytes(content_bytes, file.filename or "doc")
+            extracted_text = await asyncio.to_thread(
+                load_document_from_bytes, content_bytes, file.filename or "doc"
+            )
         except Exception as e:
             raise HTTPException(status_code=400, detail=f"Erro ao extrair texto: {e}")
 
         # Save to database — use cursor-level row_factory for robustness
-        with get_conn() as conn:
-            with conn.cursor(row_factory=dict_row) as cur:
+        async with get_aconn() as conn:
+            async with conn.cursor(row_factory=dict_row) as cur:
                 # Check if project exists
-                cur.execute("SELECT id FROM planning_projects WHERE id = %s", (str(project_id),))
-                if not cur.fetchone():
+                await cur.execute("SELECT id FROM planning_projects WHERE id = %s", (str(project_id),))
+                if not await cur.fetchone():
                     raise HTTPException(status_code=404, detail="Projeto não encontrado")
 
-                cur.execute(
+                await cur.execute(
                     """
                     INSERT INTO planning_documents (project_id, file_name, file_type, content, file_size)
                     VALUES (%s, %s, %s, %s, %s)
@@ -367,18 +401,13 @@ async def upload_document(
                     """,
                     (str(project_id), file.filename, file_type, extracted_text, file_size),
                 )
-                row = cur.fetchone()
-                conn.commit()
+                row = await cur.fetchone()
+                await conn.commit()
                 document_id = row["id"]
 
-        # RAG ingestion in background (chunking + embedding + kb_chunks with project_id)
-        background_tasks.add_task(
-            ingest_project_document_task,
-            project_id=project_id,
-            document_id=document_id,
-            content_bytes=content_bytes,
-            filename=file.filename or "doc",
-        )
+        # RAG ingestion (chunking + embedding + kb_chunks with project_id) on the worker
+        task_id = await asyncio.to_thread(_enqueue_document_ingest, project_id, document_id)
+        row["ingest_status"] = INGEST_QUEUED if task_id else INGEST_FAILED
 
         return DocumentResponse(**row)
     except HTTPException:
@@ -388,19 +417,47 @@ async def upload_document(
         raise HTTPException(status_code=500, detail=f"Erro ao fazer upload: {e}")
 
 
+@router.get(
+    "/projects/{project_id}/documents/status", response_model=DocumentIngestStatusResponse
+)
+async def get_documents_ingest_status(project_id: UUID):
+    """Poll RAG ingestion progress (queued/staged/chunked/embedded/indexed/failed)."""
+    try:
+        async with get_aconn() as conn:
+            async with conn.cursor(row_factory=dict_row) as cur:
+                await cur.execute(
+                    """
+                    SELECT id AS document_id, file_name, ingest_status, chunk_count,
+                           ingest_error, ingest_task_id, ingest_updated_at
+                    FROM planning_documents
+                    WHERE project_id = %s
+                    ORDER BY uploaded_at DESC
+                    """,
+                    (str(project_id),),
+                )
+                documents = [DocumentIngestStatus(**row) for row in await cur.fetchall()]
+        pending = sum(1 for d in documents if d.ingest_status not in ("indexed", "failed"))
+        return DocumentIngestStatusResponse(
+            documents=documents, total=len(documents), pending=pending
+        )
+    except Exception as e:
+        logger.error(f"Error fetching ingest status: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Erro ao consultar ingestão: {e}")
+
+
 @router.delete("/projects/{project_id}/documents/{document_id}")
 async def delete_document(project_id: UUID, document_id: UUID):
     """Delete a document from a project."""
     try:
-        with _get_conn_with_dict_row() as conn:
-            with conn.cursor() as cur:
-                cur.execute(
+        async with _get_aconn_with_dict_row() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(
                     "DELETE FROM planning_documents WHERE id = %s AND project_id = %s RETURNING id",
                     (str(document_id), str(project_id)),
                 )
-                if not cur.fetchone():
+                if not await cur.fetchone():
                     raise HTTPException(status_code=404, detail="Documento não encontrado")
-                conn.commit()
+                await conn.commit()
                 return {"message": "Documento excluído com sucesso"}
     except HTTPException:
         raise
@@ -410,36 +467,30 @@ async def delete_document(project_id: UUID, document_id: UUID):
 
 
 @router.post("/projects/{project_id}/reingest")
-async def reingest_project_documents(project_id: UUID, background_tasks: BackgroundTasks):
+async def reingest_project_documents(project_id: UUID):
     """Re-trigger RAG ingestion for all documents in a project.
 
     Use when documents were uploaded but chunking/embedding failed (e.g. pool exhaustion).
     """
     try:
-        with get_conn() as conn:
-            with conn.cursor(row_factory=dict_row) as cur:
-                cur.execute(
-                    "SELECT id, file_name, content FROM planning_documents WHERE project_id = %s",
+        async with get_aconn() as conn:
+            async with conn.cursor(row_factory=dict_row) as cur:
+                await cur.execute(
+                    """
+                    SELECT id FROM planning_documents
+                    WHERE project_id = %s AND COALESCE(content, '') <> ''
+                    """,
                     (str(project_id),),
                 )
-                docs = cur.fetchall()
+                docs = await cur.fetchall()
 
         if not docs:
             raise HTTPException(status_code=404, detail="Nenhum documento encontrado no projeto")
 
         queued = 0
         for doc in docs:
-            content_bytes = doc["content"].encode("utf-8") if doc["content"] else b""
-            if not content_bytes:
-                continue
-            background_tasks.add_task(
-                ingest_project_document_task,
-                project_id=project_id,
-                document_id=doc["id"],
-                content_bytes=content_bytes,
-                filename=doc["file_name"] or "doc",
-            )
-            queued += 1
+            if await asyncio.to_thread(_enqueue_document_ingest, project_id, doc["id"]):
+                queued += 1
 
         return {
             "message": f"Re-ingestão enfileirada para {queued} documento(s)",
@@ -461,14 +512,14 @@ async def reingest_project_documents(project_id: UUID, background_tasks: Backgro
 async def create_stage(project_id: UUID, request: StageCreate):
     """Create a stage in a project."""
     try:
-        with _get_conn_with_dict_row() as conn:
-            with conn.cursor() as cur:
+        async with _get_aconn_with_dict_row() as conn:
+            async with conn.cursor() as cur:
                 # Check if project exists
-                cur.execute("SELECT id FROM planning_projects WHERE id = %s", (str(project_id),))
-                if not cur.fetchone():
+                await cur.execute("SELECT id FROM planning_projects WHERE id = %s", (str(project_id),))
+                if not await cur.fetchone():
                     raise HTTPException(status_code=404, detail="Projeto não encontrado")
 
-                cur.execute(
+                await cur.execute(
                     """
                     INSERT INTO planning_stages 
                     (project_id, title, description, order_index, estimated_days, start_date, end_date)
@@ -487,8 +538,8 @@ async def create_stage(project_id: UUID, request: StageCreate):
                         request.end_date,
                     ),
                 )
-                row = cur.fetchone()
-                conn.commit()
+                row = await cur.fetchone()
+                await conn.commit()
                 return StageResponse(**row)
     except HTTPException:
         raise
@@ -501,8 +552,8 @@ async def create_stage(project_id: UUID, request: StageCreate):
 async def update_stage(project_id: UUID, stage_id: UUID, request: StageUpdate):
     """Update a stage."""
     try:
-        with _get_conn_with_dict_row() as conn:
-            with conn.cursor() as cur:
+        async with _get_aconn_with_dict_row() as conn:
+            async with conn.cursor() as cur:
                 updates = []
                 params = []
 
@@ -533,7 +584,7 @@ async def update_stage(project_id: UUID, stage_id: UUID, request: StageUpdate):
 
                 params.extend([str(stage_id), str(project_id)])
 
-                cur.execute(
+                await cur.execute(
                     f"""
                     UPDATE planning_stages
                     SET {", ".join(updates)}
@@ -544,10 +595,10 @@ async def update_stage(project_id: UUID, stage_id: UUID, request: StageUpdate):
                     """,
                     params,
                 )
-                row = cur.fetchone()
+                row = await cur.fetchone()
                 if not row:
                     raise HTTPException(status_code=404, detail="Etapa não encontrada")
-                conn.commit()
+                await conn.commit()
                 return StageResponse(**row)
     except HTTPException:
         raise
@@ -560,15 +611,15 @@ async def update_stage(project_id: UUID, stage_id: UUID, request: StageUpdate):
 async def delete_stage(project_id: UUID, stage_id: UUID):
     """Delete a stage from a project."""
     try:
-        with _get_conn_with_dict_row() as conn:
-            with conn.cursor() as cur:
-                cur.execute(
+        async with _get_aconn_with_dict_row() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(
                     "DELETE FROM planning_stages WHERE id = %s AND project_id = %s RETURNING id",
                     (str(stage_id), str(project_id)),
                 )
-                if not cur.fetchone():
+                if not await cur.fetchone():
                     raise HTTPException(status_code=404, detail="Etapa não encontrada")
-                conn.commit()
+                await conn.commit()
                 return {"message": "Etapa excluída com sucesso"}
     except HTTPException:
         raise
@@ -586,14 +637,14 @@ async def delete_stage(project_id: UUID, stage_id: UUID):
 async def create_budget_item(project_id: UUID, request: BudgetItemCreate):
     """Create a budget item for a project."""
     try:
-        with _get_conn_with_dict_row() as conn:
-            with conn.cursor() as cur:
+        async with _get_aconn_with_dict_row() as conn:
+            async with conn.cursor() as cur:
                 # Check if project exists
-                cur.execute("SELECT id FROM planning_projects WHERE id = %s", (str(project_id),))
-                if not cur.fetchone():
+                await cur.execute("SELECT id FROM planning_projects WHERE id = %s", (str(project_id),))
+                if not await cur.fetchone():
                     raise HTTPException(status_code=404, detail="Projeto não encontrado")
 
-                cur.execute(
+                await cur.execute(
                     """
                     INSERT INTO planning_budget_items 
                     (project_id, stage_id, category, description, estimated_cost, actual_cost, currency)
@@ -611,8 +662,8 @@ async def create_budget_item(project_id: UUID, request: BudgetItemCreate):
                         request.currency,
                     ),
                 )
-                row = cur.fetchone()
-                conn.commit()
+                row = await cur.fetchone()
+                await conn.commit()
                 return BudgetItemResponse(**row)
     except HTTPException:
         raise
@@ -625,8 +676,8 @@ async def create_budget_item(project_id: UUID, request: BudgetItemCreate):
 async def update_budget_item(project_id: UUID, item_id: UUID, request: BudgetItemUpdate):
     """Update a budget item."""
     try:
-        with _get_conn_with_dict_row() as conn:
-            with conn.cursor() as cur:
+        async with _get_aconn_with_dict_row() as conn:
+            async with conn.cursor() as cur:
                 updates = []
                 params = []
 
@@ -651,7 +702,7 @@ async def update_budget_item(project_id: UUID, item_id: UUID, request: BudgetIte
 
                 params.extend([str(item_id), str(project_id)])
 
-                cur.execute(
+                await cur.execute(
                     f"""
                     UPDATE planning_budget_items
                     SET {", ".join(updates)}
@@ -661,10 +712,10 @@ async def update_budget_item(project_id: UUID, item_id: UUID, request: BudgetIte
                     """,
                     params,
                 )
-                row = cur.fetchone()
+                row = await cur.fetchone()
                 if not row:
                     raise HTTPException(status_code=404, detail="Item de orçamento não encontrado")
-                conn.commit()
+                await conn.commit()
                 return BudgetItemResponse(**row)
     except HTTPException:
         raise
@@ -677,15 +728,15 @@ async def update_budget_item(project_id: UUID, item_id: UUID, request: BudgetIte
 async def delete_budget_item(project_id: UUID, item_id: UUID):
     """Delete a budget item from a project."""
     try:
-        with _get_conn_with_dict_row() as conn:
-            with conn.cursor() as cur:
-                cur.execute(
+        async with _get_aconn_with_dict_row() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(
                     "DELETE FROM planning_budget_items WHERE id = %s AND project_id = %s RETURNING id",
                     (str(item_id), str(project_id)),
                 )
-                if not cur.fetchone():
+                if not await cur.fetchone():
                     raise HTTPException(status_code=404, detail="Item de orçamento não encontrado")
-                conn.commit()
+                await conn.commit()
                 return {"message": "Item de orçamento excluído com sucesso"}
     except HTTPException:
         raise
@@ -713,19 +764,19 @@ async def analyze_project_documents(project_id: UUID, request: AnalyzeDocsReques
     """
     try:
         # Get all document content
-        with _get_conn_with_dict_row() as conn:
-            with conn.cursor() as cur:
+        async with _get_aconn_with_dict_row() as conn:
+            async with conn.cursor() as cur:
                 # Check if project exists
-                cur.execute(
+                await cur.execute(
                     "SELECT id, title FROM planning_projects WHERE id = %s", (str(project_id),)
                 )
-                project = cur.fetchone()
+                project = await cur.fetchone()
                 if not project:
                     raise HTTPException(status_code=404, detail="Projeto não encontrado")
 
                 # Get all document content
-                cur.execute("SELECT get_planning_documents_context(%s)", (str(project_id),))
-                result = cur.fetchone()
+                await cur.execute("SELECT get_planning_documents_context(%s)", (str(project_id),))
+                result = await cur.fetchone()
                 documents_context = result["get_planning_documents_context"] if result else ""
 
         if not documents_context or not documents_context.strip():
@@ -785,17 +836,17 @@ async def apply_analysis_suggestions(
         created_stages = []
         created_budget = []
 
-        with _get_conn_with_dict_row() as conn:
-            with conn.cursor() as cur:
+        async with _get_aconn_with_dict_row() as conn:
+            async with conn.cursor() as cur:
                 # Check if project exists
-                cur.execute("SELECT id FROM planning_projects WHERE id = %s", (str(project_id),))
-                if not cur.fetchone():
+                await cur.execute("SELECT id FROM planning_projects WHERE id = %s", (str(project_id),))
+                if not await cur.fetchone():
                     raise HTTPException(status_code=404, detail="Projeto não encontrado")
 
                 # Create stages
                 if stages and body.suggested_stages:
                     for i, stage in enumerate(body.suggested_stages):
-                        cur.execute(
+                        await cur.execute(
                             """
                             INSERT INTO planning_stages 
                             (project_id, title, description, order_index, estimated_days)
@@ -810,13 +861,13 @@ async def apply_analysis_suggestions(
                                 stage.estimated_days if stage.estimated_days is not None else 0,
                             ),
                         )
-                        row = cur.fetchone()
+                        row = await cur.fetchone()
                         created_stages.append(row)
 
                 # Create budget items
                 if budget and body.suggested_budget:
                     for item in body.suggested_budget:
-                        cur.execute(
+                        await cur.execute(
                             """
                             INSERT INTO planning_budget_items 
                             (project_id, category, description, estimated_cost)
@@ -830,10 +881,10 @@ async def apply_analysis_suggestions(
                                 item.estimated_cost,
                             ),
                         )
-                        row = cur.fetchone()
+                        row = await cur.fetchone()
                         created_budget.append(row)
 
-                conn.commit()
+                await conn.commit()
 
         return {
             "message": "Sugestões aplicadas com sucesso",
@@ -863,16 +914,16 @@ async def sync_project_to_linear(project_id: UUID, request: SyncLinearRequest):
     """
     try:
         # Get project with stages
-        with _get_conn_with_dict_row() as conn:
-            with conn.cursor() as cur:
-                cur.execute(
+        async with _get_aconn_with_dict_row() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(
                     """
                     SELECT id, title, description, linear_project_id
                     FROM planning_projects WHERE id = %s
                     """,
                     (str(project_id),),
                 )
-                project = cur.fetchone()
+                project = await cur.fetchone()
                 if not project:
                     raise HTTPException(status_code=404, detail="Projeto não encontrado")
 
@@ -884,7 +935,7 @@ async def sync_project_to_linear(project_id: UUID, request: SyncLinearRequest):
                     )
 
                 # Get stages
-                cur.execute(
+                await cur.execute(
                     """
                     SELECT title, description, estimated_days, start_date, end_date
                     FROM planning_stages
@@ -893,7 +944,7 @@ async def sync_project_to_linear(project_id: UUID, request: SyncLinearRequest):
                     """,
                     (str(project_id),),
                 )
-                stages = cur.fetchall()
+                stages = await cur.fetchall()
 
         # Build plan for Linear
         plan = {
@@ -939,9 +990,9 @@ async def sync_project_to_linear(project_id: UUID, request: SyncLinearRequest):
             linear_project_id = result.output.get("project_id")
             linear_project_url = result.output.get("project_url")
 
-            with _get_conn_with_dict_row() as conn:
-                with conn.cursor() as cur:
-                    cur.execute(
+            async with _get_aconn_with_dict_row() as conn:
+                async with conn.cursor() as cur:
+                    await cur.execute(
                         """
                         UPDATE planning_projects
                         SET linear_project_id = %s, linear_project_url = %s
@@ -949,7 +1000,7 @@ async def sync_project_to_linear(project_id: UUID, request: SyncLinearRequest):
                         """,
                         (linear_project_id, linear_project_url, str(project_id)),
                     )
-                    conn.commit()
+                    await conn.commit()
 
             return SyncLinearResponse(
                 success=True,
@@ -1,10 +1,12 @@
 """RAG API routes."""
 
+import asyncio
+
 from fastapi import APIRouter, HTTPException
 
-from api.models.requests import RAGSearchRequest, RAGIngestRequest
-from api.models.responses import RAGSearchResponse, RAGIngestResponse
-from core.rag.tools import kb_search_client
+from api.models.requests import RAGBatchSearchRequest, RAGSearchRequest, RAGIngestRequest
+from api.models.responses import RAGBatchSearchResponse, RAGSearchResponse, RAGIngestResponse
+from core.rag.tools import kb_search_batch, kb_search_client
 from core.rag.ingestion import (
     stage_docs_from_dir,
     materialize_chunks_from_staging,
@@ -19,7 +21,8 @@ router = APIRouter()
 async def search_kb(request: RAGSearchRequest):
     """Search knowledge base."""
     try:
-        results = kb_search_client.invoke({
+        # ainvoke runs the sync tool in a worker thread (keeps the event loop free)
+        results = await kb_search_client.ainvoke({
             "query": request.query,
             "k": request.k,
             "search_type": request.search_type,
@@ -29,6 +32,8 @@ async def search_kb(request: RAGSearchRequest):
             "chunking": request.chunking,
             "use_hyde": request.use_hyde,
             "match_threshold": request.match_threshold,
+            "ef_search": request.ef_search,
+            "iterative_scan": request.iterative_scan,
         })
         
         return RAGSearchResponse(
@@ -40,19 +45,50 @@ async def search_kb(request: RAGSearchRequest):
         raise HTTPException(status_code=500, detail=f"Search error: {str(e)}")
 
 
+@router.post("/search/batch", response_model=RAGBatchSearchResponse)
+async def search_kb_batch(request: RAGBatchSearchRequest):
+    """Search knowledge base for several queries (one embedding call, one pipelined connection)."""
+    try:
+        results = await asyncio.to_thread(
+            kb_search_batch,
+            request.queries,
+            k=request.k,
+            search_type=request.search_type,
+            reranker=request.reranker,
+            client_id=request.client_id,
+            empresa=request.empresa,
+            chunking=request.chunking,
+            project_id=request.project_id,
+            use_hyde=request.use_hyde,
+            match_threshold=request.match_threshold,
+            ef_search=request.ef_search,
+            iterative_scan=request.iterative_scan,
+        )
+
+        return RAGBatchSearchResponse(
+            results=results,
+            queries=request.queries,
+            total=sum(len(r) for r in results),
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Batch search error: {str(e)}")
+
+
 @router.post("/ingest", response_model=RAGIngestResponse)
 async def ingest_documents(request: RAGIngestRequest):
     """Ingest documents into knowledge base."""
     try:
         # Stage documents
-        staged = stage_docs_from_dir(
+        staged = await asyncio.to_thread(
+            stage_docs_from_dir,
             request.base_dir,
             empresa=request.empresa,
             client_id=request.client_id
         )
         
         # Materialize chunks
-        chunked = materialize_chunks_from_staging(
+        chunked = await asyncio.to_thread(
+            materialize_chunks_from_staging,
             strategy=request.strategy,
             empresa=request.empresa,
             client_id=request.client_id,
@@ -69,27 +105,35 @@ async def ingest_documents(request: RAGIngestRequest):
         raise HTTPException(status_code=500, detail=f"Ingestion error: {str(e)}")
 
 
+@router.get("/embeddings/cache")
+async def get_embedding_cache_stats():
+    """Embedding cache hit/miss counters per model (this process)."""
+    from core.rag.embeddings import EmbeddingFactory
+
+    return EmbeddingFactory.cache_stats()
+
+
 @router.get("/stats/{empresa}")
 async def get_kb_stats(empresa: str, client_id: str = None):
     """Get knowledge base statistics."""
     try:
-        from core.database import get_conn
+        from core.database import get_aconn
         
-        with get_conn() as conn:
-            with conn.cursor() as cur:
+        async with get_aconn() as conn:
+            async with conn.cursor() as cur:
                 # Count documents
-                cur.execute(
+                await cur.execute(
                     "select count(*) from public.kb_docs where lower(empresa) = lower(%s)",
                     (empresa,)
                 )
-                doc_count = cur.fetchone()[0]
+                doc_count = (await cur.fetchone())[0]
                 
                 # Count chunks
-                cur.execute(
+                await cur.execute(
                     "select count(*) from public.kb_chunks where lower(empresa) = lower(%s)",
                     (empresa,)
                 )
-                chunk_count = cur.fetchone()[0]
+                chunk_count = (await cur.fetchone())[0]
                 
                 return {
                     "empresa": empresa,
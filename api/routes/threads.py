@@ -20,7 +20,7 @@ from fastapi import APIRouter, HTTPException
 from langchain_core.messages import BaseMessage
 
 from core.checkpointing import get_async_checkpointer
-from core.database import get_conn
+from core.database import get_aconn
 
 
 router = APIRouter()
@@ -138,9 +138,9 @@ async def list_threads() -> Dict[str, Any]:
     da lista (delete lógico), mas os dados permanecem para auditoria.
     """
     try:
-        with get_conn() as conn:
-            with conn.cursor() as cur:
-                cur.execute(
+        async with get_aconn() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(
                     """
                     SELECT
                         c.thread_id,
@@ -153,7 +153,7 @@ async def list_threads() -> Dict[str, Any]:
                     ORDER BY last_ts DESC NULLS LAST
                     """
                 )
-                rows = cur.fetchall()
+                rows = await cur.fetchall()
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao listar threads: {e}")
 
@@ -210,9 +210,9 @@ async def delete_thread(thread_id: str):
     mas oculta a sessão da lista retornada em /api/v1/threads.
     """
     try:
-        with get_conn() as conn:
-            with conn.cursor() as cur:
-                cur.execute(
+        async with get_aconn() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(
                     """
                     INSERT INTO archived_threads (thread_id)
                     VALUES (%s)
@@ -220,7 +220,7 @@ async def delete_thread(thread_id: str):
                     """,
                     (thread_id,),
                 )
-            conn.commit()
+            await conn.commit()
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao arquivar thread {thread_id}: {e}")
 
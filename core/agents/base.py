@@ -14,6 +14,9 @@ class BaseAgent(ABC):
     consistent behavior across different agent types.
     """
     
+    # Node a turn recorded with arecord_turn() is attributed to (graph then ends)
+    final_node: Optional[str] = None
+    
     def __init__(
         self,
         model: BaseChatModel,
@@ -97,6 +100,30 @@ class BaseAgent(ABC):
         async for chunk in graph.astream(input, config, **kwargs):
             yield chunk
     
+    async def ahas_history(self, config: Dict[str, Any]) -> bool:
+        """Whether the thread in config already has messages (False without a checkpointer).
+        
+        Args:
+            config: Configuration with thread_id
+        """
+        graph = self.create_graph()
+        if getattr(graph, "checkpointer", None) is None:
+            return False
+        state = await graph.aget_state(config)
+        return bool(state.values.get("messages"))
+    
+    async def arecord_turn(self, messages: List[BaseMessage], config: Dict[str, Any]) -> None:
+        """Append an already answered turn (e.g. a cached response) to the thread.
+        
+        Args:
+            messages: Human message and the response
+            config: Configuration with thread_id
+        """
+        graph = self.create_graph()
+        if getattr(graph, "checkpointer", None) is None:
+            return
+        await graph.aupdate_state(config, {"messages": messages}, as_node=self.final_node)
+    
     def add_tool(self, tool: BaseTool):
         """Add a tool to the agent.
         
@@ -0,0 +1,192 @@
+"""Process-wide LRU of compiled agents keyed by their configuration.
+
+Building an agent means a new ChatOpenAI client, a new ToolNode and a new
+graph compile. Requests with the same configuration reuse one compiled agent;
+anything request-specific (thread_id, project/RAG context) goes in the runtime
+config, never in the cached agent.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, Optional, Set
+
+from langchain_core.tools import BaseTool
+
+from core.agents.base import BaseAgent
+
+logger = logging.getLogger(__name__)
+
+AGENT_CACHE_SIZE = int(os.getenv("AGENT_GRAPH_CACHE_SIZE", "32"))
+
+
+@dataclass(frozen=True)
+class AgentKey:
+    """Everything that changes the compiled graph."""
+
+    agent_type: str
+    model_name: str
+    fast_model: Optional[str]
+    tools: tuple[str, ...]
+    enable_itil: bool
+    enable_planning: bool
+    prompt_hash: str
+    checkpointer_id: int
+
+
+def make_agent_key(
+    *,
+    agent_type: str,
+    model_name: str,
+    tools: Iterable[BaseTool],
+    system_prompt: Optional[str],
+    checkpointer: Any = None,
+    fast_model: Optional[str] = None,
+    enable_itil: bool = False,
+    enable_planning: bool = False,
+) -> AgentKey:
+    prompt_hash = hashlib.sha256((system_prompt or "").encode("utf-8")).hexdigest()
+    return AgentKey(
+        agent_type=agent_type,
+        model_name=model_name,
+        fast_model=fast_model,
+        tools=tuple(sorted(getattr(t, "name", repr(t)) for t in tools)),
+        enable_itil=enable_itil,
+        enable_planning=enable_planning,
+        prompt_hash=prompt_hash,
+        checkpointer_id=id(checkpointer) if checkpointer is not None else 0,
+    )
+
+
+class AgentGraphCache:
+    """Thread-safe LRU of agents with a compiled graph, evictable per DB agent id."""
+
+    def __init__(self, max_size: int = AGENT_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries: OrderedDict[AgentKey, BaseAgent] = OrderedDict()
+        self._by_agent_id: Dict[str, Set[AgentKey]] = {}
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def get_or_create(
+        self,
+        key: AgentKey,
+        factory: Callable[[], BaseAgent],
+        *,
+        agent_id: Optional[str] = None,
+    ) -> BaseAgent:
+        with self._lock:
+            agent = self._entries.get(key)
+            if agent is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return agent
+            self._misses += 1
+
+        # Build outside the lock; a concurrent miss on the same key just loses the race
+        agent = factory()
+        agent.create_graph()
+
+        with self._lock:
+            existing = self._entries.get(key)
+            if existing is not None:
+                return existing
+            self._entries[key] = agent
+            if agent_id:
+                self._by_agent_id.setdefault(str(agent_id), set()).add(key)
+            while len(self._entries) > self.max_size:
+                old_key, _ = self._entries.popitem(last=False)
+                self._forget(old_key)
+        logger.info(
+            "[AGENT CACHE] compiled %s (%s, %d tools)", key.agent_type, key.model_name, len(key.tools)
+        )
+        return agent
+
+    def _forget(self, key: AgentKey) -> None:
+        for aid, keys in list(self._by_agent_id.items()):
+            keys.discard(key)
+            if not keys:
+                del self._by_agent_id[aid]
+
+    def evict_agent(self, agent_id: str) -> int:
+        """Drop every compiled graph built for a DB agent (after admin updates)."""
+        with self._lock:
+            keys = self._by_agent_id.pop(str(agent_id), set())
+            for key in keys:
+                self._entries.pop(key, None)
+        if keys:
+            logger.info("[AGENT CACHE] evicted %d graph(s) for agent %s", len(keys), agent_id)
+        return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._by_agent_id.clear()
+            self._hits = self._misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"size": len(self._entries), "hits": self._hits, "misses": self._misses}
+
+
+agent_cache = AgentGraphCache()
+
+
+def get_or_build_agent(
+    *,
+    agent_type: str,
+    model_name: str,
+    tools: Iterable[BaseTool],
+    system_prompt: Optional[str],
+    checkpointer: Any = None,
+    fast_model_name: Optional[str] = None,
+    enable_itil: bool = False,
+    enable_planning: bool = False,
+    agent_id: Optional[str] = None,
+) -> BaseAgent:
+    """Return a cached SimpleAgent/UnifiedAgent for this configuration, building it once.
+
+    agent_type is "unified" (UnifiedAgent) or "simple" (SimpleAgent).
+    """
+    tools = list(tools)
+    unified = agent_type == "unified"
+    key = make_agent_key(
+        agent_type="unified" if unified else "simple",
+        model_name=model_name,
+        tools=tools,
+        system_prompt=system_prompt,
+        checkpointer=checkpointer,
+        fast_model=fast_model_name if unified else None,
+        enable_itil=enable_itil if unified else False,
+        enable_planning=enable_planning if unified else False,
+    )
+
+    def _build() -> BaseAgent:
+        if unified:
+            from core.agents.unified import UnifiedAgent
+
+            return UnifiedAgent(
+                model_name=model_name,
+                tools=tools,
+                checkpointer=checkpointer,
+                system_prompt=system_prompt,
+                enable_itil=enable_itil,
+                enable_planning=enable_planning,
+                fast_model_name=fast_model_name,
+            )
+        from core.agents.simple import SimpleAgent
+
+        return SimpleAgent(
+            model_name=model_name,
+            tools=tools,
+            checkpointer=checkpointer,
+            system_prompt=system_prompt,
+        )
+
+    return agent_cache.get_or_create(key, _build, agent_id=agent_id)
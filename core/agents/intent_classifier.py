@@ -0,0 +1,148 @@
+"""Local intent/ITIL pre-classifier for UnifiedAgent (no LLM, no extra deps).
+
+TF-IDF over accent-folded word stems and one centroid per
+(intent, ITIL category) pair, trained once per process from a labelled dataset
+in the docs/RAG/tests/intent_dataset.json format:
+
+    [{"prompt_template": "...", "expected": {"intent": "...", "categoria": "..."}}]
+
+Prediction is a handful of dict lookups (well under a millisecond). Its
+confidence is the cosine margin between the best and second-best intent,
+each scored by its closest centroid;
+UnifiedAgent only skips the router LLM call when it reaches
+LOCAL_INTENT_MIN_CONFIDENCE (ITIL/GUT stay with the LLM classifier).
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import math
+import os
+import re
+import unicodedata
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DATASET = Path(__file__).with_name("intent_dataset.json")
+LOCAL_INTENT_DATASET = os.getenv("LOCAL_INTENT_DATASET", str(DEFAULT_DATASET))
+LOCAL_INTENT_MIN_CONFIDENCE = float(os.getenv("LOCAL_INTENT_MIN_CONFIDENCE", "0.12"))
+
+# "e" is kept: it is what tells "liste X e crie Y" (multi_action) apart
+_STOPWORDS = frozenset(
+    "a o as os um uma uns umas de do da dos das no na nos nas em por para pra com "
+    "que ou se me te lhe eu voce ele ela meu minha seu sua isso esse essa este "
+    "esta ao aos pelo pela pelos pelas".split()
+)
+_WORD = re.compile(r"[a-z0-9]+")
+# "é" (verb) must not fold into "e" (conjunction); "e-mail" is one word
+_VERB_E = re.compile(r"\bé\b")
+_STEM_LEN = 6
+
+Vector = Dict[str, float]
+
+
+def _fold(text: str) -> str:
+    text = _VERB_E.sub("eh", text.lower()).replace("e-mail", "email")
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def tokenize(text: str) -> List[str]:
+    """Accent-folded word stems (first 6 chars), stopwords removed."""
+    return [w[:_STEM_LEN] for w in _WORD.findall(_fold(text or "")) if w not in _STOPWORDS]
+
+
+def _normalize(vec: Vector) -> Vector:
+    norm = math.sqrt(sum(v * v for v in vec.values()))
+    return {t: v / norm for t, v in vec.items()} if norm else {}
+
+
+@dataclass(frozen=True)
+class IntentPrediction:
+    intent: str
+    category: Optional[str]
+    confidence: float
+
+
+class LocalIntentClassifier:
+    """TF-IDF nearest-centroid classifier for intent and ITIL category."""
+
+    def __init__(self) -> None:
+        self._idf: Dict[str, float] = {}
+        self._centroids: Dict[Tuple[str, Optional[str]], Vector] = {}
+
+    def _vectorize(self, text: str) -> Vector:
+        counts = Counter(tokenize(text))
+        return _normalize(
+            {t: (1.0 + math.log(c)) * self._idf[t] for t, c in counts.items() if t in self._idf}
+        )
+
+    def fit(self, examples: Iterable[Tuple[str, str, Optional[str]]]) -> "LocalIntentClassifier":
+        """Train from (text, intent, category) triples."""
+        examples = list(examples)
+        if not examples:
+            raise ValueError("LocalIntentClassifier.fit requires at least one example")
+        df: Counter[str] = Counter()
+        for text, _, _ in examples:
+            df.update(set(tokenize(text)))
+        n = len(examples)
+        self._idf = {t: math.log((1 + n) / (1 + c)) + 1.0 for t, c in df.items()}
+
+        # One centroid per (intent, category): "it_request" alone mixes four
+        # unrelated ITIL categories and its centroid ends up too diffuse
+        sums: Dict[Tuple[str, Optional[str]], Vector] = defaultdict(lambda: defaultdict(float))
+        for text, intent, category in examples:
+            for t, v in self._vectorize(text).items():
+                sums[(intent, category)][t] += v
+        self._centroids = {label: _normalize(vec) for label, vec in sums.items()}
+        return self
+
+    def predict(self, text: str) -> IntentPrediction:
+        """Intent, ITIL category and confidence (0 when nothing is known about the text)."""
+        vec = self._vectorize(text)
+        scores = sorted(
+            (
+                (sum(v * c.get(t, 0.0) for t, v in vec.items()), label)
+                for label, c in self._centroids.items()
+            ),
+            reverse=True,
+        )
+        if not vec or not scores:
+            return IntentPrediction(intent="conversa_geral", category=None, confidence=0.0)
+        best, (intent, category) = scores[0]
+        # Margin against the next *intent*: two categories of the same intent
+        # close to each other do not make the intent itself uncertain
+        second = next((score for score, (other, _) in scores if other != intent), 0.0)
+        return IntentPrediction(intent=intent, category=category, confidence=round(best - second, 4))
+
+
+def load_examples(path: str | Path) -> List[Tuple[str, str, Optional[str]]]:
+    """(text, intent, category) triples from an intent dataset file.
+
+    Placeholders of prompt templates ("{nome}") are dropped; rows without an
+    expected intent are skipped.
+    """
+    rows = json.loads(Path(path).read_text(encoding="utf-8"))
+    examples = []
+    for row in rows:
+        expected = row.get("expected") or {}
+        text = row.get("prompt") or row.get("prompt_template") or ""
+        text = re.sub(r"\{[^}]*\}", " ", text).strip()
+        if text and expected.get("intent"):
+            examples.append((text, expected["intent"], expected.get("categoria")))
+    return examples
+
+
+@lru_cache(maxsize=None)
+def get_local_intent_classifier(path: str = LOCAL_INTENT_DATASET) -> LocalIntentClassifier:
+    """Classifier trained from the dataset, built once per process."""
+    examples = load_examples(path)
+    classifier = LocalIntentClassifier().fit(examples)
+    logger.info("[intent] local classifier trained on %d examples from %s", len(examples), path)
+    return classifier
@@ -3,15 +3,18 @@
 Replaces hardcoded tool construction in chat.py with a database-driven approach.
 """
 
+import asyncio
 import logging
 import os
-from dataclasses import dataclass, field
+import threading
+import time
+from dataclasses import dataclass, field, replace
 from typing import Any, Callable
 from uuid import UUID
 
 from psycopg.rows import dict_row
 
-from core.database import get_conn
+from core.database import get_aconn, get_conn
 
 logger = logging.getLogger(__name__)
 
@@ -90,53 +93,85 @@ SKILL_FLAG_MAP = {
 }
 
 
-def resolve(agent_id: str | UUID) -> ResolvedAgent:
-    """Resolve an agent definition from DB into runtime configuration.
+# Agent + enabled connectors + enabled skills + domain access in one round trip.
+# Aggregates are ordered so the built system prompt (and its cache key) is stable.
+_RESOLVE_SQL = """
+SELECT a.*,
+       COALESCE((SELECT array_agg(c.slug ORDER BY c.slug)
+                 FROM agent_connectors ac
+                 JOIN connectors c ON c.id = ac.connector_id
+                 WHERE ac.agent_id = a.id AND ac.enabled = true AND c.is_active = true),
+                '{}') AS connector_slugs,
+       COALESCE((SELECT json_agg(json_build_object('slug', s.slug, 'prompt_fragment', s.prompt_fragment)
+                                 ORDER BY s.slug)
+                 FROM agent_skills asks
+                 JOIN skills s ON s.id = asks.skill_id
+                 WHERE asks.agent_id = a.id AND asks.enabled = true AND s.is_active = true),
+                '[]') AS skill_rows,
+       COALESCE((SELECT json_agg(json_build_object('id', d.id, 'access_level', ad.access_level))
+                 FROM agent_domains ad
+                 JOIN knowledge_domains d ON d.id = ad.domain_id
+                 WHERE ad.agent_id = a.id AND d.is_active = true),
+                '[]') AS domain_rows
+FROM agents a
+WHERE a.id = %s AND a.is_active = true
+"""
 
-    Queries the agent, its connectors, skills, and domains,
-    then builds the tools list and system prompt.
-    """
-    aid = str(agent_id)
+_DEFAULT_AGENT_SQL = (
+    "SELECT id FROM agents WHERE org_id = %s AND is_default = true AND is_active = true LIMIT 1"
+)
+
+_DEFAULT_ORG_ID = "00000000-0000-0000-0000-000000000001"
+
+# ---------- Resolution cache ----------
+
+RESOLVE_CACHE_TTL = float(os.getenv("AGENT_RESOLVE_CACHE_TTL", "300"))
+AGENT_CONFIG_CHANNEL = "agent_config_changed"
+
+_resolved_cache: dict[str, tuple[float, ResolvedAgent]] = {}
+_resolved_lock = threading.Lock()
 
-    with get_conn() as conn:
-        with conn.cursor(row_factory=dict_row) as cur:
-            # Fetch agent
-            cur.execute(
-                "SELECT * FROM agents WHERE id = %s AND is_active = true",
-                (aid,),
-            )
-            agent = cur.fetchone()
-            if not agent:
-                logger.warning("Agent %s not found or inactive", aid)
-                return ResolvedAgent()
-
-            # Fetch enabled connectors
-            cur.execute(
-                """SELECT c.slug FROM agent_connectors ac
-                   JOIN connectors c ON c.id = ac.connector_id
-                   WHERE ac.agent_id = %s AND ac.enabled = true AND c.is_active = true""",
-                (aid,),
-            )
-            connector_slugs = [r["slug"] for r in cur.fetchall()]
-
-            # Fetch enabled skills
-            cur.execute(
-                """SELECT s.slug, s.prompt_fragment FROM agent_skills asks
-                   JOIN skills s ON s.id = asks.skill_id
-                   WHERE asks.agent_id = %s AND asks.enabled = true AND s.is_active = true""",
-                (aid,),
-            )
-            skill_rows = cur.fetchall()
-            skill_slugs = [r["slug"] for r in skill_rows]
-
-            # Fetch domain access
-            cur.execute(
-                """SELECT d.id, ad.access_level FROM agent_domains ad
-                   JOIN knowledge_domains d ON d.id = ad.domain_id
-                   WHERE ad.agent_id = %s AND d.is_active = true""",
-                (aid,),
-            )
-            domain_rows = cur.fetchall()
+
+def _cache_get(aid: str) -> ResolvedAgent | None:
+    if RESOLVE_CACHE_TTL <= 0:
+        return None
+    with _resolved_lock:
+        entry = _resolved_cache.get(aid)
+        if entry is None:
+            return None
+        expires_at, resolved = entry
+        if expires_at < time.monotonic():
+            del _resolved_cache[aid]
+            return None
+    return _copy(resolved)
+
+
+def _copy(resolved: ResolvedAgent) -> ResolvedAgent:
+    """Callers get their own lists; the cached entry stays untouched."""
+    return replace(resolved, tools=list(resolved.tools), skill_slugs=list(resolved.skill_slugs))
+
+
+def _cache_put(aid: str, resolved: ResolvedAgent) -> None:
+    if RESOLVE_CACHE_TTL <= 0:
+        return
+    with _resolved_lock:
+        _resolved_cache[aid] = (time.monotonic() + RESOLVE_CACHE_TTL, resolved)
+
+
+def invalidate_resolved(agent_id: str | UUID | None = None) -> None:
+    """Drop cached ResolvedAgent for one agent, or all agents when agent_id is None."""
+    with _resolved_lock:
+        if agent_id is None:
+            _resolved_cache.clear()
+        else:
+            _resolved_cache.pop(str(agent_id), None)
+
+
+def _build_resolved(agent: dict) -> ResolvedAgent:
+    """Build tools list, system prompt and flags from the agent row (see _RESOLVE_SQL)."""
+    connector_slugs = list(agent.get("connector_slugs") or [])
+    skill_rows = agent.get("skill_rows") or []
+    domain_rows = agent.get("domain_rows") or []
 
     # Build tools list from connectors
     tools = []
@@ -144,8 +179,9 @@ def resolve(agent_id: str | UUID) -> ResolvedAgent:
         factory = CONNECTOR_TOOL_REGISTRY.get(slug)
         if factory:
             try:
-                tools.extend(factory())
-                logger.info("Resolved connector '%s' -> %d tools", slug, len(factory()))
+                connector_tools = factory()
+                tools.extend(connector_tools)
+                logger.info("Resolved connector '%s' -> %d tools", slug, len(connector_tools))
             except Exception as e:
                 logger.warning("Failed to load tools for connector '%s': %s", slug, e)
 
@@ -161,6 +197,7 @@ def resolve(agent_id: str | UUID) -> ResolvedAgent:
     system_prompt = "\n\n".join(prompt_parts) if prompt_parts else None
 
     # Determine flags from skills
+    skill_slugs = [r["slug"] for r in skill_rows]
     enable_itil = any(s in SKILL_FLAG_MAP for s in skill_slugs)
     enable_planning = "planning" in connector_slugs
 
@@ -183,22 +220,113 @@ def resolve(agent_id: str | UUID) -> ResolvedAgent:
     )
 
 
+def resolve(agent_id: str | UUID) -> ResolvedAgent:
+    """Resolve an agent definition from DB into runtime configuration.
+
+    Loads the agent with its connectors, skills, and domains in one query,
+    then builds the tools list and system prompt. Results are cached for
+    AGENT_RESOLVE_CACHE_TTL seconds and invalidated on admin changes.
+    """
+    aid = str(agent_id)
+    cached = _cache_get(aid)
+    if cached is not None:
+        return cached
+
+    with get_conn() as conn:
+        with conn.cursor(row_factory=dict_row) as cur:
+            cur.execute(_RESOLVE_SQL, (aid,))
+            agent = cur.fetchone()
+
+    if not agent:
+        logger.warning("Agent %s not found or inactive", aid)
+        return ResolvedAgent()
+
+    resolved = _build_resolved(agent)
+    _cache_put(aid, resolved)
+    return _copy(resolved)
+
+
+async def aresolve(agent_id: str | UUID) -> ResolvedAgent:
+    """Async variant of resolve() for request handlers (uses the shared async pool)."""
+    aid = str(agent_id)
+    cached = _cache_get(aid)
+    if cached is not None:
+        return cached
+
+    async with get_aconn() as conn:
+        async with conn.cursor(row_factory=dict_row) as cur:
+            await cur.execute(_RESOLVE_SQL, (aid,))
+            agent = await cur.fetchone()
+
+    if not agent:
+        logger.warning("Agent %s not found or inactive", aid)
+        return ResolvedAgent()
+
+    resolved = _build_resolved(agent)
+    _cache_put(aid, resolved)
+    return _copy(resolved)
+
+
+async def listen_for_agent_changes(reconnect_delay: float = 5.0) -> None:
+    """Drop cached agents when the DB announces changes (sql/kb/16_agent_config_notify.sql).
+
+    Keeps several API replicas coherent. Runs until cancelled; reconnects on errors.
+    """
+    import psycopg
+
+    from core.agents.cache import agent_cache
+    from core.database import get_db_url
+
+    while True:
+        try:
+            async with await psycopg.AsyncConnection.connect(
+                get_db_url(), autocommit=True
+            ) as conn:
+                await conn.execute(f"LISTEN {AGENT_CONFIG_CHANNEL}")
+                # Changes made while we were disconnected are unknown: start clean
+                invalidate_resolved()
+                agent_cache.clear()
+                logger.info("Listening for agent config changes on '%s'", AGENT_CONFIG_CHANNEL)
+                async for notify in conn.notifies():
+                    if notify.payload in ("", "*"):
+                        invalidate_resolved()
+                        agent_cache.clear()
+                    else:
+                        invalidate_resolved(notify.payload)
+                        agent_cache.evict_agent(notify.payload)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning("Agent config listener error: %s (retry in %.0fs)", e, reconnect_delay)
+            await asyncio.sleep(reconnect_delay)
+
+
 def resolve_default(org_id: str | UUID | None = None) -> ResolvedAgent | None:
     """Resolve the default agent for an organization."""
-    oid = str(org_id) if org_id else "00000000-0000-0000-0000-000000000001"
+    oid = str(org_id) if org_id else _DEFAULT_ORG_ID
 
     with get_conn() as conn:
         with conn.cursor(row_factory=dict_row) as cur:
-            cur.execute(
-                "SELECT id FROM agents WHERE org_id = %s AND is_default = true AND is_active = true LIMIT 1",
-                (oid,),
-            )
+            cur.execute(_DEFAULT_AGENT_SQL, (oid,))
             row = cur.fetchone()
             if not row:
                 return None
             return resolve(row["id"])
 
 
+async def aresolve_default(org_id: str | UUID | None = None) -> ResolvedAgent | None:
+    """Async variant of resolve_default()."""
+    oid = str(org_id) if org_id else _DEFAULT_ORG_ID
+
+    async with get_aconn() as conn:
+        async with conn.cursor(row_factory=dict_row) as cur:
+            await cur.execute(_DEFAULT_AGENT_SQL, (oid,))
+            row = await cur.fetchone()
+    if not row:
+        return None
+    return await aresolve(row["id"])
+
+
 def resolve_for_legacy(
     *,
     use_tavily: bool = False,
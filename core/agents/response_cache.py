@@ -0,0 +1,299 @@
+"""Opt-in semantic cache of chat responses (SEMANTIC_CACHE_ENABLED=true).
+
+A chat turn is looked up by the embedding of the user message among the
+responses stored in the last SEMANTIC_CACHE_TTL seconds (the data-freshness
+window) for the same agent configuration: model, tools, system prompt and
+request context (response_cache_key). A match with cosine similarity >=
+SEMANTIC_CACHE_THRESHOLD is answered without running the agent: one embedding
+(itself cached by CachedEmbeddings) plus one indexed query, no LLM tokens.
+
+Only first turns of a thread are eligible (follow-ups depend on history), and
+only turns that ended in an AI answer, without error, after calling no tool or
+only tools of READ_ONLY_TOOLS are stored. Rows live in public.chat_semantic_cache
+(sql/kb/22_chat_semantic_cache.sql); expired rows and rows beyond
+SEMANTIC_CACHE_MAX_ENTRIES are evicted every SEMANTIC_CACHE_EVICT_EVERY stores.
+
+Fire-and-forget: errors are logged and treated as misses, never raised.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import hashlib
+import json
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Mapping, Optional, Sequence
+
+from langchain_core.embeddings import Embeddings
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.tools import BaseTool
+
+from core.agents.cache import make_agent_key
+from core.rag.vector_adapter import Vector
+
+logger = logging.getLogger(__name__)
+
+SEMANTIC_CACHE_ENABLED = (
+    os.getenv("SEMANTIC_CACHE_ENABLED", "false").strip().lower() in {"1", "true", "yes"}
+)
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95"))
+SEMANTIC_CACHE_TTL = int(os.getenv("SEMANTIC_CACHE_TTL", "300"))
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "10000"))
+SEMANTIC_CACHE_EVICT_EVERY = int(os.getenv("SEMANTIC_CACHE_EVICT_EVERY", "100"))
+SEMANTIC_CACHE_EMBEDDING_MODEL = os.getenv("SEMANTIC_CACHE_EMBEDDING_MODEL", "openai")
+# Dimension of chat_semantic_cache.embedding
+SEMANTIC_CACHE_DIMS = 1536
+
+# Tools whose answer depends only on their arguments and the source data.
+# A new tool is not cacheable until it is listed here.
+READ_ONLY_TOOLS = frozenset({
+    "glpi_get_ticket_details",
+    "glpi_get_tickets",
+    "image_search",
+    "kb_search_client",
+    "linear_get_issue",
+    "linear_get_issues",
+    "linear_get_teams",
+    "planning_get_project",
+    "planning_list_projects",
+    "search_project_knowledge",
+    "tavily_search",
+    "wareline_search_tables",
+    "zabbix_get_alerts",
+    "zabbix_get_host",
+})
+
+
+def is_read_only_tool(name: str) -> bool:
+    return name in READ_ONLY_TOOLS
+
+
+def is_cacheable_turn(messages: Sequence[BaseMessage]) -> bool:
+    """True when the turn called no tool or only read-only tools."""
+    for message in messages:
+        for call in getattr(message, "tool_calls", None) or []:
+            if not is_read_only_tool(call.get("name", "")):
+                return False
+    return True
+
+
+def cacheable_answer(state: Mapping[str, Any]) -> Optional[AIMessage]:
+    """Final AI message of a finished turn, or None when the turn must not be stored.
+
+    A failed model call leaves "error" in the state and the user's own message
+    last; a turn that stopped at a tool call has no answer yet.
+    """
+    if state.get("error"):
+        return None
+    messages = state.get("messages") or []
+    if not messages:
+        return None
+    last = messages[-1]
+    if not isinstance(last, AIMessage) or last.tool_calls:
+        return None
+    return last if is_cacheable_turn(messages) else None
+
+
+def response_cache_key(
+    *,
+    agent_type: str,
+    model_name: str,
+    tools: Iterable[BaseTool],
+    system_prompt: Optional[str],
+    request_context: str = "",
+    enable_itil: bool = False,
+    enable_planning: bool = False,
+) -> str:
+    """Cache partition of a turn: everything but the message that changes the answer."""
+    agent_key = make_agent_key(
+        agent_type=agent_type,
+        model_name=model_name,
+        tools=tools,
+        system_prompt=system_prompt,
+        enable_itil=enable_itil,
+        enable_planning=enable_planning,
+    )
+    payload = json.dumps([dataclasses.astuple(agent_key), request_context or ""], default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    response: str
+    query: str
+    similarity: float
+
+
+class PostgresResponseStore:
+    """public.chat_semantic_cache through the async pool (core.database)."""
+
+    async def nearest(
+        self, config_key: str, embedding: Sequence[float], ttl: int
+    ) -> Optional[CachedResponse]:
+        from core.database import get_aconn
+
+        vec = Vector(embedding)
+        async with get_aconn() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(
+                    """
+                    select id, query, response, 1 - (embedding <=> %(vec)s) as similarity
+                    from public.chat_semantic_cache
+                    where config_key = %(key)s
+                      and created_at > now() - make_interval(secs => %(ttl)s)
+                    order by embedding <=> %(vec)s
+                    limit 1
+                    """,
+                    {"vec": vec, "key": config_key, "ttl": ttl},
+                )
+                row = await cur.fetchone()
+                if not row:
+                    return None
+                await cur.execute(
+                    "update public.chat_semantic_cache set hits = hits + 1, last_hit_at = now() "
+                    "where id = %s",
+                    (row[0],),
+                )
+        return CachedResponse(response=row[2], query=row[1], similarity=float(row[3]))
+
+    async def put(
+        self,
+        config_key: str,
+        query: str,
+        response: str,
+        embedding: Sequence[float],
+    ) -> None:
+        from core.database import get_aconn
+
+        async with get_aconn() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(
+                    """
+                    insert into public.chat_semantic_cache (config_key, query, response, embedding)
+                    values (%s, %s, %s, %s)
+                    """,
+                    (config_key, query, response, Vector(embedding)),
+                )
+
+    async def evict(self, ttl: int, max_entries: int) -> None:
+        """Drop expired rows and rows older than the newest max_entries.
+
+        The cutoff is read from idx_chat_semantic_cache_created (backward index
+        scan, no sort); both predicates are range scans on the same index.
+        """
+        from core.database import get_aconn
+
+        async with get_aconn() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(
+                    """
+                    delete from public.chat_semantic_cache
+                    where created_at < now() - make_interval(secs => %(ttl)s)
+                       or created_at < (
+                           select created_at from public.chat_semantic_cache
+                           order by created_at desc
+                           offset %(keep)s limit 1
+                       )
+                    """,
+                    {"ttl": ttl, "keep": max(0, max_entries)},
+                )
+
+
+class SemanticResponseCache:
+    """Embedding-similarity cache of agent responses with hit/miss counters."""
+
+    def __init__(
+        self,
+        embeddings: Optional[Embeddings] = None,
+        store: Optional[Any] = None,
+        *,
+        threshold: float = SEMANTIC_CACHE_THRESHOLD,
+        ttl: int = SEMANTIC_CACHE_TTL,
+        max_entries: int = SEMANTIC_CACHE_MAX_ENTRIES,
+        evict_every: int = SEMANTIC_CACHE_EVICT_EVERY,
+    ):
+        self._embeddings = embeddings
+        self._store = store if store is not None else PostgresResponseStore()
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.evict_every = max(1, evict_every)
+        self._since_evict = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "stores": 0, "errors": 0}
+
+    def _get_embeddings(self) -> Embeddings:
+        if self._embeddings is None:
+            from core.rag.embeddings import EmbeddingFactory
+
+            dims = EmbeddingFactory.get_metadata(SEMANTIC_CACHE_EMBEDDING_MODEL)["dims"]
+            if dims != SEMANTIC_CACHE_DIMS:
+                raise RuntimeError(
+                    f"SEMANTIC_CACHE_EMBEDDING_MODEL precisa de {SEMANTIC_CACHE_DIMS} dimensões "
+                    f"(chat_semantic_cache.embedding); {SEMANTIC_CACHE_EMBEDDING_MODEL} tem {dims}"
+                )
+            self._embeddings = EmbeddingFactory.get_model(SEMANTIC_CACHE_EMBEDDING_MODEL)
+        return self._embeddings
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self._stats[key] += 1
+
+    def stats(self) -> Dict[str, float]:
+        """Hit/miss counters (this process)."""
+        with self._lock:
+            stats: Dict[str, float] = dict(self._stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+    def clear_stats(self) -> None:
+        with self._lock:
+            self._stats = {"hits": 0, "misses": 0, "stores": 0, "errors": 0}
+
+    async def lookup(self, config_key: str, message: str) -> Optional[CachedResponse]:
+        """Closest fresh response for this configuration, if similar enough."""
+        try:
+            embedding = await self._get_embeddings().aembed_query(message)
+            found = await self._store.nearest(config_key, embedding, self.ttl)
+        except Exception as e:
+            logger.warning("[semantic cache] lookup failed: %s", e)
+            self._count("errors")
+            self._count("misses")
+            return None
+        if found is None or found.similarity < self.threshold:
+            self._count("misses")
+            return None
+        self._count("hits")
+        logger.info("[semantic cache] hit (similarity=%.3f)", found.similarity)
+        return found
+
+    async def store(self, config_key: str, message: str, response: str) -> None:
+        """Remember a response (embedding of the message is already cached by the lookup)."""
+        if not response:
+            return
+        try:
+            embedding = await self._get_embeddings().aembed_query(message)
+            await self._store.put(config_key, message, response, embedding)
+            self._count("stores")
+        except Exception as e:
+            logger.warning("[semantic cache] store failed: %s", e)
+            self._count("errors")
+            return
+        with self._lock:
+            self._since_evict += 1
+            due = self._since_evict >= self.evict_every
+            if due:
+                self._since_evict = 0
+        if due:
+            try:
+                await self._store.evict(self.ttl, self.max_entries)
+            except Exception as e:
+                logger.warning("[semantic cache] eviction failed: %s", e)
+                self._count("errors")
+
+
+response_cache = SemanticResponseCache()
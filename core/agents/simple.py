@@ -14,7 +14,7 @@ from langchain_core.tools import BaseTool
 from langchain_openai import ChatOpenAI
 
 from core.agents.base import BaseAgent
-from core.middleware.dynamic import DynamicSettingsMiddleware
+from core.middleware.dynamic import DynamicSettingsMiddleware, RequestContextMiddleware
 from typing import Dict, Any
 
 
@@ -42,6 +42,8 @@ class SimpleAgent(BaseAgent):
     - Configurable system prompts
     """
     
+    final_node = "model"
+    
     def __init__(
         self,
         model_name: str,
@@ -105,7 +107,8 @@ class SimpleAgent(BaseAgent):
             Compiled LangGraph graph
         """
         if self._graph is None:
-            middlewares = []
+            # Per-request context comes from the runtime config (graph is reusable)
+            middlewares = [RequestContextMiddleware()]
             if self.use_dynamic_middleware:
                 middlewares.append(DynamicSettingsMiddleware())
             
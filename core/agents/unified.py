@@ -8,23 +8,30 @@ This agent orchestrates:
 - Executor: Tool execution (from SimpleAgent)
 """
 
+import json
 import os
 from datetime import datetime
 from zoneinfo import ZoneInfo
-from typing import Annotated, Any, Dict, List, Literal, Optional, TypedDict
+from typing import Annotated, Any, Dict, List, Literal, Optional, Tuple, TypedDict
 from enum import Enum
 
 from dotenv import load_dotenv
 from langchain_core.messages import AnyMessage, HumanMessage, AIMessage, SystemMessage, ToolMessage
 from langchain_core.tools import BaseTool
 from langchain_openai import ChatOpenAI
+from langgraph.constants import TAG_NOSTREAM
 from langgraph.graph import StateGraph, START, END
 from langgraph.graph.message import add_messages
 from langgraph.prebuilt import ToolNode, tools_condition
 
-from langchain_core.runnables import RunnableConfig
+from langchain_core.runnables import RunnableConfig, RunnableLambda
 from core.agents.base import BaseAgent
-from core.middleware.dynamic import sanitize_image_messages
+from core.agents.intent_classifier import (
+    LOCAL_INTENT_MIN_CONFIDENCE,
+    IntentPrediction,
+    get_local_intent_classifier,
+)
+from core.middleware.dynamic import request_context_from_config, sanitize_image_messages
 
 
 load_dotenv()
@@ -32,6 +39,16 @@ load_dotenv()
 DEFAULT_OPENROUTER_BASE_URL = os.getenv("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1")
 DEBUG_AGENT_LOGS = os.getenv("DEBUG_AGENT_LOGS", "false").strip().lower() in {"1", "true", "yes"}
 
+# How ITIL mode triages a message before the executor:
+# - sequential: router → classifier → planner → executor (one LLM call at a time)
+# - parallel: router and classifier fan out together; planner runs next to the executor
+# - merged: one JSON call returns intent + ITIL/GUT; planner runs next to the executor
+ROUTING_MODES = ("sequential", "parallel", "merged")
+UNIFIED_ROUTING_MODE = os.getenv("UNIFIED_ROUTING_MODE", "sequential").strip().lower()
+# Local TF-IDF pre-classifier (core.agents.intent_classifier) in place of the router LLM;
+# ITIL category and GUT always come from the LLM classifier
+UNIFIED_LOCAL_TRIAGE = os.getenv("UNIFIED_LOCAL_TRIAGE", "false").strip().lower() in {"1", "true", "yes"}
+
 
 def dbg(*args):
     """Debug logging helper."""
@@ -42,6 +59,20 @@ def dbg(*args):
             pass
 
 
+def _node(name: str, func, afunc) -> RunnableLambda:
+    """Graph node with a sync body (graph.invoke) and an async one (ainvoke/astream)."""
+    return RunnableLambda(func, afunc=afunc, name=name)
+
+
+def _strip_code_fence(content: str) -> str:
+    """Extract JSON from markdown code blocks if present."""
+    if "```json" in content:
+        return content.split("```json")[1].split("```")[0]
+    if "```" in content:
+        return content.split("```")[1].split("```")[0]
+    return content
+
+
 # --- Enums ---
 
 class Intent(str, Enum):
@@ -52,6 +83,10 @@ class Intent(str, Enum):
     WEB_SEARCH = "web_search"
 
 
+# Intents that go through ITIL classification (and planning)
+ITIL_INTENTS = (Intent.IT_REQUEST.value, Intent.MULTI_ACTION.value)
+
+
 class TaskCategory(str, Enum):
     """ITIL Task Categories."""
     INCIDENTE = "incidente"
@@ -153,6 +188,31 @@ Responda em JSON:
     "justificativa": "breve explicação"
 }"""
 
+TRIAGE_SYSTEM_PROMPT = """Você é um roteador de intenções e Especialista em Gestão de Serviços de TI (ITIL).
+Classifique a mensagem do usuário em UMA intenção:
+
+- conversa_geral: Saudações, perguntas genéricas, conversas informais
+- it_request: Solicitações de TI (tickets, alertas, monitoramento, GLPI, Zabbix)
+- multi_action: Múltiplas ações em uma mensagem ("liste tickets e depois crie um alerta")
+- web_search: Busca de informações na internet
+
+E em UMA categoria ITIL:
+
+- INCIDENTE: Interrupção inesperada de serviço ou degradação
+- PROBLEMA: Causa raiz de incidentes recorrentes
+- MUDANÇA: Alteração planejada em sistemas/infraestrutura
+- REQUISIÇÃO: Solicitação de serviço padrão
+- CONVERSA: Conversa geral, não relacionada a TI
+
+Responda em JSON:
+{
+    "intent": "conversa_geral|it_request|multi_action|web_search",
+    "categoria": "INCIDENTE|PROBLEMA|MUDANÇA|REQUISIÇÃO|CONVERSA",
+    "gravidade": 1-5,
+    "urgencia": 1-5,
+    "tendencia": 1-5
+}"""
+
 PLANNER_SYSTEM_PROMPT = """Você é um planejador de ações de TI.
 Dado o contexto e a categoria ITIL, crie um plano de ação.
 
@@ -184,6 +244,8 @@ class UnifiedAgent(BaseAgent):
     - Tool execution with streaming
     """
     
+    final_node = "responder"
+    
     def __init__(
         self,
         model_name: str = "google/gemini-2.5-flash",
@@ -197,6 +259,8 @@ class UnifiedAgent(BaseAgent):
         openrouter_base_url: str = DEFAULT_OPENROUTER_BASE_URL,
         temperature: float = 0.2,
         fast_model_name: Optional[str] = None,
+        routing_mode: Optional[str] = None,
+        local_triage: Optional[bool] = None,
     ):
         """Initialize unified agent.
         
@@ -212,7 +276,15 @@ class UnifiedAgent(BaseAgent):
             openrouter_base_url: OpenRouter base URL.
             temperature: Model temperature.
             fast_model_name: Optional cheaper model for router/classifier (tiered).
+            routing_mode: ITIL triage mode, one of ROUTING_MODES
+                (default: UNIFIED_ROUTING_MODE).
+            local_triage: Answer the router with the local pre-classifier when
+                it is confident (default: UNIFIED_LOCAL_TRIAGE).
         """
+        routing_mode = (routing_mode or UNIFIED_ROUTING_MODE).strip().lower()
+        if routing_mode not in ROUTING_MODES:
+            raise ValueError(f"routing_mode inválido: {routing_mode!r} (use {', '.join(ROUTING_MODES)})")
+
         api_key = openrouter_api_key or os.getenv("OPENROUTER_API_KEY")
         if not api_key:
             raise RuntimeError("Defina OPENROUTER_API_KEY para inicializar o agente.")
@@ -256,6 +328,8 @@ class UnifiedAgent(BaseAgent):
         self.enable_itil = enable_itil
         self.enable_planning = enable_planning
         self.enable_confirmation = enable_confirmation
+        self.routing_mode = routing_mode
+        self.local_triage = UNIFIED_LOCAL_TRIAGE if local_triage is None else local_triage
         self.checkpointer = checkpointer
         self.openrouter_api_key = api_key
         self.openrouter_base_url = openrouter_base_url
@@ -277,8 +351,8 @@ class UnifiedAgent(BaseAgent):
         builder = StateGraph(UnifiedAgentState)
         
         # Add nodes based on configuration
-        builder.add_node("executor", self._executor_node)
-        builder.add_node("responder", self._responder_node)
+        builder.add_node("executor", _node("executor", self._executor_node, self._aexecutor_node))
+        builder.add_node("responder", _node("responder", self._responder_node, self._aresponder_node))
         
         # Add tool node if tools available
         if self.tools:
@@ -289,11 +363,27 @@ class UnifiedAgent(BaseAgent):
         if not self.enable_itil:
             # Direct path: START → executor → (tools loop) → responder → END
             builder.add_edge(START, "executor")
+        elif self.routing_mode == "merged":
+            # One LLM call for intent + ITIL/GUT
+            builder.add_node("triage", _node("triage", self._triage_node, self._atriage_node))
+            builder.add_node("planner", _node("planner", self._planner_node, self._aplanner_node))
+            builder.add_edge(START, "triage")
+            builder.add_conditional_edges("triage", self._route_after_triage, ["planner", "executor"])
+        elif self.routing_mode == "parallel":
+            # Router and classifier both read only the last HumanMessage: run them together
+            builder.add_node("router", _node("router", self._router_node, self._arouter_node))
+            builder.add_node("classifier", _node("classifier", self._classifier_node, self._aclassifier_node))
+            builder.add_node("join", _node("join", self._join_node, self._ajoin_node))
+            builder.add_node("planner", _node("planner", self._planner_node, self._aplanner_node))
+            builder.add_edge(START, "router")
+            builder.add_edge(START, "classifier")
+            builder.add_edge(["router", "classifier"], "join")
+            builder.add_conditional_edges("join", self._route_after_triage, ["planner", "executor"])
         else:
             # Full ITIL path with router and classifier
-            builder.add_node("router", self._router_node)
-            builder.add_node("classifier", self._classifier_node)
-            builder.add_node("planner", self._planner_node)
+            builder.add_node("router", _node("router", self._router_node, self._arouter_node))
+            builder.add_node("classifier", _node("classifier", self._classifier_node, self._aclassifier_node))
+            builder.add_node("planner", _node("planner", self._planner_node, self._aplanner_node))
             
             builder.add_edge(START, "router")
             
@@ -328,6 +418,10 @@ class UnifiedAgent(BaseAgent):
             # No tools: direct path to responder
             builder.add_edge("executor", "responder")
         
+        # Planner off the critical path (parallel/merged): it only feeds state["plan"]
+        if self.enable_itil and self.routing_mode != "sequential":
+            builder.add_edge("planner", END)
+        
         # Responder → END
         builder.add_edge("responder", END)
         
@@ -336,125 +430,226 @@ class UnifiedAgent(BaseAgent):
         return self._graph
     
     # --- Node Implementations ---
+    #
+    # Router, classifier, planner and executor each have a sync and an async
+    # variant sharing prompt building and response parsing. create_graph
+    # registers both, so graph.invoke() calls model.invoke() while
+    # graph.ainvoke()/astream() await model.ainvoke() on the event loop.
+
+    @property
+    def _routing_model(self):
+        """Model for router/classifier/planner (tiered: fast model if available).
+
+        Tagged nostream: their raw output (intent, JSON) never reaches
+        stream_mode="messages"; only the executor's tokens are streamed.
+        """
+        model = self._fast_model if self._fast_model else self.model
+        return model.with_config(tags=[TAG_NOSTREAM])
+
+    def _local_prediction(self, content: Any) -> Optional[IntentPrediction]:
+        """Local pre-classifier answer when confident; None sends the message to the LLM."""
+        if not self.local_triage or not isinstance(content, str):
+            return None
+        prediction = get_local_intent_classifier().predict(content)
+        if prediction.confidence < LOCAL_INTENT_MIN_CONFIDENCE:
+            return None
+        dbg(f"Local triage: {prediction}")
+        return prediction
     
-    def _router_node(self, state: UnifiedAgentState) -> Dict[str, Any]:
-        """Route user message to appropriate handler."""
-        dbg("Router node executing...")
-        
+    def _router_request(
+        self, state: UnifiedAgentState, system_prompt: str = ROUTER_SYSTEM_PROMPT
+    ) -> Tuple[Optional[List[AnyMessage]], Dict[str, Any]]:
+        """Router (or merged triage) LLM input, or (None, result) when no LLM call is needed."""
         messages = state.get("messages", [])
         if not messages:
-            return {"intent": Intent.CONVERSA_GERAL.value, "error": "No messages"}
+            return None, {"intent": Intent.CONVERSA_GERAL.value, "error": "No messages"}
         
         last_message = messages[-1]
         if not isinstance(last_message, HumanMessage):
-            return {"intent": Intent.CONVERSA_GERAL.value}
+            return None, {"intent": Intent.CONVERSA_GERAL.value}
         
         user_content = last_message.content
         dbg(f"Routing message: {user_content[:100]}...")
+        local = self._local_prediction(user_content)
+        if local is not None:
+            # Merged triage still needs the LLM for the GUT of IT intents
+            if system_prompt != TRIAGE_SYSTEM_PROMPT or local.intent not in ITIL_INTENTS:
+                return None, {"intent": local.intent}
+        return [
+            SystemMessage(content=system_prompt),
+            HumanMessage(content=user_content)
+        ], {}
+    
+    def _parse_intent(self, response: AIMessage) -> Dict[str, Any]:
+        """Map the router's answer to an Intent."""
+        return self._intent_from_text(response.content)
+    
+    def _intent_from_text(self, text: str) -> Dict[str, Any]:
+        intent_text = text.strip().lower()
         
-        # Use LLM to classify intent (tiered: fast model if available)
-        model = self._fast_model if self._fast_model else self.model
+        # Map to enum
+        if "it_request" in intent_text or "it" in intent_text:
+            intent = Intent.IT_REQUEST.value
+        elif "multi" in intent_text:
+            intent = Intent.MULTI_ACTION.value
+        elif "web" in intent_text or "search" in intent_text:
+            intent = Intent.WEB_SEARCH.value
+        else:
+            intent = Intent.CONVERSA_GERAL.value
+        
+        dbg(f"Classified intent: {intent}")
+        return {"intent": intent}
+    
+    def _router_node(self, state: UnifiedAgentState) -> Dict[str, Any]:
+        """Route user message to appropriate handler."""
+        dbg("Router node executing...")
+        request, result = self._router_request(state)
+        if request is None:
+            return result
         try:
-            response = model.invoke([
-                SystemMessage(content=ROUTER_SYSTEM_PROMPT),
-                HumanMessage(content=user_content)
-            ])
-            
-            intent_text = response.content.strip().lower()
-            
-            # Map to enum
-            if "it_request" in intent_text or "it" in intent_text:
-                intent = Intent.IT_REQUEST.value
-            elif "multi" in intent_text:
-                intent = Intent.MULTI_ACTION.value
-            elif "web" in intent_text or "search" in intent_text:
-                intent = Intent.WEB_SEARCH.value
-            else:
-                intent = Intent.CONVERSA_GERAL.value
-            
-            dbg(f"Classified intent: {intent}")
-            return {"intent": intent}
-            
+            return self._parse_intent(self._routing_model.invoke(request))
         except Exception as e:
             dbg(f"Router error: {e}")
             return {"intent": Intent.CONVERSA_GERAL.value, "error": str(e)}
     
-    def _classifier_node(self, state: UnifiedAgentState) -> Dict[str, Any]:
-        """Classify request using ITIL methodology."""
-        dbg("Classifier node executing...")
-        
+    async def _arouter_node(self, state: UnifiedAgentState, config: RunnableConfig) -> Dict[str, Any]:
+        """Async variant of _router_node."""
+        dbg("Router node executing (async)...")
+        request, result = self._router_request(state)
+        if request is None:
+            return result
+        try:
+            return self._parse_intent(await self._routing_model.ainvoke(request, config))
+        except Exception as e:
+            dbg(f"Router error: {e}")
+            return {"intent": Intent.CONVERSA_GERAL.value, "error": str(e)}
+    
+    def _classifier_request(self, state: UnifiedAgentState) -> Tuple[Optional[List[AnyMessage]], Dict[str, Any]]:
+        """Classifier LLM input, or (None, result) when no LLM call is needed."""
         if not self.enable_itil:
-            return {}
+            return None, {}
         
         messages = state.get("messages", [])
         if not messages:
-            return {}
+            return None, {}
         
         last_message = messages[-1]
         if not isinstance(last_message, HumanMessage):
-            return {}
+            return None, {}
         
-        user_content = last_message.content
-
-        # Tiered: fast model if available
-        model = self._fast_model if self._fast_model else self.model
+        return [
+            SystemMessage(content=CLASSIFIER_SYSTEM_PROMPT),
+            HumanMessage(content=last_message.content)
+        ], {}
+    
+    def _parse_classification(self, response: AIMessage) -> Dict[str, Any]:
+        """ITIL category and GUT priority from the classifier's JSON answer."""
+        return self._classification_from_data(json.loads(_strip_code_fence(response.content.strip())))
+    
+    def _classification_from_data(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        categoria = data.get("categoria", "CONVERSA").upper()
+        gravidade = int(data.get("gravidade", 3))
+        urgencia = int(data.get("urgencia", 3))
+        tendencia = int(data.get("tendencia", 3))
+        gut_score = gravidade * urgencia * tendencia
+        
+        # Map to priority
+        if gut_score >= 64:
+            priority = Priority.CRITICO.value
+        elif gut_score >= 27:
+            priority = Priority.ALTO.value
+        elif gut_score >= 8:
+            priority = Priority.MEDIO.value
+        else:
+            priority = Priority.BAIXO.value
+        
+        dbg(f"ITIL: {categoria}, GUT: {gut_score}, Priority: {priority}")
+        
+        return {
+            "task_category": categoria.lower(),
+            "priority": priority,
+            "gut_score": gut_score,
+            "gut_details": {
+                "gravidade": gravidade,
+                "urgencia": urgencia,
+                "tendencia": tendencia,
+            },
+        }
+    
+    def _classifier_node(self, state: UnifiedAgentState) -> Dict[str, Any]:
+        """Classify request using ITIL methodology."""
+        dbg("Classifier node executing...")
+        request, result = self._classifier_request(state)
+        if request is None:
+            return result
         try:
-            response = model.invoke([
-                SystemMessage(content=CLASSIFIER_SYSTEM_PROMPT),
-                HumanMessage(content=user_content)
-            ])
-            
-            # Parse JSON response
-            import json
-            content = response.content.strip()
-            
-            # Extract JSON from markdown code blocks if present
-            if "```json" in content:
-                content = content.split("```json")[1].split("```")[0]
-            elif "```" in content:
-                content = content.split("```")[1].split("```")[0]
-            
-            data = json.loads(content)
-            
-            categoria = data.get("categoria", "CONVERSA").upper()
-            gravidade = int(data.get("gravidade", 3))
-            urgencia = int(data.get("urgencia", 3))
-            tendencia = int(data.get("tendencia", 3))
-            gut_score = gravidade * urgencia * tendencia
-            
-            # Map to priority
-            if gut_score >= 64:
-                priority = Priority.CRITICO.value
-            elif gut_score >= 27:
-                priority = Priority.ALTO.value
-            elif gut_score >= 8:
-                priority = Priority.MEDIO.value
-            else:
-                priority = Priority.BAIXO.value
-            
-            dbg(f"ITIL: {categoria}, GUT: {gut_score}, Priority: {priority}")
-            
-            return {
-                "task_category": categoria.lower(),
-                "priority": priority,
-                "gut_score": gut_score,
-                "gut_details": {
-                    "gravidade": gravidade,
-                    "urgencia": urgencia,
-                    "tendencia": tendencia,
-                },
-            }
-            
+            return self._parse_classification(self._routing_model.invoke(request))
         except Exception as e:
             dbg(f"Classifier error: {e}")
             return {"task_category": TaskCategory.CONVERSA.value}
     
-    def _planner_node(self, state: UnifiedAgentState) -> Dict[str, Any]:
-        """Plan actions based on classification."""
-        dbg("Planner node executing...")
-        
-        if not self.enable_planning:
+    async def _aclassifier_node(self, state: UnifiedAgentState, config: RunnableConfig) -> Dict[str, Any]:
+        """Async variant of _classifier_node."""
+        dbg("Classifier node executing (async)...")
+        request, result = self._classifier_request(state)
+        if request is None:
+            return result
+        try:
+            return self._parse_classification(await self._routing_model.ainvoke(request, config))
+        except Exception as e:
+            dbg(f"Classifier error: {e}")
+            return {"task_category": TaskCategory.CONVERSA.value}
+    
+    def _parse_triage(self, response: AIMessage) -> Dict[str, Any]:
+        """Intent and, for IT intents, ITIL/GUT from the merged triage JSON answer."""
+        data = json.loads(_strip_code_fence(response.content.strip()))
+        result = self._intent_from_text(str(data.get("intent") or ""))
+        if result["intent"] in ITIL_INTENTS:
+            result.update(self._classification_from_data(data))
+        return result
+    
+    def _triage_node(self, state: UnifiedAgentState) -> Dict[str, Any]:
+        """Route and classify the user message in one LLM call (routing_mode="merged")."""
+        dbg("Triage node executing...")
+        request, result = self._router_request(state, TRIAGE_SYSTEM_PROMPT)
+        if request is None:
+            return result
+        try:
+            return self._parse_triage(self._routing_model.invoke(request))
+        except Exception as e:
+            dbg(f"Triage error: {e}")
+            return {"intent": Intent.CONVERSA_GERAL.value, "error": str(e)}
+    
+    async def _atriage_node(self, state: UnifiedAgentState, config: RunnableConfig) -> Dict[str, Any]:
+        """Async variant of _triage_node."""
+        dbg("Triage node executing (async)...")
+        request, result = self._router_request(state, TRIAGE_SYSTEM_PROMPT)
+        if request is None:
+            return result
+        try:
+            return self._parse_triage(await self._routing_model.ainvoke(request, config))
+        except Exception as e:
+            dbg(f"Triage error: {e}")
+            return {"intent": Intent.CONVERSA_GERAL.value, "error": str(e)}
+    
+    def _join_node(self, state: UnifiedAgentState) -> Dict[str, Any]:
+        """Merge parallel router/classifier results (routing_mode="parallel").
+
+        The classifier ran speculatively: its output is dropped for intents the
+        sequential graph would not classify, so the executor sees the same state.
+        """
+        if state.get("intent") in ITIL_INTENTS:
             return {}
+        return {"task_category": None, "priority": None, "gut_score": None, "gut_details": None}
+    
+    async def _ajoin_node(self, state: UnifiedAgentState) -> Dict[str, Any]:
+        """Async variant of _join_node (no worker thread under astream)."""
+        return self._join_node(state)
+    
+    def _planner_request(self, state: UnifiedAgentState) -> Tuple[Optional[List[AnyMessage]], Dict[str, Any]]:
+        """Planner LLM input, or (None, result) when no LLM call is needed."""
+        if not self.enable_planning:
+            return None, {}
         
         # Get context from state
         task_category = state.get("task_category", "conversa")
@@ -464,12 +659,12 @@ class UnifiedAgent(BaseAgent):
         messages = state.get("messages", [])
         
         if not messages:
-            return {"plan": [], "current_step": 0}
+            return None, {"plan": [], "current_step": 0}
         
         # Get last user message
         last_message = messages[-1]
         if not hasattr(last_message, "content"):
-            return {"plan": [], "current_step": 0}
+            return None, {"plan": [], "current_step": 0}
         
         user_message = last_message.content
         
@@ -498,47 +693,56 @@ IMPORTANTE: Para operações WRITE (create_ticket, create_issue), sempre definir
         # Enhanced prompt based on category
         category_specific_prompt = self._get_category_specific_prompt(task_category)
         
-        planning_messages = [
+        return [
             SystemMessage(content=PLANNER_SYSTEM_PROMPT),
             SystemMessage(content=context_info),
             SystemMessage(content=category_specific_prompt),
             HumanMessage(content=f"Crie um plano de ação para: {user_message}")
-        ]
-        
-        # Use fast model for planning to save costs
-        model = self._fast_model if self._fast_model else self.model
-        
-        try:
-            response = model.invoke(planning_messages)
-            content = response.content.strip()
-            
-            # Extract JSON from markdown code blocks if present
-            if "```json" in content:
-                content = content.split("```json")[1].split("```")[0]
-            elif "```" in content:
-                content = content.split("```")[1].split("```")[0]
-            
-            # Parse JSON response
-            import json
-            plan_data = json.loads(content.strip())
-            
-            plan = plan_data.get("plan", [])
-            
-            dbg(f"Planner created {len(plan)} steps for category={task_category}")
-            
-            return {
-                "plan": plan,
-                "current_step": 0,
-            }
-            
-        except json.JSONDecodeError as e:
-            dbg(f"Planner JSON parse error: {e}")
+        ], {}
+    
+    def _parse_plan(self, response: AIMessage) -> Dict[str, Any]:
+        """Plan steps from the planner's JSON answer (raises json.JSONDecodeError)."""
+        plan_data = json.loads(_strip_code_fence(response.content.strip()).strip())
+        plan = plan_data.get("plan", [])
+        dbg(f"Planner created {len(plan)} steps")
+        return {
+            "plan": plan,
+            "current_step": 0,
+        }
+    
+    def _planner_fallback(self, state: UnifiedAgentState, error: Exception) -> Dict[str, Any]:
+        if isinstance(error, json.JSONDecodeError):
+            dbg(f"Planner JSON parse error: {error}")
             # Fallback: create simple plan based on category
-            fallback_plan = self._create_fallback_plan(task_category, user_message)
+            fallback_plan = self._create_fallback_plan(
+                state.get("task_category", "conversa"), state["messages"][-1].content
+            )
             return {"plan": fallback_plan, "current_step": 0}
+        dbg(f"Planner error: {error}")
+        return {"plan": [], "current_step": 0}
+    
+    def _planner_node(self, state: UnifiedAgentState) -> Dict[str, Any]:
+        """Plan actions based on classification."""
+        dbg("Planner node executing...")
+        request, result = self._planner_request(state)
+        if request is None:
+            return result
+        # Use fast model for planning to save costs
+        try:
+            return self._parse_plan(self._routing_model.invoke(request))
+        except Exception as e:
+            return self._planner_fallback(state, e)
+    
+    async def _aplanner_node(self, state: UnifiedAgentState, config: RunnableConfig) -> Dict[str, Any]:
+        """Async variant of _planner_node."""
+        dbg("Planner node executing (async)...")
+        request, result = self._planner_request(state)
+        if request is None:
+            return result
+        try:
+            return self._parse_plan(await self._routing_model.ainvoke(request, config))
         except Exception as e:
-            dbg(f"Planner error: {e}")
-            return {"plan": [], "current_step": 0}
+            return self._planner_fallback(state, e)
     
     def _get_category_specific_prompt(self, category: str) -> str:
         """Get category-specific planning guidance."""
@@ -692,17 +896,15 @@ Foque em atendimento rápido e padronizado.
             dbg(f"Report format failed: {e}")
             return None
 
-    def _executor_node(self, state: UnifiedAgentState, config: RunnableConfig) -> Dict[str, Any]:
-        """Execute actions using tools."""
-        dbg("Executor node executing...")
-
+    def _executor_request(self, state: UnifiedAgentState, config: RunnableConfig) -> Tuple[Any, Any]:
+        """(model, messages) for the executor LLM call, or (None, result) when no call is needed."""
         messages = state.get("messages", [])
 
         # If we have ToolMessages from report tools, format with code (no LLM)
         report_md = self._try_format_tool_results_as_report(messages)
         if report_md:
             dbg("Using report formatter (no LLM) for tool results")
-            return {"messages": [AIMessage(content=report_md)]}
+            return None, {"messages": [AIMessage(content=report_md)]}
 
         # Build context message with ITIL info
         context_parts = []
@@ -720,13 +922,12 @@ Foque em atendimento rápido e padronizado.
             model_with_tools = self.model
 
         # Prepare messages with system prompt
-        # CRITICAL: Project Context Injection
-        project_instructions = config.get("configurable", {}).get("custom_instructions")
-        
+        # CRITICAL: Project Context Injection (per request, from runtime config)
         final_system_prompt = self.system_prompt
-        if project_instructions:
-            final_system_prompt += f"\n\n=== PROJECT INSTRUCTIONS ===\n{project_instructions}"
-            dbg(f"Injected project instructions: {project_instructions[:50]}...")
+        request_context = request_context_from_config(config)
+        if request_context:
+            final_system_prompt += request_context
+            dbg(f"Injected request context: {request_context[:50]}...")
 
         full_messages = [SystemMessage(content=final_system_prompt)]
         if context_parts:
@@ -744,9 +945,30 @@ Foque em atendimento rápido e padronizado.
                 truncated_messages.append(msg)
         full_messages = truncated_messages
         full_messages = sanitize_image_messages(full_messages)
+        return model_with_tools, full_messages
 
+    def _executor_node(self, state: UnifiedAgentState, config: RunnableConfig) -> Dict[str, Any]:
+        """Execute actions using tools."""
+        dbg("Executor node executing...")
+        model_with_tools, request = self._executor_request(state, config)
+        if model_with_tools is None:
+            return request
         try:
-            response = model_with_tools.invoke(full_messages)
+            response = model_with_tools.invoke(request)
+            dbg(f"Executor response: {response.content[:100] if response.content else 'tool_calls'}...")
+            return {"messages": [response]}
+        except Exception as e:
+            dbg(f"Executor error: {e}")
+            return {"error": str(e)}
+    
+    async def _aexecutor_node(self, state: UnifiedAgentState, config: RunnableConfig) -> Dict[str, Any]:
+        """Async variant of _executor_node (tokens stream as they arrive under astream)."""
+        dbg("Executor node executing (async)...")
+        model_with_tools, request = self._executor_request(state, config)
+        if model_with_tools is None:
+            return request
+        try:
+            response = await model_with_tools.ainvoke(request, config)
             dbg(f"Executor response: {response.content[:100] if response.content else 'tool_calls'}...")
             return {"messages": [response]}
         except Exception as e:
@@ -759,6 +981,10 @@ Foque em atendimento rápido e padronizado.
         # Response already in messages from executor
         return {"should_continue": False}
     
+    async def _aresponder_node(self, state: UnifiedAgentState) -> Dict[str, Any]:
+        """Async variant of _responder_node (no worker thread under astream)."""
+        return self._responder_node(state)
+    
     # --- Routing Functions ---
     
     def _route_after_router(self, state: UnifiedAgentState) -> str:
@@ -767,13 +993,23 @@ Foque em atendimento rápido e padronizado.
         
         if intent == Intent.CONVERSA_GERAL.value:
             return "executor"  # Direct to simple response
-        elif intent in [Intent.IT_REQUEST.value, Intent.MULTI_ACTION.value]:
+        elif intent in ITIL_INTENTS:
             if self.enable_itil:
                 return "classifier"
             return "executor"
         else:
             return "executor"
     
+    def _route_after_triage(self, state: UnifiedAgentState) -> List[str]:
+        """Next nodes after triage (parallel/merged modes).
+
+        The executor does not read the plan, so for IT intents the planner runs
+        next to it instead of before it.
+        """
+        if state.get("intent") in ITIL_INTENTS and self.enable_planning:
+            return ["planner", "executor"]
+        return ["executor"]
+    
     # --- Public Interface ---
     
     def invoke(self, input: Dict[str, Any], config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
@@ -822,6 +1058,7 @@ def create_unified_agent(
     openrouter_api_key: Optional[str] = None,
     openrouter_base_url: str = DEFAULT_OPENROUTER_BASE_URL,
     temperature: float = 0.2,
+    routing_mode: Optional[str] = None,
 ) -> UnifiedAgent:
     """Factory function to create a unified agent.
     
@@ -836,6 +1073,7 @@ def create_unified_agent(
         openrouter_api_key: OpenRouter API key
         openrouter_base_url: OpenRouter base URL
         temperature: Model temperature
+        routing_mode: ITIL triage mode (sequential, parallel or merged)
         
     Returns:
         Configured UnifiedAgent instance
@@ -851,4 +1089,5 @@ def create_unified_agent(
         openrouter_api_key=openrouter_api_key,
         openrouter_base_url=openrouter_base_url,
         temperature=temperature,
+        routing_mode=routing_mode,
     )
@@ -5,24 +5,47 @@ of GLPI, Zabbix, and Linear API responses. Uses the same Redis instance
 already running for Celery (REDIS_URL env var).
 
 Design: fire-and-forget — cache errors never propagate to callers.
+
+Async code should use the redis.asyncio API (aget_cached / aset_cached /
+get_or_set) so lookups never block the event loop. get_or_set also coalesces
+concurrent misses per key (single-flight) and can serve stale values while
+one background refresh runs (stale-while-revalidate).
+
+Invalidation is tag-based: writes may register their key in per-tag sets
+(e.g. "glpi:tickets") and invalidate_tags() unlinks the members in batches.
+invalidate(pattern) uses incremental SCAN, never KEYS — this Redis is also
+the Celery broker.
 """
 
+import asyncio
 import json
 import logging
 import os
+import time
+import weakref
+from typing import Any, Awaitable, Callable
 
 import redis
+import redis.asyncio as aioredis
 
 logger = logging.getLogger(__name__)
 
+TAG_PREFIX = "cache:tag:"
+# Tag sets outlive their members; stale members are harmless (UNLINK of a missing key is a no-op)
+TAG_SET_TTL = int(os.getenv("CACHE_TAG_SET_TTL", "86400"))
+DELETE_BATCH = 500
+
 _pool: redis.ConnectionPool | None = None
 
 
+def _redis_url() -> str:
+    return os.getenv("REDIS_URL", "redis://redis:6379/0")
+
+
 def _get_pool() -> redis.ConnectionPool:
     global _pool
     if _pool is None:
-        url = os.getenv("REDIS_URL", "redis://redis:6379/0")
-        _pool = redis.ConnectionPool.from_url(url, decode_responses=True)
+        _pool = redis.ConnectionPool.from_url(_redis_url(), decode_responses=True)
     return _pool
 
 
@@ -37,22 +60,248 @@ def get_cached(key: str) -> dict | list | None:
         return None
 
 
-def set_cached(key: str, value, ttl_seconds: int = 120):
-    """Cache value with TTL. Fire-and-forget, never raises."""
+def _tag_key(tag: str) -> str:
+    return f"{TAG_PREFIX}{tag}"
+
+
+def _batches(items, size: int = DELETE_BATCH):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def set_cached(key: str, value, ttl_seconds: int = 120, tags: list[str] | None = None):
+    """Cache value with TTL, registering key under tags. Fire-and-forget, never raises."""
     try:
         r = redis.Redis(connection_pool=_get_pool())
-        r.setex(key, ttl_seconds, json.dumps(value, default=str))
+        pipe = r.pipeline(transaction=False)
+        pipe.setex(key, ttl_seconds, json.dumps(value, default=str))
+        for tag in tags or ():
+            pipe.sadd(_tag_key(tag), key)
+            pipe.expire(_tag_key(tag), max(TAG_SET_TTL, ttl_seconds))
+        pipe.execute()
     except Exception as e:
         logger.debug("Cache set failed for %s: %s", key, e)
 
 
+def invalidate_tags(*tags: str) -> int:
+    """Delete every key registered under tags, in batches. Fire-and-forget."""
+    deleted = 0
+    try:
+        r = redis.Redis(connection_pool=_get_pool())
+        for tag in tags:
+            tag_key = _tag_key(tag)
+            for batch in _batches(r.sscan_iter(tag_key, count=DELETE_BATCH)):
+                deleted += r.unlink(*batch)
+            r.unlink(tag_key)
+        logger.debug("Invalidated %d keys for tags %s", deleted, tags)
+    except Exception as e:
+        logger.debug("Cache invalidate failed for tags %s: %s", tags, e)
+    return deleted
+
+
+def get_counters(*keys: str) -> list[int] | None:
+    """Read integer counters in one round trip (missing = 0). Returns None on error."""
+    try:
+        r = redis.Redis(connection_pool=_get_pool())
+        return [int(v or 0) for v in r.mget(keys)]
+    except Exception as e:
+        logger.debug("Counter read failed for %s: %s", keys, e)
+        return None
+
+
+def incr_counters(*keys: str) -> None:
+    """Increment counters (generation numbers). Fire-and-forget, never raises."""
+    try:
+        r = redis.Redis(connection_pool=_get_pool())
+        pipe = r.pipeline(transaction=False)
+        for key in keys:
+            pipe.incr(key)
+        pipe.execute()
+    except Exception as e:
+        logger.debug("Counter increment failed for %s: %s", keys, e)
+
+
 def invalidate(pattern: str):
-    """Delete keys matching a pattern (e.g. 'glpi:*'). Fire-and-forget."""
+    """Delete keys matching a pattern (e.g. 'glpi:*') via incremental SCAN. Fire-and-forget.
+
+    Prefer invalidate_tags(); this is the fallback for ad-hoc patterns.
+    """
     try:
         r = redis.Redis(connection_pool=_get_pool())
-        keys = r.keys(pattern)
-        if keys:
-            r.delete(*keys)
-            logger.debug("Invalidated %d keys matching %s", len(keys), pattern)
+        deleted = 0
+        for batch in _batches(r.scan_iter(match=pattern, count=DELETE_BATCH)):
+            deleted += r.unlink(*batch)
+        if deleted:
+            logger.debug("Invalidated %d keys matching %s", deleted, pattern)
+    except Exception as e:
+        logger.debug("Cache invalidate failed for %s: %s", pattern, e)
+
+
+# ---------- Async API (redis.asyncio) ----------
+
+# One client per event loop: the API has one loop, Celery AsyncTask creates one per task
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, aioredis.Redis]" = (
+    weakref.WeakKeyDictionary()
+)
+# In-flight loads per (loop, key) for single-flight coalescing
+_inflight: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict[str, asyncio.Task]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+_SWR_MARKER = "__swr__"
+
+
+def _get_async_client() -> aioredis.Redis:
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = aioredis.from_url(_redis_url(), decode_responses=True)
+        _async_clients[loop] = client
+    return client
+
+
+async def aget_cached(key: str) -> dict | list | None:
+    """Async get_cached. Returns None on miss or error."""
+    try:
+        data = await _get_async_client().get(key)
+        return json.loads(data) if data else None
+    except Exception as e:
+        logger.debug("Cache miss/error for %s: %s", key, e)
+        return None
+
+
+async def aset_cached(key: str, value, ttl_seconds: int = 120, tags: list[str] | None = None):
+    """Async set_cached. Fire-and-forget, never raises."""
+    try:
+        pipe = _get_async_client().pipeline(transaction=False)
+        pipe.setex(key, ttl_seconds, json.dumps(value, default=str))
+        for tag in tags or ():
+            pipe.sadd(_tag_key(tag), key)
+            pipe.expire(_tag_key(tag), max(TAG_SET_TTL, ttl_seconds))
+        await pipe.execute()
+    except Exception as e:
+        logger.debug("Cache set failed for %s: %s", key, e)
+
+
+async def ainvalidate_tags(*tags: str) -> int:
+    """Async invalidate_tags. Fire-and-forget."""
+    deleted = 0
+    try:
+        r = _get_async_client()
+        for tag in tags:
+            tag_key = _tag_key(tag)
+            batch = []
+            async for key in r.sscan_iter(tag_key, count=DELETE_BATCH):
+                batch.append(key)
+                if len(batch) >= DELETE_BATCH:
+                    deleted += await r.unlink(*batch)
+                    batch = []
+            if batch:
+                deleted += await r.unlink(*batch)
+            await r.unlink(tag_key)
+        logger.debug("Invalidated %d keys for tags %s", deleted, tags)
+    except Exception as e:
+        logger.debug("Cache invalidate failed for tags %s: %s", tags, e)
+    return deleted
+
+
+async def ainvalidate(pattern: str):
+    """Async invalidate (SCAN-based). Fire-and-forget."""
+    try:
+        r = _get_async_client()
+        batch = []
+        async for key in r.scan_iter(match=pattern, count=DELETE_BATCH):
+            batch.append(key)
+            if len(batch) >= DELETE_BATCH:
+                await r.unlink(*batch)
+                batch = []
+        if batch:
+            await r.unlink(*batch)
     except Exception as e:
         logger.debug("Cache invalidate failed for %s: %s", pattern, e)
+
+
+async def aclose():
+    """Close the async client of the running loop (FastAPI shutdown)."""
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        try:
+            await client.aclose()
+        except Exception as e:
+            logger.debug("Cache close failed: %s", e)
+
+
+def _log_task_error(task: asyncio.Task) -> None:
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning("Cache refresh failed: %s", task.exception())
+
+
+def _single_flight(key: str, load: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+    """Return the in-flight load for key, starting one if none is running."""
+    loop = asyncio.get_running_loop()
+    tasks = _inflight.setdefault(loop, {})
+    task = tasks.get(key)
+    if task is None:
+        task = loop.create_task(load())
+        tasks[key] = task
+        task.add_done_callback(lambda _t: tasks.pop(key, None))
+        task.add_done_callback(_log_task_error)
+    return task
+
+
+async def get_or_set(
+    key: str,
+    loader: Callable[[], Awaitable[Any]],
+    ttl_seconds: int = 120,
+    *,
+    stale_seconds: int = 0,
+    cache_if: Callable[[Any], bool] | None = None,
+    encode: Callable[[Any], Any] | None = None,
+    decode: Callable[[Any], Any] | None = None,
+    tags: list[str] | None = None,
+) -> Any:
+    """Read-through cache with stampede protection.
+
+    - Hit (fresh): decode(cached) is returned.
+    - Miss: loader() runs once per key per process; concurrent callers await the
+      same load and get the same value (errors included).
+    - stale_seconds > 0: entries live ttl_seconds + stale_seconds in Redis. A hit in
+      the stale window returns the old value immediately and triggers one
+      background refresh.
+
+    loader's value is stored as encode(value) only when cache_if(value) is true
+    (default: value is not None), registered under tags for invalidate_tags().
+    Redis errors are treated as misses.
+    """
+    cache_if = cache_if or (lambda v: v is not None)
+    encode = encode or (lambda v: v)
+    decode = decode or (lambda v: v)
+
+    async def _load():
+        value = await loader()
+        if cache_if(value):
+            envelope = {
+                _SWR_MARKER: 1,
+                "fresh_until": time.time() + ttl_seconds,
+                "value": encode(value),
+            }
+            await aset_cached(key, envelope, ttl_seconds + max(0, stale_seconds), tags=tags)
+        return value
+
+    cached = await aget_cached(key)
+    if isinstance(cached, dict) and cached.get(_SWR_MARKER):
+        if cached.get("fresh_until", 0) >= time.time():
+            return decode(cached["value"])
+        # Stale window: serve the old value, refresh once in the background
+        _single_flight(key, _load)
+        logger.debug("Cache stale for %s, revalidating", key)
+        return decode(cached["value"])
+
+    # shield: a cancelled caller must not cancel the load other callers await
+    return await asyncio.shield(_single_flight(key, _load))
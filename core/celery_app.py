@@ -58,6 +58,8 @@ celery_app.conf.task_routes = {
     'core.tasks.process_agent_prompt': {'queue': 'agent'},
     'core.tasks.generate_linear_report': {'queue': 'reports'},
     'core.tasks.send_notification': {'queue': 'notifications'},
+    'core.tasks.ingest_planning_document': {'queue': 'ingest'},
+    'core.tasks.ingest_kb_document': {'queue': 'ingest'},
 }
 
 logger.info(f"✅ Celery app configured with broker: {REDIS_URL}")
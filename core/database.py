@@ -1,15 +1,21 @@
 """Database utilities for PostgreSQL connection with connection pooling."""
 
+import asyncio
 import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
 
 import psycopg
-from psycopg_pool import ConnectionPool
+from psycopg_pool import AsyncConnectionPool, ConnectionPool
 
 from core.config import get_settings
+from core.rag.vector_adapter import aregister_vector, register_vector
 
 logger = logging.getLogger(__name__)
 
 _pool: ConnectionPool | None = None
+_apool: AsyncConnectionPool | None = None
+_apool_lock = asyncio.Lock()
 
 
 def get_db_url() -> str:
@@ -29,6 +35,7 @@ def _get_pool() -> ConnectionPool:
             timeout=30,
             max_lifetime=300,  # recycle connections every 5 min
             max_idle=60,       # close idle connections after 60s
+            configure=register_vector,  # binary pgvector parameters
             open=True,
         )
         logger.info("Database connection pool created (min=2, max=20)")
@@ -58,3 +65,50 @@ def close_pool():
         _pool.close()
         _pool = None
         logger.info("Database connection pool closed")
+
+
+# ---------- Async pool (FastAPI handlers) ----------
+
+
+async def open_async_pool() -> AsyncConnectionPool:
+    """Create and open the shared async pool. Called from the FastAPI lifespan."""
+    global _apool
+    async with _apool_lock:
+        if _apool is None:
+            pool = AsyncConnectionPool(
+                conninfo=get_db_url(),
+                min_size=2,
+                max_size=20,
+                timeout=30,
+                max_lifetime=300,  # recycle connections every 5 min
+                max_idle=60,       # close idle connections after 60s
+                configure=aregister_vector,  # binary pgvector parameters
+                open=False,
+            )
+            await pool.open()
+            _apool = pool
+            logger.info("Async database connection pool created (min=2, max=20)")
+    return _apool
+
+
+@asynccontextmanager
+async def get_aconn() -> AsyncIterator[psycopg.AsyncConnection]:
+    """Get an async PostgreSQL connection from the shared pool.
+
+    Commits on success and rolls back on error (same semantics as get_conn). Usage:
+        async with get_aconn() as conn:
+            async with conn.cursor(row_factory=dict_row) as cur:
+                await cur.execute(...)
+    """
+    pool = _apool or await open_async_pool()
+    async with pool.connection() as conn:
+        yield conn
+
+
+async def close_async_pool() -> None:
+    """Close the async connection pool. Call during shutdown."""
+    global _apool
+    if _apool is not None:
+        await _apool.close()
+        _apool = None
+        logger.info("Async database connection pool closed")
@@ -4,9 +4,9 @@ Reference: .claude/skills/glpi-integration/SKILL.md
 """
 
 import httpx
-from ..cache import get_cached, set_cached
+from ..cache import ainvalidate_tags
 from ..config import GLPISettings
-from .tool_result import ToolResult
+from .tool_result import ToolResult, cached_result
 
 
 class GLPIClient:
@@ -121,13 +121,19 @@ class GLPIClient:
             limit: Max results
             order: Sort order (ASC/DESC)
         """
-        # --- Redis cache (TTL 120s) ---
+        # --- Redis cache (TTL 120s, +60s stale-while-revalidate) ---
         status_key = ",".join(str(s) for s in status) if status else "all"
         cache_key = f"glpi:tickets:{status_key}:{limit}"
-        cached = get_cached(cache_key)
-        if cached is not None:
-            return ToolResult.ok(cached, operation="get_tickets")
+        return await cached_result(
+            cache_key,
+            lambda: self._fetch_tickets(status, limit, order),
+            operation="get_tickets",
+            ttl_seconds=120,
+            stale_seconds=60,
+            tags=["glpi", "glpi:tickets"],
+        )
 
+    async def _fetch_tickets(self, status: list[int] | None, limit: int, order: str) -> ToolResult:
         if not self.session_token:
             init_result = await self.init_session()
             if not init_result.success:
@@ -153,7 +159,6 @@ class GLPIClient:
             tickets = response.json()
 
             output = {"tickets": tickets, "count": len(tickets)}
-            set_cached(cache_key, output, ttl_seconds=120)
             return ToolResult.ok(output, operation="get_tickets")
         except httpx.HTTPStatusError as e:
             return ToolResult.fail(
@@ -166,11 +171,15 @@ class GLPIClient:
     async def get_ticket(self, ticket_id: int) -> ToolResult:
         """Get single ticket details."""
         # --- Redis cache (TTL 120s) ---
-        cache_key = f"glpi:ticket:{ticket_id}"
-        cached = get_cached(cache_key)
-        if cached is not None:
-            return ToolResult.ok(cached, operation="get_ticket")
+        return await cached_result(
+            f"glpi:ticket:{ticket_id}",
+            lambda: self._fetch_ticket(ticket_id),
+            operation="get_ticket",
+            ttl_seconds=120,
+            tags=["glpi", "glpi:tickets"],
+        )
 
+    async def _fetch_ticket(self, ticket_id: int) -> ToolResult:
         if not self.session_token:
             init_result = await self.init_session()
             if not init_result.success:
@@ -187,7 +196,6 @@ class GLPIClient:
             ticket = response.json()
 
             output = {"ticket": ticket}
-            set_cached(cache_key, output, ttl_seconds=120)
             return ToolResult.ok(output, operation="get_ticket")
         except httpx.HTTPStatusError as e:
             return ToolResult.fail(
@@ -250,6 +258,9 @@ class GLPIClient:
             response.raise_for_status()
             result = response.json()
 
+            # Ticket lists and reports built from them are stale now
+            await ainvalidate_tags("glpi:tickets")
+
             return ToolResult.ok(
                 {"ticket_id": result.get("id"), "created": True},
                 operation="create_ticket"
@@ -363,11 +374,16 @@ class GLPIClient:
     async def get_locations(self, limit: int = 100) -> ToolResult:
         """Get locations (Centros de Custo) from GLPI."""
         # --- Redis cache (TTL 1 hour - static data) ---
-        cache_key = f"glpi:locations:{limit}"
-        cached = get_cached(cache_key)
-        if cached is not None:
-            return ToolResult.ok(cached, operation="get_locations")
+        return await cached_result(
+            f"glpi:locations:{limit}",
+            lambda: self._fetch_locations(limit),
+            operation="get_locations",
+            ttl_seconds=3600,
+            stale_seconds=600,
+            tags=["glpi", "glpi:locations"],
+        )
 
+    async def _fetch_locations(self, limit: int) -> ToolResult:
         if not self.session_token:
             init_result = await self.init_session()
             if not init_result.success:
@@ -393,7 +409,6 @@ class GLPIClient:
             location_map = {loc["id"]: loc["name"] for loc in locations}
             
             output = {"locations": locations, "map": location_map}
-            set_cached(cache_key, output, ttl_seconds=3600)
             return ToolResult.ok(output, operation="get_locations")
         except httpx.HTTPStatusError as e:
             return ToolResult.fail(
@@ -23,3 +23,31 @@ class ToolResult:
     @classmethod
     def fail(cls, error, operation):
         return cls(False, {}, operation, error)
+
+
+async def cached_result(
+    cache_key: str,
+    fetch,
+    *,
+    operation: str,
+    ttl_seconds: int,
+    stale_seconds: int = 0,
+    tags: list[str] | None = None,
+) -> ToolResult:
+    """Serve a ToolResult through the async Redis cache (core.cache.get_or_set).
+
+    Concurrent misses share one fetch; only successful outputs are stored,
+    registered under tags (see core.cache.invalidate_tags).
+    """
+    from ..cache import get_or_set
+
+    return await get_or_set(
+        cache_key,
+        fetch,
+        ttl_seconds,
+        stale_seconds=stale_seconds,
+        cache_if=lambda r: r.success,
+        encode=lambda r: r.output,
+        decode=lambda output: ToolResult.ok(output, operation=operation),
+        tags=tags,
+    )
@@ -3,9 +3,8 @@
 import httpx
 from typing import Any, Optional
 
-from ..cache import get_cached, set_cached
 from ..config import ZabbixSettings
-from .tool_result import ToolResult
+from .tool_result import ToolResult, cached_result
 
 
 class ZabbixClient:
@@ -78,12 +77,17 @@ class ZabbixClient:
             severity: Min severity (0-5) - Note: applied as filter after retrieval
             with_hosts: If True, enriches each problem with host name via trigger.get
         """
-        # --- Redis cache (TTL 60s — alerts change fast) ---
-        cache_key = f"zabbix:problems:{severity}:{limit}:{with_hosts}"
-        cached = get_cached(cache_key)
-        if cached is not None:
-            return ToolResult.ok(cached, operation="problem.get")
-
+        # --- Redis cache (TTL 60s — alerts change fast; 30s stale-while-revalidate) ---
+        return await cached_result(
+            f"zabbix:problems:{severity}:{limit}:{with_hosts}",
+            lambda: self._fetch_problems(limit, severity, with_hosts),
+            operation="problem.get",
+            ttl_seconds=60,
+            stale_seconds=30,
+            tags=["zabbix", "zabbix:problems"],
+        )
+
+    async def _fetch_problems(self, limit: int, severity: int, with_hosts: bool) -> ToolResult:
         params = {
             "output": ["eventid", "name", "severity", "clock", "opdata", "acknowledged", "objectid"],
             "selectTags": ["tag", "value"],
@@ -122,10 +126,6 @@ class ZabbixClient:
                     for p in problems:
                         p["host_name"] = trigger_to_host.get(str(p.get("objectid")), "")
 
-        # Cache successful result (enriched with hosts)
-        if result.success:
-            set_cached(cache_key, result.output, ttl_seconds=60)
-
         return result
 
     async def get_host(self, name: str) -> ToolResult:
@@ -60,3 +60,16 @@ def job_cleanup_expired_files():
         )
     except Exception as e:
         logger.error("[cleanup_expired_files] ❌ erro: %s", e, exc_info=True)
+
+
+def job_rebalance_kb_partitions():
+    """Job diário que move tenants grandes da KB para partições próprias."""
+    try:
+        from core.rag.ingestion import KB_TENANT_PARTITION_REBALANCE_ROWS, rebalance_tenant_partitions
+
+        if KB_TENANT_PARTITION_REBALANCE_ROWS <= 0:
+            return
+        promoted = rebalance_tenant_partitions(KB_TENANT_PARTITION_REBALANCE_ROWS)
+        logger.info("[rebalance_kb_partitions] ✅ promovidos=%s", len(promoted))
+    except Exception as e:
+        logger.error("[rebalance_kb_partitions] ❌ erro: %s", e, exc_info=True)
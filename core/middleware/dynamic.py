@@ -9,6 +9,7 @@ from langchain.agents.middleware import AgentMiddleware, ModelRequest, ModelResp
 from langchain_openai import ChatOpenAI
 from langchain_core.messages import SystemMessage
 from langchain_core.tools import BaseTool
+from langgraph.config import get_config
 
 
 load_dotenv()
@@ -120,6 +121,24 @@ def sanitize_image_messages(messages):
     return result
 
 
+def request_context_from_config(config: Optional[dict]) -> str:
+    """Per-request system prompt suffix carried in the runtime config.
+
+    Compiled graphs are shared between requests (core.agents.cache), so anything that
+    varies per request (project/RAG context, project instructions) travels in
+    config["configurable"] instead of being baked into the agent's system prompt.
+    """
+    cfg = (config or {}).get("configurable", {}) or {}
+    parts = []
+    request_context = cfg.get("request_context")
+    if isinstance(request_context, str) and request_context.strip():
+        parts.append(request_context)
+    project_instructions = cfg.get("custom_instructions")
+    if isinstance(project_instructions, str) and project_instructions.strip():
+        parts.append(f"\n\n=== PROJECT INSTRUCTIONS ===\n{project_instructions}")
+    return "".join(parts)
+
+
 def resolve_settings(messages, runtime) -> tuple[Optional[str], dict]:
     """Resolve model_name and tool settings from all sources.
     
@@ -253,3 +272,36 @@ class DynamicSettingsMiddleware(AgentMiddleware):
         self.apply_settings(request, model_name, tool_settings)
         return await handler(request)
 
+
+
+class RequestContextMiddleware(AgentMiddleware):
+    """Appends the per-request context from the runtime config to the system prompt."""
+
+    def _with_context(self, request: ModelRequest) -> ModelRequest:
+        try:
+            suffix = request_context_from_config(get_config())
+        except RuntimeError:
+            # Outside a runnable context (no config available)
+            suffix = ""
+        if not suffix:
+            return request
+        dbg(f"[CONTEXT] +{len(suffix)} chars de contexto da requisição")
+        return request.override(
+            system_message=SystemMessage(content=(request.system_prompt or "") + suffix)
+        )
+
+    def wrap_model_call(
+        self,
+        request: ModelRequest,
+        handler: Callable[[ModelRequest], ModelResponse]
+    ) -> ModelResponse:
+        """Sync version: intercept model call."""
+        return handler(self._with_context(request))
+
+    async def awrap_model_call(
+        self,
+        request: ModelRequest,
+        handler: Callable[[ModelRequest], ModelResponse]
+    ) -> ModelResponse:
+        """Async version: intercept model call."""
+        return await handler(self._with_context(request))
@@ -0,0 +1,182 @@
+"""Async embedding pipeline: token-bounded batches, bounded concurrency, 429 backoff.
+
+Works with any LangChain Embeddings (OpenAI, OpenRouter BGE-M3, local HuggingFace):
+remote backends run several batches in parallel; local models run one batch at a time
+in a worker thread so the event loop stays free.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import logging
+import os
+import random
+import time
+from typing import AsyncIterator, List, Optional, Tuple
+
+from langchain_core.embeddings import Embeddings
+
+from core.rag.embeddings import BGE_M3_MODEL_ID, EmbeddingFactory
+
+logger = logging.getLogger(__name__)
+
+MAX_BATCH_TOKENS = int(os.getenv("EMBEDDING_BATCH_MAX_TOKENS", "50000"))
+MAX_BATCH_ITEMS = int(os.getenv("EMBEDDING_BATCH_MAX_ITEMS", "256"))
+CONCURRENCY = int(os.getenv("EMBEDDING_CONCURRENCY", "4"))
+MAX_RETRIES = int(os.getenv("EMBEDDING_MAX_RETRIES", "6"))
+
+# Local models are CPU/GPU bound: parallel batches only add contention
+LOCAL_MODEL_IDS = {BGE_M3_MODEL_ID}
+
+try:
+    import tiktoken
+
+    _ENCODING = tiktoken.get_encoding("cl100k_base")
+except Exception:
+    _ENCODING = None
+
+
+def count_tokens(text: str) -> int:
+    """Token count (cl100k_base when tiktoken is available, else ~4 chars/token)."""
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text, disallowed_special=()))
+    return max(1, len(text) // 4)
+
+
+def make_batches(
+    texts: List[str],
+    *,
+    max_tokens: int = MAX_BATCH_TOKENS,
+    max_items: int = MAX_BATCH_ITEMS,
+) -> List[Tuple[int, int]]:
+    """Split texts into contiguous [start, end) ranges bounded by tokens and item count.
+
+    A single text larger than max_tokens gets its own batch (the provider truncates
+    or rejects it, same as before).
+    """
+    batches: List[Tuple[int, int]] = []
+    start = 0
+    tokens = 0
+    for i, text in enumerate(texts):
+        n = count_tokens(text)
+        if i > start and (tokens + n > max_tokens or i - start >= max_items):
+            batches.append((start, i))
+            start, tokens = i, 0
+        tokens += n
+    if start < len(texts):
+        batches.append((start, len(texts)))
+    return batches
+
+
+def _is_rate_limited(exc: Exception) -> bool:
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        status = getattr(getattr(exc, "response", None), "status_code", None)
+    return status == 429 or "429" in str(exc) or "rate limit" in str(exc).lower()
+
+
+def _retry_after(exc: Exception) -> Optional[float]:
+    headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+    try:
+        value = headers.get("retry-after")
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+async def _embed_batch(
+    model: Embeddings,
+    texts: List[str],
+    semaphore: asyncio.Semaphore,
+    *,
+    max_retries: int,
+    base_delay: float,
+) -> List[List[float]]:
+    attempt = 0
+    while True:
+        async with semaphore:
+            try:
+                return await model.aembed_documents(texts)
+            except Exception as e:
+                if not _is_rate_limited(e) or attempt >= max_retries:
+                    raise
+                delay = _retry_after(e) or base_delay * (2**attempt)
+                delay += random.uniform(0, delay / 2)
+        attempt += 1
+        logger.warning(
+            "[embeddings] 429 on batch of %d texts; retry %d/%d in %.1fs",
+            len(texts),
+            attempt,
+            max_retries,
+            delay,
+        )
+        # Sleep outside the semaphore so other batches keep flowing
+        await asyncio.sleep(delay)
+
+
+async def aiter_embeddings(
+    texts: List[str],
+    model_id: str = "openai",
+    *,
+    model: Optional[Embeddings] = None,
+    max_tokens: int = MAX_BATCH_TOKENS,
+    max_items: int = MAX_BATCH_ITEMS,
+    concurrency: Optional[int] = None,
+    max_retries: int = MAX_RETRIES,
+    base_delay: float = 1.0,
+) -> AsyncIterator[Tuple[int, List[List[float]]]]:
+    """Embed texts concurrently and yield (start_index, vectors) per batch, in input order."""
+    if not texts:
+        return
+    model = model or EmbeddingFactory.get_model(model_id)
+    if concurrency is None:
+        concurrency = 1 if model_id in LOCAL_MODEL_IDS else CONCURRENCY
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    batches = make_batches(texts, max_tokens=max_tokens, max_items=max_items)
+
+    started = time.perf_counter()
+    tasks = [
+        asyncio.create_task(
+            _embed_batch(
+                model,
+                texts[start:end],
+                semaphore,
+                max_retries=max_retries,
+                base_delay=base_delay,
+            )
+        )
+        for start, end in batches
+    ]
+    try:
+        for (start, _end), task in zip(batches, tasks):
+            yield start, await task
+    finally:
+        for task in tasks:
+            task.cancel()
+    logger.info(
+        "[embeddings] %d texts in %d batches (concurrency=%d) in %.2fs",
+        len(texts),
+        len(batches),
+        concurrency,
+        time.perf_counter() - started,
+    )
+
+
+async def aembed_texts(texts: List[str], model_id: str = "openai", **kwargs) -> List[List[float]]:
+    """Embed all texts with the async pipeline; result order matches input order."""
+    vectors: List[List[float]] = []
+    async for _start, batch in aiter_embeddings(texts, model_id, **kwargs):
+        vectors.extend(batch)
+    return vectors
+
+
+def embed_texts_sync(texts: List[str], model_id: str = "openai", **kwargs) -> List[List[float]]:
+    """Sync entry point for the async pipeline (scripts, Celery workers, sync helpers)."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(aembed_texts(texts, model_id, **kwargs))
+    # Called from sync code inside a running loop: run the pipeline on its own loop
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as pool:
+        return pool.submit(asyncio.run, aembed_texts(texts, model_id, **kwargs)).result()
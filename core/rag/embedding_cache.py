@@ -0,0 +1,239 @@
+"""Caching embeddings wrapper: in-process LRU + Postgres tier keyed by (model, sha256(text))."""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LRU_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "4096"))
+
+
+def text_hash(text: str) -> str:
+    """SHA-256 hex digest of the text (cache key component)."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class PostgresEmbeddingStore:
+    """Persistent tier in public.kb_embedding_cache (see sql/kb/14_embedding_cache.sql).
+
+    Fire-and-forget: errors are logged and treated as misses, never raised.
+    """
+
+    def get_many(self, model_key: str, hashes: List[str]) -> Dict[str, List[float]]:
+        if not hashes:
+            return {}
+        try:
+            from core.database import get_conn
+
+            with get_conn() as conn:
+                with conn.cursor() as cur:
+                    cur.execute(
+                        """
+                        select text_hash, embedding
+                        from public.kb_embedding_cache
+                        where model_id = %s and text_hash = any(%s)
+                        """,
+                        (model_key, hashes),
+                        prepare=False,
+                    )
+                    return {row[0]: list(row[1]) for row in cur.fetchall() or []}
+        except Exception as e:
+            logger.debug("Embedding cache lookup failed for %s: %s", model_key, e)
+            return {}
+
+    def put_many(self, model_key: str, items: Dict[str, List[float]]) -> None:
+        if not items:
+            return
+        try:
+            from core.database import get_conn
+
+            with get_conn() as conn:
+                with conn.cursor() as cur:
+                    cur.executemany(
+                        """
+                        insert into public.kb_embedding_cache (model_id, text_hash, embedding)
+                        values (%s, %s, %s::real[])
+                        on conflict (model_id, text_hash) do nothing
+                        """,
+                        [(model_key, h, vec) for h, vec in items.items()],
+                    )
+        except Exception as e:
+            logger.debug("Embedding cache store failed for %s: %s", model_key, e)
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper that only calls the underlying model for unseen texts.
+
+    Lookup order: in-process LRU -> persistent store -> underlying model. Documents
+    and queries use separate key spaces because some backends embed them differently.
+    """
+
+    def __init__(
+        self,
+        base: Embeddings,
+        model_id: str,
+        *,
+        max_size: int = DEFAULT_LRU_SIZE,
+        store: Optional[PostgresEmbeddingStore] = None,
+    ):
+        self.base = base
+        self.model_id = model_id
+        self.max_size = max_size
+        self.store = store
+        self._lru: OrderedDict[tuple[str, str], List[float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "store_hits": 0, "misses": 0}
+
+    # ---------- counters ----------
+
+    def stats(self) -> Dict[str, float]:
+        """Hit/miss counters for this model."""
+        with self._lock:
+            stats: Dict[str, float] = dict(self._stats)
+            stats["lru_size"] = len(self._lru)
+        total = stats["memory_hits"] + stats["store_hits"] + stats["misses"]
+        stats["hit_rate"] = (
+            (stats["memory_hits"] + stats["store_hits"]) / total if total else 0.0
+        )
+        return stats
+
+    def clear(self) -> None:
+        """Drop the in-process tier and reset counters (persistent tier is kept)."""
+        with self._lock:
+            self._lru.clear()
+            self._stats = {"memory_hits": 0, "store_hits": 0, "misses": 0}
+
+    # ---------- tiers ----------
+
+    def _model_key(self, kind: str) -> str:
+        return self.model_id if kind == "doc" else f"{self.model_id}:{kind}"
+
+    def _lru_get(self, kind: str, h: str) -> Optional[List[float]]:
+        with self._lock:
+            vec = self._lru.get((kind, h))
+            if vec is not None:
+                self._lru.move_to_end((kind, h))
+            return vec
+
+    def _lru_put(self, kind: str, h: str, vec: List[float]) -> None:
+        with self._lock:
+            self._lru[(kind, h)] = vec
+            self._lru.move_to_end((kind, h))
+            while len(self._lru) > self.max_size:
+                self._lru.popitem(last=False)
+
+    def _count(self, key: str, n: int) -> None:
+        if n:
+            with self._lock:
+                self._stats[key] += n
+
+    def _lookup(
+        self, kind: str, texts: List[str]
+    ) -> tuple[List[Optional[List[float]]], Dict[str, List[int]]]:
+        """Resolve texts from cache tiers; returns partial results and misses by hash."""
+        hashes = [text_hash(t) for t in texts]
+        results: List[Optional[List[float]]] = [None] * len(texts)
+        pending: Dict[str, List[int]] = {}
+        for i, h in enumerate(hashes):
+            vec = self._lru_get(kind, h)
+            if vec is not None:
+                results[i] = vec
+                self._count("memory_hits", 1)
+            else:
+                pending.setdefault(h, []).append(i)
+
+        if pending and self.store is not None:
+            found = self.store.get_many(self._model_key(kind), list(pending))
+            for h, vec in found.items():
+                self._lru_put(kind, h, vec)
+                for i in pending.pop(h):
+                    results[i] = vec
+                    self._count("store_hits", 1)
+        return results, pending
+
+    def _fill(
+        self,
+        kind: str,
+        results: List[Optional[List[float]]],
+        pending: Dict[str, List[int]],
+        vectors: List[List[float]],
+    ) -> Dict[str, List[float]]:
+        vectors = list(vectors)
+        if len(vectors) != len(pending):
+            raise ValueError(
+                f"embedding model returned {len(vectors)} vectors for {len(pending)} texts"
+            )
+        fresh: Dict[str, List[float]] = {}
+        for h, vec in zip(pending, vectors):
+            vec = list(vec)
+            fresh[h] = vec
+            self._lru_put(kind, h, vec)
+            for i in pending[h]:
+                results[i] = vec
+        self._count("misses", sum(len(ix) for ix in pending.values()))
+        return fresh
+
+    @staticmethod
+    def _complete(results: List[Optional[List[float]]]) -> List[List[float]]:
+        """Return results aligned with the input texts; every slot must be filled."""
+        missing = [i for i, r in enumerate(results) if r is None]
+        if missing:
+            raise ValueError(f"no embedding for text(s) at index {missing}")
+        return results  # type: ignore[return-value]
+
+    # ---------- Embeddings API ----------
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        results, pending = self._lookup("doc", texts)
+        if pending:
+            missing = [texts[ix[0]] for ix in pending.values()]
+            fresh = self._fill("doc", results, pending, self.base.embed_documents(missing))
+            if self.store is not None:
+                self.store.put_many(self._model_key("doc"), fresh)
+        return self._complete(results)
+
+    def embed_query(self, text: str) -> List[float]:
+        results, pending = self._lookup("query", [text])
+        if pending:
+            fresh = self._fill("query", results, pending, [self.base.embed_query(text)])
+            if self.store is not None:
+                self.store.put_many(self._model_key("query"), fresh)
+        return results[0] or []
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """Embed several queries: one cache lookup, embed_query for each miss (query key space)."""
+        results, pending = self._lookup("query", texts)
+        if pending:
+            vectors = [self.base.embed_query(texts[ix[0]]) for ix in pending.values()]
+            fresh = self._fill("query", results, pending, vectors)
+            if self.store is not None:
+                self.store.put_many(self._model_key("query"), fresh)
+        return self._complete(results)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        results, pending = await asyncio.to_thread(self._lookup, "doc", texts)
+        if pending:
+            missing = [texts[ix[0]] for ix in pending.values()]
+            vectors = await self.base.aembed_documents(missing)
+            fresh = self._fill("doc", results, pending, vectors)
+            if self.store is not None:
+                await asyncio.to_thread(self.store.put_many, self._model_key("doc"), fresh)
+        return self._complete(results)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        results, pending = await asyncio.to_thread(self._lookup, "query", [text])
+        if pending:
+            vector = await self.base.aembed_query(text)
+            fresh = self._fill("query", results, pending, [vector])
+            if self.store is not None:
+                await asyncio.to_thread(self.store.put_many, self._model_key("query"), fresh)
+        return results[0] or []
@@ -2,13 +2,17 @@
 
 from __future__ import annotations
 
+import logging
 import os
 from functools import lru_cache
-from typing import Dict, List
+from typing import Any, Dict, List
 
 from langchain_core.embeddings import Embeddings
 from langchain_openai import OpenAIEmbeddings
 
+from core.rag.embedding_cache import CachedEmbeddings, PostgresEmbeddingStore
+
+logger = logging.getLogger(__name__)
 
 OPENAI_MODEL_ID = "openai"
 OPENAI_MODEL_NAME = "OpenAI Cloud (Rápido)"
@@ -25,6 +29,58 @@ OPENROUTER_BGE_M3_MODEL_NAME = "BGE-M3 via OpenRouter"
 OPENROUTER_BGE_M3_MODEL_DIMS = 1024
 OPENROUTER_BGE_M3_REMOTE_MODEL = "baai/bge-m3"
 
+# Índice da perna vetorial por modelo (sql/kb/21_quantized_vector_search.sql):
+#   "vector"  -> HNSW float32 (idx_kb_openai / idx_kb_bgem3), sem rescore
+#   "halfvec" -> HNSW float16 (índice ~2x menor) + rescore float32 do top-N
+#   "binary"  -> HNSW de binary_quantize (1 bit/dim, ~32x menor) + rescore float32
+# halfvec/binary exigem o índice de sql/kb/optional/ (aplicado à parte).
+# rescore_factor: candidatos da passada grossa = k * fator.
+VECTOR_STORAGES = ("vector", "halfvec", "binary")
+_DEFAULT_RESCORE_FACTOR = {"vector": 1, "halfvec": 2, "binary": 8}
+
+
+@lru_cache(maxsize=None)
+def _resolve_storage(var: str, value: str) -> str:
+    if value not in VECTOR_STORAGES:
+        logger.warning("%s inválido: %s (use %s); usando vector", var, value, ", ".join(VECTOR_STORAGES))
+        return "vector"
+    return value
+
+
+def _storage_from_env(var: str) -> str:
+    """Armazenamento configurado em var; valor inválido vira "vector" (com aviso, uma vez)."""
+    return _resolve_storage(var, os.getenv(var, "vector").strip().lower())
+
+
+def _metadata(model_id: str, name: str, dims: int, storage_env: str) -> Dict[str, Any]:
+    return {"id": model_id, "name": name, "dims": dims, "storage_env": storage_env}
+
+
+_MODEL_METADATA: Dict[str, Dict[str, Any]] = {
+    OPENAI_MODEL_ID: _metadata(
+        OPENAI_MODEL_ID, OPENAI_MODEL_NAME, OPENAI_MODEL_DIMS, "OPENAI_EMBEDDING_STORAGE"
+    ),
+    BGE_M3_MODEL_ID: _metadata(
+        BGE_M3_MODEL_ID, BGE_M3_MODEL_NAME, BGE_M3_MODEL_DIMS, "BGE_M3_EMBEDDING_STORAGE"
+    ),
+    OPENROUTER_BGE_M3_MODEL_ID: _metadata(
+        OPENROUTER_BGE_M3_MODEL_ID,
+        OPENROUTER_BGE_M3_MODEL_NAME,
+        OPENROUTER_BGE_M3_MODEL_DIMS,
+        "BGE_M3_EMBEDDING_STORAGE",
+    ),
+}
+
+# Cache de embeddings: EMBEDDING_CACHE=false desliga; EMBEDDING_CACHE_PERSIST=false mantém só o LRU
+EMBEDDING_CACHE_ENABLED = (
+    os.getenv("EMBEDDING_CACHE", "true").strip().lower() in {"1", "true", "yes"}
+)
+EMBEDDING_CACHE_PERSIST = (
+    os.getenv("EMBEDDING_CACHE_PERSIST", "true").strip().lower() in {"1", "true", "yes"}
+)
+
+_cached_models: Dict[str, CachedEmbeddings] = {}
+
 
 def _validate_openai_key() -> str:
     api_key = os.getenv("OPENAI_API_KEY", "").strip()
@@ -51,11 +107,32 @@ def _bge_available() -> bool:
 
 
 class EmbeddingFactory:
-    """Factory for embedding models with lazy loading."""
+    """Factory for embedding models with lazy loading.
+
+    get_model() returns the model wrapped in CachedEmbeddings (unless EMBEDDING_CACHE=false);
+    get_base_model() returns the raw client.
+    """
 
     @classmethod
     @lru_cache(maxsize=None)
     def get_model(cls, model_id: str) -> Embeddings:
+        model_id = (model_id or "").strip().lower() or OPENAI_MODEL_ID
+        base = cls.get_base_model(model_id)
+        if not EMBEDDING_CACHE_ENABLED:
+            return base
+        store = PostgresEmbeddingStore() if EMBEDDING_CACHE_PERSIST else None
+        model = CachedEmbeddings(base, model_id, store=store)
+        _cached_models[model_id] = model
+        return model
+
+    @classmethod
+    def cache_stats(cls) -> Dict[str, Dict[str, float]]:
+        """Hit/miss counters per embedding model already instantiated."""
+        return {model_id: model.stats() for model_id, model in _cached_models.items()}
+
+    @classmethod
+    @lru_cache(maxsize=None)
+    def get_base_model(cls, model_id: str) -> Embeddings:
         model_id = (model_id or "").strip().lower()
         if not model_id:
             model_id = OPENAI_MODEL_ID
@@ -87,17 +164,22 @@ class EmbeddingFactory:
 
         raise RuntimeError(f"Embedding model não suportado: {model_id}")
 
+    @classmethod
+    def get_metadata(cls, model_id: str) -> Dict[str, Any]:
+        """id, name, dims, storage (vector/halfvec/binary) and rescore_factor of a model."""
+        model_id = (model_id or "").strip().lower() or OPENAI_MODEL_ID
+        meta = _MODEL_METADATA.get(model_id)
+        if meta is None:
+            raise RuntimeError(f"Embedding model não suportado: {model_id}")
+        meta = dict(meta)
+        storage = _storage_from_env(meta.pop("storage_env"))
+        return {**meta, "storage": storage, "rescore_factor": _DEFAULT_RESCORE_FACTOR[storage]}
+
     @classmethod
     def list_models(cls) -> List[Dict[str, object]]:
-        models: List[Dict[str, object]] = [
-            {"id": OPENAI_MODEL_ID, "name": OPENAI_MODEL_NAME, "dims": OPENAI_MODEL_DIMS}
-        ]
+        models: List[Dict[str, object]] = [cls.get_metadata(OPENAI_MODEL_ID)]
         if _bge_available():
-            models.append(
-                {"id": BGE_M3_MODEL_ID, "name": BGE_M3_MODEL_NAME, "dims": BGE_M3_MODEL_DIMS}
-            )
+            models.append(cls.get_metadata(BGE_M3_MODEL_ID))
         if os.getenv("OPENROUTER_API_KEY"):
-            models.append(
-                {"id": OPENROUTER_BGE_M3_MODEL_ID, "name": OPENROUTER_BGE_M3_MODEL_NAME, "dims": OPENROUTER_BGE_M3_MODEL_DIMS}
-            )
+            models.append(cls.get_metadata(OPENROUTER_BGE_M3_MODEL_ID))
         return models
@@ -3,6 +3,9 @@
 from typing import List, Dict, Any, Optional, TypedDict
 from json import dumps as json_dumps
 import hashlib
+import logging
+import os
+import time
 from pathlib import Path
 import mimetypes
 
@@ -11,49 +14,74 @@ from langgraph.graph import StateGraph, END
 from core.database import get_conn
 from core.rag.loaders import load_and_split_dir, split_text
 from core.rag.embeddings import EmbeddingFactory
+from core.rag.embedding_batcher import embed_texts_sync
+from core.rag.search_cache import bump_index_generation
+from core.rag.vector_adapter import Vector
 
+logger = logging.getLogger(__name__)
 
-def _get_embedding_client():
-    """OpenAI embeddings client. Requires OPENAI_API_KEY (real OpenAI key, not OpenRouter)."""
-    return EmbeddingFactory.get_model("openai")
+# kb_chunks is partitioned by tenant (sql/kb/20_kb_chunks_tenant_partitions.sql).
+# Tenants with this many chunks in kb_chunks_default get their own partition
+# (HNSW) from the daily maintenance job (core/jobs.py); 0 disables it.
+KB_TENANT_PARTITION_REBALANCE_ROWS = int(os.getenv("KB_TENANT_PARTITION_REBALANCE_ROWS", "20000"))
+# Same threshold checked right after an ingest; 0 (default) leaves promotion
+# to the maintenance job.
+KB_TENANT_PARTITION_MIN_ROWS = int(os.getenv("KB_TENANT_PARTITION_MIN_ROWS", "0"))
 
 
-def vec_to_literal(v: List[float]) -> str:
-    """Convert float vector to pgvector literal: "[v1, v2, ...]"."""
-    return "[" + ",".join(f"{x:.6f}" for x in v) + "]"
+def _get_embedding_client(model_id: str = "openai"):
+    """Embeddings client. "openai" requires OPENAI_API_KEY (real OpenAI key, not OpenRouter)."""
+    return EmbeddingFactory.get_model(model_id)
 
 
-def embed_texts(texts: List[str]) -> List[List[float]]:
-    """Generate embeddings for texts (OpenAI api.openai.com)."""
-    emb = _get_embedding_client()
-    return emb.embed_documents(texts)
+def embed_texts(texts: List[str], model_id: str = "openai") -> List[List[float]]:
+    """Generate embeddings for texts (default: OpenAI api.openai.com).
+
+    Runs the async batcher: token-bounded batches sent concurrently, with 429 backoff.
+    """
+    return embed_texts_sync(texts, model_id=model_id, model=_get_embedding_client(model_id))
+
+
+def _log_throughput(label: str, count: int, started: float) -> None:
+    """Log rows/s for an upsert path (compare loop vs bulk)."""
+    elapsed = max(time.perf_counter() - started, 1e-9)
+    logger.info(
+        "[%s] %d rows in %.3fs (%.0f rows/s)", label, count, elapsed, count / elapsed
+    )
 
 
 def upsert_chunks(
     rows: List[Dict[str, Any]], *, client_id: Optional[str] = None, empresa: Optional[str] = None
 ) -> int:
-    """Idempotent upsert by (doc_path, chunk_ix). Returns affected count."""
+    """Idempotent upsert by (tenant, doc_path, chunk_ix), one round trip per row.
+
+    Kept as the reference path; prefer bulk_upsert_chunks for large ingests.
+    """
     if not rows:
         return 0
 
+    started = time.perf_counter()
     with get_conn() as conn:
         with conn.cursor() as cur:
             count = 0
             for r in rows:
-                vec_lit = vec_to_literal(r["embedding"])
                 cur.execute(
                     """
-                    insert into public.kb_chunks (doc_path, chunk_ix, content, embedding, meta, client_id, empresa)
-                    values (%s, %s, %s, %s::vector, %s::jsonb, %s::uuid, %s)
-                    on conflict (doc_path, chunk_ix)
+                    insert into public.kb_chunks
+                        (tenant_key, doc_path, chunk_ix, content, embedding, meta, client_id, empresa)
+                    values (public.kb_tenant_key(null, %s::uuid, %s), %s, %s, %s, %s, %s::jsonb, %s::uuid, %s)
+                    on conflict (tenant_key, doc_path, chunk_ix)
                     do update set content=excluded.content, embedding=excluded.embedding, meta=excluded.meta,
-                                  client_id=excluded.client_id, empresa=excluded.empresa, updated_at=now()
+                                  client_id=coalesce(excluded.client_id, kb_chunks.client_id),
+                                  empresa=coalesce(excluded.empresa, kb_chunks.empresa), updated_at=now()
                     """,
                     (
+                        client_id,
+                        empresa,
                         r["doc_path"],
                         r["chunk_ix"],
                         r["content"],
-                        vec_lit,
+                        Vector(r["embedding"]),
                         json_dumps(r.get("meta") or {}),
                         client_id,
                         empresa,
@@ -61,9 +89,179 @@ def upsert_chunks(
                     prepare=False,
                 )
                 count += 1
+    _log_throughput("upsert_chunks", count, started)
+    bump_index_generation(client_id=client_id, empresa=empresa)
+    return count
+
+
+def bulk_upsert_chunks(
+    rows: List[Dict[str, Any]],
+    *,
+    client_id: Optional[str] = None,
+    empresa: Optional[str] = None,
+    project_id: Optional[str] = None,
+) -> int:
+    """Bulk idempotent upsert by (tenant, doc_path, chunk_ix) in a single transaction.
+
+    Rows are streamed with binary COPY into a temp staging table (embeddings as
+    float4[], no text literal) and merged into kb_chunks with one
+    INSERT ... ON CONFLICT. Duplicate keys within `rows` keep the last one,
+    matching the per-row loop. Scope columns the caller does not pass keep
+    their stored value (e.g. client_id of an empresa chunk). Returns affected count.
+    With KB_TENANT_PARTITION_MIN_ROWS set, the tenant may then be promoted to its
+    own partition (promote_tenant_if_large); a failed promotion is only logged,
+    since the chunks are already committed.
+    """
+    if not rows:
+        return 0
+
+    started = time.perf_counter()
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                create temp table if not exists _kb_chunks_stage (
+                    seq integer,
+                    doc_path text,
+                    chunk_ix integer,
+                    content text,
+                    embedding real[],
+                    meta text
+                ) on commit drop
+                """
+            )
+            with cur.copy(
+                "copy _kb_chunks_stage (seq, doc_path, chunk_ix, content, embedding, meta)"
+                " from stdin (format binary)"
+            ) as copy:
+                copy.set_types(["int4", "text", "int4", "text", "float4[]", "text"])
+                for seq, r in enumerate(rows):
+                    copy.write_row(
+                        (
+                            seq,
+                            r["doc_path"],
+                            r["chunk_ix"],
+                            r["content"],
+                            list(r["embedding"]),
+                            json_dumps(r.get("meta") or {}),
+                        )
+                    )
+            cur.execute(
+                """
+                insert into public.kb_chunks
+                    (tenant_key, doc_path, chunk_ix, content, embedding, meta, client_id, empresa, project_id)
+                select distinct on (s.doc_path, s.chunk_ix)
+                       public.kb_tenant_key(%(project_id)s::uuid, %(client_id)s::uuid, %(empresa)s),
+                       s.doc_path, s.chunk_ix, s.content, s.embedding::vector, s.meta::jsonb,
+                       %(client_id)s::uuid, %(empresa)s, %(project_id)s::uuid
+                from _kb_chunks_stage s
+                order by s.doc_path, s.chunk_ix, s.seq desc
+                on conflict (tenant_key, doc_path, chunk_ix)
+                do update set content=excluded.content, embedding=excluded.embedding, meta=excluded.meta,
+                              client_id=coalesce(excluded.client_id, kb_chunks.client_id),
+                              empresa=coalesce(excluded.empresa, kb_chunks.empresa),
+                              project_id=coalesce(excluded.project_id, kb_chunks.project_id),
+                              updated_at=now()
+                """,
+                {"client_id": client_id, "empresa": empresa, "project_id": project_id},
+                prepare=False,
+            )
+            count = cur.rowcount
+    _log_throughput("bulk_upsert_chunks", count, started)
+    bump_index_generation(client_id=client_id, empresa=empresa, project_id=project_id)
+    if KB_TENANT_PARTITION_MIN_ROWS > 0:
+        try:
+            promote_tenant_if_large(client_id=client_id, empresa=empresa, project_id=project_id)
+        except Exception as e:
+            logger.warning("[partitions] tenant promotion failed (chunks kept in default): %s", e)
     return count
 
 
+def promote_tenant_if_large(
+    *,
+    client_id: Optional[str] = None,
+    empresa: Optional[str] = None,
+    project_id: Optional[str] = None,
+    min_rows: int = KB_TENANT_PARTITION_MIN_ROWS,
+) -> Optional[str]:
+    """Move the tenant out of kb_chunks_default once it has min_rows chunks.
+
+    Returns the new partition name, or None when the tenant stays where it is.
+    The count stops at min_rows (index-only scan on the tenant prefix), so small
+    tenants cost one cheap query per ingest.
+    """
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                with t as (select public.kb_tenant_key(%(project_id)s::uuid, %(client_id)s::uuid, %(empresa)s) as key)
+                select public.kb_promote_tenant(t.key)
+                from t
+                where not exists (select 1 from public.kb_tenant_partitions p where p.tenant_key = t.key)
+                  and (
+                      select count(*) from (
+                          select 1 from public.kb_chunks_default c where c.tenant_key = t.key limit %(min_rows)s
+                      ) n
+                  ) >= %(min_rows)s
+                """,
+                {"client_id": client_id, "empresa": empresa, "project_id": project_id, "min_rows": min_rows},
+                prepare=False,
+            )
+            row = cur.fetchone()
+    if row:
+        logger.info("[partitions] tenant promoted to %s", row[0])
+        return row[0]
+    return None
+
+
+def rebalance_tenant_partitions(min_rows: int = KB_TENANT_PARTITION_REBALANCE_ROWS) -> List[Dict[str, Any]]:
+    """Promote every tenant of kb_chunks_default with at least min_rows chunks.
+
+    Runs public.kb_rebalance_tenants (sql/kb/24_kb_promote_tenant_attach.sql:
+    the partition is filled and indexed before ATTACH, so searches keep running).
+    Returns one dict per promoted tenant.
+    """
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                "select promoted_tenant, partition_name, row_count from public.kb_rebalance_tenants(%s)",
+                (min_rows,),
+            )
+            rows = cur.fetchall()
+    promoted = [{"tenant_key": t, "partition_name": p, "row_count": n} for t, p, n in rows]
+    for r in promoted:
+        logger.info("[partitions] %s promoted to %s (%d chunks)", r["tenant_key"], r["partition_name"], r["row_count"])
+    return promoted
+
+
+def delete_chunks_beyond(
+    doc_path: str,
+    chunk_count: int,
+    *,
+    client_id: Optional[str] = None,
+    empresa: Optional[str] = None,
+    project_id: Optional[str] = None,
+) -> int:
+    """Delete chunks of doc_path with chunk_ix >= chunk_count (document shrank). Returns count.
+
+    The scope (client_id/empresa/project_id) restricts the delete to that tenant's
+    partition and drives search cache invalidation; without one, doc_path is deleted
+    in every tenant and every cached search is invalidated.
+    """
+    sql = "delete from public.kb_chunks where doc_path = %s and chunk_ix >= %s"
+    params: tuple = (doc_path, chunk_count)
+    if client_id or empresa or project_id:
+        sql += " and tenant_key = public.kb_tenant_key(%s::uuid, %s::uuid, %s)"
+        params += (project_id, client_id, empresa)
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute(sql, params, prepare=False)
+            deleted = cur.rowcount
+    if deleted:
+        bump_index_generation(client_id=client_id, empresa=empresa, project_id=project_id)
+    return deleted
+
+
 def sha256_text(s: str) -> str:
     """Calculate SHA256 hash of text."""
     return hashlib.sha256(s.encode("utf-8")).hexdigest()
@@ -90,7 +288,7 @@ def stage_docs_from_dir(
                     """
                     insert into public.kb_docs (source_path, source_hash, mime_type, content, meta, client_id, empresa)
                     values (%s, %s, %s, %s, %s::jsonb, %s::uuid, %s)
-                    on conflict (source_path, source_hash) do nothing
+                    on conflict (source_path, source_hash, dc_project_id) do nothing
                     """,
                     (str(path.as_posix()), h, mime, text, json_dumps({}), client_id, empresa),
                     prepare=False,
@@ -109,6 +307,112 @@ def truncate_kb_tables() -> None:
         with conn.cursor() as cur:
             cur.execute("truncate table public.kb_chunks;")
             cur.execute("truncate table public.kb_docs;")
+    bump_index_generation()
+
+
+def _load_manifest(
+    cur,
+    doc_paths: List[str],
+    *,
+    client_id: Optional[str] = None,
+    empresa: Optional[str] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """Load kb_chunk_manifest rows for the given output doc_paths in the write tenant."""
+    if not doc_paths:
+        return {}
+    cur.execute(
+        """
+        select doc_path, source_hash, strategy, chunk_size, chunk_overlap, embedding_model
+        from public.kb_chunk_manifest
+        where tenant_key = public.kb_tenant_key(null, %s::uuid, %s)
+          and doc_path = any(%s)
+        """,
+        (client_id, empresa, doc_paths),
+        prepare=False,
+    )
+    return {
+        row[0]: {
+            "source_hash": row[1],
+            "strategy": row[2],
+            "chunk_size": row[3],
+            "chunk_overlap": row[4],
+            "embedding_model": row[5],
+        }
+        for row in cur.fetchall() or []
+    }
+
+
+def _pending_docs(
+    docs: List[tuple],
+    manifest: Dict[str, Dict[str, Any]],
+    wanted: Dict[str, Any],
+    out_path,
+) -> List[tuple]:
+    """(doc_path, source_path, source_hash, content) of the docs that must be (re)chunked.
+
+    A doc is skipped when its manifest entry (already scoped to the write tenant)
+    matches the source hash and the wanted chunking/embedding combination.
+    """
+    pending = []
+    for _id, source_path, source_hash, content in docs:
+        doc_path = out_path(source_path)
+        done = manifest.get(doc_path)
+        if done and done == {"source_hash": source_hash, **wanted}:
+            continue
+        pending.append((doc_path, source_path, source_hash, content))
+    return pending
+
+
+def _save_manifest(
+    entries: List[Dict[str, Any]],
+    *,
+    client_id: Optional[str] = None,
+    empresa: Optional[str] = None,
+) -> None:
+    """Prune leftover chunks and record the combination that produced each doc_path.
+
+    Both are scoped to the write tenant (client_id/empresa): the same doc_path in
+    another tenant is a different set of chunks.
+    """
+    if not entries:
+        return
+    doc_paths = [e["doc_path"] for e in entries]
+    chunk_counts = [e["chunk_count"] for e in entries]
+    scope = {"client_id": client_id, "empresa": empresa}
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            # Document now has fewer chunks: drop the tail left from the previous run
+            cur.execute(
+                """
+                delete from public.kb_chunks c
+                using unnest(%s::text[], %s::int[]) as t(doc_path, chunk_count)
+                where c.tenant_key = public.kb_tenant_key(null, %s::uuid, %s)
+                  and c.doc_path = t.doc_path and c.chunk_ix >= t.chunk_count
+                """,
+                (doc_paths, chunk_counts, client_id, empresa),
+                prepare=False,
+            )
+            pruned = cur.rowcount
+            cur.executemany(
+                """
+                insert into public.kb_chunk_manifest
+                    (tenant_key, doc_path, source_path, source_hash, strategy, chunk_size,
+                     chunk_overlap, embedding_model, chunk_count)
+                values (public.kb_tenant_key(null, %(client_id)s::uuid, %(empresa)s),
+                        %(doc_path)s, %(source_path)s, %(source_hash)s, %(strategy)s,
+                        %(chunk_size)s, %(chunk_overlap)s, %(embedding_model)s, %(chunk_count)s)
+                on conflict (tenant_key, doc_path)
+                do update set source_path=excluded.source_path, source_hash=excluded.source_hash,
+                              strategy=excluded.strategy, chunk_size=excluded.chunk_size,
+                              chunk_overlap=excluded.chunk_overlap,
+                              embedding_model=excluded.embedding_model,
+                              chunk_count=excluded.chunk_count, updated_at=now()
+                """,
+                [{**e, **scope} for e in entries],
+            )
+    if pruned:
+        logger.info("[materialize] pruned %d leftover chunks", pruned)
+        bump_index_generation(client_id=client_id, empresa=empresa)
 
 
 def materialize_chunks_from_staging(
@@ -121,13 +425,29 @@ def materialize_chunks_from_staging(
     path_prefix: Optional[str] = None,
     target_empresa: Optional[str] = None,
     doc_path_prefix: Optional[str] = None,
+    embedding_model: str = "openai",
+    force: bool = False,
 ) -> int:
     """Read kb_docs (filter by empresa/path_prefix) and materialize kb_chunks with indicated strategy.
 
-    - Selection: filters rows in kb_docs by `empresa` and optionally by `path_prefix`.
+    - Selection: filters rows in kb_docs by `empresa` and optionally by `path_prefix`;
+      only the most recent staged version of each source_path is used.
+    - Incremental: documents whose (source_hash, strategy, chunk_size, chunk_overlap,
+      embedding_model) match kb_chunk_manifest for the write tenant are skipped without
+      any embedding call. Pass `force=True` to rebuild everything.
     - Write: writes to kb_chunks using `target_empresa` if provided; otherwise uses `empresa`.
-    - Idempotent by (doc_path, chunk_ix) — overwrites same pair on upsert.
+    - Idempotent by (tenant, doc_path, chunk_ix) — overwrites same pair on upsert and
+      deletes chunks beyond the new chunk count.
+
+    Returns the number of chunks written in this run.
     """
+    def _out_path(source_path: str) -> str:
+        if doc_path_prefix:
+            return f"{doc_path_prefix.rstrip('/')}/{source_path}"
+        return source_path
+
+    write_empresa = target_empresa or empresa
+
     with get_conn() as conn:
         with conn.cursor() as cur:
             clauses = []
@@ -148,51 +468,161 @@ def materialize_chunks_from_staging(
                 vals.append(like)
             where = (" where " + " and ".join(clauses)) if clauses else ""
             cur.execute(
-                f"select id, source_path, content from public.kb_docs{where}",
+                "select distinct on (source_path) id, source_path, source_hash, content"
+                f" from public.kb_docs{where}"
+                " order by source_path, created_at desc, id desc",
                 tuple(vals),
                 prepare=False,
             )
             docs = cur.fetchall() or []
+            manifest = {} if force else _load_manifest(
+                cur, [_out_path(d[1]) for d in docs], client_id=client_id, empresa=write_empresa
+            )
 
     if not docs:
         return 0
 
+    wanted = {
+        "strategy": strategy,
+        "chunk_size": chunk_size,
+        "chunk_overlap": chunk_overlap,
+        "embedding_model": embedding_model,
+    }
+    pending = _pending_docs(docs, manifest, wanted, _out_path)
+
+    logger.info(
+        "[materialize] %d docs selected, %d unchanged, %d to (re)chunk",
+        len(docs),
+        len(docs) - len(pending),
+        len(pending),
+    )
+    if not pending:
+        return 0
+
     # Decide embedder for semantic
-    embedder = EmbeddingFactory.get_model("openai") if strategy == "semantic" else None
+    embedder = EmbeddingFactory.get_model(embedding_model) if strategy == "semantic" else None
 
-    total = 0
     rows: List[Dict[str, Any]] = []
+    entries: List[Dict[str, Any]] = []
 
-    for _id, source_path, content in docs:
+    for doc_path, source_path, source_hash, content in pending:
         chunks, resolved = split_text(
-            content,
+            content or "",
             strategy=strategy,
             embedder=embedder,
             chunk_size=chunk_size,
             chunk_overlap=chunk_overlap,
         )
         for i, c in enumerate(chunks):
-            new_doc_path = source_path
-            if doc_path_prefix:
-                new_doc_path = f"{doc_path_prefix.rstrip('/')}/{source_path}"
             rows.append(
                 {
-                    "doc_path": new_doc_path,
+                    "doc_path": doc_path,
                     "chunk_ix": i,
-                    "content": c,
+                    "content": c["content"],
                     "meta": {"chunking": resolved},
                 }
             )
+        entries.append(
+            {
+                "doc_path": doc_path,
+                "source_path": source_path,
+                "source_hash": source_hash,
+                "chunk_count": len(chunks),
+                **wanted,
+            }
+        )
 
-    vectors = embed_texts([r["content"] for r in rows])
-    for r, vec in zip(rows, vectors):
-        r["embedding"] = vec
+    total = 0
+    if rows:
+        vectors = embed_texts([r["content"] for r in rows], model_id=embedding_model)
+        for r, vec in zip(rows, vectors):
+            r["embedding"] = vec
 
-    write_empresa = target_empresa or empresa
-    total = upsert_chunks(rows, client_id=client_id, empresa=write_empresa)
+        total = bulk_upsert_chunks(rows, client_id=client_id, empresa=write_empresa)
+
+    _save_manifest(entries, client_id=client_id, empresa=write_empresa)
     return total
 
 
+def set_kb_doc_ingest_status(doc_id: int, status: str, **extra: Any) -> None:
+    """Record ingestion progress in kb_docs.meta (ingest_status + extra fields). Never raises."""
+    try:
+        with get_conn() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    """
+                    update public.kb_docs
+                    set meta = coalesce(meta, '{}'::jsonb) || %s::jsonb, updated_at = now()
+                    where id = %s
+                    """,
+                    (json_dumps({"ingest_status": status, **extra}), doc_id),
+                    prepare=False,
+                )
+    except Exception as e:
+        logger.warning("Failed to record ingest status (%s -> %s): %s", doc_id, status, e)
+
+
+def ingest_kb_document(
+    doc_id: int,
+    *,
+    project_id: Optional[str] = None,
+    strategy: str = "semantic",
+    chunk_size: int = 800,
+    chunk_overlap: int = 200,
+    embedding_model: str = "openai",
+) -> int:
+    """Chunk, embed and index a single staged kb_docs row (one ingest task per document).
+
+    Progress goes to kb_docs.meta.ingest_status: staged -> chunked -> embedded -> indexed
+    (or failed, with ingest_error). Returns the number of chunks indexed.
+    """
+    try:
+        with get_conn() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    "select source_path, content from public.kb_docs where id = %s",
+                    (doc_id,),
+                    prepare=False,
+                )
+                row = cur.fetchone()
+        if not row:
+            raise RuntimeError(f"kb_docs {doc_id} not found")
+        source_path, content = row
+        set_kb_doc_ingest_status(doc_id, "staged")
+
+        embedder = EmbeddingFactory.get_model(embedding_model) if strategy == "semantic" else None
+        chunks, resolved = split_text(
+            content or "",
+            strategy=strategy,
+            embedder=embedder,
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+        )
+        set_kb_doc_ingest_status(doc_id, "chunked", chunk_count=len(chunks))
+
+        rows = [
+            {
+                "doc_path": source_path,
+                "chunk_ix": i,
+                "content": c["content"],
+                "meta": {"chunking": resolved},
+            }
+            for i, c in enumerate(chunks)
+        ]
+        if rows:
+            vectors = embed_texts([r["content"] for r in rows], model_id=embedding_model)
+            for r, vec in zip(rows, vectors):
+                r["embedding"] = vec
+            set_kb_doc_ingest_status(doc_id, "embedded", chunk_count=len(rows))
+            bulk_upsert_chunks(rows, project_id=project_id)
+        delete_chunks_beyond(source_path, len(rows), project_id=project_id)
+        set_kb_doc_ingest_status(doc_id, "indexed", chunk_count=len(rows), ingest_error=None)
+        return len(rows)
+    except Exception as e:
+        set_kb_doc_ingest_status(doc_id, "failed", ingest_error=str(e)[:1000])
+        raise
+
+
 # ---------- LangGraph ingestion graph ----------
 
 
@@ -204,6 +634,7 @@ class IngestState(TypedDict, total=False):
     empresa: Optional[str]
     skip_stage: bool
     skip_chunks: bool
+    force: bool
     staged: int
     chunked: int
     processed: int
@@ -248,6 +679,7 @@ def node_chunk(state: IngestState) -> IngestState:
             "empresa": empresa,
             "client_id": client_id,
             "doc_path_prefix": s,
+            "force": bool(state.get("force")),
         }
         if chunk_size is not None:
             kwargs["chunk_size"] = int(chunk_size)
@@ -1,52 +1,114 @@
 """RAG ingestion for planning documents: chunking, embedding, persistence by project_id."""
 
+import asyncio
 import logging
-from json import dumps
 from uuid import UUID
 
 from core.database import get_conn
-from core.rag.loaders import load_document_from_bytes, split_text
-from core.rag.ingestion import vec_to_literal
-from core.rag.embeddings import EmbeddingFactory
+from core.rag.loaders import split_text
+from core.rag.ingestion import bulk_upsert_chunks, delete_chunks_beyond
+from core.rag.embedding_batcher import aembed_texts
+from core.rag.project_settings import get_project_embedding_model
 
 logger = logging.getLogger(__name__)
 
 
-async def ingest_project_document_task(
-    project_id: UUID,
-    document_id: UUID,
-    content_bytes: bytes,
-    filename: str,
+# Estados de ingestão gravados em planning_documents.ingest_status
+INGEST_QUEUED = "queued"
+INGEST_STAGED = "staged"
+INGEST_CHUNKED = "chunked"
+INGEST_EMBEDDED = "embedded"
+INGEST_INDEXED = "indexed"
+INGEST_FAILED = "failed"
+
+
+def set_document_ingest_status(
+    document_id: UUID | str,
+    status: str,
+    *,
+    chunk_count: int | None = None,
+    error: str | None = None,
+    task_id: str | None = None,
 ) -> None:
+    """Grava o progresso da ingestão em planning_documents (best-effort, nunca levanta)."""
+    try:
+        with get_conn() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    """
+                    UPDATE planning_documents
+                    SET ingest_status = %s,
+                        ingest_error = %s,
+                        chunk_count = COALESCE(%s, chunk_count),
+                        ingest_task_id = COALESCE(%s, ingest_task_id),
+                        ingest_updated_at = NOW()
+                    WHERE id = %s
+                    """,
+                    (status, error, chunk_count, task_id, str(document_id)),
+                )
+    except Exception as e:
+        logger.warning("Falha ao gravar status de ingestão (%s -> %s): %s", document_id, status, e)
+
+
+def _load_planning_document(document_id: UUID | str) -> tuple[str, str]:
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                "SELECT file_name, content FROM planning_documents WHERE id = %s",
+                (str(document_id),),
+            )
+            row = cur.fetchone()
+            if not row:
+                raise RuntimeError(f"Documento {document_id} não encontrado para ingestão RAG")
+            return row[0] or "doc", row[1] or ""
+
+
+async def ingest_project_document(project_id: UUID | str, document_id: UUID | str) -> int:
     """
-    Processa documento em background: Chunking (Markdown/Fixed) -> Embedding -> DB (com project_id).
+    Ingestão de um documento de planejamento (executada pelo worker da fila 'ingest').
+
+    Texto extraído (planning_documents.content) -> Chunking (Markdown/Fixed) -> Embedding
+    -> kb_chunks (com project_id). Cada etapa atualiza planning_documents.ingest_status.
+    Retorna o número de chunks indexados; em erro marca 'failed' e propaga a exceção.
     """
     try:
+        # 1. Carregar texto já extraído no upload
+        filename, text = await asyncio.to_thread(_load_planning_document, document_id)
+        await asyncio.to_thread(set_document_ingest_status, document_id, INGEST_STAGED)
         logger.info("Iniciando ingestão RAG: %s (Proj: %s)", filename, project_id)
 
-        # 1. Carregar texto
-        text = load_document_from_bytes(content_bytes, filename)
-
         # 2. Chunking inteligente
         strategy = "markdown" if filename.lower().endswith(".md") else "fixed"
-        chunks, _ = split_text(text, strategy=strategy, chunk_size=1000, chunk_overlap=200)
+        chunks, _ = await asyncio.to_thread(
+            split_text, text, strategy=strategy, chunk_size=1000, chunk_overlap=200
+        )
+        await asyncio.to_thread(
+            set_document_ingest_status, document_id, INGEST_CHUNKED, chunk_count=len(chunks)
+        )
 
+        doc_path = f"planning/{project_id}/{filename}"
         if not chunks:
             logger.warning("Nenhum chunk gerado para %s", filename)
-            return
+            await asyncio.to_thread(
+                delete_chunks_beyond, doc_path, 0, project_id=str(project_id)
+            )
+            await asyncio.to_thread(
+                set_document_ingest_status, document_id, INGEST_INDEXED, chunk_count=0
+            )
+            return 0
 
+        # 3. Embeddings
         chunk_texts = [c["content"] for c in chunks]
-        embedding_model = _get_project_embedding_model(project_id)
-        embedder = EmbeddingFactory.get_model(embedding_model)
-        vectors = embedder.embed_documents(chunk_texts)
+        embedding_model = await asyncio.to_thread(get_project_embedding_model, project_id)
+        vectors = await aembed_texts(chunk_texts, model_id=embedding_model)
+        await asyncio.to_thread(set_document_ingest_status, document_id, INGEST_EMBEDDED)
 
-        # 3. Persistência isolada
-        doc_path_prefix = f"planning/{project_id}/{filename}"
+        # 4. Persistência isolada
         rows = []
         for i, (c, vec) in enumerate(zip(chunks, vectors)):
             rows.append(
                 {
-                    "doc_path": doc_path_prefix,
+                    "doc_path": doc_path,
                     "chunk_ix": i,
                     "content": c["content"],
                     "embedding": vec,
@@ -58,8 +120,15 @@ async def ingest_project_document_task(
                 }
             )
 
-        _upsert_planning_chunks(rows, project_id)
+        await asyncio.to_thread(_upsert_planning_chunks, rows, project_id)
+        await asyncio.to_thread(
+            delete_chunks_beyond, doc_path, len(rows), project_id=str(project_id)
+        )
+        await asyncio.to_thread(
+            set_document_ingest_status, document_id, INGEST_INDEXED, chunk_count=len(rows)
+        )
         logger.info("Sucesso: %s chunks indexados para %s", len(rows), filename)
+        return len(rows)
 
     except Exception as e:
         logger.error(
@@ -68,47 +137,14 @@ async def ingest_project_document_task(
             e,
             exc_info=True,
         )
-
-
-def _get_project_embedding_model(project_id: UUID) -> str:
-    with get_conn() as conn:
-        with conn.cursor() as cur:
-            cur.execute(
-                "SELECT embedding_model FROM planning_projects WHERE id = %s", (str(project_id),)
-            )
-            row = cur.fetchone()
-            if not row:
-                raise RuntimeError("Projeto não encontrado para ingestão RAG")
-            model = row[0] if isinstance(row, tuple) else row.get("embedding_model")
-            return (model or "openai").strip().lower()
+        await asyncio.to_thread(
+            set_document_ingest_status, document_id, INGEST_FAILED, error=str(e)[:1000]
+        )
+        raise
 
 
 def _upsert_planning_chunks(rows: list, project_id: UUID) -> None:
-    """Insere ou atualiza chunks em kb_chunks com project_id."""
+    """Insere ou atualiza chunks em kb_chunks com project_id (COPY + merge único)."""
     if not rows:
         return
-    with get_conn() as conn:
-        with conn.cursor() as cur:
-            for r in rows:
-                cur.execute(
-                    """
-                    INSERT INTO kb_chunks
-                    (doc_path, chunk_ix, content, embedding, meta, project_id)
-                    VALUES (%s, %s, %s, %s::vector, %s::jsonb, %s::uuid)
-                    ON CONFLICT (doc_path, chunk_ix)
-                    DO UPDATE SET
-                        content = excluded.content,
-                        embedding = excluded.embedding,
-                        meta = excluded.meta,
-                        project_id = excluded.project_id
-                    """,
-                    (
-                        r["doc_path"],
-                        r["chunk_ix"],
-                        r["content"],
-                        vec_to_literal(r["embedding"]),
-                        dumps(r["meta"]),
-                        str(project_id),
-                    ),
-                )
-        conn.commit()
+    bulk_upsert_chunks(rows, project_id=str(project_id))
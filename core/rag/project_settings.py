@@ -0,0 +1,86 @@
+"""Shared cache of per-project RAG settings (embedding model).
+
+Searches and ingestion resolve a project's embedding model here: one query on
+the first use (projects, falling back to the legacy planning_projects), none
+afterwards until the entry expires or the project is updated through
+api/routes/projects.py or api/routes/planning.py, which call
+invalidate_project_settings(). Other processes (Celery workers) pick up
+changes after PROJECT_SETTINGS_CACHE_TTL seconds.
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from core.database import get_conn
+
+logger = logging.getLogger(__name__)
+
+PROJECT_SETTINGS_CACHE_TTL = float(os.getenv("PROJECT_SETTINGS_CACHE_TTL", "300"))
+DEFAULT_EMBEDDING_MODEL = "openai"
+
+# projects.settings wins over planning_projects; a missing setting means the default model
+_PROJECT_SETTINGS_SQL = """
+SELECT s.settings, s.embedding_model
+FROM (
+    SELECT 1 AS pri, settings, settings->>'embedding_model' AS embedding_model
+    FROM projects WHERE id = %(id)s
+    UNION ALL
+    SELECT 2, NULL::jsonb, embedding_model
+    FROM planning_projects WHERE id = %(id)s
+) s
+ORDER BY s.pri
+LIMIT 1
+"""
+
+_cache: Dict[str, tuple[float, Dict[str, Any]]] = {}
+_lock = threading.Lock()
+
+
+def _load(project_id: str) -> Optional[Dict[str, Any]]:
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute(_PROJECT_SETTINGS_SQL, {"id": project_id})
+            row = cur.fetchone()
+    if not row:
+        return None
+    settings, model = row
+    return {
+        "settings": settings or {},
+        "embedding_model": (model or DEFAULT_EMBEDDING_MODEL).strip().lower(),
+    }
+
+
+def get_project_settings(project_id: Any) -> Optional[Dict[str, Any]]:
+    """Cached RAG settings of a project ({"settings", "embedding_model"}), None if not found."""
+    key = str(project_id)
+    if PROJECT_SETTINGS_CACHE_TTL > 0:
+        with _lock:
+            entry = _cache.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                return entry[1]
+    found = _load(key)
+    # Unknown projects are not cached: they may be created right after
+    if found is not None and PROJECT_SETTINGS_CACHE_TTL > 0:
+        with _lock:
+            _cache[key] = (time.monotonic() + PROJECT_SETTINGS_CACHE_TTL, found)
+    return found
+
+
+def get_project_embedding_model(project_id: Any) -> str:
+    """Embedding model id of a project; raises RuntimeError if the project does not exist."""
+    found = get_project_settings(project_id)
+    if found is None:
+        raise RuntimeError(f"Projeto {project_id} não encontrado para busca RAG")
+    return found["embedding_model"]
+
+
+def invalidate_project_settings(project_id: Any = None) -> None:
+    """Drop one project's entry (or all entries) after its settings change."""
+    with _lock:
+        if project_id is None:
+            _cache.clear()
+        else:
+            _cache.pop(str(project_id), None)
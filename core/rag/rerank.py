@@ -0,0 +1,151 @@
+"""Rerankers for kb_search_client: local cross-encoder and Cohere.
+
+Both map results back to the candidates by index (never by content string).
+
+"local" loads a small multilingual cross-encoder once per process and scores
+every candidate in one batched forward pass on CPU. The number of candidates is
+capped by RERANK_MAX_CANDIDATES and by a latency budget: the per-pair cost is
+measured on each call, and the next call scores only as many pairs as fit in
+RERANK_BUDGET_MS (never fewer than k).
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+LOCAL_RERANK_MODEL = os.getenv("RERANK_LOCAL_MODEL", "cross-encoder/mmarco-mMiniLMv2-L12-H384-v1")
+RERANK_MAX_CANDIDATES = int(os.getenv("RERANK_MAX_CANDIDATES", "32"))
+RERANK_BUDGET_MS = float(os.getenv("RERANK_BUDGET_MS", "400"))
+RERANK_MAX_LENGTH = int(os.getenv("RERANK_MAX_LENGTH", "512"))
+COHERE_RERANK_MODEL = os.getenv("COHERE_RERANK_MODEL", "rerank-english-v3.0")
+
+Scorer = Callable[[List[tuple[str, str]]], Sequence[float]]
+
+
+@lru_cache(maxsize=None)
+def get_cross_encoder(model_name: str = LOCAL_RERANK_MODEL):
+    """Load the cross-encoder once per process (CPU)."""
+    try:
+        from sentence_transformers import CrossEncoder
+    except ImportError as e:
+        raise RuntimeError(
+            "Reranker 'local' requer sentence-transformers; não disponível neste ambiente"
+        ) from e
+    started = time.perf_counter()
+    model = CrossEncoder(model_name, device="cpu", max_length=RERANK_MAX_LENGTH)
+    logger.info("[rerank] loaded %s in %.2fs", model_name, time.perf_counter() - started)
+    return model
+
+
+def _cross_encoder_scorer(model_name: str) -> Scorer:
+    model = get_cross_encoder(model_name)
+
+    def score(pairs: List[tuple[str, str]]) -> Sequence[float]:
+        # One forward pass over all pairs
+        return model.predict(pairs, batch_size=max(1, len(pairs)), show_progress_bar=False)
+
+    return score
+
+
+class LocalReranker:
+    """Cross-encoder reranker with a candidate cap and an adaptive latency budget."""
+
+    def __init__(
+        self,
+        scorer: Optional[Scorer] = None,
+        *,
+        model_name: str = LOCAL_RERANK_MODEL,
+        max_candidates: int = RERANK_MAX_CANDIDATES,
+        budget_ms: float = RERANK_BUDGET_MS,
+    ):
+        self._scorer = scorer
+        self.model_name = model_name
+        self.max_candidates = max_candidates
+        self.budget_ms = budget_ms
+        self._ms_per_pair: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def _get_scorer(self) -> Scorer:
+        if self._scorer is None:
+            self._scorer = _cross_encoder_scorer(self.model_name)
+        return self._scorer
+
+    def candidate_limit(self, k: int) -> int:
+        """How many candidates to score: max_candidates, reduced to fit the budget."""
+        limit = self.max_candidates
+        with self._lock:
+            ms_per_pair = self._ms_per_pair
+        if ms_per_pair and self.budget_ms > 0:
+            limit = min(limit, int(self.budget_ms / ms_per_pair))
+        return max(k, limit)
+
+    def _record(self, pairs: int, elapsed_ms: float) -> None:
+        per_pair = elapsed_ms / max(1, pairs)
+        with self._lock:
+            prev = self._ms_per_pair
+            self._ms_per_pair = per_pair if prev is None else 0.7 * prev + 0.3 * per_pair
+
+    def rerank(self, query: str, items: List[Dict[str, Any]], k: int) -> List[Dict[str, Any]]:
+        if not items:
+            return []
+        scorer = self._get_scorer()
+        n = min(len(items), self.candidate_limit(k))
+        pairs = [(query, it.get("content") or "") for it in items[:n]]
+
+        started = time.perf_counter()
+        scores = scorer(pairs)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self._record(len(pairs), elapsed_ms)
+        if self.budget_ms > 0 and elapsed_ms > self.budget_ms:
+            logger.warning(
+                "[rerank] %d pairs took %.0fms (budget %.0fms)", len(pairs), elapsed_ms, self.budget_ms
+            )
+
+        order = sorted(range(n), key=lambda i: float(scores[i]), reverse=True)
+        # n >= k, so candidates left out by the cap/budget never reach the top k
+        return [{**items[i], "rerank_score": float(scores[i])} for i in order[:k]]
+
+
+@lru_cache(maxsize=None)
+def get_local_reranker() -> LocalReranker:
+    return LocalReranker()
+
+
+@lru_cache(maxsize=None)
+def get_cohere_reranker(model: str = COHERE_RERANK_MODEL):
+    """CohereRerank client, built once per process."""
+    try:
+        from langchain_cohere import CohereRerank
+    except Exception as e:
+        raise RuntimeError(
+            "Reranker 'cohere' requested but langchain-cohere package not available"
+        ) from e
+    return CohereRerank(model=model)
+
+
+def cohere_rerank(query: str, items: List[Dict[str, Any]], k: int) -> List[Dict[str, Any]]:
+    """Rerank with Cohere; results carry the candidate index."""
+    if not os.getenv("COHERE_API_KEY"):
+        raise RuntimeError("Reranker 'cohere' requested but COHERE_API_KEY not defined")
+    if not items:
+        return []
+    results = get_cohere_reranker().rerank(
+        documents=[it.get("content") or "" for it in items], query=query, top_n=k
+    )
+    ranked: List[Dict[str, Any]] = []
+    for res in results or []:
+        ix = res.get("index") if isinstance(res, dict) else getattr(res, "index", None)
+        score = (
+            res.get("relevance_score") if isinstance(res, dict) else getattr(res, "relevance_score", None)
+        )
+        if ix is None or not 0 <= int(ix) < len(items):
+            continue
+        ranked.append({**items[int(ix)], "rerank_score": float(score or 0.0)})
+    return ranked[:k] if ranked else items[:k]
@@ -0,0 +1,102 @@
+"""Result cache for kb_search_client, invalidated by index generations.
+
+Every search key embeds the current generation of the scopes it filters on
+(project_id, empresa, client_id). Ingestion bumps the generations of the
+scopes it wrote, so older entries simply stop being looked up and expire by
+TTL; stale results are never served. Searches without a scope filter depend
+on "any" (bumped by every write); truncate bumps "all" (read by every search).
+
+Generations live in Redis next to the cached results (core.cache). When
+Redis is unreachable the generation is unknown and the cache is bypassed.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import unicodedata
+from typing import Any, Dict, List, Optional
+
+from core.cache import get_cached, get_counters, incr_counters, set_cached
+
+logger = logging.getLogger(__name__)
+
+SEARCH_CACHE_TTL = int(os.getenv("RAG_SEARCH_CACHE_TTL", "600"))
+
+KEY_PREFIX = "rag:search:"
+GEN_PREFIX = "rag:gen:"
+_GEN_ALL = f"{GEN_PREFIX}all"
+_GEN_ANY = f"{GEN_PREFIX}any"
+
+_WS = re.compile(r"\s+")
+
+
+def normalize_query(query: str) -> str:
+    """Case/whitespace-insensitive form of the query (NFKC, lower, single spaces)."""
+    return _WS.sub(" ", unicodedata.normalize("NFKC", query or "")).strip().lower()
+
+
+def _scope_keys(
+    project_id: Optional[str] = None,
+    empresa: Optional[str] = None,
+    client_id: Optional[str] = None,
+) -> List[str]:
+    keys = []
+    if project_id:
+        keys.append(f"{GEN_PREFIX}project:{project_id}")
+    if empresa:
+        # Search filters compare lower(empresa)
+        keys.append(f"{GEN_PREFIX}empresa:{empresa.strip().lower()}")
+    if client_id:
+        keys.append(f"{GEN_PREFIX}client:{client_id}")
+    return keys
+
+
+def index_generation(
+    *,
+    project_id: Optional[str] = None,
+    empresa: Optional[str] = None,
+    client_id: Optional[str] = None,
+) -> Optional[str]:
+    """Current index generation for a search scope, or None if unknown."""
+    keys = [_GEN_ALL] + (_scope_keys(project_id, empresa, client_id) or [_GEN_ANY])
+    values = get_counters(*keys)
+    if values is None:
+        return None
+    return ".".join(str(v) for v in values)
+
+
+def bump_index_generation(
+    *,
+    project_id: Optional[str] = None,
+    empresa: Optional[str] = None,
+    client_id: Optional[str] = None,
+) -> None:
+    """Mark kb_chunks as changed for these scopes (call after the write commits).
+
+    With no scope at all (e.g. truncate) every cached search is invalidated.
+    """
+    scopes = _scope_keys(project_id, empresa, client_id)
+    incr_counters(*(scopes + [_GEN_ANY] if scopes else [_GEN_ALL]))
+
+
+def search_cache_key(generation: str, **params: Any) -> str:
+    """Cache key for a search: normalized query + filters + options + generation."""
+    params = dict(params)
+    params["query"] = normalize_query(params.get("query") or "")
+    if params.get("empresa"):
+        params["empresa"] = params["empresa"].strip().lower()
+    payload = json.dumps(params, sort_keys=True, default=str)
+    digest = hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    return f"{KEY_PREFIX}{generation}:{digest}"
+
+
+def get_results(key: str) -> Optional[List[Dict[str, Any]]]:
+    hit = get_cached(key)
+    return hit if isinstance(hit, list) else None
+
+
+def put_results(key: str, results: List[Dict[str, Any]]) -> None:
+    if SEARCH_CACHE_TTL > 0:
+        set_cached(key, results, ttl_seconds=SEARCH_CACHE_TTL)
@@ -4,22 +4,100 @@ Filter policy:
 - At least one of client_id, empresa, chunking, or project_id must be set.
 """
 
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 import os
 
 from langchain_core.tools import tool
 from langchain_openai import ChatOpenAI
 
 from core.database import get_conn
-from core.rag.embeddings import EmbeddingFactory
+from core.rag.embeddings import VECTOR_STORAGES, EmbeddingFactory
+from core.rag.project_settings import get_project_embedding_model
+from core.rag.rerank import cohere_rerank, get_local_reranker
+from core.rag.search_cache import (
+    SEARCH_CACHE_TTL,
+    get_results,
+    index_generation,
+    put_results,
+    search_cache_key,
+)
+from core.rag.vector_adapter import Vector
+
+# Text leg of text/hybrid searches (sql/kb/19_fts_text_leg.sql), chosen by suffix:
+#   "hybrid"        -> full-text (portuguese tsvector, ts_rank_cd)
+#   "hybrid_trgm"   -> pg_trgm similarity (previous behaviour)
+#   "hybrid_fuzzy"  -> full-text, trigram fallback when full-text finds nothing
+TEXT_MODE_SUFFIXES = {"_trgm": "trgm", "_fuzzy": "fts_trgm"}
+
+
+def split_search_type(search_type: str) -> Tuple[str, str]:
+    """Split a search_type into (base type, text mode), e.g. "text_trgm" -> ("text", "trgm")."""
+    for suffix, mode in TEXT_MODE_SUFFIXES.items():
+        if search_type.endswith(suffix):
+            return search_type[: -len(suffix)], mode
+    return search_type, "fts"
+
+
+# Recall/latency knobs of the vector leg (pgvector HNSW), set per search transaction:
+#   ef_search       -> hnsw.ef_search: candidate list size (pgvector default 40, max 1000);
+#                      higher = better recall, slower. Without iterative scans an HNSW
+#                      scan returns at most ef_search rows before the tenant filters.
+#   iterative_scan  -> hnsw.iterative_scan (pgvector >= 0.8): "strict_order" or
+#                      "relaxed_order" keep scanning the index when the filters
+#                      (client_id/empresa/project_id) discard rows, so k rows come back.
+# None leaves the server setting (RAG_HNSW_EF_SEARCH / RAG_HNSW_ITERATIVE_SCAN override it).
+# storage/rescore_factor come from the embedding model (EmbeddingFactory.get_metadata):
+# halfvec/binary search a compact index and rescore k * rescore_factor candidates
+# in float32 (sql/kb/21_quantized_vector_search.sql).
+ITERATIVE_SCAN_MODES = ("off", "strict_order", "relaxed_order")
+HNSW_EF_SEARCH = int(os.getenv("RAG_HNSW_EF_SEARCH", "0")) or None
+HNSW_ITERATIVE_SCAN = os.getenv("RAG_HNSW_ITERATIVE_SCAN") or None
+
+
+def _ann_settings(
+    ef_search: Optional[int],
+    iterative_scan: Optional[str],
+    storage: Optional[str] = None,
+    rescore_factor: Optional[int] = None,
+) -> Optional[Tuple[str, Dict[str, Any]]]:
+    """Transaction-local set_config statement for the vector-leg knobs, None if nothing to set."""
+    calls: List[str] = []
+    params: Dict[str, Any] = {}
+    if storage is not None and storage != "vector":
+        if storage not in VECTOR_STORAGES:
+            raise ValueError(f"storage must be one of {', '.join(VECTOR_STORAGES)}, got {storage}")
+        calls.append("set_config('kb.vector_storage', %(storage)s, true)")
+        params["storage"] = storage
+        if rescore_factor:
+            calls.append("set_config('kb.rescore_factor', %(rescore_factor)s, true)")
+            params["rescore_factor"] = str(int(rescore_factor))
+    if ef_search is not None:
+        if not 1 <= int(ef_search) <= 1000:
+            raise ValueError(f"ef_search must be between 1 and 1000, got {ef_search}")
+        calls.append("set_config('hnsw.ef_search', %(ef_search)s, true)")
+        params["ef_search"] = str(int(ef_search))
+    if iterative_scan is not None:
+        if iterative_scan not in ITERATIVE_SCAN_MODES:
+            raise ValueError(
+                f"iterative_scan must be one of {', '.join(ITERATIVE_SCAN_MODES)}, got {iterative_scan}"
+            )
+        calls.append("set_config('hnsw.iterative_scan', %(iterative_scan)s, true)")
+        params["iterative_scan"] = iterative_scan
+    if not calls:
+        return None
+    return "select " + ", ".join(calls), params
 
 
-def vec_to_literal(v: List[float]) -> str:
-    """Convert vector to pgvector literal."""
-    return "[" + ",".join(f"{x:.6f}" for x in v) + "]"
+_SEARCH_SQL = {
+    "vector": "select doc_path, chunk_ix, content, score, meta from public.kb_vector_search(%(vec)s, %(k)s, %(threshold)s, %(client_id)s, %(empresa)s, %(chunking)s, %(project_id)s)",
+    "text": "select doc_path, chunk_ix, content, score, meta from public.kb_text_search(%(query)s, %(k)s, %(client_id)s, %(empresa)s, %(chunking)s, %(project_id)s, %(text_mode)s)",
+    "hybrid": "select doc_path, chunk_ix, content, score, meta from public.kb_hybrid_search(%(query)s, %(vec)s, %(k)s, %(threshold)s, %(client_id)s, %(empresa)s, %(chunking)s, %(project_id)s, %(text_mode)s)",
+    "hybrid_union": "select doc_path, chunk_ix, content, score, meta from public.kb_hybrid_union(%(query)s, %(vec)s, %(k)s, %(threshold)s, %(client_id)s, %(empresa)s, %(chunking)s, %(project_id)s, %(text_mode)s)",
+}
+_SEARCH_SQL["hybrid_rrf"] = _SEARCH_SQL["hybrid"]
 
 
-def query_candidates(
+def _candidates_query(
     query: str,
     k: int,
     search_type: str,
@@ -28,12 +106,13 @@ def query_candidates(
     chunking: Optional[str],
     query_embedding: Optional[List[float]],
     match_threshold: Optional[float],
-    project_id: Optional[str] = None,
-) -> List[Dict[str, Any]]:
-    """Get candidates from Postgres according to search type.
-
-    Returns dicts with doc_path, chunk_ix, content, score, meta.
-    """
+    project_id: Optional[str],
+) -> Tuple[str, Dict[str, Any]]:
+    """SQL and parameters for one search (see _SEARCH_SQL)."""
+    base_type, text_mode = split_search_type(search_type)
+    sql = _SEARCH_SQL.get(base_type)
+    if sql is None:
+        raise ValueError(f"Unknown search_type: {search_type}")
     params: Dict[str, Any] = {
         "k": k,
         "client_id": client_id,
@@ -42,155 +121,143 @@ def query_candidates(
         "query": query,
         "threshold": match_threshold,
         "project_id": project_id,
+        "text_mode": text_mode,
     }
+    if base_type != "text":
+        if not query_embedding:
+            raise RuntimeError(f"search_type={base_type} requires query embedding")
+        params["vec"] = Vector(query_embedding)
+    return sql, params
+
+
+def _rows_to_results(rows) -> List[Dict[str, Any]]:
+    return [
+        {
+            "doc_path": row[0],
+            "chunk_ix": row[1],
+            "content": row[2],
+            "score": float(row[3]) if row[3] is not None else None,
+            "meta": row[4] or {},
+        }
+        for row in rows or []
+    ]
+
 
+def query_candidates(
+    query: str,
+    k: int,
+    search_type: str,
+    client_id: Optional[str],
+    empresa: Optional[str],
+    chunking: Optional[str],
+    query_embedding: Optional[List[float]],
+    match_threshold: Optional[float],
+    project_id: Optional[str] = None,
+    ef_search: Optional[int] = None,
+    iterative_scan: Optional[str] = None,
+    storage: Optional[str] = None,
+    rescore_factor: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """Get candidates from Postgres according to search type.
+
+    Returns dicts with doc_path, chunk_ix, content, score, meta.
+    ef_search/iterative_scan tune the HNSW scan of the vector leg and
+    storage/rescore_factor pick its index (see _ann_settings).
+    """
+    sql, params = _candidates_query(
+        query, k, search_type, client_id, empresa, chunking,
+        query_embedding, match_threshold, project_id,
+    )
+    ann = (
+        _ann_settings(ef_search, iterative_scan, storage, rescore_factor)
+        if "vec" in params
+        else None
+    )
     with get_conn() as conn:
         with conn.cursor() as cur:
-            results: List[Dict[str, Any]] = []
-            if search_type in ("vector",):
-                if not query_embedding:
-                    raise RuntimeError("search_type=vector requires query embedding")
-                vec_lit = vec_to_literal(query_embedding)
-                cur.execute(
-                    "select doc_path, chunk_ix, content, score, meta from public.kb_vector_search(%(vec)s, %(k)s, %(threshold)s, %(client_id)s, %(empresa)s, %(chunking)s, %(project_id)s)",
-                    {**params, "vec": vec_lit},
-                )
-            elif search_type in ("text",):
-                cur.execute(
-                    "select doc_path, chunk_ix, content, score, meta from public.kb_text_search(%(query)s, %(k)s, %(client_id)s, %(empresa)s, %(chunking)s, %(project_id)s)",
-                    params,
-                )
-            elif search_type in ("hybrid", "hybrid_rrf"):
-                if query_embedding is None:
-                    raise RuntimeError("search_type=hybrid requires query embedding")
-                vec_lit = vec_to_literal(query_embedding)
-                cur.execute(
-                    "select doc_path, chunk_ix, content, score, meta from public.kb_hybrid_search(%(query)s, %(vec)s, %(k)s, %(threshold)s, %(client_id)s, %(empresa)s, %(chunking)s, %(project_id)s)",
-                    {**params, "vec": vec_lit},
-                )
-            elif search_type in ("hybrid_union",):
-                if query_embedding is None:
-                    raise RuntimeError("search_type=hybrid_union requires query embedding")
-                vec_lit = vec_to_literal(query_embedding)
-                cur.execute(
-                    "select doc_path, chunk_ix, content, score, meta from public.kb_hybrid_union(%(query)s, %(vec)s, %(k)s, %(threshold)s, %(client_id)s, %(empresa)s, %(chunking)s, %(project_id)s)",
-                    {**params, "vec": vec_lit},
-                )
-            else:
-                raise ValueError(f"Unknown search_type: {search_type}")
-
-            for row in cur.fetchall() or []:
-                results.append(
-                    {
-                        "doc_path": row[0],
-                        "chunk_ix": row[1],
-                        "content": row[2],
-                        "score": float(row[3]) if row[3] is not None else None,
-                        "meta": row[4] or {},
-                    }
-                )
-            return results
+            if ann:
+                # Same transaction as the search: set_config(..., true) ends with it
+                cur.execute(*ann)
+            cur.execute(sql, params)
+            return _rows_to_results(cur.fetchall())
+
+
+def query_candidates_many(
+    queries: List[str],
+    k: int,
+    search_type: str,
+    client_id: Optional[str],
+    empresa: Optional[str],
+    chunking: Optional[str],
+    query_embeddings: List[Optional[List[float]]],
+    match_threshold: Optional[float],
+    project_id: Optional[str] = None,
+    ef_search: Optional[int] = None,
+    iterative_scan: Optional[str] = None,
+    storage: Optional[str] = None,
+    rescore_factor: Optional[int] = None,
+) -> List[List[Dict[str, Any]]]:
+    """query_candidates for several queries on one connection, pipelined.
+
+    All searches are sent before the first result is read: one network round
+    trip for the batch instead of one per query.
+    """
+    statements = [
+        _candidates_query(
+            query, k, search_type, client_id, empresa, chunking,
+            emb, match_threshold, project_id,
+        )
+        for query, emb in zip(queries, query_embeddings)
+    ]
+    uses_vector = any("vec" in params for _, params in statements)
+    ann = (
+        _ann_settings(ef_search, iterative_scan, storage, rescore_factor)
+        if uses_vector
+        else None
+    )
+    with get_conn() as conn:
+        cursors = [conn.cursor() for _ in statements]
+        try:
+            with conn.pipeline():
+                if ann:
+                    conn.execute(*ann)
+                for cur, (sql, params) in zip(cursors, statements):
+                    cur.execute(sql, params)
+            return [_rows_to_results(cur.fetchall()) for cur in cursors]
+        finally:
+            for cur in cursors:
+                cur.close()
 
 
 def apply_rerank(
     query: str, items: List[Dict[str, Any]], reranker: str, k: int
 ) -> List[Dict[str, Any]]:
-    """Apply reranking to search results."""
+    """Apply reranking to search results.
+
+    reranker: "none", "local" (cross-encoder on CPU, see core.rag.rerank) or "cohere".
+    """
     if reranker == "none" or not items:
         return items[:k]
 
+    if reranker == "local":
+        return get_local_reranker().rerank(query, items, k)
+
     if reranker == "cohere":
-        try:
-            from langchain_cohere import CohereRerank
-        except Exception as e:
-            raise RuntimeError(
-                "Reranker 'cohere' requested but langchain-cohere package not available"
-            ) from e
-
-        if not os.getenv("COHERE_API_KEY"):
-            raise RuntimeError("Reranker 'cohere' requested but COHERE_API_KEY not defined")
-
-        reranker_model = CohereRerank(model="rerank-english-v3.0")
-        docs = [it["content"] for it in items]
-
-        # Try multiple APIs for version compatibility
-        results = None
-        if hasattr(reranker_model, "rank"):
-            results = reranker_model.rank(query=query, documents=docs)
-        elif hasattr(reranker_model, "rerank"):
-            results = reranker_model.rerank(query=query, documents=docs)
-        else:
-            try:
-                results = reranker_model.invoke({"query": query, "documents": docs})
-            except Exception:
-                results = None
-
-        # Reconstruct order from reranked results
-        if isinstance(results, list) and results:
-
-            def _get_content_and_score(obj):
-                c = getattr(obj, "document", None)
-                if c is not None:
-                    txt = getattr(c, "page_content", None) or getattr(c, "text", None) or str(c)
-                else:
-                    txt = getattr(obj, "page_content", None) or getattr(obj, "text", None)
-                if txt is None and isinstance(obj, dict):
-                    d = obj.get("document") or obj
-                    txt = d.get("text") or d.get("page_content") or str(d)
-                score = getattr(obj, "relevance_score", None)
-                if score is None and isinstance(obj, dict):
-                    score = obj.get("relevance_score")
-                return (str(txt or ""), float(score or 0.0))
-
-            res_pairs = [_get_content_and_score(r) for r in results]
-            from collections import defaultdict, deque
-
-            idx_map = defaultdict(deque)
-            for i, d in enumerate(docs):
-                idx_map[d].append(i)
-            ordered = []
-            for content, _score in res_pairs:
-                if content in idx_map and idx_map[content]:
-                    i = idx_map[content].popleft()
-                    ordered.append(items[i])
-            if ordered:
-                return ordered[:k]
-
-        # Fallback: return original top-k
-        return items[:k]
+        return cohere_rerank(query, items, k)
 
     # Future rerankers can be added here
     return items[:k]
 
 
-def _get_project_embedding_model(project_id: str) -> str:
-    with get_conn() as conn:
-        with conn.cursor() as cur:
-            # Tenta tabela nova 'projects' (settings->>embedding_model)
-            cur.execute(
-                "SELECT settings->>'embedding_model' FROM projects WHERE id = %s",
-                (project_id,),
-            )
-            row = cur.fetchone()
-            if row:
-                return (row[0] or "openai").strip().lower()
-            
-            # Fallback para tabela antiga 'planning_projects' (se existir)
-            try:
-                cur.execute(
-                    "SELECT embedding_model FROM planning_projects WHERE id = %s",
-                    (project_id,),
-                )
-                row = cur.fetchone()
-                if row:
-                    return (row[0] or "openai").strip().lower()
-            except Exception:
-                pass
+def _hyde_prompt(query: str) -> str:
+    return (
+        "Escreva um parágrafo conciso que seria altamente relevante para a seguinte pergunta,"
+        " simulando um documento técnico real.\nPergunta: " + query
+    )
 
-            # Default global se não encontrar projeto (evita crash)
-            # return "openai"
-            # Ou lançar erro se preferir strictness
-            raise RuntimeError(f"Projeto {project_id} não encontrado para busca RAG")
+
+def _hyde_llm() -> ChatOpenAI:
+    return ChatOpenAI(model=(os.getenv("HYDE_LLM_MODEL") or "gpt-4o-mini"), temperature=0.3)
 
 
 def hyde(query: str) -> str:
@@ -198,17 +265,30 @@ def hyde(query: str) -> str:
 
     KISS: uses ChatOpenAI with light model; controls low temperature.
     """
-    llm = ChatOpenAI(model=(os.getenv("HYDE_LLM_MODEL") or "gpt-4o-mini"), temperature=0.3)
-    prompt = (
-        "Escreva um parágrafo conciso que seria altamente relevante para a seguinte pergunta,"
-        " simulando um documento técnico real.\nPergunta: " + query
-    )
-    return (llm.invoke(prompt).content or "").strip()
+    return (_hyde_llm().invoke(_hyde_prompt(query)).content or "").strip()
 
 
-@tool
-def kb_search_client(
-    query: str,
+def hyde_many(queries: List[str]) -> List[str]:
+    """HyDE for several queries; the LLM calls run concurrently (llm.batch)."""
+    messages = _hyde_llm().batch([_hyde_prompt(q) for q in queries])
+    return [(m.content or "").strip() for m in messages]
+
+
+def _search_model_id(project_id: Optional[str]) -> str:
+    return get_project_embedding_model(project_id) if project_id else "openai"
+
+
+def _embed_queries(texts: List[str], project_id: Optional[str]) -> List[List[float]]:
+    """Embed search queries with the project's model (query mode, one cache lookup for the batch)."""
+    emb = EmbeddingFactory.get_model(_search_model_id(project_id))
+    if hasattr(emb, "embed_queries"):
+        return emb.embed_queries(texts)
+    return [emb.embed_query(t) for t in texts]
+
+
+def kb_search_batch(
+    queries: List[str],
+    *,
     k: int = 5,
     search_type: str = "hybrid",
     reranker: str = "none",
@@ -217,44 +297,160 @@ def kb_search_client(
     empresa: Optional[str] = None,
     chunking: Optional[str] = None,
     project_id: Optional[str] = None,
-    tags: Optional[List[str]] = None,
     use_hyde: bool = False,
     match_threshold: Optional[float] = None,
-) -> List[Dict[str, Any]]:
-    """Search KB with filters and optional reranking.
-
-    Filter policy: at least one of client_id, empresa, chunking, or project_id must be set.
+    ef_search: Optional[int] = None,
+    iterative_scan: Optional[str] = None,
+) -> List[List[Dict[str, Any]]]:
+    """Search KB for several queries sharing the same filters and options.
+
+    Cache misses are embedded in one batched call and searched over a single
+    pipelined connection. Returns one result list per query, in input order.
+    Same filter policy, result cache and HNSW knobs as kb_search_client.
     """
-    # Filter policy: allow query when any filter is set
     if not client_id and not empresa and not chunking and not project_id:
         raise RuntimeError(
             "KB query without filter (client_id/empresa/chunking/project_id) is not allowed"
         )
+    ef_search = HNSW_EF_SEARCH if ef_search is None else ef_search
+    iterative_scan = HNSW_ITERATIVE_SCAN if iterative_scan is None else iterative_scan
+    _ann_settings(ef_search, iterative_scan)  # reject bad values before touching cache or DB
+
+    # Compact index of the model (halfvec/binary): the coarse pass must see every candidate
+    storage, rescore_factor = "vector", None
+    if split_search_type(search_type)[0] != "text":
+        model_meta = EmbeddingFactory.get_metadata(_search_model_id(project_id))
+        storage, rescore_factor = model_meta["storage"], model_meta["rescore_factor"]
+        if storage != "vector" and ef_search is None:
+            # hybrid asks the vector leg for 2x the candidates
+            ef_search = min(1000, max(40, 2 * (rerank_candidates or k) * rescore_factor))
+    if not queries:
+        return []
+
+    results: List[Optional[List[Dict[str, Any]]]] = [None] * len(queries)
+    cache_keys: List[Optional[str]] = [None] * len(queries)
+
+    # Result cache: the key carries the index generation, so ingestion never leaves stale hits
+    if SEARCH_CACHE_TTL > 0:
+        generation = index_generation(project_id=project_id, empresa=empresa, client_id=client_id)
+        if generation is not None:
+            for i, query in enumerate(queries):
+                cache_keys[i] = search_cache_key(
+                    generation,
+                    query=query,
+                    k=k,
+                    search_type=search_type,
+                    reranker=reranker,
+                    rerank_candidates=rerank_candidates,
+                    client_id=client_id,
+                    empresa=empresa,
+                    chunking=chunking,
+                    project_id=project_id,
+                    use_hyde=use_hyde,
+                    match_threshold=match_threshold,
+                    ef_search=ef_search,
+                    iterative_scan=iterative_scan,
+                    storage=storage,
+                )
+                results[i] = get_results(cache_keys[i])
+
+    misses = [i for i, r in enumerate(results) if r is None]
+    if not misses:
+        return results
+    miss_queries = [queries[i] for i in misses]
 
     # Embedding only when necessary (usa OPENAI_API_KEY, não OpenRouter)
-    query_emb: Optional[List[float]] = None
-    if search_type != "text":
-        if project_id:
-            model_id = _get_project_embedding_model(project_id)
-            emb = EmbeddingFactory.get_model(model_id)
-        else:
-            emb = EmbeddingFactory.get_model("openai")
-        q_for_embed = hyde(query) if use_hyde else query
-        query_emb = emb.embed_query(q_for_embed)
+    embeddings: List[Optional[List[float]]] = [None] * len(misses)
+    if split_search_type(search_type)[0] != "text":
+        texts = hyde_many(miss_queries) if use_hyde else miss_queries
+        embeddings = _embed_queries(texts, project_id)
 
     # Candidates from Postgres
-    candidates = query_candidates(
-        query,
-        rerank_candidates or k,
-        search_type,
-        client_id,
-        empresa,
-        chunking,
-        query_emb,
-        match_threshold,
-        project_id=project_id,
-    )
+    if len(misses) == 1:
+        candidates = [
+            query_candidates(
+                miss_queries[0],
+                rerank_candidates or k,
+                search_type,
+                client_id,
+                empresa,
+                chunking,
+                embeddings[0],
+                match_threshold,
+                project_id=project_id,
+                ef_search=ef_search,
+                iterative_scan=iterative_scan,
+                storage=storage,
+                rescore_factor=rescore_factor,
+            )
+        ]
+    else:
+        candidates = query_candidates_many(
+            miss_queries,
+            rerank_candidates or k,
+            search_type,
+            client_id,
+            empresa,
+            chunking,
+            embeddings,
+            match_threshold,
+            project_id=project_id,
+            ef_search=ef_search,
+            iterative_scan=iterative_scan,
+            storage=storage,
+            rescore_factor=rescore_factor,
+        )
 
     # Optional reranking
-    final = apply_rerank(query, candidates, reranker, k)
-    return final
+    for i, query, items in zip(misses, miss_queries, candidates):
+        final = apply_rerank(query, items, reranker, k)
+        results[i] = final
+        if cache_keys[i]:
+            put_results(cache_keys[i], final)
+    return results
+
+
+@tool
+def kb_search_client(
+    query: str,
+    k: int = 5,
+    search_type: str = "hybrid",
+    reranker: str = "none",
+    rerank_candidates: int = 24,
+    client_id: Optional[str] = None,
+    empresa: Optional[str] = None,
+    chunking: Optional[str] = None,
+    project_id: Optional[str] = None,
+    tags: Optional[List[str]] = None,
+    use_hyde: bool = False,
+    match_threshold: Optional[float] = None,
+    ef_search: Optional[int] = None,
+    iterative_scan: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """Search KB with filters and optional reranking.
+
+    search_type: vector, text, hybrid (RRF) or hybrid_union. Text and hybrid rank the
+    text leg with full-text search; add "_trgm" for trigram similarity or "_fuzzy"
+    for full-text with a trigram fallback (e.g. "hybrid_fuzzy").
+
+    ef_search (1-1000) and iterative_scan (off, strict_order, relaxed_order) trade
+    latency for recall in the vector leg; raise them when tenant filters return
+    fewer than k results.
+
+    Filter policy: at least one of client_id, empresa, chunking, or project_id must be set.
+    """
+    return kb_search_batch(
+        [query],
+        k=k,
+        search_type=search_type,
+        reranker=reranker,
+        rerank_candidates=rerank_candidates,
+        client_id=client_id,
+        empresa=empresa,
+        chunking=chunking,
+        project_id=project_id,
+        use_hyde=use_hyde,
+        match_threshold=match_threshold,
+        ef_search=ef_search,
+        iterative_scan=iterative_scan,
+    )[0]
@@ -0,0 +1,126 @@
+"""Binary psycopg adapter for the pgvector ``vector`` type.
+
+Vectors sent as text literals ("[0.123456,...]") cost a float->str->float round
+trip on both ends and ~10 bytes per dimension on the wire. The binary format is
+4 bytes per dimension: int16 dim, int16 unused, then float4 values big-endian.
+
+Usage:
+    cur.execute("select ... (embedding <=> %s) ...", (Vector(embedding),))
+
+register_vector / aregister_vector are installed as the ``configure`` callback of
+the shared pools (core.database), so every pooled connection can dump Vector
+parameters in binary and loads vector columns as List[float].
+"""
+
+from __future__ import annotations
+
+import logging
+import struct
+import sys
+from array import array
+from typing import Iterable, List, Optional
+
+import psycopg
+from psycopg.adapt import Dumper, Loader
+from psycopg.pq import Format
+from psycopg.types import TypeInfo
+
+logger = logging.getLogger(__name__)
+
+_HEADER = struct.Struct(">HH")
+_SWAP = sys.byteorder == "little"
+
+
+class Vector:
+    """Query parameter wrapper: a float sequence sent to Postgres as ``vector``.
+
+    Plain Python lists adapt to float8[]; wrapping them selects the binary dumper.
+    """
+
+    __slots__ = ("values",)
+
+    def __init__(self, values: Iterable[float]):
+        self.values = values if isinstance(values, array) else array("f", values)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def to_list(self) -> List[float]:
+        return self.values.tolist()
+
+    def __repr__(self) -> str:
+        return f"Vector(dim={len(self.values)})"
+
+
+def dump_vector(values: Iterable[float]) -> bytes:
+    """Encode floats in pgvector's binary wire format."""
+    arr = array("f", values)
+    if _SWAP:
+        arr.byteswap()
+    return _HEADER.pack(len(arr), 0) + arr.tobytes()
+
+
+def load_vector(data) -> List[float]:
+    """Decode pgvector's binary wire format into floats."""
+    data = bytes(data)
+    dim, _unused = _HEADER.unpack_from(data)
+    arr = array("f")
+    arr.frombytes(data[_HEADER.size:_HEADER.size + 4 * dim])
+    if _SWAP:
+        arr.byteswap()
+    return arr.tolist()
+
+
+def parse_vector_text(data) -> List[float]:
+    """Decode pgvector's text format ("[1,2,3]") into floats."""
+    text = bytes(data).decode("ascii").strip("[]")
+    return [float(x) for x in text.split(",")] if text else []
+
+
+class VectorBinaryDumper(Dumper):
+    format = Format.BINARY
+
+    def dump(self, obj: Vector) -> bytes:
+        return dump_vector(obj.values)
+
+
+class VectorBinaryLoader(Loader):
+    format = Format.BINARY
+
+    def load(self, data) -> List[float]:
+        return load_vector(data)
+
+
+class VectorTextLoader(Loader):
+    format = Format.TEXT
+
+    def load(self, data) -> List[float]:
+        return parse_vector_text(data)
+
+
+def _register(conn, info: Optional[TypeInfo]) -> bool:
+    if info is None:
+        logger.warning("pgvector type 'vector' not found; Vector parameters unavailable")
+        return False
+    dumper = type("VectorBinaryDumper", (VectorBinaryDumper,), {"oid": info.oid})
+    conn.adapters.register_dumper(Vector, dumper)
+    conn.adapters.register_loader(info.oid, VectorBinaryLoader)
+    conn.adapters.register_loader(info.oid, VectorTextLoader)
+    return True
+
+
+def register_vector(conn: psycopg.Connection) -> bool:
+    """Register the vector adapters on a sync connection (pool ``configure`` hook)."""
+    info = TypeInfo.fetch(conn, "vector")
+    # Pools require connections to be returned idle, not inside the lookup transaction
+    if not conn.autocommit:
+        conn.commit()
+    return _register(conn, info)
+
+
+async def aregister_vector(conn: psycopg.AsyncConnection) -> bool:
+    """Register the vector adapters on an async connection (pool ``configure`` hook)."""
+    info = await TypeInfo.fetch(conn, "vector")
+    if not conn.autocommit:
+        await conn.commit()
+    return _register(conn, info)
@@ -2,6 +2,7 @@
 
 Use these functions to generate GLPI, Zabbix, Linear and dashboard reports
 from the same structures returned by core/tools and core/integrations.
+The iter_* variants yield the same markdown piece by piece, for streaming.
 """
 
 from .glpi import (
@@ -9,15 +10,19 @@ from .glpi import (
     format_tickets_table,
     format_new_unassigned_report,
     format_pending_old_report,
+    iter_glpi_report,
+    iter_new_unassigned_report,
+    iter_pending_old_report,
 )
-from .zabbix import format_zabbix_report, format_alerts_table
+from .zabbix import format_zabbix_report, format_alerts_table, iter_zabbix_report
 from .linear import (
     format_linear_report,
     format_issues_table,
+    iter_linear_report,
     format_project_plan_preview,
     format_project_plan_preview_from_tool_output,
 )
-from .dashboard import format_dashboard_report
+from .dashboard import format_dashboard_report, iter_dashboard_report
 from .itil import format_itil_classification_block
 
 __all__ = [
@@ -33,4 +38,10 @@ __all__ = [
     "format_project_plan_preview_from_tool_output",
     "format_dashboard_report",
     "format_itil_classification_block",
+    "iter_glpi_report",
+    "iter_new_unassigned_report",
+    "iter_pending_old_report",
+    "iter_zabbix_report",
+    "iter_linear_report",
+    "iter_dashboard_report",
 ]
@@ -1,32 +1,57 @@
 """Dashboard report: GLPI + Zabbix combined markdown."""
 
-from .glpi import format_glpi_report
-from .zabbix import format_zabbix_report
-from .linear import format_linear_report
+from typing import Iterator
 
+from .glpi import iter_glpi_report
+from .zabbix import iter_zabbix_report
+from .linear import iter_linear_report
 
-def format_dashboard_report(
+DASHBOARD_HEADER = "## Dashboard - Visão geral\n"
+# Between the header and each source section
+DASHBOARD_SEPARATOR = "\n\n---\n\n"
+DASHBOARD_EMPTY = "**Nenhum dado disponível.** Configure GLPI e/ou Zabbix para ver o dashboard."
+
+
+def iter_dashboard_report(
     glpi_data: dict | None = None,
     zabbix_data: dict | None = None,
     linear_data: dict | None = None,
     glpi_base_url: str | None = None,
     zabbix_base_url: str | None = None,
-) -> str:
-    """Gera relatório dashboard combinando GLPI, Zabbix e opcionalmente Linear."""
+) -> Iterator[str]:
+    """Dashboard em partes: cabeçalho e, para cada fonte, separador e seção."""
     sections = []
-
-    sections.append("## Dashboard - Visão geral\n")
-
     if glpi_data is not None:
-        sections.append(format_glpi_report(glpi_data, glpi_base_url=glpi_base_url))
-
+        sections.append(iter_glpi_report(glpi_data, glpi_base_url=glpi_base_url))
     if zabbix_data is not None:
-        sections.append(format_zabbix_report(zabbix_data, zabbix_base_url=zabbix_base_url))
-
+        sections.append(iter_zabbix_report(zabbix_data, zabbix_base_url=zabbix_base_url))
     if linear_data is not None:
-        sections.append(format_linear_report(linear_data))
+        sections.append(iter_linear_report(linear_data))
+
+    if not sections:
+        yield DASHBOARD_EMPTY
+        return
 
-    if not sections or sections == ["## Dashboard - Visão geral\n"]:
-        return "**Nenhum dado disponível.** Configure GLPI e/ou Zabbix para ver o dashboard."
+    yield DASHBOARD_HEADER
+    for section in sections:
+        yield DASHBOARD_SEPARATOR
+        yield from section
 
-    return "\n\n---\n\n".join(sections)
+
+def format_dashboard_report(
+    glpi_data: dict | None = None,
+    zabbix_data: dict | None = None,
+    linear_data: dict | None = None,
+    glpi_base_url: str | None = None,
+    zabbix_base_url: str | None = None,
+) -> str:
+    """Gera relatório dashboard combinando GLPI, Zabbix e opcionalmente Linear."""
+    return "".join(
+        iter_dashboard_report(
+            glpi_data=glpi_data,
+            zabbix_data=zabbix_data,
+            linear_data=linear_data,
+            glpi_base_url=glpi_base_url,
+            zabbix_base_url=zabbix_base_url,
+        )
+    )
@@ -1,6 +1,10 @@
-"""GLPI report formatters: tickets to markdown."""
+"""GLPI report formatters: tickets to markdown.
 
-from typing import Any
+iter_* functions yield the report piece by piece (header and summary, then
+one table row at a time) for streaming; format_* join them.
+"""
+
+from typing import Any, Iterator
 
 
 # GLPI status IDs -> label (common mapping)
@@ -41,21 +45,19 @@ def _glpi_frontend_base(base_url: str | None) -> str:
     return base
 
 
-def format_tickets_table(
+def iter_tickets_table(
     tickets: list[dict],
     limit: int = 10,
     glpi_base_url: str | None = None,
-) -> str:
-    """Formata lista de tickets como tabela markdown (ID com link para o ticket no GLPI)."""
+) -> Iterator[str]:
+    """Tabela markdown de tickets: cabeçalho e depois uma linha por ticket."""
     if not tickets:
-        return "Nenhum ticket encontrado."
+        yield "Nenhum ticket encontrado."
+        return
 
     base = _glpi_frontend_base(glpi_base_url)
 
-    lines = [
-        "| ID | Título | Status | Prioridade |",
-        "|-----|--------|--------|------------|",
-    ]
+    yield "| ID | Título | Status | Prioridade |\n|-----|--------|--------|------------|"
     for t in tickets[:limit]:
         tid = _safe_get(t, "id", "?")
         name = str(_safe_get(t, "name", "(sem título)"))[:50]
@@ -64,15 +66,23 @@ def format_tickets_table(
         status = STATUS_LABELS.get(status_id, str(status_id)) if status_id else "?"
         priority = PRIORITY_LABELS.get(priority_id, str(priority_id)) if priority_id else "?"
         id_cell = f"[#{tid}]({base}/front/ticket.form.php?id={tid})" if base and tid != "?" else f"#{tid}"
-        lines.append(f"| {id_cell} | {name} | {status} | {priority} |")
+        yield f"\n| {id_cell} | {name} | {status} | {priority} |"
 
-    return "\n".join(lines)
 
+def format_tickets_table(
+    tickets: list[dict],
+    limit: int = 10,
+    glpi_base_url: str | None = None,
+) -> str:
+    """Formata lista de tickets como tabela markdown (ID com link para o ticket no GLPI)."""
+    return "".join(iter_tickets_table(tickets, limit=limit, glpi_base_url=glpi_base_url))
 
-def format_glpi_report(data: dict, glpi_base_url: str | None = None) -> str:
-    """Relatório completo GLPI a partir do dict retornado por glpi_get_tickets."""
+
+def iter_glpi_report(data: dict, glpi_base_url: str | None = None) -> Iterator[str]:
+    """Relatório GLPI em partes: título e resumo, depois as linhas da tabela."""
     if data.get("error"):
-        return f"**Erro ao consultar GLPI:** {data['error']}"
+        yield f"**Erro ao consultar GLPI:** {data['error']}"
+        return
 
     tickets = data.get("tickets") or []
     count = data.get("count", len(tickets))
@@ -82,7 +92,7 @@ def format_glpi_report(data: dict, glpi_base_url: str | None = None) -> str:
         s = t.get("status")
         by_status[s] = by_status.get(s, 0) + 1
 
-    report = f"""### GLPI - Tickets
+    yield f"""### GLPI - Tickets
 
 **Resumo:**
 
@@ -92,26 +102,29 @@ def format_glpi_report(data: dict, glpi_base_url: str | None = None) -> str:
 
 **Últimos tickets:**
 
-{format_tickets_table(tickets, glpi_base_url=glpi_base_url)}
 """
-    return report
+    yield from iter_tickets_table(tickets, glpi_base_url=glpi_base_url)
+    yield "\n"
 
 
-def format_tickets_table_with_date(
+def format_glpi_report(data: dict, glpi_base_url: str | None = None) -> str:
+    """Relatório completo GLPI a partir do dict retornado por glpi_get_tickets."""
+    return "".join(iter_glpi_report(data, glpi_base_url=glpi_base_url))
+
+
+def iter_tickets_table_with_date(
     tickets: list[dict],
     limit: int = 15,
     glpi_base_url: str | None = None,
-) -> str:
-    """Formata lista de tickets como tabela markdown incluindo data (ID com link para o GLPI)."""
+) -> Iterator[str]:
+    """Tabela markdown de tickets com data: cabeçalho e depois uma linha por ticket."""
     if not tickets:
-        return "Nenhum ticket encontrado."
+        yield "Nenhum ticket encontrado."
+        return
 
     base = _glpi_frontend_base(glpi_base_url)
 
-    lines = [
-        "| ID | Título | Criado em | Prioridade |",
-        "|-----|--------|-----------|------------|",
-    ]
+    yield "| ID | Título | Criado em | Prioridade |\n|-----|--------|-----------|------------|"
     for t in tickets[:limit]:
         tid = _safe_get(t, "id", "?")
         name = str(_safe_get(t, "name", "(sem título)"))[:45]
@@ -127,15 +140,23 @@ def format_tickets_table_with_date(
         priority_id = _safe_get(t, "priority")
         priority = PRIORITY_LABELS.get(priority_id, str(priority_id)) if priority_id else "?"
         id_cell = f"[#{tid}]({base}/front/ticket.form.php?id={tid})" if base and tid != "?" else f"#{tid}"
-        lines.append(f"| {id_cell} | {name} | {date_str} | {priority} |")
+        yield f"\n| {id_cell} | {name} | {date_str} | {priority} |"
 
-    return "\n".join(lines)
 
+def format_tickets_table_with_date(
+    tickets: list[dict],
+    limit: int = 15,
+    glpi_base_url: str | None = None,
+) -> str:
+    """Formata lista de tickets como tabela markdown incluindo data (ID com link para o GLPI)."""
+    return "".join(iter_tickets_table_with_date(tickets, limit=limit, glpi_base_url=glpi_base_url))
 
-def format_new_unassigned_report(data: dict, glpi_base_url: str | None = None) -> str:
-    """Relatório de tickets novos sem atribuição há mais de 24h."""
+
+def iter_new_unassigned_report(data: dict, glpi_base_url: str | None = None) -> Iterator[str]:
+    """Relatório de novos sem atribuição em partes (ver format_new_unassigned_report)."""
     if data.get("error"):
-        return f"**Erro ao consultar GLPI:** {data['error']}"
+        yield f"**Erro ao consultar GLPI:** {data['error']}"
+        return
 
     tickets = data.get("tickets") or []
     count = data.get("count", len(tickets))
@@ -143,28 +164,36 @@ def format_new_unassigned_report(data: dict, glpi_base_url: str | None = None) -
     min_hours = data.get("min_age_hours", 24)
 
     if count == 0:
-        return f"""### Chamados Novos sem Atribuição
+        yield f"""### Chamados Novos sem Atribuição
 
 Nenhum chamado novo sem atribuição há mais de {min_hours}h.
 
 **Situação:** Todos os chamados novos estão atribuídos ou foram criados recentemente.
 """
+        return
 
-    report = f"""### Chamados Novos sem Atribuição (> {min_hours}h)
+    yield f"""### Chamados Novos sem Atribuição (> {min_hours}h)
 
 **Atenção:** {total_found} chamado(s) aguardando atribuição!
 
-{format_tickets_table_with_date(tickets, glpi_base_url=glpi_base_url)}
+"""
+    yield from iter_tickets_table_with_date(tickets, glpi_base_url=glpi_base_url)
+    yield """
 
 **Ação recomendada:** Atribuir técnico responsável para cada chamado listado acima.
 """
-    return report
 
 
-def format_pending_old_report(data: dict, glpi_base_url: str | None = None) -> str:
-    """Relatório de tickets pendentes há mais de 7 dias."""
+def format_new_unassigned_report(data: dict, glpi_base_url: str | None = None) -> str:
+    """Relatório de tickets novos sem atribuição há mais de 24h."""
+    return "".join(iter_new_unassigned_report(data, glpi_base_url=glpi_base_url))
+
+
+def iter_pending_old_report(data: dict, glpi_base_url: str | None = None) -> Iterator[str]:
+    """Relatório de pendentes antigos em partes (ver format_pending_old_report)."""
     if data.get("error"):
-        return f"**Erro ao consultar GLPI:** {data['error']}"
+        yield f"**Erro ao consultar GLPI:** {data['error']}"
+        return
 
     tickets = data.get("tickets") or []
     count = data.get("count", len(tickets))
@@ -172,22 +201,29 @@ def format_pending_old_report(data: dict, glpi_base_url: str | None = None) -> s
     min_days = data.get("min_age_days", 7)
 
     if count == 0:
-        return f"""### Chamados Pendentes Antigos
+        yield f"""### Chamados Pendentes Antigos
 
 Nenhum chamado pendente há mais de {min_days} dias.
 
 **Situação:** Todos os chamados pendentes foram atualizados recentemente.
 """
+        return
 
-    report = f"""### Chamados Pendentes há mais de {min_days} dias
+    yield f"""### Chamados Pendentes há mais de {min_days} dias
 
 **Atenção:** {total_found} chamado(s) parado(s) há muito tempo!
 
-{format_tickets_table_with_date(tickets, glpi_base_url=glpi_base_url)}
+"""
+    yield from iter_tickets_table_with_date(tickets, glpi_base_url=glpi_base_url)
+    yield """
 
 **Ação recomendada:** 
 - Verificar se há bloqueio ou dependência externa
 - Considerar escalonamento se necessário
 - Atualizar o chamado com informações de status
 """
-    return report
+
+
+def format_pending_old_report(data: dict, glpi_base_url: str | None = None) -> str:
+    """Relatório de tickets pendentes há mais de 7 dias."""
+    return "".join(iter_pending_old_report(data, glpi_base_url=glpi_base_url))
@@ -1,6 +1,10 @@
-"""Linear report formatters: issues and project plan preview to markdown."""
+"""Linear report formatters: issues and project plan preview to markdown.
 
-from typing import Any
+iter_* functions yield the report piece by piece (header and summary, then
+one table row at a time) for streaming; format_* join them.
+"""
+
+from typing import Any, Iterator
 
 
 def _safe_get(obj: dict, key: str, default: Any = "") -> Any:
@@ -22,15 +26,13 @@ def _nested(obj: dict, path: str, default: Any = "") -> Any:
     return cur
 
 
-def format_issues_table(issues: list[dict], limit: int = 10) -> str:
-    """Formata lista de issues Linear como tabela markdown."""
+def iter_issues_table(issues: list[dict], limit: int = 10) -> Iterator[str]:
+    """Tabela markdown de issues: cabeçalho e depois uma linha por issue."""
     if not issues:
-        return "Nenhuma issue encontrada."
+        yield "Nenhuma issue encontrada."
+        return
 
-    lines = [
-        "| ID | Título | Estado | Prioridade |",
-        "|----|--------|--------|------------|",
-    ]
+    yield "| ID | Título | Estado | Prioridade |\n|----|--------|--------|------------|"
     for i in issues[:limit]:
         ident = _safe_get(i, "identifier", _safe_get(i, "id", "?"))[:12]
         title = str(_safe_get(i, "title", "(sem título)"))[:45]
@@ -38,15 +40,19 @@ def format_issues_table(issues: list[dict], limit: int = 10) -> str:
         if isinstance(state, dict):
             state = state.get("name", "?")
         priority = _safe_get(i, "priorityLabel") or _safe_get(i, "priority", "?")
-        lines.append(f"| {ident} | {title} | {state} | {priority} |")
+        yield f"\n| {ident} | {title} | {state} | {priority} |"
 
-    return "\n".join(lines)
+
+def format_issues_table(issues: list[dict], limit: int = 10) -> str:
+    """Formata lista de issues Linear como tabela markdown."""
+    return "".join(iter_issues_table(issues, limit=limit))
 
 
-def format_linear_report(data: dict) -> str:
-    """Relatório completo Linear a partir do dict retornado por linear_get_issues."""
+def iter_linear_report(data: dict) -> Iterator[str]:
+    """Relatório Linear em partes: título e resumo, depois as linhas da tabela."""
     if data.get("error"):
-        return f"**Erro ao consultar Linear:** {data['error']}"
+        yield f"**Erro ao consultar Linear:** {data['error']}"
+        return
 
     issues = data.get("issues") or []
     count = data.get("count", len(issues))
@@ -61,7 +67,7 @@ def format_linear_report(data: dict) -> str:
     backlog = by_state.get("Backlog", 0)
     in_progress = by_state.get("In Progress", 0) + by_state.get("Started", 0)
     done = by_state.get("Done", 0) + by_state.get("Canceled", 0)
-    report = f"""### Linear - Issues
+    yield f"""### Linear - Issues
 
 **Resumo:**
 
@@ -71,9 +77,14 @@ def format_linear_report(data: dict) -> str:
 
 **Últimas issues:**
 
-{format_issues_table(issues)}
 """
-    return report
+    yield from iter_issues_table(issues)
+    yield "\n"
+
+
+def format_linear_report(data: dict) -> str:
+    """Relatório completo Linear a partir do dict retornado por linear_get_issues."""
+    return "".join(iter_linear_report(data))
 
 
 def format_project_plan_preview(plan: dict, team_name: str = "") -> str:
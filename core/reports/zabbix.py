@@ -1,6 +1,10 @@
-"""Zabbix report formatters: problems/alerts to markdown."""
+"""Zabbix report formatters: problems/alerts to markdown.
 
-from typing import Any
+iter_* functions yield the report piece by piece (header and summary, then
+one table row at a time) for streaming; format_* join them.
+"""
+
+from typing import Any, Iterator
 
 SEVERITY_LABELS = {
     0: "Não classificado",
@@ -47,14 +51,15 @@ def _summarize_event_name(name: str, max_len: int = EVENT_DESC_MAX_LEN) -> str:
     return s or "?"
 
 
-def format_alerts_table(
+def iter_alerts_table(
     problems: list[dict],
     limit: int = 10,
     zabbix_base_url: str | None = None,
-) -> str:
-    """Formata lista de problemas Zabbix como tabela markdown (host, descrição resumida, link)."""
+) -> Iterator[str]:
+    """Tabela markdown de problemas: cabeçalho e depois uma linha por problema."""
     if not problems:
-        return "Nenhum alerta ativo encontrado."
+        yield "Nenhum alerta ativo encontrado."
+        return
 
     base = _zabbix_frontend_base(zabbix_base_url)
     has_link = bool(base)
@@ -62,7 +67,7 @@ def format_alerts_table(
     header = "| Severidade | Host | Nome / Descrição |"
     if has_link:
         header += " Link |"
-    lines = [header, "|------------|------|------------------|" + ("--------|" if has_link else "")]
+    yield header + "\n|------------|------|------------------|" + ("--------|" if has_link else "")
 
     for p in problems[:limit]:
         sev_id = int(_safe_get(p, "severity", 0))
@@ -84,15 +89,23 @@ def format_alerts_table(
                 row += f" [Abrir]({url}) |"
             else:
                 row += " |"
-        lines.append(row)
+        yield "\n" + row
 
-    return "\n".join(lines)
+
+def format_alerts_table(
+    problems: list[dict],
+    limit: int = 10,
+    zabbix_base_url: str | None = None,
+) -> str:
+    """Formata lista de problemas Zabbix como tabela markdown (host, descrição resumida, link)."""
+    return "".join(iter_alerts_table(problems, limit=limit, zabbix_base_url=zabbix_base_url))
 
 
-def format_zabbix_report(data: dict, zabbix_base_url: str | None = None) -> str:
-    """Relatório completo Zabbix a partir do dict retornado por zabbix_get_alerts."""
+def iter_zabbix_report(data: dict, zabbix_base_url: str | None = None) -> Iterator[str]:
+    """Relatório Zabbix em partes: título e resumo, depois as linhas da tabela."""
     if data.get("error"):
-        return f"**Erro ao consultar Zabbix:** {data['error']}"
+        yield f"**Erro ao consultar Zabbix:** {data['error']}"
+        return
 
     problems = data.get("problems") or []
     count = data.get("count", len(problems))
@@ -103,7 +116,7 @@ def format_zabbix_report(data: dict, zabbix_base_url: str | None = None) -> str:
         sev = int(p.get("severity", 0))
         by_severity[sev] = by_severity.get(sev, 0) + 1
 
-    report = f"""### Zabbix - Alertas
+    yield f"""### Zabbix - Alertas
 
 **Resumo:**
 
@@ -113,6 +126,11 @@ def format_zabbix_report(data: dict, zabbix_base_url: str | None = None) -> str:
 
 **Alertas ativos (severidade >= {min_severity}):**
 
-{format_alerts_table(problems, zabbix_base_url=zabbix_base_url)}
 """
-    return report
+    yield from iter_alerts_table(problems, zabbix_base_url=zabbix_base_url)
+    yield "\n"
+
+
+def format_zabbix_report(data: dict, zabbix_base_url: str | None = None) -> str:
+    """Relatório completo Zabbix a partir do dict retornado por zabbix_get_alerts."""
+    return "".join(iter_zabbix_report(data, zabbix_base_url=zabbix_base_url))
@@ -46,6 +46,7 @@ class SchedulerService:
             self.scheduler.start()
             logger.info("✅ Scheduler iniciado")
             self._ensure_file_cleanup_job()
+            self._ensure_kb_rebalance_job()
         else:
             logger.warning("⚠️ Scheduler já está rodando")
 
@@ -66,6 +67,23 @@ class SchedulerService:
         )
         logger.info("📦 Job de limpeza de arquivos agendado (02:00)")
 
+    def _ensure_kb_rebalance_job(self) -> None:
+        """Registra job diário de promoção de tenants grandes da KB (partições)."""
+        job_id = "rebalance_kb_partitions"
+        if self.scheduler.get_job(job_id):
+            return
+        from core.jobs import job_rebalance_kb_partitions
+
+        trigger = CronTrigger.from_crontab("0 3 * * *", timezone="America/Campo_Grande")
+        self.scheduler.add_job(
+            job_rebalance_kb_partitions,
+            trigger=trigger,
+            id=job_id,
+            name="Partições da KB por tenant",
+            replace_existing=True,
+        )
+        logger.info("📦 Job de partições da KB agendado (03:00)")
+
     def shutdown(self, wait: bool = True):
         """
         Desliga o scheduler.
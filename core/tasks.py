@@ -220,3 +220,93 @@ def send_notification(
     except Exception as exc:
         logger.error(f"[Task {self.request.id}] ❌ Erro: {exc}")
         raise self.retry(exc=exc, countdown=30 * (2 ** self.request.retries))
+
+
+@celery_app.task(
+    name='core.tasks.ingest_planning_document',
+    bind=True,
+    base=AsyncTask,
+    max_retries=3,
+    default_retry_delay=30
+)
+async def ingest_planning_document(
+    self,
+    project_id: str,
+    document_id: str
+) -> Dict[str, Any]:
+    """
+    Ingestão RAG de um documento de planejamento (fila 'ingest').
+    
+    Progresso (staged/chunked/embedded/indexed/failed) fica em
+    planning_documents.ingest_status.
+    
+    Args:
+        project_id: ID do projeto de planejamento
+        document_id: ID do documento em planning_documents
+    
+    Returns:
+        Dict com número de chunks indexados
+    """
+    try:
+        logger.info(f"[Task {self.request.id}] Ingerindo documento {document_id}")
+        
+        from core.rag.planning_ingestion import ingest_project_document
+        
+        chunks = await ingest_project_document(project_id, document_id)
+        
+        logger.info(f"[Task {self.request.id}] ✅ {chunks} chunks indexados")
+        
+        return {
+            "success": True,
+            "document_id": document_id,
+            "chunks": chunks,
+            "task_id": self.request.id
+        }
+        
+    except Exception as exc:
+        logger.error(f"[Task {self.request.id}] ❌ Erro: {exc}", exc_info=True)
+        raise self.retry(exc=exc, countdown=30 * (2 ** self.request.retries))
+
+
+@celery_app.task(
+    name='core.tasks.ingest_kb_document',
+    bind=True,
+    max_retries=3,
+    default_retry_delay=30
+)
+def ingest_kb_document(
+    self,
+    doc_id: int,
+    project_id: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Ingestão RAG de um documento já em kb_docs (fila 'ingest').
+    
+    Progresso fica em kb_docs.meta.ingest_status.
+    
+    Args:
+        doc_id: ID da linha em kb_docs
+        project_id: Projeto gravado em kb_chunks.project_id
+    
+    Returns:
+        Dict com número de chunks indexados
+    """
+    try:
+        logger.info(f"[Task {self.request.id}] Ingerindo kb_docs {doc_id}")
+        
+        from core.rag.ingestion import ingest_kb_document as _ingest
+        
+        chunks = _ingest(doc_id, project_id=project_id)
+        
+        logger.info(f"[Task {self.request.id}] ✅ {chunks} chunks indexados")
+        
+        return {
+            "success": True,
+            "doc_id": doc_id,
+            "chunks": chunks,
+            "task_id": self.request.id
+        }
+        
+    except Exception as exc:
+        logger.error(f"[Task {self.request.id}] ❌ Erro: {exc}", exc_info=True)
+        raise self.retry(exc=exc, countdown=30 * (2 ** self.request.retries))
@@ -11,6 +11,7 @@ from typing import Optional
 from langchain_core.tools import tool
 
 from core.database import get_conn
+from core.rag.vector_adapter import Vector
 
 logger = logging.getLogger(__name__)
 
@@ -67,29 +68,32 @@ def search_wareline_catalog(
     """
     try:
         model = _get_embedding_model()
-        query_embedding = model.embed_query(query)
+        query_embedding = Vector(model.embed_query(query))
 
+        # The query vector is bound once (binary) and shared through the q CTE
         with get_conn() as conn:
             with conn.cursor() as cur:
                 if domain:
                     cur.execute("""
-                        SELECT table_name, column_name, description, domain,
-                               1 - (embedding <=> %s::vector) AS similarity
-                        FROM wareline_rag.wareline_embeddings
-                        WHERE domain = %s
-                          AND 1 - (embedding <=> %s::vector) > %s
-                        ORDER BY embedding <=> %s::vector
+                        WITH q AS (SELECT %s::vector AS v)
+                        SELECT e.table_name, e.column_name, e.description, e.domain,
+                               1 - (e.embedding <=> q.v) AS similarity
+                        FROM wareline_rag.wareline_embeddings e, q
+                        WHERE e.domain = %s
+                          AND 1 - (e.embedding <=> q.v) > %s
+                        ORDER BY e.embedding <=> q.v
                         LIMIT %s
-                    """, (query_embedding, domain.upper(), query_embedding, threshold, query_embedding, limit))
+                    """, (query_embedding, domain.upper(), threshold, limit))
                 else:
                     cur.execute("""
-                        SELECT table_name, column_name, description, domain,
-                               1 - (embedding <=> %s::vector) AS similarity
-                        FROM wareline_rag.wareline_embeddings
-                        WHERE 1 - (embedding <=> %s::vector) > %s
-                        ORDER BY embedding <=> %s::vector
+                        WITH q AS (SELECT %s::vector AS v)
+                        SELECT e.table_name, e.column_name, e.description, e.domain,
+                               1 - (e.embedding <=> q.v) AS similarity
+                        FROM wareline_rag.wareline_embeddings e, q
+                        WHERE 1 - (e.embedding <=> q.v) > %s
+                        ORDER BY e.embedding <=> q.v
                         LIMIT %s
-                    """, (query_embedding, query_embedding, threshold, query_embedding, limit))
+                    """, (query_embedding, threshold, limit))
 
                 rows = cur.fetchall()
 
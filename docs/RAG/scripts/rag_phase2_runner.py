@@ -7,16 +7,34 @@ Executa cada configuração (chunking/search_type/HyDE/threshold/reranker) sobre
 e salva JSON/CSV em tests/rag/analysis/.
 
 Uso:
-  PYTHONPATH=. .venv/bin/python scripts/rag_phase2_runner.py [--fast] [--max N] [--outfile NAME]
+  PYTHONPATH=. .venv/bin/python scripts/rag_phase2_runner.py [--fast] [--max N] [--outfile NAME] [--batch]
+  PYTHONPATH=. .venv/bin/python scripts/rag_phase2_runner.py --ann-sweep [--ef 10,20,40,80,160,320] [--iterative none,relaxed_order]
+                                                            [--storage vector,halfvec,binary]
 
 Exemplos:
   PYTHONPATH=. .venv/bin/python scripts/rag_phase2_runner.py --fast
   PYTHONPATH=. .venv/bin/python scripts/rag_phase2_runner.py --max 50 --outfile phase2_full
+  PYTHONPATH=. .venv/bin/python scripts/rag_phase2_runner.py --batch   # kb_search_batch por experimento
+  PYTHONPATH=. .venv/bin/python scripts/rag_phase2_runner.py --ann-sweep --ann-chunking markdown
 
 Saídas:
   tests/rag/analysis/<NAME>_results.json   (summary + details)
   tests/rag/analysis/<NAME>_results.csv    (summary + details em um único CSV)
 
+Latência: cada chamada a kb_search_client é cronometrada (latency_ms por pergunta,
+p50_ms/p95_ms por experimento). Para comparar a perna textual FTS x trigram, use
+search_type com sufixo (text / text_trgm, hybrid_rrf / hybrid_rrf_trgm).
+
+--ann-sweep: curva recall@k x latência da perna vetorial (HNSW). Para cada
+combinação de ef_search (--ef) e iterative_scan (--iterative; "none" = padrão do
+servidor) busca todas as perguntas e compara com o kNN exato (sem índice) dos
+mesmos filtros. Saídas: <NAME>_ann_sweep.json/.csv e <NAME>_ann_sweep.png
+(se matplotlib estiver instalado).
+--storage compara o índice float32 com os compactos (halfvec / binário +
+rescore float32, sql/kb/21); o JSON inclui o tamanho de cada índice vetorial.
+Tenants ainda em kb_chunks_default usam kNN exato (sql/kb/20): a curva só
+faz sentido para um tenant com partição própria.
+
 Obs.: Se o reranker Cohere atingir 429 (Trial key), o experimento específico é pulado e registrado como skipped.
 """
 
@@ -26,6 +44,8 @@ import argparse
 import csv
 import json
 import os
+import statistics
+import time
 from pathlib import Path
 from typing import Any
 
@@ -93,8 +113,148 @@ def load_experiments_and_queries() -> tuple[list[dict[str, Any]], list[dict[str,
     return exps, qs, base
 
 
+def _percentile(values: list[float], pct: float) -> float | None:
+    if not values:
+        return None
+    ordered = sorted(values)
+    ix = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return round(ordered[ix], 1)
+
+
+def _exact_neighbors(cur, vec: Any, k: int, empresa: str, chunking: str) -> list[tuple[str, int]]:
+    """kNN exato (ground truth): ORDER BY sem o cast dos índices parciais -> varredura sequencial."""
+    cur.execute(
+        "select doc_path, chunk_ix from public.kb_chunks"
+        " where vector_dims(embedding) = vector_dims(%(vec)s)"
+        " and lower(empresa) = lower(%(empresa)s) and meta->>'chunking' = %(chunking)s"
+        " order by embedding <=> %(vec)s limit %(k)s",
+        {"vec": vec, "k": k, "empresa": empresa, "chunking": chunking},
+    )
+    return [(r[0], r[1]) for r in cur.fetchall()]
+
+
+def _plot_ann_sweep(rows: list[dict[str, Any]], path: Path, k: int) -> bool:
+    try:
+        import matplotlib
+
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+    except ImportError:
+        return False
+    fig, ax = plt.subplots(figsize=(7, 4.5))
+    for series in dict.fromkeys((r["storage"], r["iterative_scan"]) for r in rows):
+        pts = [r for r in rows if (r["storage"], r["iterative_scan"]) == series]
+        ax.plot([r["p50_ms"] for r in pts], [r[f"recall@{k}"] for r in pts], marker="o", label=" / ".join(series))
+        for r in pts:
+            ax.annotate(str(r["ef_search"]), (r["p50_ms"], r[f"recall@{k}"]), fontsize=8)
+    ax.set_xlabel("latência p50 (ms)")
+    ax.set_ylabel(f"recall@{k}")
+    ax.set_title("HNSW: recall x latência (rótulos = ef_search)")
+    ax.grid(True, alpha=0.3)
+    ax.legend(title="storage / iterative_scan")
+    fig.tight_layout()
+    fig.savefig(path, dpi=120)
+    plt.close(fig)
+    return True
+
+
+def run_ann_sweep(args: argparse.Namespace) -> int:
+    """Recall@k x latência da perna vetorial para vários ef_search / iterative_scan."""
+    from core.database import get_conn
+    from core.rag.embeddings import _DEFAULT_RESCORE_FACTOR
+    from core.rag.tools import _embed_queries, query_candidates
+    from core.rag.vector_adapter import Vector
+
+    _, queries, base = load_experiments_and_queries()
+    if args.fast:
+        queries = queries[:10]
+    if args.max and args.max > 0:
+        queries = queries[: args.max]
+    perguntas = [q.get("pergunta") or q.get("question") for q in queries]
+    perguntas = [p for p in perguntas if p]
+    k = args.ann_k
+    empresa, chunking = "Empresa X", args.ann_chunking
+    ef_values = [int(x) for x in args.ef.split(",") if x.strip()]
+    modes = [m.strip() for m in args.iterative.split(",") if m.strip()]
+    storages = [s.strip() for s in args.storage.split(",") if s.strip()]
+
+    embeddings = _embed_queries(perguntas, None)
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            truth = [set(_exact_neighbors(cur, Vector(e), k, empresa, chunking)) for e in embeddings]
+            index_sizes: dict[str, Any] = {}
+            try:
+                cur.execute("select index_name, storage, size_bytes from public.kb_vector_index_sizes()")
+                index_sizes = {name: {"storage": st, "mb": round(size / 2**20, 2)} for name, st, size in cur.fetchall()}
+            except Exception:
+                conn.rollback()
+    for name, info in index_sizes.items():
+        print(f"índice {name:24s} {info['storage']:8s} {info['mb']:>10.2f} MB")
+
+    rows: list[dict[str, Any]] = []
+    for storage, mode, ef in [(s, m, e) for s in storages for m in modes for e in ef_values]:
+        rescore_factor = args.rescore_factor or _DEFAULT_RESCORE_FACTOR.get(storage, 1)
+        latencies: list[float] = []
+        recalls: list[float] = []
+        returned: list[int] = []
+        for pergunta, emb, exact in zip(perguntas, embeddings, truth):
+            # query_candidates direto: sem cache de resultados nem rerank
+            started = time.perf_counter()
+            res = query_candidates(
+                pergunta, k, "vector", None, empresa, chunking, emb, None,
+                ef_search=ef, iterative_scan=None if mode == "none" else mode,
+                storage=storage, rescore_factor=rescore_factor,
+            )
+            latencies.append((time.perf_counter() - started) * 1000)
+            got = {(r["doc_path"], r["chunk_ix"]) for r in res}
+            returned.append(len(res))
+            if exact:
+                recalls.append(len(got & exact) / len(exact))
+        rows.append({
+            "storage": storage,
+            "rescore_factor": rescore_factor if storage != "vector" else None,
+            "iterative_scan": mode,
+            "ef_search": ef,
+            f"recall@{k}": round(statistics.mean(recalls), 3) if recalls else None,
+            "avg_returned": round(statistics.mean(returned), 2) if returned else None,
+            "p50_ms": round(statistics.median(latencies), 1) if latencies else None,
+            "p95_ms": _percentile(latencies, 95),
+        })
+        r = rows[-1]
+        print(
+            f"{storage:8s} {mode:14s} ef={ef:<4d} recall@{k}={r[f'recall@{k}']} "
+            f"returned={r['avg_returned']} p50={r['p50_ms']}ms p95={r['p95_ms']}ms"
+        )
+
+    out_dir = base / "analysis"
+    out_dir.mkdir(parents=True, exist_ok=True)
+    outname = args.outfile or "phase2"
+    json_path = out_dir / f"{outname}_ann_sweep.json"
+    json_path.write_text(json.dumps({
+        "k": k, "empresa": empresa, "chunking": chunking, "queries": len(perguntas),
+        "index_sizes": index_sizes, "rows": rows,
+    }, ensure_ascii=False, indent=2), encoding="utf-8")
+    csv_path = out_dir / f"{outname}_ann_sweep.csv"
+    with csv_path.open("w", encoding="utf-8", newline="") as f:
+        w = csv.DictWriter(f, fieldnames=list(rows[0].keys()) if rows else ["iterative_scan"])
+        w.writeheader()
+        w.writerows(rows)
+    png_path = out_dir / f"{outname}_ann_sweep.png"
+    print(f"\nCSV: {csv_path}")
+    print(f"JSON: {json_path}")
+    if rows and _plot_ann_sweep(rows, png_path, k):
+        print(f"PNG: {png_path}")
+    else:
+        print("PNG: matplotlib não instalado (gráfico não gerado)")
+    return 0
+
+
 def run(args: argparse.Namespace) -> int:
-    from app.rag.tools import kb_search_client
+    try:
+        from core.rag.tools import kb_search_batch, kb_search_client
+    except ImportError:
+        from app.rag.tools import kb_search_client
+        kb_search_batch = None
 
     experiments, queries, base = load_experiments_and_queries()
     if args.fast:
@@ -121,9 +281,43 @@ def run(args: argparse.Namespace) -> int:
         hit1 = 0
         lyes = 0
         total = 0
+        latencies: list[float] = []
         skipped_reason = None
 
+        # --batch: todas as perguntas do experimento numa chamada (1 embedding em lote, 1 conexão)
+        batch_results: dict[str, list[dict[str, Any]]] = {}
+        batch_latency_ms = 0.0
+        if args.batch and kb_search_batch is not None:
+            perguntas = [
+                q.get("pergunta") or q.get("question")
+                for q in queries
+                if (q.get("pergunta") or q.get("question")) and (q.get("expected") or q.get("expected_all"))
+            ]
+            batch_kwargs: dict[str, Any] = {}
+            if match_threshold is not None:
+                batch_kwargs["match_threshold"] = float(match_threshold)
+            started = time.perf_counter()
+            try:
+                found = kb_search_batch(
+                    perguntas,
+                    k=5,
+                    search_type=search_type,
+                    reranker=reranker,
+                    empresa="Empresa X",
+                    chunking=chunking,
+                    use_hyde=use_hyde,
+                    **batch_kwargs,
+                )
+            except Exception as e:
+                if "TooManyRequests" not in str(e):
+                    raise
+                found, skipped_reason = [], "cohere_429"
+            batch_latency_ms = (time.perf_counter() - started) * 1000 / max(len(perguntas), 1)
+            batch_results = dict(zip(perguntas, found))
+
         for q in queries:
+            if skipped_reason:
+                break
             pergunta = q.get("pergunta") or q.get("question")
             exp_all = q.get("expected_all")
             exp_one = q.get("expected")
@@ -146,7 +340,14 @@ def run(args: argparse.Namespace) -> int:
                 except Exception:
                     pass
             try:
-                res = kb_search_client.invoke(req)
+                if pergunta in batch_results:
+                    res = batch_results[pergunta]
+                    latency_ms = batch_latency_ms
+                else:
+                    started = time.perf_counter()
+                    res = kb_search_client.invoke(req)
+                    latency_ms = (time.perf_counter() - started) * 1000
+                latencies.append(latency_ms)
             except Exception as e:
                 # Reranker 429
                 if "TooManyRequests" in str(e):
@@ -214,6 +415,7 @@ def run(args: argparse.Namespace) -> int:
                 "answer": judge_expected,
                 "hit@5": bool(ok5),
                 "hit@1": bool(ok1),
+                "latency_ms": round(latency_ms, 1),
                 "judge_yes": bool(judge_ok),
                 "judge_justification": judge_reason,
                 # Auditoria do que o juiz viu
@@ -236,6 +438,8 @@ def run(args: argparse.Namespace) -> int:
                 "skipped": skipped_reason,
                 "hit@5": None,
                 "hit@1": None,
+                "p50_ms": None,
+                "p95_ms": None,
                 "llm_yes": None,
             })
         else:
@@ -248,6 +452,8 @@ def run(args: argparse.Namespace) -> int:
                 "reranker": reranker,
                 "hit@5": round(hit5 / max(total, 1), 2),
                 "hit@1": round(hit1 / max(total, 1), 2),
+                "p50_ms": round(statistics.median(latencies), 1) if latencies else None,
+                "p95_ms": _percentile(latencies, 95),
                 "llm_yes": round(lyes / max(total, 1), 2),
             })
 
@@ -256,12 +462,12 @@ def run(args: argparse.Namespace) -> int:
     csv_path = out_dir / f"{outname}_results.csv"
     # Campos: união de summary e details + marcador de tipo de linha
     summary_fields = [
-        "name", "chunking", "search_type", "use_hyde", "match_threshold", "reranker", "hit@5", "hit@1", "llm_yes", "skipped"
+        "name", "chunking", "search_type", "use_hyde", "match_threshold", "reranker", "hit@5", "hit@1", "p50_ms", "p95_ms", "llm_yes", "skipped"
     ]
     detail_fields = [
         "experiment", "chunking", "search_type", "use_hyde", "match_threshold", "reranker",
         "question", "expected", "answer",
-        "hit@5", "hit@1", "judge_yes", "judge_justification",
+        "hit@5", "hit@1", "latency_ms", "judge_yes", "judge_justification",
         # Campos de auditoria leves
         "top1_path", "top1_chunk_ix", "top1_score",
         # Até 3 contextos formatados para leitura rápida
@@ -310,12 +516,12 @@ def run(args: argparse.Namespace) -> int:
 
 
     print("\n=== EXPERIMENTS RESULTS (ordenado por llm_yes) ===")
-    print("name                 | chunking  | search       | hyde | thr  | rerank   | hit@5 | hit@1 | llm_yes")
-    print("-" * 118)
+    print("name                 | chunking  | search       | hyde | thr  | rerank   | hit@5 | hit@1 | p50 ms | p95 ms | llm_yes")
+    print("-" * 136)
     for r in sorted(rows, key=lambda x: (x.get("llm_yes") is None, -(x.get("llm_yes") or 0))):
         thr = r.get('match_threshold')
         thr_s = f"{thr:.2f}" if isinstance(thr, (int, float)) else "-"
-        print(f"{str(r['name'])[:20]:20s} | {str(r['chunking']):9s} | {str(r['search_type']):11s} | {str(r['use_hyde'])[:4]:4s} | {thr_s:>4s} | {str(r.get('reranker','none'))[:8]:8s} | {str(r['hit@5']):>5s} | {str(r['hit@1']):>5s} | {str(r['llm_yes']):>6s}")
+        print(f"{str(r['name'])[:20]:20s} | {str(r['chunking']):9s} | {str(r['search_type']):11s} | {str(r['use_hyde'])[:4]:4s} | {thr_s:>4s} | {str(r.get('reranker','none'))[:8]:8s} | {str(r['hit@5']):>5s} | {str(r['hit@1']):>5s} | {str(r.get('p50_ms')):>6s} | {str(r.get('p95_ms')):>6s} | {str(r['llm_yes']):>6s}")
 
     print(f"\nCSV: {csv_path}")
     print(f"JSON: {json_path}")
@@ -327,9 +533,19 @@ def main(argv: list[str] | None = None) -> int:
     p.add_argument("--fast", action="store_true", help="Usa apenas ~10 perguntas (atalho; equivalente a RAG_FAST=1)")
     p.add_argument("--max", type=int, default=0, help="Limita a N perguntas (0 = todas)")
     p.add_argument("--outfile", default="phase2", help="Prefixo do arquivo de saída (default: phase2)")
+    p.add_argument("--batch", action="store_true", help="Busca todas as perguntas de cada experimento com kb_search_batch")
+    p.add_argument("--ann-sweep", action="store_true", help="Curva recall@k x latência do HNSW (em vez dos experimentos)")
+    p.add_argument("--ef", default="10,20,40,80,160,320", help="Valores de ef_search do --ann-sweep")
+    p.add_argument("--iterative", default="none,relaxed_order", help="Modos iterative_scan do --ann-sweep (none = padrão do servidor)")
+    p.add_argument("--ann-k", type=int, default=10, help="k do recall@k no --ann-sweep")
+    p.add_argument("--ann-chunking", default="semantic", help="Chunking filtrado no --ann-sweep")
+    p.add_argument("--storage", default="vector", help="Índices do --ann-sweep: vector,halfvec,binary")
+    p.add_argument("--rescore-factor", type=int, default=0, help="Candidatos = k * fator (0 = padrão do armazenamento)")
     args = p.parse_args(argv)
     if args.fast:
         os.environ["RAG_FAST"] = "1"
+    if args.ann_sweep:
+        return run_ann_sweep(args)
     return run(args)
 
 
@@ -30,6 +30,8 @@ def main():
     parser.add_argument("--chunk-size", type=int, default=800, help="Chunk size")
     parser.add_argument("--chunk-overlap", type=int, default=200, help="Chunk overlap")
     parser.add_argument("--truncate", action="store_true", help="Truncate tables before ingestion")
+    parser.add_argument("--force", action="store_true",
+                       help="Re-chunk and re-embed documents even if unchanged")
     
     args = parser.parse_args()
     
@@ -55,6 +57,7 @@ def main():
         client_id=args.client_id,
         chunk_size=args.chunk_size,
         chunk_overlap=args.chunk_overlap,
+        force=args.force,
     )
     print(f"Created {chunked} chunks.")
     
@@ -0,0 +1,25 @@
+-- =============================================================================
+-- 13_kb_chunk_manifest.sql - Materialização incremental de kb_chunks
+-- Registra qual combinação (hash do documento, estratégia, chunk_size,
+-- chunk_overlap, modelo de embedding) gerou os chunks de cada doc_path.
+-- Aplicar após 07_model_agnostic.sql
+-- =============================================================================
+CREATE TABLE IF NOT EXISTS public.kb_chunk_manifest (
+    doc_path TEXT PRIMARY KEY,
+    -- doc_path gravado em kb_chunks (inclui doc_path_prefix)
+    source_path TEXT NOT NULL,
+    source_hash VARCHAR(64) NOT NULL,
+    strategy TEXT NOT NULL,
+    chunk_size INTEGER NOT NULL,
+    chunk_overlap INTEGER NOT NULL,
+    embedding_model TEXT NOT NULL,
+    chunk_count INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMPTZ DEFAULT now(),
+    updated_at TIMESTAMPTZ DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS idx_kb_chunk_manifest_source_path ON public.kb_chunk_manifest(source_path);
+
+-- Versão mais recente de cada source_path em kb_docs (staging guarda uma linha por hash)
+CREATE INDEX IF NOT EXISTS idx_kb_docs_source_path_created
+ON public.kb_docs(source_path, created_at DESC, id DESC);
@@ -0,0 +1,15 @@
+-- =============================================================================
+-- 14_embedding_cache.sql - Cache persistente de embeddings
+-- Chave: (model_id, sha256 do texto). Usado por core/rag/embedding_cache.py
+-- para não recalcular vetores de chunks e perguntas repetidas.
+-- =============================================================================
+CREATE TABLE IF NOT EXISTS public.kb_embedding_cache (
+    model_id TEXT NOT NULL,
+    -- id do modelo (ex.: openai, bge-m3); consultas usam o sufixo ':query'
+    text_hash CHAR(64) NOT NULL,
+    embedding REAL [] NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT now(),
+    PRIMARY KEY (model_id, text_hash)
+);
+
+CREATE INDEX IF NOT EXISTS idx_kb_embedding_cache_created ON public.kb_embedding_cache(created_at);
@@ -0,0 +1,24 @@
+-- =============================================================================
+-- 15_ingest_status.sql - Progresso da ingestão RAG por documento (fila Celery 'ingest')
+-- Estados: pending -> queued -> staged -> chunked -> embedded -> indexed (ou failed)
+-- Aplicar após 10_schema_fixes.sql
+-- =============================================================================
+ALTER TABLE planning_documents
+ADD COLUMN IF NOT EXISTS ingest_status TEXT DEFAULT 'pending',
+ADD COLUMN IF NOT EXISTS ingest_task_id TEXT,
+ADD COLUMN IF NOT EXISTS ingest_error TEXT,
+ADD COLUMN IF NOT EXISTS chunk_count INTEGER DEFAULT 0,
+ADD COLUMN IF NOT EXISTS ingest_updated_at TIMESTAMPTZ;
+
+DO $$ BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_constraint WHERE conname = 'chk_planning_documents_ingest_status'
+    ) THEN
+        ALTER TABLE planning_documents
+        ADD CONSTRAINT chk_planning_documents_ingest_status
+        CHECK (ingest_status IN ('pending', 'queued', 'staged', 'chunked', 'embedded', 'indexed', 'failed'));
+    END IF;
+END $$;
+
+CREATE INDEX IF NOT EXISTS idx_planning_docs_ingest_status
+ON planning_documents(project_id, ingest_status);
@@ -0,0 +1,43 @@
+-- =============================================================================
+-- 16_agent_config_notify.sql - Invalidação do cache de agentes via LISTEN/NOTIFY
+-- Qualquer alteração em agents / agent_connectors / agent_skills / agent_domains
+-- publica o agent_id no canal 'agent_config_changed'. Alterações em connectors,
+-- skills ou knowledge_domains publicam '*' (afetam vários agentes).
+-- As réplicas da API escutam o canal e descartam os ResolvedAgent em cache.
+-- Aplicar após 12_multi_agent_schema.sql
+-- =============================================================================
+CREATE OR REPLACE FUNCTION public.notify_agent_config_changed() RETURNS trigger AS $$
+DECLARE
+    payload TEXT;
+    rec RECORD;
+BEGIN
+    rec := COALESCE(NEW, OLD);
+    IF TG_TABLE_NAME = 'agents' THEN
+        payload := rec.id::text;
+    ELSIF TG_TABLE_NAME IN ('agent_connectors', 'agent_skills', 'agent_domains') THEN
+        payload := rec.agent_id::text;
+    ELSE
+        payload := '*';
+    END IF;
+    PERFORM pg_notify('agent_config_changed', payload);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DO $$
+DECLARE
+    t TEXT;
+BEGIN
+    FOREACH t IN ARRAY ARRAY[
+        'agents', 'agent_connectors', 'agent_skills', 'agent_domains',
+        'connectors', 'skills', 'knowledge_domains'
+    ] LOOP
+        EXECUTE format('DROP TRIGGER IF EXISTS trg_%s_notify_config ON public.%I', t, t);
+        EXECUTE format(
+            'CREATE TRIGGER trg_%s_notify_config
+             AFTER INSERT OR UPDATE OR DELETE ON public.%I
+             FOR EACH ROW EXECUTE FUNCTION public.notify_agent_config_changed()',
+            t, t
+        );
+    END LOOP;
+END $$;
@@ -0,0 +1,411 @@
+-- =============================================================================
+-- 18_hnsw_dim_search.sql - Perna vetorial especializada por dimensão
+-- Os índices HNSW de 07_model_agnostic.sql são parciais e de expressão:
+--   (embedding::vector(1536)) WHERE vector_dims(embedding) = 1536
+--   (embedding::vector(1024)) WHERE vector_dims(embedding) = 1024
+-- O planner só usa o índice quando a consulta repete o mesmo cast, o mesmo
+-- predicado de dimensão e tem ORDER BY distância + LIMIT direto na tabela.
+-- As funções de 09/17 ordenavam por c.embedding <=> query_vec sem cast e
+-- numeravam (ROW_NUMBER) antes do LIMIT: varredura de todo o tenant.
+--
+-- kb_vector_candidates_<dim> são funções SQL STABLE (inlináveis: o EXPLAIN da
+-- chamada mostra o Index Scan). kb_vector_candidates escolhe pela dimensão do
+-- vetor da consulta; as buscas públicas passam a usá-la.
+-- O threshold é aplicado depois do top-k: como a lista está ordenada por
+-- distância, o resultado é o mesmo de filtrar antes.
+-- =============================================================================
+
+-- 1. Candidatos por dimensão (casam com idx_kb_openai / idx_kb_bgem3)
+CREATE OR REPLACE FUNCTION public.kb_vector_candidates_1536(
+        query_vec vector,
+        k INTEGER,
+        p_client_id UUID DEFAULT NULL,
+        p_empresa TEXT DEFAULT NULL,
+        p_chunking TEXT DEFAULT NULL,
+        p_project_id UUID DEFAULT NULL
+    ) RETURNS TABLE (
+        doc_path TEXT,
+        chunk_ix INTEGER,
+        content TEXT,
+        meta JSONB,
+        distance FLOAT
+    ) AS $$
+SELECT c.doc_path,
+    c.chunk_ix,
+    c.content,
+    c.meta,
+    (c.embedding::vector(1536) <=> query_vec::vector(1536))::float AS distance
+FROM public.kb_chunks c
+WHERE vector_dims(c.embedding) = 1536
+    AND (
+        p_client_id IS NULL
+        OR c.client_id = p_client_id
+    )
+    AND (
+        p_empresa IS NULL
+        OR lower(c.empresa) = lower(p_empresa)
+    )
+    AND (
+        p_chunking IS NULL
+        OR c.meta->>'chunking' = p_chunking
+    )
+    AND (
+        p_project_id IS NULL
+        OR c.project_id = p_project_id
+    )
+ORDER BY c.embedding::vector(1536) <=> query_vec::vector(1536)
+LIMIT k;
+$$ LANGUAGE sql STABLE;
+
+CREATE OR REPLACE FUNCTION public.kb_vector_candidates_1024(
+        query_vec vector,
+        k INTEGER,
+        p_client_id UUID DEFAULT NULL,
+        p_empresa TEXT DEFAULT NULL,
+        p_chunking TEXT DEFAULT NULL,
+        p_project_id UUID DEFAULT NULL
+    ) RETURNS TABLE (
+        doc_path TEXT,
+        chunk_ix INTEGER,
+        content TEXT,
+        meta JSONB,
+        distance FLOAT
+    ) AS $$
+SELECT c.doc_path,
+    c.chunk_ix,
+    c.content,
+    c.meta,
+    (c.embedding::vector(1024) <=> query_vec::vector(1024))::float AS distance
+FROM public.kb_chunks c
+WHERE vector_dims(c.embedding) = 1024
+    AND (
+        p_client_id IS NULL
+        OR c.client_id = p_client_id
+    )
+    AND (
+        p_empresa IS NULL
+        OR lower(c.empresa) = lower(p_empresa)
+    )
+    AND (
+        p_chunking IS NULL
+        OR c.meta->>'chunking' = p_chunking
+    )
+    AND (
+        p_project_id IS NULL
+        OR c.project_id = p_project_id
+    )
+ORDER BY c.embedding::vector(1024) <=> query_vec::vector(1024)
+LIMIT k;
+$$ LANGUAGE sql STABLE;
+
+-- 2. Despacho pela dimensão da consulta (outras dimensões: busca exata)
+CREATE OR REPLACE FUNCTION public.kb_vector_candidates(
+        query_vec vector,
+        k INTEGER,
+        p_client_id UUID DEFAULT NULL,
+        p_empresa TEXT DEFAULT NULL,
+        p_chunking TEXT DEFAULT NULL,
+        p_project_id UUID DEFAULT NULL
+    ) RETURNS TABLE (
+        doc_path TEXT,
+        chunk_ix INTEGER,
+        content TEXT,
+        meta JSONB,
+        distance FLOAT
+    ) AS $$ BEGIN
+    IF vector_dims(query_vec) = 1536 THEN
+        RETURN QUERY SELECT * FROM public.kb_vector_candidates_1536(
+            query_vec, k, p_client_id, p_empresa, p_chunking, p_project_id);
+    ELSIF vector_dims(query_vec) = 1024 THEN
+        RETURN QUERY SELECT * FROM public.kb_vector_candidates_1024(
+            query_vec, k, p_client_id, p_empresa, p_chunking, p_project_id);
+    ELSE
+        RETURN QUERY
+        SELECT c.doc_path,
+            c.chunk_ix,
+            c.content,
+            c.meta,
+            (c.embedding <=> query_vec)::float AS distance
+        FROM public.kb_chunks c
+        WHERE vector_dims(c.embedding) = vector_dims(query_vec)
+            AND (
+                p_client_id IS NULL
+                OR c.client_id = p_client_id
+            )
+            AND (
+                p_empresa IS NULL
+                OR lower(c.empresa) = lower(p_empresa)
+            )
+            AND (
+                p_chunking IS NULL
+                OR c.meta->>'chunking' = p_chunking
+            )
+            AND (
+                p_project_id IS NULL
+                OR c.project_id = p_project_id
+            )
+        ORDER BY c.embedding <=> query_vec
+        LIMIT k;
+    END IF;
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+-- 3. Busca Vetorial
+CREATE OR REPLACE FUNCTION public.kb_vector_search(
+        query_vec vector,
+        k INTEGER,
+        threshold FLOAT DEFAULT NULL,
+        p_client_id UUID DEFAULT NULL,
+        p_empresa TEXT DEFAULT NULL,
+        p_chunking TEXT DEFAULT NULL,
+        p_project_id UUID DEFAULT NULL
+    ) RETURNS TABLE (
+        doc_path TEXT,
+        chunk_ix INTEGER,
+        content TEXT,
+        score FLOAT,
+        meta JSONB
+    ) AS $$ BEGIN RETURN QUERY
+SELECT v.doc_path,
+    v.chunk_ix,
+    v.content,
+    1 - v.distance AS score,
+    v.meta
+FROM public.kb_vector_candidates(
+        query_vec, k, p_client_id, p_empresa, p_chunking, p_project_id
+    ) v
+WHERE threshold IS NULL
+    OR 1 - v.distance >= threshold
+ORDER BY v.distance;
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+-- 4. Busca Híbrida (RRF): perna vetorial limitada antes do ROW_NUMBER
+CREATE OR REPLACE FUNCTION public.kb_hybrid_search(
+        query_text TEXT,
+        query_vec vector,
+        k INTEGER,
+        threshold FLOAT DEFAULT NULL,
+        p_client_id UUID DEFAULT NULL,
+        p_empresa TEXT DEFAULT NULL,
+        p_chunking TEXT DEFAULT NULL,
+        p_project_id UUID DEFAULT NULL
+    ) RETURNS TABLE (
+        doc_path TEXT,
+        chunk_ix INTEGER,
+        content TEXT,
+        score FLOAT,
+        meta JSONB
+    ) AS $$ BEGIN RETURN QUERY WITH vector_results AS (
+        SELECT v.doc_path,
+            v.chunk_ix,
+            v.content,
+            v.meta,
+            ROW_NUMBER() OVER (
+                ORDER BY v.distance
+            ) AS vec_rank
+        FROM public.kb_vector_candidates(
+                query_vec, k * 2, p_client_id, p_empresa, p_chunking, p_project_id
+            ) v
+        WHERE threshold IS NULL
+            OR 1 - v.distance >= threshold
+    ), text_results AS (
+        SELECT c.doc_path,
+            c.chunk_ix,
+            c.content,
+            c.meta,
+            ROW_NUMBER() OVER (
+                ORDER BY similarity(c.content, query_text) DESC
+            ) AS text_rank
+        FROM public.kb_chunks c
+        WHERE (
+                p_client_id IS NULL
+                OR c.client_id = p_client_id
+            )
+            AND (
+                p_empresa IS NULL
+                OR lower(c.empresa) = lower(p_empresa)
+            )
+            AND (
+                p_chunking IS NULL
+                OR c.meta->>'chunking' = p_chunking
+            )
+            AND (
+                p_project_id IS NULL
+                OR c.project_id = p_project_id
+            )
+            AND c.content % query_text
+        LIMIT k * 2
+    ), combined AS (
+        SELECT COALESCE(v.doc_path, t.doc_path) AS doc_path,
+            COALESCE(v.chunk_ix, t.chunk_ix) AS chunk_ix,
+            COALESCE(v.content, t.content) AS content,
+            COALESCE(v.meta, t.meta) AS meta,
+            COALESCE(
+                1.0::double precision / (60 + v.vec_rank),
+                0.0::double precision
+            ) + COALESCE(
+                1.0::double precision / (60 + t.text_rank),
+                0.0::double precision
+            ) AS rrf_score
+        FROM vector_results v
+            FULL OUTER JOIN text_results t ON v.doc_path = t.doc_path
+            AND v.chunk_ix = t.chunk_ix
+    )
+SELECT combined.doc_path,
+    combined.chunk_ix,
+    combined.content,
+    combined.rrf_score AS score,
+    combined.meta
+FROM combined
+ORDER BY combined.rrf_score DESC
+LIMIT k;
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+-- 5. Busca Híbrida (Union - Score Máximo)
+CREATE OR REPLACE FUNCTION public.kb_hybrid_union(
+        query_text TEXT,
+        query_vec vector,
+        k INTEGER,
+        threshold FLOAT DEFAULT NULL,
+        p_client_id UUID DEFAULT NULL,
+        p_empresa TEXT DEFAULT NULL,
+        p_chunking TEXT DEFAULT NULL,
+        p_project_id UUID DEFAULT NULL
+    ) RETURNS TABLE (
+        doc_path TEXT,
+        chunk_ix INTEGER,
+        content TEXT,
+        score FLOAT,
+        meta JSONB
+    ) AS $$ BEGIN RETURN QUERY WITH vector_results AS (
+        SELECT v.doc_path,
+            v.chunk_ix,
+            v.content,
+            v.meta,
+            1 - v.distance AS score
+        FROM public.kb_vector_candidates(
+                query_vec, k, p_client_id, p_empresa, p_chunking, p_project_id
+            ) v
+        WHERE threshold IS NULL
+            OR 1 - v.distance >= threshold
+    ), text_results AS (
+        SELECT c.doc_path,
+            c.chunk_ix,
+            c.content,
+            c.meta,
+            similarity(c.content, query_text)::float AS score
+        FROM public.kb_chunks c
+        WHERE (
+                p_client_id IS NULL
+                OR c.client_id = p_client_id
+            )
+            AND (
+                p_empresa IS NULL
+                OR lower(c.empresa) = lower(p_empresa)
+            )
+            AND (
+                p_chunking IS NULL
+                OR c.meta->>'chunking' = p_chunking
+            )
+            AND (
+                p_project_id IS NULL
+                OR c.project_id = p_project_id
+            )
+            AND c.content % query_text
+        ORDER BY similarity(c.content, query_text) DESC
+        LIMIT k
+    ), best AS (
+        SELECT DISTINCT ON (u.doc_path, u.chunk_ix) u.doc_path,
+            u.chunk_ix,
+            u.content,
+            u.score,
+            u.meta
+        FROM (
+                SELECT vr.doc_path, vr.chunk_ix, vr.content, vr.meta, vr.score
+                FROM vector_results vr
+                UNION ALL
+                SELECT tr.doc_path, tr.chunk_ix, tr.content, tr.meta, tr.score
+                FROM text_results tr
+            ) u
+        ORDER BY u.doc_path,
+            u.chunk_ix,
+            u.score DESC
+    )
+SELECT best.doc_path,
+    best.chunk_ix,
+    best.content,
+    best.score,
+    best.meta
+FROM best
+ORDER BY best.score DESC
+LIMIT k;
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+-- 6. Versões TEXT (chamadores antigos) delegam para as versões vector
+CREATE OR REPLACE FUNCTION public.kb_vector_search(
+        query_vec TEXT,
+        k INTEGER,
+        threshold FLOAT DEFAULT NULL,
+        p_client_id UUID DEFAULT NULL,
+        p_empresa TEXT DEFAULT NULL,
+        p_chunking TEXT DEFAULT NULL,
+        p_project_id UUID DEFAULT NULL
+    ) RETURNS TABLE (
+        doc_path TEXT,
+        chunk_ix INTEGER,
+        content TEXT,
+        score FLOAT,
+        meta JSONB
+    ) AS $$ BEGIN RETURN QUERY
+SELECT * FROM public.kb_vector_search(
+        query_vec::vector, k, threshold, p_client_id, p_empresa, p_chunking, p_project_id
+    );
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+CREATE OR REPLACE FUNCTION public.kb_hybrid_search(
+        query_text TEXT,
+        query_vec TEXT,
+        k INTEGER,
+        threshold FLOAT DEFAULT NULL,
+        p_client_id UUID DEFAULT NULL,
+        p_empresa TEXT DEFAULT NULL,
+        p_chunking TEXT DEFAULT NULL,
+        p_project_id UUID DEFAULT NULL
+    ) RETURNS TABLE (
+        doc_path TEXT,
+        chunk_ix INTEGER,
+        content TEXT,
+        score FLOAT,
+        meta JSONB
+    ) AS $$ BEGIN RETURN QUERY
+SELECT * FROM public.kb_hybrid_search(
+        query_text, query_vec::vector, k, threshold, p_client_id, p_empresa, p_chunking, p_project_id
+    );
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+CREATE OR REPLACE FUNCTION public.kb_hybrid_union(
+        query_text TEXT,
+        query_vec TEXT,
+        k INTEGER,
+        threshold FLOAT DEFAULT NULL,
+        p_client_id UUID DEFAULT NULL,
+        p_empresa TEXT DEFAULT NULL,
+        p_chunking TEXT DEFAULT NULL,
+        p_project_id UUID DEFAULT NULL
+    ) RETURNS TABLE (
+        doc_path TEXT,
+        chunk_ix INTEGER,
+        content TEXT,
+        score FLOAT,
+        meta JSONB
+    ) AS $$ BEGIN RETURN QUERY
+SELECT * FROM public.kb_hybrid_union(
+        query_text, query_vec::vector, k, threshold, p_client_id, p_empresa, p_chunking, p_project_id
+    );
+END;
+$$ LANGUAGE plpgsql STABLE;
@@ -0,0 +1,270 @@
+-- =============================================================================
+-- 19_fts_text_leg.sql - Perna textual com full-text search (tsvector)
+-- A perna textual usava similarity(content, query) atrás do operador % (pg_trgm)
+-- sobre o chunk inteiro: lento em chunks de 800+ caracteres e ruim para
+-- ranquear perguntas em português. Agora:
+--   - content_tsv: tsvector gerado (config 'portuguese') com índice GIN
+--   - ranking com ts_rank_cd; termos da pergunta combinados com OR
+--   - p_text_mode: 'fts' (padrão), 'trgm' (comportamento antigo) ou
+--     'fts_trgm' (FTS; trigram como fallback difuso quando o FTS não acha nada)
+-- =============================================================================
+
+-- 1. Coluna gerada + índice GIN
+ALTER TABLE public.kb_chunks
+ADD COLUMN IF NOT EXISTS content_tsv tsvector
+GENERATED ALWAYS AS (to_tsvector('portuguese', coalesce(content, ''))) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_kb_chunks_content_tsv
+ON public.kb_chunks USING gin(content_tsv);
+
+-- Substituído por idx_kb_chunks_content_tsv (cobre todos os tenants)
+DROP INDEX IF EXISTS idx_kb_chunks_fts_project;
+
+-- 2. Candidatos da perna textual
+-- Normalização 32 (rank / (rank + 1)) deixa o score em [0, 1), comparável ao
+-- score vetorial no kb_hybrid_union.
+CREATE OR REPLACE FUNCTION public.kb_text_candidates(
+        query_text TEXT,
+        k INTEGER,
+        p_client_id UUID DEFAULT NULL,
+        p_empresa TEXT DEFAULT NULL,
+        p_chunking TEXT DEFAULT NULL,
+        p_project_id UUID DEFAULT NULL,
+        p_text_mode TEXT DEFAULT 'fts'
+    ) RETURNS TABLE (
+        doc_path TEXT,
+        chunk_ix INTEGER,
+        content TEXT,
+        meta JSONB,
+        score FLOAT
+    ) AS $$
+DECLARE
+    tsq tsquery;
+BEGIN
+    IF coalesce(p_text_mode, 'fts') <> 'trgm' THEN
+        -- plainto_tsquery junta os termos com AND; para perguntas, OR + ranking funciona melhor
+        tsq := nullif(replace(plainto_tsquery('portuguese', query_text)::text, '&', '|'), '')::tsquery;
+        IF tsq IS NOT NULL THEN
+            RETURN QUERY
+            SELECT c.doc_path,
+                c.chunk_ix,
+                c.content,
+                c.meta,
+                ts_rank_cd(c.content_tsv, tsq, 32)::float AS score
+            FROM public.kb_chunks c
+            WHERE c.content_tsv @@ tsq
+                AND (
+                    p_client_id IS NULL
+                    OR c.client_id = p_client_id
+                )
+                AND (
+                    p_empresa IS NULL
+                    OR lower(c.empresa) = lower(p_empresa)
+                )
+                AND (
+                    p_chunking IS NULL
+                    OR c.meta->>'chunking' = p_chunking
+                )
+                AND (
+                    p_project_id IS NULL
+                    OR c.project_id = p_project_id
+                )
+            ORDER BY ts_rank_cd(c.content_tsv, tsq, 32) DESC
+            LIMIT k;
+        END IF;
+        IF FOUND OR p_text_mode IS DISTINCT FROM 'fts_trgm' THEN
+            RETURN;
+        END IF;
+    END IF;
+
+    RETURN QUERY
+    SELECT c.doc_path,
+        c.chunk_ix,
+        c.content,
+        c.meta,
+        similarity(c.content, query_text)::float AS score
+    FROM public.kb_chunks c
+    WHERE c.content % query_text
+        AND (
+            p_client_id IS NULL
+            OR c.client_id = p_client_id
+        )
+        AND (
+            p_empresa IS NULL
+            OR lower(c.empresa) = lower(p_empresa)
+        )
+        AND (
+            p_chunking IS NULL
+            OR c.meta->>'chunking' = p_chunking
+        )
+        AND (
+            p_project_id IS NULL
+            OR c.project_id = p_project_id
+        )
+    ORDER BY similarity(c.content, query_text) DESC
+    LIMIT k;
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+-- 3. Busca textual (assinatura ganha p_text_mode)
+DROP FUNCTION IF EXISTS public.kb_text_search(TEXT, INTEGER, UUID, TEXT, TEXT, UUID);
+CREATE OR REPLACE FUNCTION public.kb_text_search(
+        query_text TEXT,
+        k INTEGER,
+        p_client_id UUID DEFAULT NULL,
+        p_empresa TEXT DEFAULT NULL,
+        p_chunking TEXT DEFAULT NULL,
+        p_project_id UUID DEFAULT NULL,
+        p_text_mode TEXT DEFAULT 'fts'
+    ) RETURNS TABLE (
+        doc_path TEXT,
+        chunk_ix INTEGER,
+        content TEXT,
+        score FLOAT,
+        meta JSONB
+    ) AS $$ BEGIN RETURN QUERY
+SELECT t.doc_path,
+    t.chunk_ix,
+    t.content,
+    t.score,
+    t.meta
+FROM public.kb_text_candidates(
+        query_text, k, p_client_id, p_empresa, p_chunking, p_project_id, p_text_mode
+    ) t;
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+-- 4. Busca Híbrida (RRF)
+DROP FUNCTION IF EXISTS public.kb_hybrid_search(TEXT, vector, INTEGER, FLOAT, UUID, TEXT, TEXT, UUID);
+CREATE OR REPLACE FUNCTION public.kb_hybrid_search(
+        query_text TEXT,
+        query_vec vector,
+        k INTEGER,
+        threshold FLOAT DEFAULT NULL,
+        p_client_id UUID DEFAULT NULL,
+        p_empresa TEXT DEFAULT NULL,
+        p_chunking TEXT DEFAULT NULL,
+        p_project_id UUID DEFAULT NULL,
+        p_text_mode TEXT DEFAULT 'fts'
+    ) RETURNS TABLE (
+        doc_path TEXT,
+        chunk_ix INTEGER,
+        content TEXT,
+        score FLOAT,
+        meta JSONB
+    ) AS $$ BEGIN RETURN QUERY WITH vector_results AS (
+        SELECT v.doc_path,
+            v.chunk_ix,
+            v.content,
+            v.meta,
+            ROW_NUMBER() OVER (
+                ORDER BY v.distance
+            ) AS vec_rank
+        FROM public.kb_vector_candidates(
+                query_vec, k * 2, p_client_id, p_empresa, p_chunking, p_project_id
+            ) v
+        WHERE threshold IS NULL
+            OR 1 - v.distance >= threshold
+    ), text_results AS (
+        SELECT t.doc_path,
+            t.chunk_ix,
+            t.content,
+            t.meta,
+            ROW_NUMBER() OVER (
+                ORDER BY t.score DESC
+            ) AS text_rank
+        FROM public.kb_text_candidates(
+                query_text, k * 2, p_client_id, p_empresa, p_chunking, p_project_id, p_text_mode
+            ) t
+    ), combined AS (
+        SELECT COALESCE(v.doc_path, t.doc_path) AS doc_path,
+            COALESCE(v.chunk_ix, t.chunk_ix) AS chunk_ix,
+            COALESCE(v.content, t.content) AS content,
+            COALESCE(v.meta, t.meta) AS meta,
+            COALESCE(
+                1.0::double precision / (60 + v.vec_rank),
+                0.0::double precision
+            ) + COALESCE(
+                1.0::double precision / (60 + t.text_rank),
+                0.0::double precision
+            ) AS rrf_score
+        FROM vector_results v
+            FULL OUTER JOIN text_results t ON v.doc_path = t.doc_path
+            AND v.chunk_ix = t.chunk_ix
+    )
+SELECT combined.doc_path,
+    combined.chunk_ix,
+    combined.content,
+    combined.rrf_score AS score,
+    combined.meta
+FROM combined
+ORDER BY combined.rrf_score DESC
+LIMIT k;
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+-- 5. Busca Híbrida (Union - Score Máximo)
+DROP FUNCTION IF EXISTS public.kb_hybrid_union(TEXT, vector, INTEGER, FLOAT, UUID, TEXT, TEXT, UUID);
+CREATE OR REPLACE FUNCTION public.kb_hybrid_union(
+        query_text TEXT,
+        query_vec vector,
+        k INTEGER,
+        threshold FLOAT DEFAULT NULL,
+        p_client_id UUID DEFAULT NULL,
+        p_empresa TEXT DEFAULT NULL,
+        p_chunking TEXT DEFAULT NULL,
+        p_project_id UUID DEFAULT NULL,
+        p_text_mode TEXT DEFAULT 'fts'
+    ) RETURNS TABLE (
+        doc_path TEXT,
+        chunk_ix INTEGER,
+        content TEXT,
+        score FLOAT,
+        meta JSONB
+    ) AS $$ BEGIN RETURN QUERY WITH vector_results AS (
+        SELECT v.doc_path,
+            v.chunk_ix,
+            v.content,
+            v.meta,
+            1 - v.distance AS score
+        FROM public.kb_vector_candidates(
+                query_vec, k, p_client_id, p_empresa, p_chunking, p_project_id
+            ) v
+        WHERE threshold IS NULL
+            OR 1 - v.distance >= threshold
+    ), text_results AS (
+        SELECT t.doc_path,
+            t.chunk_ix,
+            t.content,
+            t.meta,
+            t.score
+        FROM public.kb_text_candidates(
+                query_text, k, p_client_id, p_empresa, p_chunking, p_project_id, p_text_mode
+            ) t
+    ), best AS (
+        SELECT DISTINCT ON (u.doc_path, u.chunk_ix) u.doc_path,
+            u.chunk_ix,
+            u.content,
+            u.score,
+            u.meta
+        FROM (
+                SELECT vr.doc_path, vr.chunk_ix, vr.content, vr.meta, vr.score
+                FROM vector_results vr
+                UNION ALL
+                SELECT tr.doc_path, tr.chunk_ix, tr.content, tr.meta, tr.score
+                FROM text_results tr
+            ) u
+        ORDER BY u.doc_path,
+            u.chunk_ix,
+            u.score DESC
+    )
+SELECT best.doc_path,
+    best.chunk_ix,
+    best.content,
+    best.score,
+    best.meta
+FROM best
+ORDER BY best.score DESC
+LIMIT k;
+END;
+$$ LANGUAGE plpgsql STABLE;
@@ -0,0 +1,483 @@
+-- =============================================================================
+-- 20_kb_chunks_tenant_partitions.sql - kb_chunks particionada por tenant
+-- Todos os tenants (empresa, client_id, project_id) dividiam uma única tabela:
+-- quanto mais seletivo o filtro, pior o HNSW (descarta vizinhos de outros
+-- tenants e devolve menos de k linhas), e lower(c.empresa) = lower(p_empresa)
+-- não usava idx_kb_chunks_empresa.
+--
+-- Agora kb_chunks é PARTITION BY LIST (tenant_key):
+--   - tenant_key = kb_tenant_key(project_id, client_id, empresa), nesta ordem:
+--       'project:<uuid>' | 'empresa:<lower(empresa)>' | 'client:<uuid>' | 'shared'
+--     Gravado pela ingestão (core/rag/ingestion.py); um CHECK garante a coerência.
+--   - Tenants pequenos ficam em kb_chunks_default e são buscados por kNN exato
+--     (btree de kb_chunks_unique começa por tenant_key): recall total e rápido.
+--   - Tenants grandes ganham partição própria (kb_promote_tenant), com os
+--     índices HNSW por dimensão herdados do pai; promovidos pelo job diário
+--     de manutenção (ver 24_kb_promote_tenant_attach.sql).
+--   - Buscas com project_id ou empresa são podadas para uma partição
+--     (kb_search_tenant_key). Só client_id não identifica o tenant (chunks
+--     com empresa também têm client_id): nesse caso todas as partições.
+--     Chunks com project_id e empresa ficam em 'project:<uuid>'; a busca só
+--     por empresa não poda quando eles existem (26_kb_search_tenant_key_project_rows.sql).
+--
+-- A unicidade passa a ser (tenant_key, doc_path, chunk_ix): o mesmo doc_path
+-- gravado em dois tenants são dois conjuntos de chunks.
+-- Requer PostgreSQL 13+.
+-- =============================================================================
+
+-- 1. Chave de tenant
+CREATE OR REPLACE FUNCTION public.kb_tenant_key(
+        p_project_id UUID,
+        p_client_id UUID,
+        p_empresa TEXT
+    ) RETURNS TEXT AS $$
+SELECT CASE
+        WHEN p_project_id IS NOT NULL THEN 'project:' || p_project_id::text
+        WHEN p_empresa IS NOT NULL THEN 'empresa:' || lower(p_empresa)
+        WHEN p_client_id IS NOT NULL THEN 'client:' || p_client_id::text
+        ELSE 'shared'
+    END;
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Tenant de uma busca, quando os filtros o determinam (NULL = sem poda)
+CREATE OR REPLACE FUNCTION public.kb_search_tenant_key(
+        p_client_id UUID,
+        p_empresa TEXT,
+        p_project_id UUID
+    ) RETURNS TEXT AS $$
+SELECT CASE
+        WHEN p_project_id IS NOT NULL THEN public.kb_tenant_key(p_project_id, NULL, NULL)
+        WHEN p_empresa IS NOT NULL THEN public.kb_tenant_key(NULL, NULL, p_empresa)
+    END;
+$$ LANGUAGE sql IMMUTABLE;
+
+-- 2. Conversão da tabela (uma vez; reexecutar o arquivo não faz nada)
+DO $$ BEGIN
+    IF (SELECT c.relkind FROM pg_class c WHERE c.oid = 'public.kb_chunks'::regclass) = 'p' THEN
+        RETURN;
+    END IF;
+
+    ALTER TABLE public.kb_chunks RENAME TO kb_chunks_unpartitioned;
+    ALTER SEQUENCE public.kb_chunks_id_seq OWNED BY NONE;
+
+    CREATE TABLE public.kb_chunks (
+        id INTEGER NOT NULL DEFAULT nextval('public.kb_chunks_id_seq'),
+        tenant_key TEXT NOT NULL,
+        doc_path TEXT NOT NULL,
+        chunk_ix INTEGER NOT NULL,
+        content TEXT,
+        embedding vector,
+        meta JSONB DEFAULT '{}',
+        client_id UUID,
+        empresa TEXT,
+        created_at TIMESTAMP WITH TIME ZONE DEFAULT now(),
+        updated_at TIMESTAMP WITH TIME ZONE DEFAULT now(),
+        project_id UUID REFERENCES public.planning_projects(id) ON DELETE CASCADE,
+        dc_project_id UUID REFERENCES public.projects(id) ON DELETE CASCADE,
+        domain_id UUID REFERENCES public.knowledge_domains(id),
+        content_tsv tsvector GENERATED ALWAYS AS (to_tsvector('portuguese', coalesce(content, ''))) STORED,
+        CONSTRAINT kb_chunks_tenant_key_check CHECK (
+            tenant_key = public.kb_tenant_key(project_id, client_id, empresa)
+        )
+    ) PARTITION BY LIST (tenant_key);
+
+    CREATE TABLE public.kb_chunks_default PARTITION OF public.kb_chunks DEFAULT;
+
+    INSERT INTO public.kb_chunks (
+        id, tenant_key, doc_path, chunk_ix, content, embedding, meta, client_id, empresa,
+        created_at, updated_at, project_id, dc_project_id, domain_id
+    )
+    SELECT id, public.kb_tenant_key(project_id, client_id, empresa), doc_path, chunk_ix, content,
+        embedding, meta, client_id, empresa, created_at, updated_at, project_id, dc_project_id, domain_id
+    FROM public.kb_chunks_unpartitioned;
+
+    DROP TABLE public.kb_chunks_unpartitioned;
+    ALTER SEQUENCE public.kb_chunks_id_seq OWNED BY public.kb_chunks.id;
+
+    -- Índices depois da carga (construção em lote); valem para as partições futuras
+    ALTER TABLE public.kb_chunks ADD CONSTRAINT kb_chunks_pkey PRIMARY KEY (id, tenant_key);
+    ALTER TABLE public.kb_chunks ADD CONSTRAINT kb_chunks_unique UNIQUE (tenant_key, doc_path, chunk_ix);
+    CREATE INDEX idx_kb_chunks_empresa_lower ON public.kb_chunks (lower(empresa));
+    CREATE INDEX idx_kb_chunks_client_id ON public.kb_chunks (client_id);
+    CREATE INDEX idx_kb_chunks_doc_path ON public.kb_chunks (doc_path);
+    CREATE INDEX idx_kb_chunks_project_id ON public.kb_chunks (project_id);
+    CREATE INDEX idx_kb_chunks_dc_project ON public.kb_chunks (dc_project_id);
+    CREATE INDEX idx_kb_chunks_domain ON public.kb_chunks (domain_id);
+    CREATE INDEX idx_kb_chunks_content_trgm ON public.kb_chunks USING gin (content gin_trgm_ops);
+    CREATE INDEX idx_kb_chunks_content_tsv ON public.kb_chunks USING gin (content_tsv);
+    CREATE INDEX idx_kb_openai ON public.kb_chunks USING hnsw ((embedding::vector(1536)) vector_cosine_ops)
+    WHERE (vector_dims(embedding) = 1536);
+    CREATE INDEX idx_kb_bgem3 ON public.kb_chunks USING hnsw ((embedding::vector(1024)) vector_cosine_ops)
+    WHERE (vector_dims(embedding) = 1024);
+END $$;
+
+-- 3. Partições próprias para tenants grandes
+CREATE TABLE IF NOT EXISTS public.kb_tenant_partitions (
+    tenant_key TEXT PRIMARY KEY,
+    partition_name TEXT NOT NULL UNIQUE,
+    promoted_at TIMESTAMP WITH TIME ZONE DEFAULT now()
+);
+
+-- Move os chunks do tenant de kb_chunks_default para kb_chunks_t_<hash>.
+-- A partição nova só pode ser criada depois que a default não tiver mais
+-- linhas do tenant; a escrita na default fica bloqueada até o commit.
+CREATE OR REPLACE FUNCTION public.kb_promote_tenant(p_tenant_key TEXT) RETURNS TEXT AS $$
+DECLARE
+    v_part TEXT;
+BEGIN
+    SELECT tp.partition_name INTO v_part
+    FROM public.kb_tenant_partitions tp
+    WHERE tp.tenant_key = p_tenant_key;
+    IF v_part IS NOT NULL THEN
+        RETURN v_part;
+    END IF;
+    v_part := 'kb_chunks_t_' || substr(md5(p_tenant_key), 1, 16);
+
+    LOCK TABLE public.kb_chunks_default IN SHARE ROW EXCLUSIVE MODE;
+    CREATE TEMP TABLE _kb_promote ON COMMIT DROP AS
+    SELECT c.id, c.tenant_key, c.doc_path, c.chunk_ix, c.content, c.embedding, c.meta, c.client_id,
+        c.empresa, c.created_at, c.updated_at, c.project_id, c.dc_project_id, c.domain_id
+    FROM public.kb_chunks_default c
+    WHERE c.tenant_key = p_tenant_key;
+    DELETE FROM public.kb_chunks_default c WHERE c.tenant_key = p_tenant_key;
+
+    EXECUTE format(
+        'CREATE TABLE public.%I PARTITION OF public.kb_chunks FOR VALUES IN (%L)',
+        v_part, p_tenant_key
+    );
+    INSERT INTO public.kb_chunks (
+        id, tenant_key, doc_path, chunk_ix, content, embedding, meta, client_id, empresa,
+        created_at, updated_at, project_id, dc_project_id, domain_id
+    )
+    SELECT * FROM _kb_promote;
+    DROP TABLE _kb_promote;
+
+    INSERT INTO public.kb_tenant_partitions (tenant_key, partition_name)
+    VALUES (p_tenant_key, v_part);
+    RETURN v_part;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Promove todos os tenants da default com pelo menos p_min_rows chunks
+CREATE OR REPLACE FUNCTION public.kb_rebalance_tenants(p_min_rows INTEGER DEFAULT 20000)
+RETURNS TABLE (promoted_tenant TEXT, partition_name TEXT, row_count BIGINT) AS $$
+DECLARE
+    r RECORD;
+BEGIN
+    FOR r IN
+        SELECT c.tenant_key AS key, count(*) AS n
+        FROM public.kb_chunks_default c
+        GROUP BY c.tenant_key
+        HAVING count(*) >= p_min_rows
+    LOOP
+        promoted_tenant := r.key;
+        row_count := r.n;
+        partition_name := public.kb_promote_tenant(r.key);
+        RETURN NEXT;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+-- 4. Perna vetorial podada por tenant
+-- Tenant com partição própria: HNSW só na partição (todas as linhas são do
+-- tenant, o filtro não esvazia o top-k). A igualdade em tenant_key poda a
+-- partição também em planos genéricos (poda em tempo de execução).
+CREATE OR REPLACE FUNCTION public.kb_tenant_vector_candidates_1536(
+        query_vec vector,
+        k INTEGER,
+        p_tenant_key TEXT,
+        p_client_id UUID DEFAULT NULL,
+        p_empresa TEXT DEFAULT NULL,
+        p_chunking TEXT DEFAULT NULL,
+        p_project_id UUID DEFAULT NULL
+    ) RETURNS TABLE (
+        doc_path TEXT,
+        chunk_ix INTEGER,
+        content TEXT,
+        meta JSONB,
+        distance FLOAT
+    ) AS $$
+SELECT c.doc_path,
+    c.chunk_ix,
+    c.content,
+    c.meta,
+    (c.embedding::vector(1536) <=> query_vec::vector(1536))::float AS distance
+FROM public.kb_chunks c
+WHERE c.tenant_key = p_tenant_key
+    AND vector_dims(c.embedding) = 1536
+    AND (
+        p_client_id IS NULL
+        OR c.client_id = p_client_id
+    )
+    AND (
+        p_empresa IS NULL
+        OR lower(c.empresa) = lower(p_empresa)
+    )
+    AND (
+        p_chunking IS NULL
+        OR c.meta->>'chunking' = p_chunking
+    )
+    AND (
+        p_project_id IS NULL
+        OR c.project_id = p_project_id
+    )
+ORDER BY c.embedding::vector(1536) <=> query_vec::vector(1536)
+LIMIT k;
+$$ LANGUAGE sql STABLE;
+
+CREATE OR REPLACE FUNCTION public.kb_tenant_vector_candidates_1024(
+        query_vec vector,
+        k INTEGER,
+        p_tenant_key TEXT,
+        p_client_id UUID DEFAULT NULL,
+        p_empresa TEXT DEFAULT NULL,
+        p_chunking TEXT DEFAULT NULL,
+        p_project_id UUID DEFAULT NULL
+    ) RETURNS TABLE (
+        doc_path TEXT,
+        chunk_ix INTEGER,
+        content TEXT,
+        meta JSONB,
+        distance FLOAT
+    ) AS $$
+SELECT c.doc_path,
+    c.chunk_ix,
+    c.content,
+    c.meta,
+    (c.embedding::vector(1024) <=> query_vec::vector(1024))::float AS distance
+FROM public.kb_chunks c
+WHERE c.tenant_key = p_tenant_key
+    AND vector_dims(c.embedding) = 1024
+    AND (
+        p_client_id IS NULL
+        OR c.client_id = p_client_id
+    )
+    AND (
+        p_empresa IS NULL
+        OR lower(c.empresa) = lower(p_empresa)
+    )
+    AND (
+        p_chunking IS NULL
+        OR c.meta->>'chunking' = p_chunking
+    )
+    AND (
+        p_project_id IS NULL
+        OR c.project_id = p_project_id
+    )
+ORDER BY c.embedding::vector(1024) <=> query_vec::vector(1024)
+LIMIT k;
+$$ LANGUAGE sql STABLE;
+
+-- Tenant na default: kNN exato (sem o cast dos índices HNSW, lê só as linhas
+-- do tenant pela btree de tenant_key)
+CREATE OR REPLACE FUNCTION public.kb_tenant_vector_exact(
+        query_vec vector,
+        k INTEGER,
+        p_tenant_key TEXT,
+        p_client_id UUID DEFAULT NULL,
+        p_empresa TEXT DEFAULT NULL,
+        p_chunking TEXT DEFAULT NULL,
+        p_project_id UUID DEFAULT NULL
+    ) RETURNS TABLE (
+        doc_path TEXT,
+        chunk_ix INTEGER,
+        content TEXT,
+        meta JSONB,
+        distance FLOAT
+    ) AS $$
+SELECT c.doc_path,
+    c.chunk_ix,
+    c.content,
+    c.meta,
+    (c.embedding <=> query_vec)::float AS distance
+FROM public.kb_chunks c
+WHERE c.tenant_key = p_tenant_key
+    AND vector_dims(c.embedding) = vector_dims(query_vec)
+    AND (
+        p_client_id IS NULL
+        OR c.client_id = p_client_id
+    )
+    AND (
+        p_empresa IS NULL
+        OR lower(c.empresa) = lower(p_empresa)
+    )
+    AND (
+        p_chunking IS NULL
+        OR c.meta->>'chunking' = p_chunking
+    )
+    AND (
+        p_project_id IS NULL
+        OR c.project_id = p_project_id
+    )
+ORDER BY c.embedding <=> query_vec
+LIMIT k;
+$$ LANGUAGE sql STABLE;
+
+-- Despacho: tenant conhecido -> uma partição; senão, como em 18 (todas)
+CREATE OR REPLACE FUNCTION public.kb_vector_candidates(
+        query_vec vector,
+        k INTEGER,
+        p_client_id UUID DEFAULT NULL,
+        p_empresa TEXT DEFAULT NULL,
+        p_chunking TEXT DEFAULT NULL,
+        p_project_id UUID DEFAULT NULL
+    ) RETURNS TABLE (
+        doc_path TEXT,
+        chunk_ix INTEGER,
+        content TEXT,
+        meta JSONB,
+        distance FLOAT
+    ) AS $$
+DECLARE
+    v_tenant TEXT := public.kb_search_tenant_key(p_client_id, p_empresa, p_project_id);
+BEGIN
+    IF v_tenant IS NOT NULL THEN
+        IF vector_dims(query_vec) IN (1536, 1024) AND EXISTS (
+            SELECT 1 FROM public.kb_tenant_partitions tp WHERE tp.tenant_key = v_tenant
+        ) THEN
+            IF vector_dims(query_vec) = 1536 THEN
+                RETURN QUERY SELECT * FROM public.kb_tenant_vector_candidates_1536(
+                    query_vec, k, v_tenant, p_client_id, p_empresa, p_chunking, p_project_id);
+            ELSE
+                RETURN QUERY SELECT * FROM public.kb_tenant_vector_candidates_1024(
+                    query_vec, k, v_tenant, p_client_id, p_empresa, p_chunking, p_project_id);
+            END IF;
+        ELSE
+            RETURN QUERY SELECT * FROM public.kb_tenant_vector_exact(
+                query_vec, k, v_tenant, p_client_id, p_empresa, p_chunking, p_project_id);
+        END IF;
+        RETURN;
+    END IF;
+
+    IF vector_dims(query_vec) = 1536 THEN
+        RETURN QUERY SELECT * FROM public.kb_vector_candidates_1536(
+            query_vec, k, p_client_id, p_empresa, p_chunking, p_project_id);
+    ELSIF vector_dims(query_vec) = 1024 THEN
+        RETURN QUERY SELECT * FROM public.kb_vector_candidates_1024(
+            query_vec, k, p_client_id, p_empresa, p_chunking, p_project_id);
+    ELSE
+        RETURN QUERY
+        SELECT c.doc_path,
+            c.chunk_ix,
+            c.content,
+            c.meta,
+            (c.embedding <=> query_vec)::float AS distance
+        FROM public.kb_chunks c
+        WHERE vector_dims(c.embedding) = vector_dims(query_vec)
+            AND (
+                p_client_id IS NULL
+                OR c.client_id = p_client_id
+            )
+            AND (
+                p_empresa IS NULL
+                OR lower(c.empresa) = lower(p_empresa)
+            )
+            AND (
+                p_chunking IS NULL
+                OR c.meta->>'chunking' = p_chunking
+            )
+            AND (
+                p_project_id IS NULL
+                OR c.project_id = p_project_id
+            )
+        ORDER BY c.embedding <=> query_vec
+        LIMIT k;
+    END IF;
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+-- 5. Perna textual podada por tenant
+-- v_tenant entra como parâmetro: nos planos custom do PL/pgSQL (o caso normal,
+-- já que o plano podado é mais barato) "v_tenant IS NULL OR ..." vira a
+-- igualdade e a poda acontece no planejamento.
+CREATE OR REPLACE FUNCTION public.kb_text_candidates(
+        query_text TEXT,
+        k INTEGER,
+        p_client_id UUID DEFAULT NULL,
+        p_empresa TEXT DEFAULT NULL,
+        p_chunking TEXT DEFAULT NULL,
+        p_project_id UUID DEFAULT NULL,
+        p_text_mode TEXT DEFAULT 'fts'
+    ) RETURNS TABLE (
+        doc_path TEXT,
+        chunk_ix INTEGER,
+        content TEXT,
+        meta JSONB,
+        score FLOAT
+    ) AS $$
+DECLARE
+    tsq tsquery;
+    v_tenant TEXT := public.kb_search_tenant_key(p_client_id, p_empresa, p_project_id);
+BEGIN
+    IF coalesce(p_text_mode, 'fts') <> 'trgm' THEN
+        -- plainto_tsquery junta os termos com AND; para perguntas, OR + ranking funciona melhor
+        tsq := nullif(replace(plainto_tsquery('portuguese', query_text)::text, '&', '|'), '')::tsquery;
+        IF tsq IS NOT NULL THEN
+            RETURN QUERY
+            SELECT c.doc_path,
+                c.chunk_ix,
+                c.content,
+                c.meta,
+                ts_rank_cd(c.content_tsv, tsq, 32)::float AS score
+            FROM public.kb_chunks c
+            WHERE c.content_tsv @@ tsq
+                AND (
+                    v_tenant IS NULL
+                    OR c.tenant_key = v_tenant
+                )
+                AND (
+                    p_client_id IS NULL
+                    OR c.client_id = p_client_id
+                )
+                AND (
+                    p_empresa IS NULL
+                    OR lower(c.empresa) = lower(p_empresa)
+                )
+                AND (
+                    p_chunking IS NULL
+                    OR c.meta->>'chunking' = p_chunking
+                )
+                AND (
+                    p_project_id IS NULL
+                    OR c.project_id = p_project_id
+                )
+            ORDER BY ts_rank_cd(c.content_tsv, tsq, 32) DESC
+            LIMIT k;
+        END IF;
+        IF FOUND OR p_text_mode IS DISTINCT FROM 'fts_trgm' THEN
+            RETURN;
+        END IF;
+    END IF;
+
+    RETURN QUERY
+    SELECT c.doc_path,
+        c.chunk_ix,
+        c.content,
+        c.meta,
+        similarity(c.content, query_text)::float AS score
+    FROM public.kb_chunks c
+    WHERE c.content % query_text
+        AND (
+            v_tenant IS NULL
+            OR c.tenant_key = v_tenant
+        )
+        AND (
+            p_client_id IS NULL
+            OR c.client_id = p_client_id
+        )
+        AND (
+            p_empresa IS NULL
+            OR lower(c.empresa) = lower(p_empresa)
+        )
+        AND (
+            p_chunking IS NULL
+            OR c.meta->>'chunking' = p_chunking
+        )
+        AND (
+            p_project_id IS NULL
+            OR c.project_id = p_project_id
+        )
+    ORDER BY similarity(c.content, query_text) DESC
+    LIMIT k;
+END;
+$$ LANGUAGE plpgsql STABLE;
@@ -0,0 +1,361 @@
+-- =============================================================================
+-- 21_quantized_vector_search.sql - Busca compacta opcional (halfvec / binário) + rescore
+-- Um embedding OpenAI (1536 dims float32) ocupa ~6 KB e o índice HNSW repete
+-- esse tamanho. Em vez de uma coluna nova, os índices compactos são de
+-- expressão sobre kb_chunks.embedding (a coluna float32 continua a fonte do
+-- rescore, lida só para os candidatos):
+--   halfvec: embedding::halfvec(N)           ~2x menor, recall quase igual
+--   binário: binary_quantize(embedding)::bit(N)  ~32x menor, exige rescore
+-- A busca faz uma passada grossa no índice compacto (k * rescore_factor
+-- candidatos) e reordena pela distância float32 exata.
+--
+-- Escolha por modelo em EmbeddingFactory (storage / rescore_factor); a busca
+-- informa a escolha na própria transação:
+--   set_config('kb.vector_storage', 'vector' | 'halfvec' | 'binary', true)
+--   set_config('kb.rescore_factor', '<n>', true)
+-- Sem essas configurações nada muda (índices float32 de 07/18).
+--
+-- Este arquivo só cria as funções: o padrão continua sendo só o índice
+-- float32. Os índices compactos são opcionais e aplicados à parte, apenas
+-- para o armazenamento que algum modelo escolher:
+--   sql/kb/optional/halfvec_indexes.sql  (idx_kb_openai_halfvec / idx_kb_bgem3_halfvec)
+--   sql/kb/optional/binary_indexes.sql   (idx_kb_openai_bq / idx_kb_bgem3_bq)
+-- Sem o índice a busca compacta ainda funciona, mas por varredura.
+-- Requer pgvector 0.7+ (halfvec, binary_quantize).
+-- =============================================================================
+
+-- 1. Passada grossa + rescore float32
+-- p_tenant_key NULL = todas as partições; com valor, os planos custom do
+-- PL/pgSQL que chamam estas funções podam para a partição do tenant.
+CREATE OR REPLACE FUNCTION public.kb_vector_candidates_halfvec_1536(
+        query_vec vector,
+        k INTEGER,
+        p_candidates INTEGER,
+        p_tenant_key TEXT DEFAULT NULL,
+        p_client_id UUID DEFAULT NULL,
+        p_empresa TEXT DEFAULT NULL,
+        p_chunking TEXT DEFAULT NULL,
+        p_project_id UUID DEFAULT NULL
+    ) RETURNS TABLE (
+        doc_path TEXT,
+        chunk_ix INTEGER,
+        content TEXT,
+        meta JSONB,
+        distance FLOAT
+    ) AS $$
+SELECT g.doc_path,
+    g.chunk_ix,
+    g.content,
+    g.meta,
+    (g.embedding <=> query_vec)::float AS distance
+FROM (
+        SELECT c.doc_path,
+            c.chunk_ix,
+            c.content,
+            c.meta,
+            c.embedding
+        FROM public.kb_chunks c
+        WHERE vector_dims(c.embedding) = 1536
+            AND (
+                p_tenant_key IS NULL
+                OR c.tenant_key = p_tenant_key
+            )
+            AND (
+                p_client_id IS NULL
+                OR c.client_id = p_client_id
+            )
+            AND (
+                p_empresa IS NULL
+                OR lower(c.empresa) = lower(p_empresa)
+            )
+            AND (
+                p_chunking IS NULL
+                OR c.meta->>'chunking' = p_chunking
+            )
+            AND (
+                p_project_id IS NULL
+                OR c.project_id = p_project_id
+            )
+        ORDER BY c.embedding::halfvec(1536) <=> query_vec::halfvec(1536)
+        LIMIT greatest(k, p_candidates)
+    ) g
+ORDER BY g.embedding <=> query_vec
+LIMIT k;
+$$ LANGUAGE sql STABLE;
+
+CREATE OR REPLACE FUNCTION public.kb_vector_candidates_halfvec_1024(
+        query_vec vector,
+        k INTEGER,
+        p_candidates INTEGER,
+        p_tenant_key TEXT DEFAULT NULL,
+        p_client_id UUID DEFAULT NULL,
+        p_empresa TEXT DEFAULT NULL,
+        p_chunking TEXT DEFAULT NULL,
+        p_project_id UUID DEFAULT NULL
+    ) RETURNS TABLE (
+        doc_path TEXT,
+        chunk_ix INTEGER,
+        content TEXT,
+        meta JSONB,
+        distance FLOAT
+    ) AS $$
+SELECT g.doc_path,
+    g.chunk_ix,
+    g.content,
+    g.meta,
+    (g.embedding <=> query_vec)::float AS distance
+FROM (
+        SELECT c.doc_path,
+            c.chunk_ix,
+            c.content,
+            c.meta,
+            c.embedding
+        FROM public.kb_chunks c
+        WHERE vector_dims(c.embedding) = 1024
+            AND (
+                p_tenant_key IS NULL
+                OR c.tenant_key = p_tenant_key
+            )
+            AND (
+                p_client_id IS NULL
+                OR c.client_id = p_client_id
+            )
+            AND (
+                p_empresa IS NULL
+                OR lower(c.empresa) = lower(p_empresa)
+            )
+            AND (
+                p_chunking IS NULL
+                OR c.meta->>'chunking' = p_chunking
+            )
+            AND (
+                p_project_id IS NULL
+                OR c.project_id = p_project_id
+            )
+        ORDER BY c.embedding::halfvec(1024) <=> query_vec::halfvec(1024)
+        LIMIT greatest(k, p_candidates)
+    ) g
+ORDER BY g.embedding <=> query_vec
+LIMIT k;
+$$ LANGUAGE sql STABLE;
+
+CREATE OR REPLACE FUNCTION public.kb_vector_candidates_bq_1536(
+        query_vec vector,
+        k INTEGER,
+        p_candidates INTEGER,
+        p_tenant_key TEXT DEFAULT NULL,
+        p_client_id UUID DEFAULT NULL,
+        p_empresa TEXT DEFAULT NULL,
+        p_chunking TEXT DEFAULT NULL,
+        p_project_id UUID DEFAULT NULL
+    ) RETURNS TABLE (
+        doc_path TEXT,
+        chunk_ix INTEGER,
+        content TEXT,
+        meta JSONB,
+        distance FLOAT
+    ) AS $$
+SELECT g.doc_path,
+    g.chunk_ix,
+    g.content,
+    g.meta,
+    (g.embedding <=> query_vec)::float AS distance
+FROM (
+        SELECT c.doc_path,
+            c.chunk_ix,
+            c.content,
+            c.meta,
+            c.embedding
+        FROM public.kb_chunks c
+        WHERE vector_dims(c.embedding) = 1536
+            AND (
+                p_tenant_key IS NULL
+                OR c.tenant_key = p_tenant_key
+            )
+            AND (
+                p_client_id IS NULL
+                OR c.client_id = p_client_id
+            )
+            AND (
+                p_empresa IS NULL
+                OR lower(c.empresa) = lower(p_empresa)
+            )
+            AND (
+                p_chunking IS NULL
+                OR c.meta->>'chunking' = p_chunking
+            )
+            AND (
+                p_project_id IS NULL
+                OR c.project_id = p_project_id
+            )
+        ORDER BY binary_quantize(c.embedding)::bit(1536) <~> binary_quantize(query_vec)::bit(1536)
+        LIMIT greatest(k, p_candidates)
+    ) g
+ORDER BY g.embedding <=> query_vec
+LIMIT k;
+$$ LANGUAGE sql STABLE;
+
+CREATE OR REPLACE FUNCTION public.kb_vector_candidates_bq_1024(
+        query_vec vector,
+        k INTEGER,
+        p_candidates INTEGER,
+        p_tenant_key TEXT DEFAULT NULL,
+        p_client_id UUID DEFAULT NULL,
+        p_empresa TEXT DEFAULT NULL,
+        p_chunking TEXT DEFAULT NULL,
+        p_project_id UUID DEFAULT NULL
+    ) RETURNS TABLE (
+        doc_path TEXT,
+        chunk_ix INTEGER,
+        content TEXT,
+        meta JSONB,
+        distance FLOAT
+    ) AS $$
+SELECT g.doc_path,
+    g.chunk_ix,
+    g.content,
+    g.meta,
+    (g.embedding <=> query_vec)::float AS distance
+FROM (
+        SELECT c.doc_path,
+            c.chunk_ix,
+            c.content,
+            c.meta,
+            c.embedding
+        FROM public.kb_chunks c
+        WHERE vector_dims(c.embedding) = 1024
+            AND (
+                p_tenant_key IS NULL
+                OR c.tenant_key = p_tenant_key
+            )
+            AND (
+                p_client_id IS NULL
+                OR c.client_id = p_client_id
+            )
+            AND (
+                p_empresa IS NULL
+                OR lower(c.empresa) = lower(p_empresa)
+            )
+            AND (
+                p_chunking IS NULL
+                OR c.meta->>'chunking' = p_chunking
+            )
+            AND (
+                p_project_id IS NULL
+                OR c.project_id = p_project_id
+            )
+        ORDER BY binary_quantize(c.embedding)::bit(1024) <~> binary_quantize(query_vec)::bit(1024)
+        LIMIT greatest(k, p_candidates)
+    ) g
+ORDER BY g.embedding <=> query_vec
+LIMIT k;
+$$ LANGUAGE sql STABLE;
+
+-- 2. Despacho (20) + armazenamento escolhido na transação
+-- Tenants na default continuam no kNN exato (já é rápido e tem recall total).
+CREATE OR REPLACE FUNCTION public.kb_vector_candidates(
+        query_vec vector,
+        k INTEGER,
+        p_client_id UUID DEFAULT NULL,
+        p_empresa TEXT DEFAULT NULL,
+        p_chunking TEXT DEFAULT NULL,
+        p_project_id UUID DEFAULT NULL
+    ) RETURNS TABLE (
+        doc_path TEXT,
+        chunk_ix INTEGER,
+        content TEXT,
+        meta JSONB,
+        distance FLOAT
+    ) AS $$
+DECLARE
+    v_tenant TEXT := public.kb_search_tenant_key(p_client_id, p_empresa, p_project_id);
+    v_dims INTEGER := vector_dims(query_vec);
+    v_storage TEXT := coalesce(nullif(current_setting('kb.vector_storage', true), ''), 'vector');
+    v_candidates INTEGER := k * coalesce(nullif(current_setting('kb.rescore_factor', true), '')::integer, 4);
+BEGIN
+    IF v_tenant IS NOT NULL AND NOT EXISTS (
+        SELECT 1 FROM public.kb_tenant_partitions tp WHERE tp.tenant_key = v_tenant
+    ) THEN
+        RETURN QUERY SELECT * FROM public.kb_tenant_vector_exact(
+            query_vec, k, v_tenant, p_client_id, p_empresa, p_chunking, p_project_id);
+        RETURN;
+    END IF;
+
+    IF v_storage = 'halfvec' AND v_dims = 1536 THEN
+        RETURN QUERY SELECT * FROM public.kb_vector_candidates_halfvec_1536(
+            query_vec, k, v_candidates, v_tenant, p_client_id, p_empresa, p_chunking, p_project_id);
+    ELSIF v_storage = 'halfvec' AND v_dims = 1024 THEN
+        RETURN QUERY SELECT * FROM public.kb_vector_candidates_halfvec_1024(
+            query_vec, k, v_candidates, v_tenant, p_client_id, p_empresa, p_chunking, p_project_id);
+    ELSIF v_storage = 'binary' AND v_dims = 1536 THEN
+        RETURN QUERY SELECT * FROM public.kb_vector_candidates_bq_1536(
+            query_vec, k, v_candidates, v_tenant, p_client_id, p_empresa, p_chunking, p_project_id);
+    ELSIF v_storage = 'binary' AND v_dims = 1024 THEN
+        RETURN QUERY SELECT * FROM public.kb_vector_candidates_bq_1024(
+            query_vec, k, v_candidates, v_tenant, p_client_id, p_empresa, p_chunking, p_project_id);
+    ELSIF v_tenant IS NOT NULL AND v_dims = 1536 THEN
+        RETURN QUERY SELECT * FROM public.kb_tenant_vector_candidates_1536(
+            query_vec, k, v_tenant, p_client_id, p_empresa, p_chunking, p_project_id);
+    ELSIF v_tenant IS NOT NULL AND v_dims = 1024 THEN
+        RETURN QUERY SELECT * FROM public.kb_tenant_vector_candidates_1024(
+            query_vec, k, v_tenant, p_client_id, p_empresa, p_chunking, p_project_id);
+    ELSIF v_dims = 1536 THEN
+        RETURN QUERY SELECT * FROM public.kb_vector_candidates_1536(
+            query_vec, k, p_client_id, p_empresa, p_chunking, p_project_id);
+    ELSIF v_dims = 1024 THEN
+        RETURN QUERY SELECT * FROM public.kb_vector_candidates_1024(
+            query_vec, k, p_client_id, p_empresa, p_chunking, p_project_id);
+    ELSE
+        RETURN QUERY
+        SELECT c.doc_path,
+            c.chunk_ix,
+            c.content,
+            c.meta,
+            (c.embedding <=> query_vec)::float AS distance
+        FROM public.kb_chunks c
+        WHERE vector_dims(c.embedding) = v_dims
+            AND (
+                v_tenant IS NULL
+                OR c.tenant_key = v_tenant
+            )
+            AND (
+                p_client_id IS NULL
+                OR c.client_id = p_client_id
+            )
+            AND (
+                p_empresa IS NULL
+                OR lower(c.empresa) = lower(p_empresa)
+            )
+            AND (
+                p_chunking IS NULL
+                OR c.meta->>'chunking' = p_chunking
+            )
+            AND (
+                p_project_id IS NULL
+                OR c.project_id = p_project_id
+            )
+        ORDER BY c.embedding <=> query_vec
+        LIMIT k;
+    END IF;
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+-- 3. Tamanho dos índices da perna vetorial (soma das partições)
+CREATE OR REPLACE FUNCTION public.kb_vector_index_sizes()
+RETURNS TABLE (index_name TEXT, storage TEXT, size_bytes BIGINT) AS $$
+SELECT i.name,
+    CASE
+        WHEN i.name LIKE '%\_halfvec' THEN 'halfvec'
+        WHEN i.name LIKE '%\_bq' THEN 'binary'
+        ELSE 'vector'
+    END,
+    (
+        SELECT coalesce(sum(pg_relation_size(t.relid)), 0)::bigint
+        FROM pg_partition_tree(to_regclass('public.' || i.name)) t
+    )
+FROM unnest(ARRAY[
+        'idx_kb_openai', 'idx_kb_openai_halfvec', 'idx_kb_openai_bq',
+        'idx_kb_bgem3', 'idx_kb_bgem3_halfvec', 'idx_kb_bgem3_bq'
+    ]) AS i(name)
+WHERE to_regclass('public.' || i.name) IS NOT NULL;
+$$ LANGUAGE sql STABLE;
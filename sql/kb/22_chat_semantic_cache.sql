@@ -0,0 +1,28 @@
+-- =============================================================================
+-- 22_chat_semantic_cache.sql - Cache semântico de respostas do chat (opt-in)
+-- Usado por core/agents/response_cache.py quando SEMANTIC_CACHE_ENABLED=true.
+-- Chave: config_key (sha256 do modelo, ferramentas, system prompt e contexto
+-- da requisição) + similaridade de cosseno do embedding da pergunta.
+-- Só respostas recentes (SEMANTIC_CACHE_TTL) são consultadas; a cada
+-- SEMANTIC_CACHE_EVICT_EVERY gravações as expiradas e as além de
+-- SEMANTIC_CACHE_MAX_ENTRIES são removidas (corte lido de idx_chat_semantic_cache_created).
+-- Sem índice HNSW: a busca filtra por config_key + janela de frescor (poucas
+-- linhas) e ordena essas linhas pela distância exata.
+-- =============================================================================
+CREATE TABLE IF NOT EXISTS public.chat_semantic_cache (
+    id BIGSERIAL PRIMARY KEY,
+    config_key CHAR(64) NOT NULL,
+    query TEXT NOT NULL,
+    response TEXT NOT NULL,
+    embedding vector(1536) NOT NULL,
+    -- embedding do modelo SEMANTIC_CACHE_EMBEDDING_MODEL (padrão: openai)
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    hits INTEGER NOT NULL DEFAULT 0,
+    last_hit_at TIMESTAMPTZ
+);
+
+CREATE INDEX IF NOT EXISTS idx_chat_semantic_cache_key_created
+ON public.chat_semantic_cache (config_key, created_at DESC);
+
+CREATE INDEX IF NOT EXISTS idx_chat_semantic_cache_created
+ON public.chat_semantic_cache (created_at);
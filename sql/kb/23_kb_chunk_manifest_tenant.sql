@@ -0,0 +1,27 @@
+-- =============================================================================
+-- 23_kb_chunk_manifest_tenant.sql - Manifesto de materialização por tenant
+-- kb_chunk_manifest era chaveado só por doc_path: materializar a mesma fonte
+-- para outra empresa (target_empresa) era pulado como "sem mudança", e a poda
+-- de chunks excedentes apagava o doc_path em todos os tenants.
+-- A chave passa a ser (tenant_key, doc_path), com tenant_key =
+-- kb_tenant_key(NULL, client_id, empresa) do escopo de escrita.
+-- As linhas antigas não dizem em qual tenant foram gravadas e são
+-- descartadas: a próxima materialização refaz esses documentos uma vez
+-- (os embeddings saem do cache de embeddings, 14_embedding_cache.sql).
+-- Aplicar após 20_kb_chunks_tenant_partitions.sql
+-- =============================================================================
+DO $$ BEGIN
+    IF EXISTS (
+        SELECT 1 FROM information_schema.columns
+        WHERE table_schema = 'public'
+            AND table_name = 'kb_chunk_manifest'
+            AND column_name = 'tenant_key'
+    ) THEN
+        RETURN;
+    END IF;
+
+    DELETE FROM public.kb_chunk_manifest;
+    ALTER TABLE public.kb_chunk_manifest DROP CONSTRAINT kb_chunk_manifest_pkey;
+    ALTER TABLE public.kb_chunk_manifest ADD COLUMN tenant_key TEXT NOT NULL;
+    ALTER TABLE public.kb_chunk_manifest ADD PRIMARY KEY (tenant_key, doc_path);
+END $$;
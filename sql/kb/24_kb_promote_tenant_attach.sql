@@ -0,0 +1,118 @@
+-- =============================================================================
+-- 24_kb_promote_tenant_attach.sql - Promoção de tenant sem bloquear buscas
+-- A versão de 20 tinha três problemas:
+--   - a consulta ao registro vinha antes do LOCK: duas ingestões do mesmo
+--     tenant tentavam criar a mesma kb_chunks_t_<hash> e uma falhava;
+--   - CREATE TABLE ... PARTITION OF pega ACCESS EXCLUSIVE em kb_chunks até o
+--     commit, e a cópia das linhas e a construção dos índices HNSW / halfvec /
+--     binários aconteciam dentro desse lock: todas as buscas da KB paravam;
+--   - rodava no fim de cada ingestão (KB_TENANT_PARTITION_MIN_ROWS).
+--
+-- Agora:
+--   - pg_advisory_xact_lock(hashtext(tenant)) serializa promoções do mesmo
+--     tenant, e o registro é consultado de novo depois do lock;
+--   - a tabela nasce avulsa (LIKE kb_chunks), recebe as linhas e os índices
+--     do pai sem lock nenhum em kb_chunks; só a sincronização final (linhas
+--     gravadas durante a cópia) bloqueia a escrita em kb_chunks_default,
+--     e a leitura continua;
+--   - ATTACH PARTITION pega SHARE UPDATE EXCLUSIVE no pai (buscas seguem) e
+--     reaproveita os índices e constraints já criados; o CHECK em tenant_key
+--     dispensa a varredura da tabela nova. Resta a varredura de validação de
+--     kb_chunks_default, sob ACCESS EXCLUSIVE só nessa partição;
+--   - a promoção sai da ingestão: job diário (core/jobs.py) chama
+--     kb_rebalance_tenants (KB_TENANT_PARTITION_REBALANCE_ROWS).
+-- Requer PostgreSQL 13+.
+-- =============================================================================
+
+CREATE OR REPLACE FUNCTION public.kb_promote_tenant(p_tenant_key TEXT) RETURNS TEXT AS $$
+DECLARE
+    v_part TEXT;
+    r RECORD;
+BEGIN
+    PERFORM pg_advisory_xact_lock(hashtext(p_tenant_key));
+    SELECT tp.partition_name INTO v_part
+    FROM public.kb_tenant_partitions tp
+    WHERE tp.tenant_key = p_tenant_key;
+    IF v_part IS NOT NULL THEN
+        RETURN v_part;
+    END IF;
+    v_part := 'kb_chunks_t_' || substr(md5(p_tenant_key), 1, 16);
+
+    -- 1. Tabela avulsa com as linhas atuais (sem lock em kb_chunks)
+    EXECUTE format(
+        'CREATE TABLE public.%I (LIKE public.kb_chunks INCLUDING DEFAULTS INCLUDING GENERATED'
+        ' INCLUDING CONSTRAINTS, CONSTRAINT %I CHECK (tenant_key = %L))',
+        v_part, v_part || '_tenant', p_tenant_key
+    );
+    EXECUTE format(
+        'INSERT INTO public.%I (id, tenant_key, doc_path, chunk_ix, content, embedding, meta, client_id,'
+        '     empresa, created_at, updated_at, project_id, dc_project_id, domain_id)'
+        ' SELECT c.id, c.tenant_key, c.doc_path, c.chunk_ix, c.content, c.embedding, c.meta, c.client_id,'
+        '     c.empresa, c.created_at, c.updated_at, c.project_id, c.dc_project_id, c.domain_id'
+        ' FROM public.kb_chunks_default c WHERE c.tenant_key = %L',
+        v_part, p_tenant_key
+    );
+
+    -- 2. Índices e constraints do pai, construídos antes do ATTACH
+    FOR r IN
+        SELECT pg_get_indexdef(i.indexrelid) AS def
+        FROM pg_index i
+        WHERE i.indrelid = 'public.kb_chunks'::regclass
+            AND NOT EXISTS (
+                SELECT 1 FROM pg_constraint k
+                WHERE k.conrelid = i.indrelid AND k.conindid = i.indexrelid
+            )
+    LOOP
+        EXECUTE regexp_replace(
+            r.def,
+            '^CREATE (UNIQUE )?INDEX \S+ ON ONLY public\.kb_chunks ',
+            format('CREATE \1INDEX ON public.%I ', v_part)
+        );
+    END LOOP;
+    FOR r IN
+        SELECT k.conname, pg_get_constraintdef(k.oid) AS def
+        FROM pg_constraint k
+        WHERE k.conrelid = 'public.kb_chunks'::regclass
+            AND k.contype IN ('p', 'u', 'f')
+        ORDER BY k.contype DESC  -- chaves antes das FKs
+    LOOP
+        EXECUTE format(
+            'ALTER TABLE public.%I ADD CONSTRAINT %I %s',
+            v_part, v_part || '_' || r.conname, r.def
+        );
+    END LOOP;
+
+    -- 3. Linhas gravadas durante a cópia; a partir daqui a escrita na default espera
+    LOCK TABLE public.kb_chunks_default IN SHARE ROW EXCLUSIVE MODE;
+    EXECUTE format(
+        'DELETE FROM public.%1$I p WHERE NOT EXISTS ('
+        '    SELECT 1 FROM public.kb_chunks_default c'
+        '    WHERE c.tenant_key = %2$L AND c.id = p.id'
+        '        AND (c.doc_path, c.chunk_ix, c.content, c.embedding, c.meta, c.client_id, c.empresa,'
+        '             c.created_at, c.updated_at, c.project_id, c.dc_project_id, c.domain_id)'
+        '        IS NOT DISTINCT FROM'
+        '            (p.doc_path, p.chunk_ix, p.content, p.embedding, p.meta, p.client_id, p.empresa,'
+        '             p.created_at, p.updated_at, p.project_id, p.dc_project_id, p.domain_id))',
+        v_part, p_tenant_key
+    );
+    EXECUTE format(
+        'INSERT INTO public.%1$I (id, tenant_key, doc_path, chunk_ix, content, embedding, meta, client_id,'
+        '     empresa, created_at, updated_at, project_id, dc_project_id, domain_id)'
+        ' SELECT c.id, c.tenant_key, c.doc_path, c.chunk_ix, c.content, c.embedding, c.meta, c.client_id,'
+        '     c.empresa, c.created_at, c.updated_at, c.project_id, c.dc_project_id, c.domain_id'
+        ' FROM public.kb_chunks_default c'
+        ' WHERE c.tenant_key = %2$L AND NOT EXISTS (SELECT 1 FROM public.%1$I p WHERE p.id = c.id)',
+        v_part, p_tenant_key
+    );
+    DELETE FROM public.kb_chunks_default c WHERE c.tenant_key = p_tenant_key;
+
+    -- 4. Troca
+    EXECUTE format(
+        'ALTER TABLE public.kb_chunks ATTACH PARTITION public.%I FOR VALUES IN (%L)',
+        v_part, p_tenant_key
+    );
+    INSERT INTO public.kb_tenant_partitions (tenant_key, partition_name)
+    VALUES (p_tenant_key, v_part);
+    RETURN v_part;
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,26 @@
+-- =============================================================================
+-- 25_kb_docs_unique_per_project.sql - Staging de kb_docs por projeto
+-- kb_docs_unique era (source_path, source_hash): o upload do mesmo arquivo em
+-- outro projeto (POST /projects/{id}/ingest) caía no conflito da linha do
+-- primeiro projeto, que sumia de GET /{id}/ingest/status ou ficava com o
+-- ingest_status antigo.
+--
+-- Agora a chave inclui dc_project_id (NULLS NOT DISTINCT: o staging sem projeto,
+-- stage_docs_from_dir, continua deduplicando por arquivo + hash).
+-- Requer PostgreSQL 15+.
+-- =============================================================================
+
+DO $$ BEGIN
+    IF EXISTS (
+        SELECT 1 FROM pg_constraint
+        WHERE conname = 'kb_docs_unique'
+            AND conrelid = 'public.kb_docs'::regclass
+            AND array_length(conkey, 1) = 3
+    ) THEN
+        RETURN;
+    END IF;
+
+    ALTER TABLE public.kb_docs DROP CONSTRAINT IF EXISTS kb_docs_unique;
+    ALTER TABLE public.kb_docs
+    ADD CONSTRAINT kb_docs_unique UNIQUE NULLS NOT DISTINCT (source_path, source_hash, dc_project_id);
+END $$;
@@ -0,0 +1,34 @@
+-- =============================================================================
+-- 26_kb_search_tenant_key_project_rows.sql - Busca por empresa sem perder chunks de projeto
+-- kb_tenant_key põe project_id antes de empresa: um chunk com project_id e
+-- empresa fica em 'project:<uuid>'. Antes de 20 a busca só por empresa filtrava
+-- lower(empresa) = lower(p_empresa) em todas as linhas; com a poda de 20 ela
+-- lia só 'empresa:<x>' e esses chunks (migrados ou gravados com os dois) sumiam.
+--
+-- Agora kb_search_tenant_key só poda por empresa quando nenhum chunk da
+-- empresa tem project_id; senão devolve NULL e a busca percorre todas as
+-- partições com o filtro de empresa, como antes de 20. A consulta usa o
+-- índice parcial abaixo (só linhas com project_id e empresa), então custa
+-- uma descida de btree por busca.
+-- =============================================================================
+
+CREATE INDEX IF NOT EXISTS idx_kb_chunks_empresa_with_project
+ON public.kb_chunks (lower(empresa))
+WHERE project_id IS NOT NULL AND empresa IS NOT NULL;
+
+CREATE OR REPLACE FUNCTION public.kb_search_tenant_key(
+        p_client_id UUID,
+        p_empresa TEXT,
+        p_project_id UUID
+    ) RETURNS TEXT AS $$
+SELECT CASE
+        WHEN p_project_id IS NOT NULL THEN public.kb_tenant_key(p_project_id, NULL, NULL)
+        WHEN p_empresa IS NOT NULL AND NOT EXISTS (
+            SELECT 1
+            FROM public.kb_chunks c
+            WHERE c.project_id IS NOT NULL
+                AND c.empresa IS NOT NULL
+                AND lower(c.empresa) = lower(p_empresa)
+        ) THEN public.kb_tenant_key(NULL, NULL, p_empresa)
+    END;
+$$ LANGUAGE sql STABLE;
@@ -0,0 +1,16 @@
+-- =============================================================================
+-- optional/binary_indexes.sql - Índices HNSW binários (storage "binary")
+-- Aplicar só quando um modelo usar OPENAI_EMBEDDING_STORAGE=binary ou
+-- BGE_M3_EMBEDDING_STORAGE=binary (ver 21_quantized_vector_search.sql).
+-- binary_quantize guarda 1 bit por dimensão (~32x menor que float32); a busca
+-- reordena os candidatos pela distância float32 (rescore_factor).
+-- Não é aplicado por scripts/init-db.sh (fora de sql/kb/*.sql).
+-- =============================================================================
+
+CREATE INDEX IF NOT EXISTS idx_kb_openai_bq
+ON public.kb_chunks USING hnsw ((binary_quantize(embedding)::bit(1536)) bit_hamming_ops)
+WHERE (vector_dims(embedding) = 1536);
+
+CREATE INDEX IF NOT EXISTS idx_kb_bgem3_bq
+ON public.kb_chunks USING hnsw ((binary_quantize(embedding)::bit(1024)) bit_hamming_ops)
+WHERE (vector_dims(embedding) = 1024);
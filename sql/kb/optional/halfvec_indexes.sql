@@ -0,0 +1,16 @@
+-- =============================================================================
+-- optional/halfvec_indexes.sql - Índices HNSW float16 (storage "halfvec")
+-- Aplicar só quando um modelo usar OPENAI_EMBEDDING_STORAGE=halfvec ou
+-- BGE_M3_EMBEDDING_STORAGE=halfvec (ver 21_quantized_vector_search.sql).
+-- Cada índice ocupa ~metade do float32 equivalente; o float32 (idx_kb_openai /
+-- idx_kb_bgem3) pode ser removido quando nenhum modelo da dimensão usar "vector".
+-- Não é aplicado por scripts/init-db.sh (fora de sql/kb/*.sql).
+-- =============================================================================
+
+CREATE INDEX IF NOT EXISTS idx_kb_openai_halfvec
+ON public.kb_chunks USING hnsw ((embedding::halfvec(1536)) halfvec_cosine_ops)
+WHERE (vector_dims(embedding) = 1536);
+
+CREATE INDEX IF NOT EXISTS idx_kb_bgem3_halfvec
+ON public.kb_chunks USING hnsw ((embedding::halfvec(1024)) halfvec_cosine_ops)
+WHERE (vector_dims(embedding) = 1024);
@@ -0,0 +1,75 @@
+"""Tests for the compiled agent cache."""
+
+from langchain_core.tools import tool
+
+from core.agents.cache import AgentGraphCache, make_agent_key
+
+
+@tool
+def alpha(x: str) -> str:
+    """Alpha tool."""
+    return x
+
+
+@tool
+def beta(x: str) -> str:
+    """Beta tool."""
+    return x
+
+
+class _FakeAgent:
+    builds = 0
+
+    def __init__(self):
+        _FakeAgent.builds += 1
+        self.compiled = 0
+
+    def create_graph(self):
+        self.compiled += 1
+        return object()
+
+
+def _key(**overrides):
+    params = dict(agent_type="simple", model_name="m", tools=[alpha], system_prompt="p")
+    params.update(overrides)
+    return make_agent_key(**params)
+
+
+class TestAgentKey:
+    def test_tool_order_does_not_matter(self):
+        assert _key(tools=[alpha, beta]) == _key(tools=[beta, alpha])
+
+    def test_prompt_and_flags_change_key(self):
+        assert _key() != _key(system_prompt="other")
+        assert _key() != _key(enable_itil=True)
+        assert _key() != _key(model_name="other")
+
+
+class TestAgentGraphCache:
+    def test_builds_and_compiles_once(self):
+        cache = AgentGraphCache()
+        first = cache.get_or_create(_key(), _FakeAgent)
+        second = cache.get_or_create(_key(), _FakeAgent)
+
+        assert first is second
+        assert first.compiled == 1
+        assert cache.stats() == {"size": 1, "hits": 1, "misses": 1}
+
+    def test_lru_eviction(self):
+        cache = AgentGraphCache(max_size=2)
+        a = cache.get_or_create(_key(model_name="a"), _FakeAgent)
+        cache.get_or_create(_key(model_name="b"), _FakeAgent)
+        cache.get_or_create(_key(model_name="a"), _FakeAgent)
+        cache.get_or_create(_key(model_name="c"), _FakeAgent)
+
+        assert cache.get_or_create(_key(model_name="a"), _FakeAgent) is a
+        assert cache.stats()["size"] == 2
+
+    def test_evict_agent_drops_its_graphs(self):
+        cache = AgentGraphCache()
+        old = cache.get_or_create(_key(), _FakeAgent, agent_id="agent-1")
+        other = cache.get_or_create(_key(model_name="x"), _FakeAgent, agent_id="agent-2")
+
+        assert cache.evict_agent("agent-1") == 1
+        assert cache.get_or_create(_key(), _FakeAgent, agent_id="agent-1") is not old
+        assert cache.get_or_create(_key(model_name="x"), _FakeAgent) is other
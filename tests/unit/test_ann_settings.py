@@ -0,0 +1,130 @@
+"""Tests for the per-query HNSW knobs (ef_search, iterative_scan)."""
+
+from contextlib import contextmanager
+
+import pytest
+
+from core.rag import tools
+
+
+class FakeCursor:
+    def __init__(self, log):
+        self.log = log
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        self.log.append((sql, params))
+
+    def fetchall(self):
+        return []
+
+
+class FakeConn:
+    def __init__(self):
+        self.log = []
+
+    def cursor(self):
+        return FakeCursor(self.log)
+
+
+@pytest.fixture
+def conn(monkeypatch):
+    fake = FakeConn()
+
+    @contextmanager
+    def get_conn():
+        yield fake
+
+    monkeypatch.setattr(tools, "get_conn", get_conn)
+    return fake
+
+
+def test_settings_statement():
+    sql, params = tools._ann_settings(80, "relaxed_order")
+    assert "hnsw.ef_search" in sql and "hnsw.iterative_scan" in sql
+    assert sql.count(", true)") == 2  # transaction-local
+    assert params == {"ef_search": "80", "iterative_scan": "relaxed_order"}
+    assert tools._ann_settings(None, None) is None
+
+
+@pytest.mark.parametrize("ef, mode", [(0, None), (1001, None), (None, "fast")])
+def test_rejects_bad_values(ef, mode):
+    with pytest.raises(ValueError):
+        tools._ann_settings(ef, mode)
+
+
+def test_vector_search_sets_knobs_before_search(conn):
+    tools.query_candidates(
+        "q", 5, "hybrid", None, "Empresa X", None, [0.1, 0.2], None,
+        ef_search=100, iterative_scan="strict_order",
+    )
+    assert len(conn.log) == 2
+    assert "set_config" in conn.log[0][0]
+    assert "kb_hybrid_search" in conn.log[1][0]
+
+
+def test_text_search_ignores_knobs(conn):
+    tools.query_candidates("q", 5, "text", None, "Empresa X", None, None, None, ef_search=100)
+    assert len(conn.log) == 1
+    assert "kb_text_search" in conn.log[0][0]
+
+
+def test_batch_validates_before_searching(monkeypatch):
+    monkeypatch.setattr(tools, "query_candidates", lambda *a, **kw: pytest.fail("searched"))
+    with pytest.raises(ValueError):
+        tools.kb_search_batch(["q"], empresa="Empresa X", search_type="text", ef_search=5000)
+
+
+def test_compact_storage_settings():
+    sql, params = tools._ann_settings(None, None, "binary", 8)
+    assert "kb.vector_storage" in sql and "kb.rescore_factor" in sql
+    assert params == {"storage": "binary", "rescore_factor": "8"}
+    # float32 index: nothing to set
+    assert tools._ann_settings(None, None, "vector", 1) is None
+    with pytest.raises(ValueError):
+        tools._ann_settings(None, None, "pq", 4)
+
+
+def test_model_metadata_drives_storage(monkeypatch):
+    seen = {}
+
+    def query_candidates(*args, **kwargs):
+        seen.update(kwargs)
+        return []
+
+    monkeypatch.setattr(tools, "SEARCH_CACHE_TTL", 0)
+    monkeypatch.setattr(tools, "_embed_queries", lambda texts, project_id: [[0.1]] * len(texts))
+    monkeypatch.setattr(tools, "query_candidates", query_candidates)
+    monkeypatch.setattr(
+        tools.EmbeddingFactory,
+        "get_metadata",
+        classmethod(lambda cls, model_id: {"storage": "binary", "rescore_factor": 8}),
+    )
+    tools.kb_search_batch(["q"], k=5, rerank_candidates=0, empresa="Empresa X", search_type="vector")
+
+    assert seen["storage"] == "binary" and seen["rescore_factor"] == 8
+    # ef_search grows so the coarse pass can return k * rescore_factor candidates
+    assert seen["ef_search"] >= 5 * 8
+
+
+def test_metadata_lists_storage():
+    meta = tools.EmbeddingFactory.get_metadata("OpenAI")
+    assert meta["dims"] == 1536
+    assert meta["storage"] in tools.VECTOR_STORAGES
+    with pytest.raises(RuntimeError):
+        tools.EmbeddingFactory.get_metadata("unknown-model")
+
+
+def test_invalid_storage_falls_back_to_vector(monkeypatch):
+    monkeypatch.setenv("OPENAI_EMBEDDING_STORAGE", "halfvect")
+
+    meta = tools.EmbeddingFactory.get_metadata("openai")
+
+    assert (meta["storage"], meta["rescore_factor"]) == ("vector", 1)
+    monkeypatch.setenv("OPENAI_EMBEDDING_STORAGE", "binary")
+    assert tools.EmbeddingFactory.get_metadata("openai")["storage"] == "binary"
@@ -0,0 +1,105 @@
+"""Tests for the async cache helpers (single-flight and stale-while-revalidate)."""
+
+import asyncio
+import time
+
+import pytest
+
+from core import cache
+
+
+@pytest.fixture
+def store(monkeypatch):
+    data = {}
+
+    async def aget(key):
+        return data.get(key)
+
+    async def aset(key, value, ttl_seconds=120, tags=None):
+        data[key] = value
+        for tag in tags or ():
+            data.setdefault(f"tag:{tag}", set()).add(key)
+
+    monkeypatch.setattr(cache, "aget_cached", aget)
+    monkeypatch.setattr(cache, "aset_cached", aset)
+    return data
+
+
+async def test_concurrent_misses_share_one_load(store):
+    calls = 0
+
+    async def loader():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return {"n": calls}
+
+    results = await asyncio.gather(*(cache.get_or_set("k", loader, 60) for _ in range(10)))
+
+    assert calls == 1
+    assert results == [{"n": 1}] * 10
+    assert store["k"]["value"] == {"n": 1}
+
+
+async def test_fresh_hit_skips_loader(store):
+    store["k"] = {"__swr__": 1, "fresh_until": time.time() + 60, "value": [1, 2]}
+
+    async def loader():
+        raise AssertionError("should not load")
+
+    assert await cache.get_or_set("k", loader, 60) == [1, 2]
+
+
+async def test_stale_hit_returns_old_value_and_refreshes(store):
+    store["k"] = {"__swr__": 1, "fresh_until": time.time() - 1, "value": "old"}
+
+    async def loader():
+        return "new"
+
+    assert await cache.get_or_set("k", loader, 60, stale_seconds=30) == "old"
+    await asyncio.sleep(0)
+    await asyncio.sleep(0)
+    assert store["k"]["value"] == "new"
+
+
+async def test_cache_if_and_codecs(store):
+    async def failing():
+        return (False, "error")
+
+    result = await cache.get_or_set("k", failing, 60, cache_if=lambda r: r[0])
+    assert result == (False, "error")
+    assert "k" not in store
+
+    async def ok():
+        return (True, "report")
+
+    await cache.get_or_set("k", ok, 60, cache_if=lambda r: r[0], encode=lambda r: r[1])
+    assert store["k"]["value"] == "report"
+    hit = await cache.get_or_set("k", ok, 60, decode=lambda v: (True, v))
+    assert hit == (True, "report")
+
+
+async def test_loader_errors_reach_every_waiter(store):
+    async def loader():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("boom")
+
+    results = await asyncio.gather(
+        *(cache.get_or_set("k", loader, 60) for _ in range(3)), return_exceptions=True
+    )
+
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert "k" not in store
+
+
+async def test_tags_are_registered_on_write(store):
+    async def loader():
+        return {"tickets": []}
+
+    await cache.get_or_set("glpi:tickets:all:15", loader, 60, tags=["glpi", "glpi:tickets"])
+
+    assert store["tag:glpi:tickets"] == {"glpi:tickets:all:15"}
+
+
+def test_batches():
+    assert list(cache._batches(range(5), size=2)) == [[0, 1], [2, 3], [4]]
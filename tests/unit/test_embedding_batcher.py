@@ -0,0 +1,86 @@
+"""Tests for the async embedding batcher."""
+
+import asyncio
+
+import pytest
+from langchain_core.embeddings import Embeddings
+
+from core.rag.embedding_batcher import aembed_texts, aiter_embeddings, make_batches
+
+
+class _RateLimited(Exception):
+    status_code = 429
+
+
+class _SlowEmbeddings(Embeddings):
+    def __init__(self, fail_first=0):
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.calls = 0
+        self.fail_first = fail_first
+
+    def embed_documents(self, texts):
+        raise NotImplementedError
+
+    def embed_query(self, text):
+        raise NotImplementedError
+
+    async def aembed_documents(self, texts):
+        self.calls += 1
+        if self.calls <= self.fail_first:
+            raise _RateLimited("429 Too Many Requests")
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        # Later batches finish first to check ordering
+        await asyncio.sleep(0.01 / (1 + int(texts[0])))
+        self.in_flight -= 1
+        return [[float(t)] for t in texts]
+
+
+class TestMakeBatches:
+    def test_respects_item_limit(self):
+        assert make_batches(["a"] * 5, max_tokens=10_000, max_items=2) == [(0, 2), (2, 4), (4, 5)]
+
+    def test_respects_token_limit(self):
+        texts = ["word " * 40, "word " * 40, "word " * 40]
+        batches = make_batches(texts, max_tokens=60, max_items=100)
+        assert batches == [(0, 1), (1, 2), (2, 3)]
+
+    def test_oversized_text_gets_own_batch(self):
+        assert make_batches(["x " * 500, "y"], max_tokens=10, max_items=100) == [(0, 1), (1, 2)]
+
+    def test_empty(self):
+        assert make_batches([]) == []
+
+
+class TestAembedTexts:
+    async def test_order_preserved_with_concurrency_limit(self):
+        model = _SlowEmbeddings()
+        texts = [str(i) for i in range(10)]
+
+        vectors = await aembed_texts(texts, model=model, max_items=1, concurrency=3)
+
+        assert vectors == [[float(i)] for i in range(10)]
+        assert 1 < model.max_in_flight <= 3
+
+    async def test_streams_batches_in_order(self):
+        model = _SlowEmbeddings()
+        texts = [str(i) for i in range(6)]
+
+        starts = [start async for start, _ in aiter_embeddings(texts, model=model, max_items=2)]
+
+        assert starts == [0, 2, 4]
+
+    async def test_backs_off_on_429(self):
+        model = _SlowEmbeddings(fail_first=2)
+
+        vectors = await aembed_texts(["1", "2"], model=model, base_delay=0.001)
+
+        assert vectors == [[1.0], [2.0]]
+        assert model.calls == 3
+
+    async def test_gives_up_after_max_retries(self):
+        model = _SlowEmbeddings(fail_first=10)
+
+        with pytest.raises(_RateLimited):
+            await aembed_texts(["1"], model=model, max_retries=2, base_delay=0.001)
@@ -0,0 +1,133 @@
+"""Tests for CachedEmbeddings."""
+
+import pytest
+from langchain_core.embeddings import Embeddings
+
+from core.rag.embedding_cache import CachedEmbeddings, text_hash
+
+
+class _CountingEmbeddings(Embeddings):
+    def __init__(self):
+        self.doc_calls = []
+        self.query_calls = []
+
+    def embed_documents(self, texts):
+        self.doc_calls.append(list(texts))
+        return [[float(len(t)), 1.0] for t in texts]
+
+    def embed_query(self, text):
+        self.query_calls.append(text)
+        return [float(len(text)), 0.0]
+
+
+class _ShortEmbeddings(_CountingEmbeddings):
+    """Provider that drops the last vector of a batch."""
+
+    def embed_documents(self, texts):
+        return super().embed_documents(texts)[:-1]
+
+    async def aembed_documents(self, texts):
+        return self.embed_documents(texts)
+
+
+class _DictStore:
+    def __init__(self):
+        self.data = {}
+
+    def get_many(self, model_key, hashes):
+        return {h: self.data[(model_key, h)] for h in hashes if (model_key, h) in self.data}
+
+    def put_many(self, model_key, items):
+        for h, vec in items.items():
+            self.data[(model_key, h)] = vec
+
+
+class TestCachedEmbeddings:
+    def test_only_misses_reach_base_model(self):
+        base = _CountingEmbeddings()
+        emb = CachedEmbeddings(base, "fake")
+
+        first = emb.embed_documents(["a", "bb"])
+        second = emb.embed_documents(["bb", "ccc", "a"])
+
+        assert first == [[1.0, 1.0], [2.0, 1.0]]
+        assert second == [[2.0, 1.0], [3.0, 1.0], [1.0, 1.0]]
+        assert base.doc_calls == [["a", "bb"], ["ccc"]]
+        stats = emb.stats()
+        assert stats["memory_hits"] == 2
+        assert stats["misses"] == 3
+
+    def test_duplicates_in_one_batch_embedded_once(self):
+        base = _CountingEmbeddings()
+        emb = CachedEmbeddings(base, "fake")
+
+        result = emb.embed_documents(["x", "x", "yy"])
+
+        assert result == [[1.0, 1.0], [1.0, 1.0], [2.0, 1.0]]
+        assert base.doc_calls == [["x", "yy"]]
+
+    def test_lru_eviction(self):
+        base = _CountingEmbeddings()
+        emb = CachedEmbeddings(base, "fake", max_size=2)
+
+        emb.embed_documents(["a", "b", "c"])
+        emb.embed_documents(["a"])
+
+        assert base.doc_calls == [["a", "b", "c"], ["a"]]
+        assert emb.stats()["lru_size"] == 2
+
+    def test_query_and_document_key_spaces_are_separate(self):
+        base = _CountingEmbeddings()
+        emb = CachedEmbeddings(base, "fake")
+
+        emb.embed_documents(["hello"])
+        assert emb.embed_query("hello") == [5.0, 0.0]
+        assert emb.embed_query("hello") == [5.0, 0.0]
+        assert base.query_calls == ["hello"]
+
+    def test_batched_queries_use_query_mode(self):
+        base = _CountingEmbeddings()
+        emb = CachedEmbeddings(base, "fake")
+
+        assert emb.embed_queries(["hi", "hey", "hi"]) == [[2.0, 0.0], [3.0, 0.0], [2.0, 0.0]]
+        assert emb.embed_query("hey") == [3.0, 0.0]
+        assert base.doc_calls == []
+        assert base.query_calls == ["hi", "hey"]
+
+    def test_persistent_tier_survives_new_instance(self):
+        store = _DictStore()
+        CachedEmbeddings(_CountingEmbeddings(), "fake", store=store).embed_documents(["abc"])
+
+        base = _CountingEmbeddings()
+        emb = CachedEmbeddings(base, "fake", store=store)
+
+        assert emb.embed_documents(["abc"]) == [[3.0, 1.0]]
+        assert base.doc_calls == []
+        assert emb.stats()["store_hits"] == 1
+        assert ("fake", text_hash("abc")) in store.data
+
+    async def test_async_path_uses_cache(self):
+        base = _CountingEmbeddings()
+        emb = CachedEmbeddings(base, "fake")
+
+        await emb.aembed_documents(["one", "two"])
+        result = await emb.aembed_documents(["two"])
+
+        assert result == [[3.0, 1.0]]
+        assert base.doc_calls == [["one", "two"]]
+
+    def test_short_provider_response_raises(self):
+        store = _DictStore()
+        emb = CachedEmbeddings(_ShortEmbeddings(), "fake", store=store)
+
+        with pytest.raises(ValueError, match="1 vectors for 2 texts"):
+            emb.embed_documents(["a", "bb"])
+        # Nothing half-filled is cached
+        assert emb.stats()["lru_size"] == 0
+        assert store.data == {}
+
+    async def test_async_short_provider_response_raises(self):
+        emb = CachedEmbeddings(_ShortEmbeddings(), "fake")
+
+        with pytest.raises(ValueError):
+            await emb.aembed_documents(["a", "bb"])
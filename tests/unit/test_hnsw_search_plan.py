@@ -0,0 +1,74 @@
+"""EXPLAIN checks: the dimension-specialised vector leg must use the HNSW partial indexes.
+
+Needs a Postgres with sql/kb applied; skipped when the database is unreachable.
+"""
+
+import psycopg
+import pytest
+
+from core.database import get_db_url
+from core.rag.vector_adapter import Vector, register_vector
+
+
+@pytest.fixture(scope="module")
+def conn():
+    try:
+        conn = psycopg.connect(get_db_url(), connect_timeout=2)
+    except Exception as e:
+        pytest.skip(f"Postgres unavailable: {e}")
+    with conn.cursor() as cur:
+        cur.execute("select to_regprocedure('public.kb_vector_candidates_1536(vector,integer,uuid,text,text,uuid)')")
+        if cur.fetchone()[0] is None:
+            conn.close()
+            pytest.skip("sql/kb/18_hnsw_dim_search.sql not applied")
+    register_vector(conn)
+    yield conn
+    conn.close()
+
+
+def _plan(conn, sql, params):
+    with conn.cursor() as cur:
+        # Small test tables are cheaper to seq scan; only check that the index is usable
+        cur.execute("set local enable_seqscan = off")
+        cur.execute("explain " + sql, params)
+        plan = "\n".join(row[0] for row in cur.fetchall())
+    conn.rollback()
+    return plan
+
+
+def _relations(conn, name):
+    """The relation plus its partitions (kb_chunks is partitioned after sql/kb/20)."""
+    with conn.cursor() as cur:
+        cur.execute(
+            "select %s union select i.inhrelid::regclass::text from pg_inherits i"
+            " where i.inhparent = to_regclass(%s)",
+            (name, "public." + name),
+        )
+        names = {row[0].split(".")[-1] for row in cur.fetchall()}
+    conn.rollback()
+    return names
+
+
+@pytest.mark.parametrize("dims,index", [(1536, "idx_kb_openai"), (1024, "idx_kb_bgem3")])
+def test_vector_candidates_use_hnsw_index(conn, dims, index):
+    plan = _plan(
+        conn,
+        f"select * from public.kb_vector_candidates_{dims}(%s, 10, null, null, null, %s::uuid)",
+        (Vector([0.01] * dims), "00000000-0000-0000-0000-000000000000"),
+    )
+
+    assert any(f"Index Scan using {name} " in plan for name in _relations(conn, index))
+
+
+def test_tenant_search_prunes_to_one_partition(conn):
+    partitions = _relations(conn, "kb_chunks") - {"kb_chunks"}
+    if not partitions:
+        pytest.skip("sql/kb/20_kb_chunks_tenant_partitions.sql not applied")
+    plan = _plan(
+        conn,
+        "select * from public.kb_tenant_vector_exact(%s, 10, public.kb_search_tenant_key(null, %s, null))",
+        (Vector([0.01] * 1536), "Empresa X"),
+    )
+
+    scanned = {p for p in partitions if f" on {p} " in plan or plan.endswith(f" on {p}")}
+    assert len(scanned) == 1
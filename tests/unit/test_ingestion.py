@@ -0,0 +1,257 @@
+"""Tests for the kb_chunks write path (bulk upsert, incremental materialization)."""
+
+import uuid
+from contextlib import contextmanager
+
+import psycopg
+import pytest
+
+from core.database import get_db_url
+from core.rag import ingestion
+
+
+class FakeCopy:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set_types(self, types):
+        pass
+
+    def write_row(self, row):
+        self.rows.append(row)
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.rowcount = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None, prepare=None):
+        self.conn.log.append((sql, params))
+        self.rowcount = self.conn.rowcount
+        self.last_sql = sql
+
+    def executemany(self, sql, params_seq):
+        self.conn.log.append((sql, list(params_seq)))
+
+    def copy(self, sql):
+        self.conn.log.append((sql, None))
+        return FakeCopy(self.conn.copied)
+
+    def fetchone(self):
+        return None
+
+    def fetchall(self):
+        for fragment, rows in self.conn.results.items():
+            if fragment in self.last_sql:
+                return rows
+        return []
+
+
+class FakeConn:
+    def __init__(self):
+        self.log = []
+        self.copied = []
+        self.rowcount = 0
+        self.results = {}  # SQL fragment -> fetchall() rows
+
+    def cursor(self):
+        return FakeCursor(self)
+
+
+@pytest.fixture
+def conn(monkeypatch):
+    fake = FakeConn()
+
+    @contextmanager
+    def get_conn():
+        yield fake
+
+    monkeypatch.setattr(ingestion, "get_conn", get_conn)
+    fake.bumps = []
+    monkeypatch.setattr(ingestion, "bump_index_generation", lambda **scope: fake.bumps.append(scope))
+    monkeypatch.setattr(ingestion, "KB_TENANT_PARTITION_MIN_ROWS", 0)
+    monkeypatch.setattr(ingestion, "embed_texts", lambda texts, model_id: [[0.1, 0.2] for _ in texts])
+    return fake
+
+
+def _sql(conn, fragment):
+    return [(sql, params) for sql, params in conn.log if fragment in sql]
+
+
+def _row(doc_path, ix, content):
+    return {"doc_path": doc_path, "chunk_ix": ix, "content": content, "embedding": [0.1, 0.2]}
+
+
+def test_bulk_upsert_stages_rows_in_order(conn):
+    rows = [_row("a.md", 0, "v1"), _row("a.md", 1, "x"), _row("a.md", 0, "v2")]
+
+    ingestion.bulk_upsert_chunks(rows, empresa="Empresa X")
+
+    assert [(seq, ix, content) for seq, _, ix, content, _, _ in conn.copied] == [
+        (0, 0, "v1"), (1, 1, "x"), (2, 0, "v2")
+    ]
+    merge_sql, params = conn.log[-1]
+    # Last staged duplicate wins; scope columns not passed are kept
+    assert "distinct on (s.doc_path, s.chunk_ix)" in merge_sql
+    assert "s.seq desc" in merge_sql
+    for column in ("client_id", "empresa", "project_id"):
+        assert f"{column}=coalesce(excluded.{column}, kb_chunks.{column})" in merge_sql
+    assert params == {"client_id": None, "empresa": "Empresa X", "project_id": None}
+
+
+def test_failed_promotion_does_not_fail_the_upsert(conn, monkeypatch, caplog):
+    def promote(**scope):
+        raise psycopg.errors.DuplicateTable("relation kb_chunks_t_x already exists")
+
+    monkeypatch.setattr(ingestion, "KB_TENANT_PARTITION_MIN_ROWS", 10)
+    monkeypatch.setattr(ingestion, "promote_tenant_if_large", promote)
+    conn.rowcount = 1
+
+    assert ingestion.bulk_upsert_chunks([_row("a.md", 0, "v1")], empresa="Empresa X") == 1
+    assert conn.bumps == [{"client_id": None, "empresa": "Empresa X", "project_id": None}]
+    assert "tenant promotion failed" in caplog.text
+
+
+def test_rebalance_promotes_from_maintenance_job(conn):
+    conn.results["kb_rebalance_tenants"] = [("empresa:x", "kb_chunks_t_0123", 25000)]
+
+    promoted = ingestion.rebalance_tenant_partitions(20000)
+
+    assert promoted == [{"tenant_key": "empresa:x", "partition_name": "kb_chunks_t_0123", "row_count": 25000}]
+    (_, params), = _sql(conn, "kb_rebalance_tenants")
+    assert params == (20000,)
+
+
+WANTED = {"strategy": "fixed", "chunk_size": 800, "chunk_overlap": 200, "embedding_model": "openai"}
+
+
+def test_pending_docs_skips_only_unchanged():
+    docs = [(1, "a.md", "h1", "A"), (2, "b.md", "h2", "B"), (3, "c.md", "h3", "C"), (4, "d.md", "h4", "D")]
+    manifest = {
+        "fixed/a.md": {"source_hash": "h1", **WANTED},
+        "fixed/b.md": {"source_hash": "old", **WANTED},
+        "fixed/c.md": {"source_hash": "h3", **WANTED, "chunk_size": 400},
+    }
+
+    pending = ingestion._pending_docs(docs, manifest, WANTED, lambda p: f"fixed/{p}")
+
+    assert [doc_path for doc_path, *_ in pending] == ["fixed/b.md", "fixed/c.md", "fixed/d.md"]
+
+
+def _materialize(conn, **kwargs):
+    conn.results["from public.kb_docs"] = [(1, "a.md", "h1", "texto curto")]
+    return ingestion.materialize_chunks_from_staging(strategy="fixed", **kwargs)
+
+
+def test_manifest_and_prune_use_the_write_tenant(conn):
+    client_id = "00000000-0000-0000-0000-000000000001"
+
+    _materialize(conn, empresa="A", client_id=client_id, target_empresa="B")
+
+    assert len(conn.copied) == 1
+    (_, manifest_params), = _sql(conn, "from public.kb_chunk_manifest")
+    assert manifest_params[:2] == (client_id, "B")
+    (prune_sql, prune_params), = _sql(conn, "delete from public.kb_chunks")
+    assert "c.tenant_key = public.kb_tenant_key(null, %s::uuid, %s)" in prune_sql
+    assert prune_params[2:] == (client_id, "B")
+    (_, saved), = _sql(conn, "insert into public.kb_chunk_manifest")
+    assert saved[0]["empresa"] == "B" and saved[0]["client_id"] == client_id
+
+
+def test_manifest_of_another_tenant_does_not_skip(conn):
+    # The fake returns this row only to a query that is not tenant-scoped
+    conn.results["where doc_path = any"] = [("a.md", "h1", *WANTED.values())]
+
+    _materialize(conn, empresa="A", target_empresa="B")
+
+    assert len(conn.copied) == 1  # re-chunked for B
+
+
+def test_prune_bumps_search_generation(conn):
+    conn.rowcount = 3  # the prune deleted leftover chunks
+
+    _materialize(conn, empresa="A")
+
+    assert {"client_id": None, "empresa": "A"} in conn.bumps
+
+
+def test_document_emptied_is_pruned_and_invalidated(conn):
+    conn.results["from public.kb_docs"] = [(1, "a.md", "h2", "")]
+    conn.rowcount = 2
+
+    assert ingestion.materialize_chunks_from_staging(strategy="fixed", empresa="A") == 0
+
+    assert not conn.copied  # nothing to upsert
+    (_, prune_params), = _sql(conn, "delete from public.kb_chunks")
+    assert prune_params[1] == [0]
+    assert conn.bumps == [{"client_id": None, "empresa": "A"}]
+
+
+# ---------- Against Postgres (skipped when unreachable) ----------
+
+
+@pytest.fixture(scope="module")
+def db():
+    try:
+        conn = psycopg.connect(get_db_url(), connect_timeout=2)
+    except Exception as e:
+        pytest.skip(f"Postgres unavailable: {e}")
+    with conn.cursor() as cur:
+        cur.execute("select to_regprocedure('public.kb_tenant_key(uuid,uuid,text)')")
+        if cur.fetchone()[0] is None:
+            conn.close()
+            pytest.skip("sql/kb/20_kb_chunks_tenant_partitions.sql not applied")
+    yield conn
+    conn.close()
+
+
+@pytest.fixture
+def doc_path(db, monkeypatch):
+    monkeypatch.setattr(ingestion, "bump_index_generation", lambda **scope: None)
+    monkeypatch.setattr(ingestion, "KB_TENANT_PARTITION_MIN_ROWS", 0)
+    path = f"tests/{uuid.uuid4().hex}.md"
+    yield path
+    with db.cursor() as cur:
+        cur.execute("delete from public.kb_chunks where doc_path = %s", (path,))
+    db.commit()
+
+
+def _stored(db, doc_path):
+    with db.cursor() as cur:
+        cur.execute(
+            "select chunk_ix, content, client_id::text, empresa from public.kb_chunks"
+            " where doc_path = %s order by chunk_ix",
+            (doc_path,),
+        )
+        rows = cur.fetchall()
+    db.rollback()
+    return rows
+
+
+def test_bulk_upsert_keeps_last_duplicate(db, doc_path):
+    rows = [_row(doc_path, 0, "v1"), _row(doc_path, 1, "x"), _row(doc_path, 0, "v2")]
+
+    assert ingestion.bulk_upsert_chunks(rows, empresa="Empresa Teste") == 2
+    assert [(ix, content) for ix, content, _, _ in _stored(db, doc_path)] == [(0, "v2"), (1, "x")]
+
+
+def test_bulk_upsert_keeps_scope_columns_not_passed(db, doc_path):
+    client_id = str(uuid.uuid4())
+    ingestion.bulk_upsert_chunks([_row(doc_path, 0, "v1")], client_id=client_id, empresa="Empresa Teste")
+
+    ingestion.bulk_upsert_chunks([_row(doc_path, 0, "v2")], empresa="Empresa Teste")
+
+    assert _stored(db, doc_path) == [(0, "v2", client_id, "Empresa Teste")]
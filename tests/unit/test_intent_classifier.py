@@ -0,0 +1,144 @@
+"""Tests for the local intent/ITIL pre-classifier."""
+
+import time
+from pathlib import Path
+
+import pytest
+from langchain_core.messages import HumanMessage
+
+from core.agents.intent_classifier import (
+    DEFAULT_DATASET,
+    LOCAL_INTENT_MIN_CONFIDENCE,
+    LocalIntentClassifier,
+    get_local_intent_classifier,
+    load_examples,
+    tokenize,
+)
+from core.agents.unified import (
+    CLASSIFIER_SYSTEM_PROMPT,
+    ROUTER_SYSTEM_PROMPT,
+    TRIAGE_SYSTEM_PROMPT,
+    UnifiedAgent,
+)
+from tests.unit.test_unified_async import _ScriptedModel
+
+DOCS_DATASET = Path(__file__).resolve().parents[2] / "docs" / "RAG" / "tests" / "intent_dataset.json"
+
+
+class TestTokenize:
+    def test_folds_accents_and_case(self):
+        assert tokenize("Migração URGENTE") == tokenize("migracao urgente")
+
+    def test_verb_e_is_not_the_conjunction(self):
+        assert "e" in tokenize("liste os tickets e crie uma issue")
+        assert "e" not in tokenize("o que é ITIL")
+        assert "email" in tokenize("o e-mail parou")
+
+
+class TestLoadExamples:
+    def test_bundled_dataset(self):
+        examples = load_examples(DEFAULT_DATASET)
+        assert len(examples) > 50
+        assert {intent for _, intent, _ in examples} == {
+            "conversa_geral", "it_request", "multi_action", "web_search"
+        }
+
+    def test_docs_dataset_format(self):
+        examples = load_examples(DOCS_DATASET)
+        assert examples
+        text, intent, category = examples[0]
+        assert "{" not in text
+        assert intent == "lead_criar"
+        assert category is None
+
+
+class TestLocalIntentClassifier:
+    @pytest.mark.parametrize(
+        "message, intent, category",
+        [
+            ("o outlook não abre", "it_request", "incidente"),
+            ("quero migrar o servidor de arquivos", "it_request", "mudanca"),
+            ("a rede cai todo dia, qual a causa?", "it_request", "problema"),
+            ("pesquise na internet sobre o log4j", "web_search", "conversa"),
+            ("bom dia, tudo certo?", "conversa_geral", "conversa"),
+            ("Liste os alertas e depois crie um ticket", "multi_action", "requisicao"),
+        ],
+    )
+    def test_confident_predictions(self, message, intent, category):
+        prediction = get_local_intent_classifier().predict(message)
+        assert (prediction.intent, prediction.category) == (intent, category)
+        assert prediction.confidence >= LOCAL_INTENT_MIN_CONFIDENCE
+
+    def test_unknown_text_has_no_confidence(self):
+        prediction = get_local_intent_classifier().predict("xyzzy qwerty")
+        assert prediction.confidence == 0.0
+
+    def test_confidence_is_the_margin_between_intents(self):
+        classifier = LocalIntentClassifier().fit([
+            ("o servidor caiu", "it_request", "incidente"),
+            ("o servidor caiu", "it_request", "problema"),
+            ("bom dia, tudo certo", "conversa_geral", "conversa"),
+        ])
+
+        prediction = classifier.predict("o servidor caiu")
+
+        # Both it_request centroids tie; the intent is still clear
+        assert prediction.intent == "it_request"
+        assert prediction.confidence >= LOCAL_INTENT_MIN_CONFIDENCE
+
+    def test_fit_requires_examples(self):
+        with pytest.raises(ValueError):
+            LocalIntentClassifier().fit([])
+
+    def test_predict_is_sub_millisecond(self):
+        classifier = get_local_intent_classifier()
+        started = time.perf_counter()
+        for _ in range(200):
+            classifier.predict("O servidor de e-mail caiu e ninguém consegue acessar desde cedo")
+        assert (time.perf_counter() - started) / 200 < 0.001
+
+
+class TestUnifiedAgentLocalTriage:
+    def _agent(self, model, **kwargs):
+        agent = UnifiedAgent(openrouter_api_key="test", system_prompt="Teste.", local_triage=True, **kwargs)
+        agent.model = model
+        return agent
+
+    def test_off_by_default(self):
+        assert UnifiedAgent(openrouter_api_key="test").local_triage is False
+
+    async def test_confident_message_skips_only_the_router(self):
+        model = _ScriptedModel()
+        result = await self._agent(model).ainvoke({"messages": [HumanMessage("o outlook não abre")]})
+
+        assert ROUTER_SYSTEM_PROMPT not in model.prompts
+        assert CLASSIFIER_SYSTEM_PROMPT in model.prompts
+        assert result["intent"] == "it_request"
+        # GUT is scored per message by the LLM classifier (4x4x4 = 64)
+        assert result["gut_score"] == 64
+        assert result["priority"] == "critico"
+
+    async def test_merged_triage_keeps_the_llm_for_it_intents(self):
+        model = _ScriptedModel()
+        result = await self._agent(model, routing_mode="merged").ainvoke(
+            {"messages": [HumanMessage("o outlook não abre")]}
+        )
+
+        assert TRIAGE_SYSTEM_PROMPT in model.prompts
+        assert result["gut_score"] == 64
+
+    async def test_merged_triage_skips_the_llm_for_conversation(self):
+        model = _ScriptedModel()
+        result = await self._agent(model, routing_mode="merged").ainvoke(
+            {"messages": [HumanMessage("bom dia, tudo certo?")]}
+        )
+
+        assert TRIAGE_SYSTEM_PROMPT not in model.prompts
+        assert result["intent"] == "conversa_geral"
+
+    async def test_low_confidence_message_falls_through_to_llm(self):
+        model = _ScriptedModel()
+        await self._agent(model).ainvoke({"messages": [HumanMessage("xyzzy qwerty")]})
+
+        assert ROUTER_SYSTEM_PROMPT in model.prompts
+
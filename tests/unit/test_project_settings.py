@@ -0,0 +1,49 @@
+"""Tests for the per-project RAG settings cache."""
+
+import pytest
+
+from core.rag import project_settings
+
+
+@pytest.fixture
+def loads(monkeypatch):
+    calls = []
+    projects = {"p1": {"settings": {"embedding_model": "bge-m3"}, "embedding_model": "bge-m3"}}
+
+    def load(project_id):
+        calls.append(project_id)
+        return projects.get(project_id)
+
+    monkeypatch.setattr(project_settings, "_load", load)
+    project_settings.invalidate_project_settings()
+    yield calls
+    project_settings.invalidate_project_settings()
+
+
+def test_second_lookup_hits_cache(loads):
+    assert project_settings.get_project_embedding_model("p1") == "bge-m3"
+    assert project_settings.get_project_embedding_model("p1") == "bge-m3"
+    assert loads == ["p1"]
+
+
+def test_invalidate_reloads(loads):
+    project_settings.get_project_embedding_model("p1")
+    project_settings.invalidate_project_settings("p1")
+    project_settings.get_project_embedding_model("p1")
+    assert loads == ["p1", "p1"]
+
+
+def test_unknown_project_is_not_cached(loads):
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            project_settings.get_project_embedding_model("missing")
+    assert loads == ["missing", "missing"]
+
+
+def test_entry_expires_after_ttl(loads, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(project_settings.time, "monotonic", lambda: now[0])
+    project_settings.get_project_settings("p1")
+    now[0] += project_settings.PROJECT_SETTINGS_CACHE_TTL + 1
+    project_settings.get_project_settings("p1")
+    assert loads == ["p1", "p1"]
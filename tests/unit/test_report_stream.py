@@ -0,0 +1,170 @@
+"""Tests for the incremental report formatters and the rule-based SSE stream."""
+
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from api.models.requests import ChatRequest
+from api.routes import chat
+from core import cache
+from core.reports import format_glpi_report, format_zabbix_report, iter_glpi_report
+from core.reports.dashboard import DASHBOARD_HEADER, DASHBOARD_SEPARATOR
+
+TICKETS = {"tickets": [{"id": i, "name": f"Ticket {i}", "status": 1, "priority": 3} for i in range(1, 6)]}
+PROBLEMS = [{"severity": 4, "host_name": "srv01", "name": "Disco cheio"}]
+
+
+@pytest.fixture
+def store(monkeypatch):
+    data = {}
+
+    async def aget(key):
+        return data.get(key)
+
+    async def aset(key, value, ttl_seconds=120, tags=None):
+        data[key] = value
+
+    monkeypatch.setattr(cache, "aget_cached", aget)
+    monkeypatch.setattr(cache, "aset_cached", aset)
+    return data
+
+
+@pytest.fixture
+def sources(monkeypatch):
+    """GLPI answers after 50 ms, Zabbix after 10 ms."""
+    import core.tools.glpi
+    import core.tools.zabbix
+
+    class _Glpi:
+        async def get_tickets(self, limit=15):
+            await asyncio.sleep(0.05)
+            return SimpleNamespace(success=True, output=TICKETS, error=None)
+
+    class _Zabbix:
+        async def get_problems(self, limit=15, severity=3):
+            await asyncio.sleep(0.01)
+            return SimpleNamespace(success=True, output=PROBLEMS, error=None)
+
+    monkeypatch.setattr(core.tools.glpi, "get_client", _Glpi)
+    monkeypatch.setattr(core.tools.zabbix, "get_client", _Zabbix)
+
+
+async def _events(message):
+    response = await chat.stream_chat(ChatRequest(message=message))
+    events = []
+    async for line in response.body_iterator:
+        events.append(json.loads(line.removeprefix("data: ")))
+    return events
+
+
+def test_iter_report_joins_to_format_report():
+    pieces = list(iter_glpi_report(TICKETS))
+
+    assert "".join(pieces) == format_glpi_report(TICKETS)
+    assert pieces[0].startswith("### GLPI - Tickets")
+    assert len(pieces) == 1 + 1 + 5 + 1  # title/summary, table header, rows, trailer
+
+
+async def test_dashboard_sections_stream_in_completion_order(sources):
+    streamed = []
+
+    report, success = await chat._build_report_by_intent("dashboard", streamed.append)
+
+    assert success
+    glpi = format_glpi_report(TICKETS)
+    zabbix = format_zabbix_report({"problems": PROBLEMS, "count": 1, "min_severity": 3})
+    assert "".join(streamed) == DASHBOARD_HEADER + DASHBOARD_SEPARATOR + zabbix + DASHBOARD_SEPARATOR + glpi
+    # The report itself keeps the fixed section order, whatever answered first
+    assert report == DASHBOARD_HEADER + DASHBOARD_SEPARATOR + glpi + DASHBOARD_SEPARATOR + zabbix
+
+
+async def test_failed_dashboard_section_cancels_the_other(monkeypatch):
+    glpi_cancelled = asyncio.Event()
+
+    async def slow_glpi(glpi_base_url):
+        try:
+            await asyncio.sleep(1)
+        except asyncio.CancelledError:
+            glpi_cancelled.set()
+            raise
+
+    async def broken_zabbix(zabbix_base_url):
+        raise RuntimeError("zabbix down")
+
+    monkeypatch.setattr(chat, "_dashboard_glpi_section", slow_glpi)
+    monkeypatch.setattr(chat, "_dashboard_zabbix_section", broken_zabbix)
+
+    report, success = await chat._build_report_by_intent("dashboard")
+
+    assert not success
+    assert "zabbix down" in report
+    await asyncio.sleep(0)
+    assert glpi_cancelled.is_set()
+
+
+async def test_stream_emits_pieces_before_slow_source(store, sources):
+    started = time.perf_counter()
+    response = await chat.stream_chat(ChatRequest(message="dashboard"))
+    timeline = []
+    async for line in response.body_iterator:
+        event = json.loads(line.removeprefix("data: "))
+        timeline.append((event["type"], event.get("content", ""), time.perf_counter() - started))
+
+    types = [t for t, _, _ in timeline]
+    assert types[:3] == ["start", "artifact_start", "artifact_content"]
+    assert types[-3:] == ["artifact_end", "content", "done"]
+    zabbix_at = next(at for _, content, at in timeline if content.startswith("### Zabbix"))
+    glpi_at = next(at for _, content, at in timeline if content.startswith("### GLPI"))
+    assert zabbix_at < 0.04 < glpi_at
+    streamed = "".join(c for t, c, _ in timeline if t == "artifact_content")
+    cached = store["report:dashboard"]["value"]["report"]
+    assert sorted(streamed.split(DASHBOARD_SEPARATOR)) == sorted(cached.split(DASHBOARD_SEPARATOR))
+    assert cached.index("### GLPI") < cached.index("### Zabbix")
+
+
+async def test_cached_report_is_sent_whole(store, sources):
+    store["report:glpi_tickets"] = {
+        "__swr__": 1,
+        "fresh_until": time.time() + 60,
+        "value": {"report": "### cached", "success": True},
+    }
+
+    events = await _events("tickets")
+
+    assert [e["type"] for e in events] == [
+        "start", "artifact_start", "artifact_content", "artifact_end", "content", "done"
+    ]
+    assert events[2]["content"] == "### cached"
+
+
+async def test_source_error_is_sent_as_content(store, monkeypatch):
+    import core.tools.glpi
+
+    class _Down:
+        async def get_tickets(self, limit=15):
+            return SimpleNamespace(success=False, output=None, error="timeout")
+
+    monkeypatch.setattr(core.tools.glpi, "get_client", _Down)
+
+    events = await _events("tickets")
+
+    assert [e["type"] for e in events] == ["start", "content", "done"]
+    assert "timeout" in events[1]["content"]
+
+
+async def test_stale_report_is_sent_whole_while_refreshing(store, sources):
+    store["report:dashboard"] = {
+        "__swr__": 1,
+        "fresh_until": time.time() - 1,
+        "value": {"report": "## old dashboard", "success": True},
+    }
+
+    events = await _events("dashboard")
+
+    contents = [e["content"] for e in events if e["type"] == "artifact_content"]
+    assert contents == ["## old dashboard"]
+    await asyncio.sleep(0.1)  # background refresh
+    assert store["report:dashboard"]["value"]["report"].startswith(DASHBOARD_HEADER)
@@ -0,0 +1,85 @@
+"""Tests for the local and Cohere rerankers."""
+
+import time
+
+from core.rag import rerank
+from core.rag.rerank import LocalReranker
+
+
+def _items(*contents):
+    return [{"doc_path": f"d{i}.md", "chunk_ix": i, "content": c} for i, c in enumerate(contents)]
+
+
+class _Scorer:
+    def __init__(self, delay_per_pair=0.0):
+        self.calls = []
+        self.delay_per_pair = delay_per_pair
+
+    def __call__(self, pairs):
+        self.calls.append(len(pairs))
+        time.sleep(self.delay_per_pair * len(pairs))
+        # Score = number of "x" in the passage
+        return [float(passage.count("x")) for _query, passage in pairs]
+
+
+class TestLocalReranker:
+    def test_orders_by_score_in_one_batch(self):
+        scorer = _Scorer()
+        reranker = LocalReranker(scorer, max_candidates=10, budget_ms=0)
+
+        result = reranker.rerank("q", _items("x", "xxx", "xx"), k=2)
+
+        assert [r["chunk_ix"] for r in result] == [1, 2]
+        assert result[0]["rerank_score"] == 3.0
+        assert scorer.calls == [3]
+
+    def test_maps_back_by_index_with_duplicate_contents(self):
+        reranker = LocalReranker(_Scorer(), max_candidates=10, budget_ms=0)
+
+        result = reranker.rerank("q", _items("same", "xx", "same"), k=3)
+
+        assert [r["chunk_ix"] for r in result] == [1, 0, 2]
+
+    def test_max_candidates_caps_scoring(self):
+        scorer = _Scorer()
+        reranker = LocalReranker(scorer, max_candidates=2, budget_ms=0)
+
+        result = reranker.rerank("q", _items("a", "x", "xxx"), k=2)
+
+        assert scorer.calls == [2]
+        assert [r["chunk_ix"] for r in result] == [1, 0]
+
+    def test_budget_shrinks_next_batch(self):
+        scorer = _Scorer(delay_per_pair=0.005)
+        reranker = LocalReranker(scorer, max_candidates=20, budget_ms=20)
+
+        reranker.rerank("q", _items(*["x"] * 20), k=2)
+        reranker.rerank("q", _items(*["x"] * 20), k=2)
+
+        assert scorer.calls[0] == 20
+        assert 2 <= scorer.calls[1] < 20
+
+    def test_never_scores_fewer_than_k(self):
+        reranker = LocalReranker(_Scorer(), max_candidates=1, budget_ms=0)
+
+        assert reranker.candidate_limit(5) == 5
+
+
+class _FakeCohere:
+    def __init__(self):
+        self.calls = 0
+
+    def rerank(self, documents, query, top_n):
+        self.calls += 1
+        return [{"index": 2, "relevance_score": 0.9}, {"index": 0, "relevance_score": 0.5}]
+
+
+def test_cohere_maps_by_index_and_reuses_client(monkeypatch):
+    client = _FakeCohere()
+    monkeypatch.setenv("COHERE_API_KEY", "test")
+    monkeypatch.setattr(rerank, "get_cohere_reranker", lambda: client)
+
+    result = rerank.cohere_rerank("q", _items("a", "b", "a"), k=2)
+
+    assert [r["chunk_ix"] for r in result] == [2, 0]
+    assert result[0]["rerank_score"] == 0.9
@@ -0,0 +1,61 @@
+"""Tests for agent resolution (row building and cache)."""
+
+from core.agents import resolver
+from core.agents.resolver import ResolvedAgent, _build_resolved, invalidate_resolved
+
+
+def _agent_row(**overrides):
+    row = {
+        "id": "a1",
+        "system_prompt": "Base",
+        "agent_type": "unified",
+        "model_override": None,
+        "connector_slugs": ["fake"],
+        "skill_rows": [{"slug": "itil_classification", "prompt_fragment": "ITIL"}],
+        "domain_rows": [{"id": "00000000-0000-0000-0000-0000000000aa", "access_level": "read"}],
+    }
+    row.update(overrides)
+    return row
+
+
+class TestBuildResolved:
+    def test_builds_from_single_row(self, monkeypatch):
+        calls = []
+
+        def factory():
+            calls.append(1)
+            return ["tool-a", "tool-b"]
+
+        monkeypatch.setitem(resolver.CONNECTOR_TOOL_REGISTRY, "fake", factory)
+
+        resolved = _build_resolved(_agent_row())
+
+        assert resolved.tools == ["tool-a", "tool-b"]
+        assert calls == [1]  # factory runs once per connector
+        assert resolved.system_prompt == "Base\n\nITIL"
+        assert resolved.enable_itil is True
+        assert [str(d) for d in resolved.allowed_domain_ids] == ["00000000-0000-0000-0000-0000000000aa"]
+
+    def test_admin_domain_means_no_restriction(self):
+        resolved = _build_resolved(_agent_row(connector_slugs=[], domain_rows=[{"id": "x", "access_level": "admin"}]))
+        assert resolved.allowed_domain_ids is None
+
+
+class TestResolveCache:
+    def test_hit_returns_copy_and_invalidate_drops_it(self):
+        invalidate_resolved()
+        resolver._cache_put("a1", ResolvedAgent(tools=["t"], agent_type="simple"))
+
+        first = resolver._cache_get("a1")
+        first.tools.append("mutated")
+
+        assert resolver._cache_get("a1").tools == ["t"]
+        invalidate_resolved("a1")
+        assert resolver._cache_get("a1") is None
+
+    def test_expired_entries_are_dropped(self, monkeypatch):
+        invalidate_resolved()
+        resolver._cache_put("a1", ResolvedAgent())
+        now = resolver.time.monotonic()
+        monkeypatch.setattr(resolver.time, "monotonic", lambda: now + resolver.RESOLVE_CACHE_TTL + 1)
+        assert resolver._cache_get("a1") is None
@@ -0,0 +1,219 @@
+"""Tests for the semantic response cache."""
+
+import math
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from langchain_core.tools import tool
+from langgraph.checkpoint.memory import MemorySaver
+
+from core.agents.response_cache import (
+    CachedResponse,
+    SemanticResponseCache,
+    cacheable_answer,
+    is_cacheable_turn,
+    response_cache_key,
+)
+from core.agents.unified import (
+    CLASSIFIER_SYSTEM_PROMPT,
+    PLANNER_SYSTEM_PROMPT,
+    ROUTER_SYSTEM_PROMPT,
+    UnifiedAgent,
+)
+from tests.unit.test_unified_async import _agent, _ScriptedModel
+
+KEY = "k" * 64
+
+
+class _FakeEmbeddings:
+    """Bag-of-letters embedding: same letters, same vector."""
+
+    async def aembed_query(self, text):
+        vec = [0.0] * 26
+        for ch in text.lower():
+            if "a" <= ch <= "z":
+                vec[ord(ch) - ord("a")] += 1.0
+        return vec
+
+
+class _MemoryStore:
+    def __init__(self):
+        self.rows = []
+        self.evictions = 0
+
+    async def nearest(self, config_key, embedding, ttl):
+        def cosine(a, b):
+            norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(x * x for x in b))
+            return sum(x * y for x, y in zip(a, b)) / norm if norm else 0.0
+
+        scored = [
+            (cosine(embedding, emb), query, response)
+            for key, query, response, emb in self.rows
+            if key == config_key
+        ]
+        if not scored:
+            return None
+        similarity, query, response = max(scored)
+        return CachedResponse(response=response, query=query, similarity=similarity)
+
+    async def put(self, config_key, query, response, embedding):
+        self.rows.append((config_key, query, response, embedding))
+
+    async def evict(self, ttl, max_entries):
+        self.evictions += 1
+
+
+class _BrokenStore(_MemoryStore):
+    async def put(self, *args):
+        raise ConnectionError("db down")
+
+
+def _cache(store=None, threshold=0.95, **kwargs):
+    return SemanticResponseCache(_FakeEmbeddings(), store or _MemoryStore(), threshold=threshold, **kwargs)
+
+
+@tool
+def glpi_get_tickets() -> str:
+    """List tickets."""
+    return "[]"
+
+
+@tool
+def glpi_create_ticket() -> str:
+    """Create a ticket."""
+    return "ok"
+
+
+class TestSemanticResponseCache:
+    async def test_similar_question_hits(self):
+        cache = _cache()
+        await cache.store(KEY, "quais tickets abertos", "3 tickets")
+
+        hit = await cache.lookup(KEY, "Quais tickets abertos?")
+
+        assert hit.response == "3 tickets"
+        assert hit.similarity >= 0.95
+
+    async def test_different_question_or_partition_misses(self):
+        cache = _cache()
+        await cache.store(KEY, "quais tickets abertos", "3 tickets")
+
+        assert await cache.lookup(KEY, "status do zabbix") is None
+        assert await cache.lookup("x" * 64, "quais tickets abertos") is None
+
+    async def test_stats_hit_rate(self):
+        cache = _cache()
+        await cache.store(KEY, "quais tickets abertos", "3 tickets")
+        await cache.lookup(KEY, "quais tickets abertos")
+        await cache.lookup(KEY, "status do zabbix")
+
+        stats = cache.stats()
+        assert (stats["hits"], stats["misses"], stats["stores"]) == (1, 1, 1)
+        assert stats["hit_rate"] == 0.5
+        cache.clear_stats()
+        assert cache.stats()["hit_rate"] == 0.0
+
+    async def test_store_errors_are_swallowed(self):
+        cache = _cache(store=_BrokenStore())
+
+        await cache.store(KEY, "quais tickets abertos", "3 tickets")
+
+        assert cache.stats()["errors"] == 1
+
+    async def test_eviction_runs_every_n_stores(self):
+        store = _MemoryStore()
+        cache = _cache(store=store, evict_every=3)
+
+        for i in range(7):
+            await cache.store(KEY, f"pergunta {i}", "resposta")
+
+        assert store.evictions == 2
+
+
+class TestCacheability:
+    def test_read_only_tools_are_cacheable(self):
+        messages = [
+            HumanMessage("tickets"),
+            AIMessage("", tool_calls=[{"name": "glpi_get_tickets", "args": {}, "id": "1"}]),
+            AIMessage("3 tickets"),
+        ]
+        assert is_cacheable_turn(messages)
+
+    def test_unlisted_tools_are_not_cacheable(self):
+        # Name looks read-only, but only READ_ONLY_TOOLS are trusted
+        messages = [
+            HumanMessage("exporte"),
+            AIMessage("", tool_calls=[{"name": "glpi_get_and_close_tickets", "args": {}, "id": "1"}]),
+            AIMessage("feito"),
+        ]
+        assert not is_cacheable_turn(messages)
+
+    def test_write_tools_are_not_cacheable(self):
+        messages = [
+            HumanMessage("abra um ticket"),
+            AIMessage("", tool_calls=[{"name": "glpi_create_ticket", "args": {}, "id": "1"}]),
+        ]
+        assert not is_cacheable_turn(messages)
+
+    def test_key_depends_on_context_and_tools(self):
+        base = dict(agent_type="simple", model_name="m", tools=[glpi_get_tickets], system_prompt="s")
+
+        assert response_cache_key(**base) == response_cache_key(**base)
+        assert response_cache_key(**base) != response_cache_key(request_context="cliente A", **base)
+        assert response_cache_key(**base) != response_cache_key(
+            **{**base, "tools": [glpi_get_tickets, glpi_create_ticket]}
+        )
+
+
+class TestRecordTurn:
+    async def test_cached_turn_is_recorded_in_thread(self):
+        agent = UnifiedAgent(openrouter_api_key="test", checkpointer=MemorySaver())
+        config = {"configurable": {"thread_id": "t1"}}
+
+        assert not await agent.ahas_history(config)
+        await agent.arecord_turn([HumanMessage("oi"), AIMessage("olá")], config)
+
+        state = await agent.create_graph().aget_state(config)
+        assert [m.content for m in state.values["messages"]] == ["oi", "olá"]
+        assert state.next == ()
+        assert await agent.ahas_history(config)
+
+    async def test_without_checkpointer_nothing_is_recorded(self):
+        agent = UnifiedAgent(openrouter_api_key="test")
+        config = {"configurable": {"thread_id": "t1"}}
+
+        await agent.arecord_turn([HumanMessage("oi"), AIMessage("olá")], config)
+
+        assert not await agent.ahas_history(config)
+
+
+class _FailingExecutor(_ScriptedModel):
+    """Triage works; the executor call fails (e.g. a 429 from the provider)."""
+
+    def _answer(self, messages):
+        system = messages[0].content if isinstance(messages[0], SystemMessage) else ""
+        if system not in (ROUTER_SYSTEM_PROMPT, CLASSIFIER_SYSTEM_PROMPT, PLANNER_SYSTEM_PROMPT):
+            raise RuntimeError("429 Too Many Requests")
+        return super()._answer(messages)
+
+
+class TestCacheableAnswer:
+    def test_final_ai_answer_is_stored(self):
+        answer = AIMessage("3 tickets")
+        assert cacheable_answer({"messages": [HumanMessage("tickets"), answer]}) is answer
+
+    def test_pending_tool_call_or_error_is_not_stored(self):
+        pending = AIMessage("", tool_calls=[{"name": "glpi_get_tickets", "args": {}, "id": "1"}])
+        assert cacheable_answer({"messages": [HumanMessage("tickets"), pending]}) is None
+        assert cacheable_answer({"messages": [HumanMessage("a"), AIMessage("b")], "error": "x"}) is None
+        assert cacheable_answer({"messages": []}) is None
+
+    async def test_executor_error_is_not_stored(self):
+        agent = _agent()
+        agent.model = _FailingExecutor()
+
+        result = await agent.ainvoke({"messages": [HumanMessage("O servidor caiu")]})
+
+        # The user's message is still last; it must not be cached as the answer
+        assert isinstance(result["messages"][-1], HumanMessage)
+        assert result["error"]
+        assert cacheable_answer(result) is None
@@ -0,0 +1,79 @@
+"""Tests for kb_search_batch (batched embedding + pipelined retrieval)."""
+
+import pytest
+
+from core.rag import search_cache, tools
+
+
+@pytest.fixture
+def no_cache(monkeypatch):
+    monkeypatch.setattr(search_cache, "get_counters", lambda *keys: None)
+
+
+@pytest.fixture
+def fakes(monkeypatch):
+    calls = {"embed": [], "many": [], "single": []}
+
+    def embed_queries(texts, project_id):
+        calls["embed"].append(list(texts))
+        return [[float(len(t))] for t in texts]
+
+    def _result(query, emb):
+        return [{"doc_path": f"{query}.md", "chunk_ix": 0, "content": query, "score": emb[0], "meta": {}}]
+
+    def query_candidates_many(queries, k, search_type, client_id, empresa, chunking, embs, *a, **kw):
+        calls["many"].append(list(queries))
+        return [_result(q, e) for q, e in zip(queries, embs)]
+
+    def query_candidates(query, k, search_type, client_id, empresa, chunking, emb, *a, **kw):
+        calls["single"].append(query)
+        return _result(query, emb)
+
+    monkeypatch.setattr(tools, "_embed_queries", embed_queries)
+    monkeypatch.setattr(tools, "query_candidates_many", query_candidates_many)
+    monkeypatch.setattr(tools, "query_candidates", query_candidates)
+    return calls
+
+
+def test_batch_embeds_once_and_keeps_order(no_cache, fakes):
+    results = tools.kb_search_batch(["a", "bbb", "cc"], empresa="X", search_type="hybrid")
+
+    assert [r[0]["doc_path"] for r in results] == ["a.md", "bbb.md", "cc.md"]
+    assert [r[0]["score"] for r in results] == [1.0, 3.0, 2.0]
+    assert fakes["embed"] == [["a", "bbb", "cc"]]
+    assert fakes["many"] == [["a", "bbb", "cc"]]
+
+
+def test_text_search_skips_embedding(no_cache, fakes, monkeypatch):
+    seen = []
+    monkeypatch.setattr(
+        tools,
+        "query_candidates_many",
+        lambda queries, k, st, c, e, ch, embs, *a, **kw: seen.append(embs) or [[] for _ in queries],
+    )
+
+    tools.kb_search_batch(["a", "b"], empresa="X", search_type="text")
+
+    assert fakes["embed"] == []
+    assert seen == [[None, None]]
+
+
+def test_only_cache_misses_are_searched(fakes, monkeypatch):
+    store = {}
+    monkeypatch.setattr(search_cache, "get_counters", lambda *keys: [0] * len(keys))
+    monkeypatch.setattr(search_cache, "get_cached", store.get)
+    monkeypatch.setattr(
+        search_cache, "set_cached", lambda key, value, ttl_seconds=120, tags=None: store.__setitem__(key, value)
+    )
+
+    tools.kb_search_batch(["a"], empresa="X")
+    results = tools.kb_search_batch(["a", "bb", "ccc"], empresa="X")
+
+    assert [r[0]["doc_path"] for r in results] == ["a.md", "bb.md", "ccc.md"]
+    assert fakes["single"] == ["a"]
+    assert fakes["many"] == [["bb", "ccc"]]
+
+
+def test_requires_a_filter(no_cache, fakes):
+    with pytest.raises(RuntimeError):
+        tools.kb_search_batch(["a"])
@@ -0,0 +1,96 @@
+"""Tests for the kb_search_client result cache and index generations."""
+
+import pytest
+
+from core.rag import search_cache, tools
+
+
+@pytest.fixture
+def redis_store(monkeypatch):
+    data = {}
+
+    def get_counters(*keys):
+        return [data.get(k, 0) for k in keys]
+
+    def incr_counters(*keys):
+        for k in keys:
+            data[k] = data.get(k, 0) + 1
+
+    def set_cached(key, value, ttl_seconds=120, tags=None):
+        data[key] = value
+
+    monkeypatch.setattr(search_cache, "get_counters", get_counters)
+    monkeypatch.setattr(search_cache, "incr_counters", incr_counters)
+    monkeypatch.setattr(search_cache, "get_cached", data.get)
+    monkeypatch.setattr(search_cache, "set_cached", set_cached)
+    return data
+
+
+@pytest.fixture
+def fake_search(monkeypatch):
+    calls = []
+
+    def query_candidates(query, k, search_type, *args, **kwargs):
+        calls.append(query)
+        return [{"doc_path": "a.md", "chunk_ix": 0, "content": "x", "score": 1.0, "meta": {}}]
+
+    monkeypatch.setattr(tools, "query_candidates", query_candidates)
+    return calls
+
+
+def _search(query, **kwargs):
+    params = {"query": query, "search_type": "text", "empresa": "Empresa X", **kwargs}
+    return tools.kb_search_client.invoke(params)
+
+
+def test_normalize_query():
+    assert search_cache.normalize_query("  Como   CONFIGURAR\tVPN? ") == "como configurar vpn?"
+
+
+def test_repeated_query_served_from_cache(redis_store, fake_search):
+    first = _search("Como configurar VPN?")
+    second = _search("  como configurar   vpn? ")
+
+    assert first == second
+    assert fake_search == ["Como configurar VPN?"]
+
+
+def test_ingestion_bump_invalidates_scope(redis_store, fake_search):
+    _search("vpn")
+    search_cache.bump_index_generation(empresa="empresa x")
+    _search("vpn")
+
+    assert len(fake_search) == 2
+
+
+def test_other_scope_bump_keeps_entry(redis_store, fake_search):
+    _search("vpn")
+    search_cache.bump_index_generation(project_id="p1")
+    _search("vpn")
+
+    assert len(fake_search) == 1
+
+
+def test_truncate_invalidates_everything(redis_store, fake_search):
+    _search("vpn")
+    search_cache.bump_index_generation()
+    _search("vpn")
+
+    assert len(fake_search) == 2
+
+
+def test_options_are_part_of_key(redis_store, fake_search):
+    _search("vpn", k=5)
+    _search("vpn", k=10)
+    _search("vpn", search_type="text_trgm")
+
+    assert len(fake_search) == 3
+
+
+def test_unknown_generation_bypasses_cache(redis_store, fake_search, monkeypatch):
+    monkeypatch.setattr(search_cache, "get_counters", lambda *keys: None)
+
+    _search("vpn")
+    _search("vpn")
+
+    assert len(fake_search) == 2
@@ -0,0 +1,20 @@
+"""Tests for search_type parsing (text leg selection)."""
+
+import pytest
+
+from core.rag.tools import split_search_type
+
+
+@pytest.mark.parametrize(
+    "search_type,expected",
+    [
+        ("hybrid", ("hybrid", "fts")),
+        ("text", ("text", "fts")),
+        ("text_trgm", ("text", "trgm")),
+        ("hybrid_rrf_trgm", ("hybrid_rrf", "trgm")),
+        ("hybrid_union_fuzzy", ("hybrid_union", "fts_trgm")),
+        ("vector", ("vector", "fts")),
+    ],
+)
+def test_split_search_type(search_type, expected):
+    assert split_search_type(search_type) == expected
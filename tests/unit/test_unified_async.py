@@ -0,0 +1,184 @@
+"""Tests for the async UnifiedAgent nodes."""
+
+import asyncio
+import json
+from typing import Any, List
+
+import pytest
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from core.agents.unified import (
+    CLASSIFIER_SYSTEM_PROMPT,
+    PLANNER_SYSTEM_PROMPT,
+    ROUTER_SYSTEM_PROMPT,
+    TRIAGE_SYSTEM_PROMPT,
+    UnifiedAgent,
+)
+
+CLASSIFICATION = {"categoria": "INCIDENTE", "gravidade": 4, "urgencia": 4, "tendencia": 4}
+PLAN = {"plan": [{"tool": "glpi_get_tickets", "params": {"limit": 5}, "requires_confirm": False}]}
+
+
+class _ScriptedModel(BaseChatModel):
+    """Answers by node (system prompt); records which API was used."""
+
+    intent: str = "it_request"
+    delay: float = 0.0
+    sync_calls: int = 0
+    async_calls: int = 0
+    in_flight: int = 0
+    max_in_flight: int = 0
+    prompts: List[str] = []
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def _answer(self, messages: List[BaseMessage]) -> ChatResult:
+        system = messages[0].content if isinstance(messages[0], SystemMessage) else ""
+        self.prompts.append(system)
+        if system == ROUTER_SYSTEM_PROMPT:
+            text = self.intent
+        elif system == TRIAGE_SYSTEM_PROMPT:
+            text = json.dumps({"intent": self.intent, **CLASSIFICATION})
+        elif system == CLASSIFIER_SYSTEM_PROMPT:
+            text = "```json\n" + json.dumps(CLASSIFICATION) + "\n```"
+        elif system == PLANNER_SYSTEM_PROMPT:
+            text = json.dumps(PLAN)
+        else:
+            text = "resposta final"
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        self.sync_calls += 1
+        return self._answer(messages)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        self.async_calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+            return self._answer(messages)
+        finally:
+            self.in_flight -= 1
+
+
+def _agent(**kwargs):
+    # LLM path only; the local pre-classifier is covered in test_intent_classifier.py
+    kwargs.setdefault("local_triage", False)
+    return UnifiedAgent(openrouter_api_key="test", system_prompt="Você é um teste.", **kwargs)
+
+
+@pytest.fixture
+def agent():
+    agent = _agent()
+    agent.model = _ScriptedModel()
+    return agent
+
+
+def _input():
+    return {"messages": [HumanMessage(content="O servidor caiu")]}
+
+
+async def test_ainvoke_uses_only_async_model_calls(agent):
+    result = await agent.ainvoke(_input())
+
+    assert agent.model.sync_calls == 0
+    assert agent.model.async_calls == 4  # router, classifier, planner, executor
+    assert result["intent"] == "it_request"
+    assert result["task_category"] == "incidente"
+    assert result["gut_score"] == 64
+    assert result["priority"] == "critico"
+    assert result["plan"] == PLAN["plan"]
+    assert result["messages"][-1].content == "resposta final"
+
+
+async def test_async_and_sync_paths_agree(agent):
+    async_result = await agent.ainvoke(_input())
+    sync_result = agent.invoke(_input())
+
+    assert agent.model.sync_calls == 4
+    for key in ("intent", "task_category", "priority", "gut_score", "gut_details", "plan", "should_continue"):
+        assert async_result[key] == sync_result[key]
+    assert async_result["messages"][-1].content == sync_result["messages"][-1].content
+
+
+async def test_astream_messages_only_carries_executor_output(agent):
+    streamed = []
+    async for chunk, metadata in agent.astream(_input(), stream_mode="messages"):
+        streamed.append((metadata.get("langgraph_node"), chunk.content))
+
+    assert streamed == [("executor", "resposta final")]
+
+
+async def test_planner_falls_back_on_invalid_json(agent):
+    class _BadPlanner(_ScriptedModel):
+        def _answer(self, messages):
+            if messages[0].content == PLANNER_SYSTEM_PROMPT:
+                return ChatResult(generations=[ChatGeneration(message=AIMessage(content="sem json"))])
+            return super()._answer(messages)
+
+    agent.model = _BadPlanner()
+    result = await agent.ainvoke(_input())
+
+    assert [step["tool"] for step in result["plan"]] == ["glpi_get_tickets", "zabbix_get_alerts"]
+
+
+@pytest.mark.parametrize("mode", ["parallel", "merged"])
+async def test_routing_modes_match_sequential_state(mode):
+    sequential = _agent()
+    sequential.model = _ScriptedModel()
+    agent = _agent(routing_mode=mode)
+    agent.model = _ScriptedModel()
+
+    expected = await sequential.ainvoke(_input())
+    result = await agent.ainvoke(_input())
+
+    for key in ("intent", "task_category", "priority", "gut_score", "gut_details", "plan"):
+        assert result[key] == expected[key]
+    assert result["messages"][-1].content == "resposta final"
+    assert agent.model.async_calls == (4 if mode == "parallel" else 3)
+
+
+async def test_parallel_mode_overlaps_llm_calls():
+    agent = _agent(routing_mode="parallel")
+    agent.model = _ScriptedModel(delay=0.05)
+
+    await agent.ainvoke(_input())
+
+    # router + classifier together, then planner + executor together
+    assert agent.model.max_in_flight == 2
+    assert agent.model.prompts[:2].count(ROUTER_SYSTEM_PROMPT) == 1
+    assert agent.model.prompts[:2].count(CLASSIFIER_SYSTEM_PROMPT) == 1
+
+
+@pytest.mark.parametrize("mode", ["parallel", "merged"])
+async def test_general_conversation_skips_classification_and_planning(mode):
+    agent = _agent(routing_mode=mode)
+    agent.model = _ScriptedModel(intent="conversa_geral")
+
+    result = await agent.ainvoke(_input())
+
+    assert result["intent"] == "conversa_geral"
+    assert result.get("task_category") is None
+    assert result.get("gut_score") is None
+    assert PLANNER_SYSTEM_PROMPT not in agent.model.prompts
+
+
+def test_invalid_routing_mode():
+    with pytest.raises(ValueError):
+        UnifiedAgent(openrouter_api_key="test", routing_mode="fanout")
+
+
+def test_parallel_mode_sync_invoke():
+    agent = _agent(routing_mode="parallel")
+    agent.model = _ScriptedModel()
+
+    result = agent.invoke(_input())
+
+    assert agent.model.sync_calls == 4
+    assert result["task_category"] == "incidente"
+    assert result["messages"][-1].content == "resposta final"
@@ -0,0 +1,49 @@
+"""Tests for the binary pgvector adapter."""
+
+import struct
+
+import pytest
+
+from core.rag.vector_adapter import (
+    Vector,
+    VectorBinaryDumper,
+    dump_vector,
+    load_vector,
+    parse_vector_text,
+)
+
+
+class TestVectorWireFormat:
+    def test_dump_matches_pgvector_layout(self):
+        data = dump_vector([1.0, -2.5, 0.25])
+
+        assert data[:4] == struct.pack(">HH", 3, 0)
+        assert data[4:] == struct.pack(">3f", 1.0, -2.5, 0.25)
+
+    def test_round_trip(self):
+        values = [0.1 * i for i in range(1536)]
+
+        loaded = load_vector(dump_vector(values))
+
+        assert len(loaded) == 1536
+        assert loaded == pytest.approx(values, rel=1e-6)
+
+    def test_load_accepts_memoryview(self):
+        assert load_vector(memoryview(dump_vector([3.0]))) == [3.0]
+
+    def test_text_format(self):
+        assert parse_vector_text(b"[1,2.5,-3]") == [1.0, 2.5, -3.0]
+        assert parse_vector_text(b"[]") == []
+
+
+class TestVectorDumper:
+    def test_dumper_writes_binary(self):
+        dumper = VectorBinaryDumper(Vector, None)
+
+        assert dumper.dump(Vector([1.0, 2.0])) == dump_vector([1.0, 2.0])
+
+    def test_vector_wrapper(self):
+        vec = Vector([1, 2, 3])
+
+        assert len(vec) == 3
+        assert vec.to_list() == [1.0, 2.0, 3.0]